@@ -0,0 +1,283 @@
+"""
+分析結果時間序列存儲（SQLite）
+
+每次保存 analysis 數據時追加/更新一行（symbol, 日期）的關鍵字段，
+跨日期的趨勢查詢和每日橫截面視圖直接用一條SQL讀成pandas DataFrame，不需要打開每天的JSON文件
+"""
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import pandas as pd
+
+from config import ANALYSIS_DB_FILENAME
+from summary_index import analysis_highlights
+from json_codec import strip_data_suffix, read_json_file
+
+
+# 每行保存的字段（除 symbol、date 外）
+ANALYSIS_COLUMNS = ("company", "rating", "target_price", "risk_level", "bias",
+                    "positive_count", "risk_count", "updated_at")
+
+# 投資傾向轉換為數值（用於趨勢圖）
+BIAS_SCORES = {
+    "看多": 1, "偏多": 1, "Bullish": 1,
+    "中性": 0, "Neutral": 0,
+    "看空": -1, "偏空": -1, "Bearish": -1
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_history (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    company TEXT,
+    rating TEXT,
+    target_price REAL,
+    risk_level TEXT,
+    bias TEXT,
+    positive_count INTEGER,
+    risk_count INTEGER,
+    updated_at TEXT,
+    PRIMARY KEY (symbol, date)
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_history_date ON analysis_history (date);
+"""
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """目標價可能是數字或 "$12.50" 之類的字符串"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace("$", "").replace(",", "").strip())
+        except ValueError:
+            return None
+    return None
+
+
+def extract_analysis_row(analysis: Any) -> Dict[str, Any]:
+    """
+    從分析結果提取要存儲的字段
+
+    Args:
+        analysis: analysis 數據（保存格式 {"data": {...}} 或直接是分析字典）
+
+    Returns:
+        Dict: ANALYSIS_COLUMNS 中除 updated_at 外的字段
+    """
+    row = analysis_highlights(analysis)
+    data = analysis.get("data") if isinstance(analysis, dict) and isinstance(analysis.get("data"), dict) else analysis
+    data = data if isinstance(data, dict) else {}
+
+    recommendation = data.get("investment_recommendation")
+    target_price = recommendation.get("target_price") if isinstance(recommendation, dict) else None
+
+    row.update({
+        "target_price": _to_float(target_price),
+        "positive_count": len(data["positive_factors"]) if isinstance(data.get("positive_factors"), list) else None,
+        "risk_count": len(data["risks"]) if isinstance(data.get("risks"), list) else None
+    })
+    return row
+
+
+class AnalysisStore:
+    """
+    分析結果的SQLite存儲
+
+    使用WAL模式：Worker寫入時Streamlit仍可同時讀取；每次操作使用獨立連接，可在多線程中共用
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def upsert_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        寫入多行，(symbol, date) 已存在時更新
+
+        Args:
+            rows: 每行包含 symbol、date 和 ANALYSIS_COLUMNS 字段
+
+        Returns:
+            int: 寫入的行數
+        """
+        columns = ("symbol", "date") + ANALYSIS_COLUMNS
+        sql = (
+            f"INSERT INTO analysis_history ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT (symbol, date) DO UPDATE SET "
+            + ", ".join(f"{column} = excluded.{column}" for column in ANALYSIS_COLUMNS)
+        )
+        values = [tuple(row.get(column) for column in columns) for row in rows]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(sql, values)
+        return len(values)
+
+    def record_analysis(self, symbol: str, date_str: str, analysis: Any):
+        """
+        記錄一天的分析結果（流程保存 analysis 數據後調用）
+
+        Args:
+            symbol: 股票代碼
+            date_str: 日期字符串
+            analysis: analysis 數據
+        """
+        row = extract_analysis_row(analysis)
+        row.update({
+            "symbol": symbol.upper(),
+            "date": date_str,
+            "updated_at": datetime.now().isoformat(timespec="seconds")
+        })
+        self.upsert_rows([row])
+
+    def _query(self, where: str = "", params: tuple = ()) -> pd.DataFrame:
+        sql = f"SELECT * FROM analysis_history {where} ORDER BY date, symbol"
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        df["date"] = pd.to_datetime(df["date"])
+        df["bias_score"] = df["bias"].map(BIAS_SCORES)
+        return df
+
+    def symbol_history(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        某個股票的歷史分析（評級、目標價、風險、投資傾向）
+
+        Args:
+            symbol: 股票代碼
+            start_date: 開始日期（包含）
+            end_date: 結束日期（包含）
+
+        Returns:
+            pd.DataFrame: 按日期排序，附加 bias_score 列
+        """
+        conditions = ["symbol = ?"]
+        params = [symbol.upper()]
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        return self._query("WHERE " + " AND ".join(conditions), tuple(params))
+
+    def daily_view(self, date_str: str) -> pd.DataFrame:
+        """
+        某一天所有股票的分析結果（橫截面）
+
+        Args:
+            date_str: 日期字符串
+
+        Returns:
+            pd.DataFrame: 每個股票一行
+        """
+        return self._query("WHERE date = ?", (date_str,))
+
+    def field_matrix(self, field: str, start_date: str = None, end_date: str = None,
+                     symbols: Iterable[str] = None) -> pd.DataFrame:
+        """
+        某個字段的 日期 × 股票 矩陣（用於多股票趨勢圖）
+
+        Args:
+            field: 字段名（如 target_price、bias_score）
+            start_date: 開始日期（包含）
+            end_date: 結束日期（包含）
+            symbols: 只包含這些股票
+
+        Returns:
+            pd.DataFrame: 索引為日期，列為股票代碼
+        """
+        conditions, params = [], []
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        if symbols:
+            symbols = [symbol.upper() for symbol in symbols]
+            conditions.append(f"symbol IN ({', '.join('?' for _ in symbols)})")
+            params.extend(symbols)
+
+        df = self._query("WHERE " + " AND ".join(conditions) if conditions else "", tuple(params))
+        return df.pivot_table(index="date", columns="symbol", values=field, aggfunc="last")
+
+    def backfill(self, base_data_dir: str = "data") -> int:
+        """
+        從已有的 data/YYYY-MM-DD/SYMBOL/analysis_YYYY-MM-DD.json（或壓縮格式）導入歷史數據
+
+        Args:
+            base_data_dir: 數據根目錄
+
+        Returns:
+            int: 導入的行數
+        """
+        rows = []
+        base = Path(base_data_dir)
+        for analysis_file in sorted(base.glob("*/*/analysis_*.json*")):
+            date_str = analysis_file.parent.parent.name
+            if strip_data_suffix(analysis_file.name) != f"analysis_{date_str}":
+                continue
+            try:
+                analysis = read_json_file(analysis_file, base)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 跳過 {analysis_file}: {e}")
+                continue
+
+            row = extract_analysis_row(analysis)
+            row.update({
+                "symbol": analysis_file.parent.name.upper(),
+                "date": date_str,
+                "updated_at": datetime.fromtimestamp(os.path.getmtime(analysis_file)).isoformat(timespec="seconds")
+            })
+            rows.append(row)
+
+        count = self.upsert_rows(rows)
+        print(f"✅ 已導入 {count} 條分析記錄到 {self.db_path}")
+        return count
+
+
+# 每個數據目錄一個共用實例
+_stores: Dict[str, AnalysisStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_analysis_store(base_data_dir: str = "data") -> AnalysisStore:
+    """獲取數據目錄對應的共用分析存儲"""
+    db_path = str(Path(base_data_dir) / ANALYSIS_DB_FILENAME)
+    with _stores_lock:
+        if db_path not in _stores:
+            _stores[db_path] = AnalysisStore(db_path)
+        return _stores[db_path]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="分析結果時間序列存儲")
+    parser.add_argument("--data-dir", default="data", help="數據根目錄")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("backfill", help="從已有的analysis JSON導入歷史數據")
+    history_parser = subparsers.add_parser("history", help="顯示某個股票的歷史分析")
+    history_parser.add_argument("symbol")
+    daily_parser = subparsers.add_parser("daily", help="顯示某一天所有股票的分析")
+    daily_parser.add_argument("date")
+    args = parser.parse_args()
+
+    store = get_analysis_store(args.data_dir)
+    if args.command == "backfill":
+        store.backfill(args.data_dir)
+    elif args.command == "history":
+        print(store.symbol_history(args.symbol).to_string(index=False))
+    else:
+        print(store.daily_view(args.date).to_string(index=False))
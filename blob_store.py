@@ -0,0 +1,232 @@
+"""
+LLM原始輸出的內容尋址存儲：data/_blobs/ab/abcdef....zst
+
+數據文件只保存 "raw_ref": "sha256:<hex>"，原始文本按SHA-256只存一份（重新生成得到相同輸出時不重複保存），
+正常流程不讀取原始文本，只在排查解析問題時通過 load_raw_text 按需載入
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from config import RAW_BLOB_DIR, JSON_COMPRESSION_LEVEL
+from json_codec import list_data_files, read_json_file, write_json_file, decode_json, strip_data_suffix
+from data_retention import archived_dates, read_archive
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+REF_PREFIX = "sha256:"
+BLOB_SUFFIXES = (".zst", ".gz")
+
+
+def _blob_dir(base_data_dir: Path) -> Path:
+    return Path(base_data_dir) / RAW_BLOB_DIR
+
+
+def _digest(ref: str) -> str:
+    if not isinstance(ref, str) or not ref.startswith(REF_PREFIX):
+        raise ValueError(f"無效的原始文本引用: {ref}")
+    return ref[len(REF_PREFIX):]
+
+
+def find_blob(base_data_dir: Path, ref: str) -> Optional[Path]:
+    """引用對應的blob文件，不存在時返回None"""
+    digest = _digest(ref)
+    for suffix in BLOB_SUFFIXES:
+        path = _blob_dir(base_data_dir) / digest[:2] / f"{digest}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def put_text(base_data_dir: Path, text: str) -> str:
+    """
+    保存原始文本（內容相同時只保存一次）
+
+    Args:
+        base_data_dir: 數據根目錄
+        text: LLM原始輸出
+
+    Returns:
+        str: 引用，如 "sha256:9f86d08..."
+    """
+    raw = text.encode("utf-8")
+    ref = REF_PREFIX + hashlib.sha256(raw).hexdigest()
+    if find_blob(base_data_dir, ref) is not None:
+        return ref
+
+    digest = _digest(ref)
+    if zstandard is not None:
+        suffix, content = ".zst", zstandard.ZstdCompressor(level=JSON_COMPRESSION_LEVEL).compress(raw)
+    else:
+        suffix, content = ".gz", gzip.compress(raw, compresslevel=min(JSON_COMPRESSION_LEVEL, 9), mtime=0)
+
+    path = _blob_dir(base_data_dir) / digest[:2] / f"{digest}{suffix}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 先寫臨時文件再替換：多個線程同時保存同一內容時結果相同，誰最後替換都可以
+    fd, tmp_path = tempfile.mkstemp(prefix=".blob_", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return ref
+
+
+def get_text(base_data_dir: Path, ref: str) -> Optional[str]:
+    """
+    按引用讀取原始文本
+
+    Args:
+        base_data_dir: 數據根目錄
+        ref: put_text 返回的引用
+
+    Returns:
+        str: 原始文本，blob不存在時返回None
+    """
+    path = find_blob(base_data_dir, ref)
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        content = f.read()
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise ImportError(f"讀取 {path} 需要安裝 zstandard")
+        content = zstandard.ZstdDecompressor().decompress(content)
+    else:
+        content = gzip.decompress(content)
+    return content.decode("utf-8")
+
+
+def resolve_raw_text(base_data_dir: Path, record: Any) -> Optional[str]:
+    """
+    取出數據記錄的原始文本（新格式讀 raw_ref，舊數據直接使用內嵌的 raw_text）
+
+    Args:
+        base_data_dir: 數據根目錄
+        record: load_data 返回的數據
+
+    Returns:
+        str: 原始文本，沒有時返回None
+    """
+    if not isinstance(record, dict):
+        return None
+    if record.get("raw_ref"):
+        return get_text(base_data_dir, record["raw_ref"])
+    return record.get("raw_text")
+
+
+def migrate_raw_text(base_data_dir: Path = Path("data"), dry_run: bool = False) -> Dict[str, Any]:
+    """
+    把已有數據文件中內嵌的 raw_text 移到blob存儲，改為 raw_ref（保留文件格式和修改時間）
+
+    Args:
+        base_data_dir: 數據根目錄
+        dry_run: 只統計不修改
+
+    Returns:
+        Dict: files（修改的文件數）, bytes（移出的原始文本字節數）
+    """
+    result = {"files": 0, "bytes": 0}
+    for path in list_data_files(base_data_dir):
+        try:
+            record = read_json_file(path, base_data_dir)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 跳過 {path}: {e}")
+            continue
+        if not isinstance(record, dict) or not isinstance(record.get("raw_text"), str):
+            continue
+
+        result["files"] += 1
+        result["bytes"] += len(record["raw_text"].encode("utf-8"))
+        if dry_run:
+            continue
+        stat = path.stat()
+        record["raw_ref"] = put_text(base_data_dir, record.pop("raw_text"))
+        write_json_file(path, record, base_data_dir)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    if result["files"]:
+        print(f"{'📊 將遷移' if dry_run else '✅ 已遷移'} {result['files']} 個文件的原始文本（{result['bytes'] / 1024:.0f} KB）")
+    return result
+
+
+def collect_garbage(base_data_dir: Path = Path("data"), dry_run: bool = False) -> Dict[str, Any]:
+    """
+    刪除沒有被任何數據文件引用的blob（包括已歸檔日期中的數據文件）
+
+    Args:
+        base_data_dir: 數據根目錄
+        dry_run: 只統計不刪除
+
+    Returns:
+        Dict: files, bytes
+    """
+    referenced: Set[str] = set()
+
+    def _mark(record: Any):
+        if isinstance(record, dict) and isinstance(record.get("raw_ref"), str):
+            referenced.add(_digest(record["raw_ref"]))
+
+    for path in list_data_files(base_data_dir):
+        try:
+            _mark(read_json_file(path, base_data_dir))
+        except (OSError, ValueError) as e:
+            # 無法確認引用時不刪除任何blob
+            raise IOError(f"無法讀取 {path}，停止清理: {e}")
+
+    for date_str in archived_dates(base_data_dir):
+        for name, content in read_archive(base_data_dir, date_str).items():
+            if strip_data_suffix(name):
+                _mark(decode_json(content, name, base_data_dir))
+
+    result = {"files": 0, "bytes": 0}
+    blob_dir = _blob_dir(base_data_dir)
+    for path in sorted(blob_dir.glob("*/*")) if blob_dir.exists() else []:
+        digest = path.name.split(".", 1)[0]
+        if path.suffix not in BLOB_SUFFIXES or digest in referenced:
+            continue
+        result["files"] += 1
+        result["bytes"] += path.stat().st_size
+        if not dry_run:
+            path.unlink()
+
+    if result["files"]:
+        print(f"🗑️ {'將刪除' if dry_run else '已刪除'} {result['files']} 個未引用的blob（{result['bytes'] / 1024:.0f} KB）")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LLM原始輸出blob存儲")
+    parser.add_argument("--data-dir", default="data", help="數據根目錄")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    show_parser = subparsers.add_parser("show", help="顯示某個數據文件或引用的原始文本")
+    show_parser.add_argument("target", help="sha256:<hex> 引用或數據文件路徑")
+    migrate_parser = subparsers.add_parser("migrate", help="把已有數據文件中的 raw_text 移到blob存儲")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="只顯示將要遷移的數據量")
+    gc_parser = subparsers.add_parser("gc", help="刪除沒有被引用的blob")
+    gc_parser.add_argument("--dry-run", action="store_true", help="只顯示將要刪除的blob")
+    args = parser.parse_args()
+
+    base = Path(args.data_dir)
+    if args.command == "show":
+        if args.target.startswith(REF_PREFIX):
+            text = get_text(base, args.target)
+        else:
+            text = resolve_raw_text(base, read_json_file(Path(args.target), base))
+        print(text if text is not None else "❌ 找不到原始文本")
+    elif args.command == "migrate":
+        migrate_raw_text(base, args.dry_run)
+    else:
+        collect_garbage(base, args.dry_run)
@@ -1,6 +1,7 @@
 """
 Configuration file for system prompts and settings
 """
+import os
 
 system_prompts_chatgpy = """
 你是一個專業的金融分析師和投資顧問。你的任務是：
@@ -32,6 +33,42 @@ system_prompts_deepseek = """
 DEFAULT_TEMPERATURE = 0.7
 DEFAULT_MAX_TOKENS = 1500
 
+# Token Budget Settings
+# 各模型的上下文窗口大小（tokens），未列出的模型使用 "default"
+LLM_CONTEXT_WINDOWS = {
+    "deepseek-chat": 64000,
+    "gpt-4o-mini": 128000,
+    "gpt-4o": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "default": 16000
+}
+
+# 各模型單次回應的最大輸出tokens
+LLM_MAX_OUTPUT_TOKENS = {
+    "deepseek-chat": 8192,
+    "gpt-4o-mini": 16384,
+    "gpt-4o": 16384,
+    "gpt-4": 4096,
+    "gpt-3.5-turbo": 4096,
+    "default": 4096
+}
+
+# 各階段的輸出預算：輸出tokens ≈ 輸入tokens * ratio，並限制在 [min, max] 之間
+LLM_STAGE_OUTPUT_BUDGETS = {
+    "desc_cn": {"ratio": 1.5, "min": 800, "max": 3000},
+    "news_cn": {"ratio": 1.3, "min": 1000, "max": 6000},
+    "analysis": {"ratio": 0.4, "min": 2500, "max": 6000},
+    "news_en": {"ratio": 1.2, "min": 1000, "max": 6000},
+    "analysis_en": {"ratio": 1.3, "min": 2000, "max": 6000},
+    "ig_post": {"ratio": 0.2, "min": 800, "max": 1500},
+    "news_chunk_summary": {"ratio": 0.25, "min": 800, "max": 2500},
+    "default": {"ratio": 1.0, "min": 1000, "max": 4000}
+}
+
+# 預留給消息格式和估算誤差的安全餘量（tokens）
+LLM_CONTEXT_SAFETY_MARGIN = 512
+
 # News Analysis Settings
 NEWS_ANALYSIS_PROMPT = """
 你是一位專業的財經分析師，請基於使用者輸入的新聞稿與財務數據進行分析，並必須以有效的JSON格式輸出結果。
@@ -81,6 +118,34 @@ NEWS_ANALYSIS_PROMPT = """
 請確保輸出完整、有效的JSON格式，不要包含任何額外的文字說明。
 """
 
+# Map-Reduce News Analysis Settings
+# 新聞輸入超過此token數時，改為分塊摘要後再綜合分析
+NEWS_MAP_REDUCE_THRESHOLD_TOKENS = 12000
+# 每個分塊的新聞token上限
+NEWS_MAP_REDUCE_CHUNK_TOKENS = 6000
+# 分塊摘要的最大並行數
+NEWS_MAP_REDUCE_MAX_WORKERS = 4
+
+NEWS_CHUNK_SUMMARY_PROMPT = """
+你是一位專業的財經分析師，使用者會輸入某股票的一部分新聞稿。請為每篇新聞提取對股價有影響的重點，並必須以有效的JSON格式輸出結果。
+
+請嚴格按照以下JSON結構輸出，所有內容使用繁體中文：
+
+{
+  "articles": [
+    {
+      "title": "新聞標題",
+      "publishedAt": "發佈時間",
+      "summary": "新聞重點摘要（100字以內，保留具體數字和事件）",
+      "impact": "對股價的影響（利好/利空/中性）"
+    }
+  ],
+  "key_facts": ["這批新聞中最重要的事實或數據"]
+}
+
+請確保輸出完整、有效的JSON格式，不要包含任何額外的文字說明。
+"""
+
 news_to_traditional_chinese_prompt = """
 你是一位專業的財經翻譯專家，請將使用者輸入的新聞稿翻譯成繁體中文，並以JSON格式輸出。
 
@@ -186,6 +251,142 @@ desc_to_chinese_prompt = """
 請確保輸出完整、有效的JSON格式，不要包含任何額外的文字說明。
 """
 
+# News API Settings
+NEWS_API_BASE_URL = "http://news.enomars.org/api/news/"
+# 連接/讀取超時（秒）
+NEWS_CONNECT_TIMEOUT = 10
+NEWS_READ_TIMEOUT = 60
+NEWS_MAX_RETRIES = 3
+# 異步批量獲取時的最大並發連接數
+NEWS_MAX_CONCURRENCY = 10
+# 批量模式：先拉取一次總新聞流（或多ticker查詢），在本地按ticker分組，沒有命中的symbol才逐個請求
+NEWS_BULK_MODE = True
+# 多ticker查詢參數名（如 "tickers" → ?tickers=AAPL,TSLA），None 表示使用不帶ticker的總新聞流
+NEWS_BULK_QUERY_PARAM = None
+# 每次多ticker查詢包含的ticker數量
+NEWS_BULK_QUERY_BATCH = 20
+# 條件請求緩存（ETag/Last-Modified + 響應內容）的最大URL數，超出時淘汰最久未使用的
+NEWS_VALIDATOR_CACHE_SIZE = 256
+# 條件請求緩存的有效期（秒），過期後重新完整下載
+NEWS_VALIDATOR_CACHE_TTL = 6 * 3600
+
+# Request Rate Limit Settings
+# Yahoo Finance 每秒請求數和最大並發數（全流程共用）
+YAHOO_REQUESTS_PER_SECOND = 0.5
+YAHOO_MAX_CONCURRENCY = 2
+# 各主機的限速配置，按主機名後綴匹配
+HOST_RATE_LIMITS = {
+    "finance.yahoo.com": {"rate": YAHOO_REQUESTS_PER_SECOND, "concurrency": YAHOO_MAX_CONCURRENCY}
+}
+# 未配置主機的默認限速
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+DEFAULT_MAX_CONCURRENCY = 4
+# 遇到429/503時的重試次數和退避時間（秒）
+RATE_LIMIT_MAX_RETRIES = 3
+RATE_LIMIT_BASE_BACKOFF = 5.0
+RATE_LIMIT_MAX_BACKOFF = 60.0
+
+# PDF Rendering Settings
+# PDF引擎："wkhtmltopdf"（pdfkit）或 "reportlab"（不啟動子進程；但會去掉標題中的emoji，
+# 英文報告使用Helvetica字體，其中的中文無法顯示）；主引擎失敗時自動改用另一個
+PDF_ENGINE = "wkhtmltopdf"
+# reportlab引擎是否在當前進程內渲染：True 時省去進程間傳輸，但所有PDF串行渲染並佔用調用方線程；
+# 默認 False，與wkhtmltopdf一樣交給PDF渲染工作池並行渲染（字體和樣式在每個工作進程內緩存）
+PDF_REPORTLAB_IN_PROCESS = False
+# reportlab可用的TrueType CJK字體：(字體名, 路徑, ttc子字體索引)，按順序嘗試
+# Noto Sans CJK 為CFF輪廓，reportlab無法加載，因此不在列表中
+PDF_CJK_FONT_CANDIDATES = [
+    ("WenQuanYiZenHei", "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc", 0),
+    ("ARPLUMing", "/usr/share/fonts/truetype/arphic/uming.ttc", 0),
+    ("MicrosoftJhengHei", "C:/Windows/Fonts/msjh.ttc", 0),
+    ("SimHei", "C:/Windows/Fonts/simhei.ttf", 0),
+]
+# 沒有可用TrueType字體時使用的reportlab內置CID字體（繁體中文）
+PDF_CJK_CID_FONT = "MSung-Light"
+# PDF渲染工作進程數（1 CPU / 2GB 容器建議不超過2）
+PDF_RENDER_WORKERS = 2
+# 單個PDF渲染的最長等待時間（秒）
+PDF_RENDER_TIMEOUT = 120
+# 批量渲染：文檔數多於 PDF_RENDER_WORKERS 時，多個文檔共用一次wkhtmltopdf運行（--read-args-from-stdin），省去重複的啟動成本
+PDF_BATCH_RENDER = True
+# 每次wkhtmltopdf運行最多渲染的文檔數
+PDF_BATCH_SIZE = 8
+# Markdown轉HTML引擎："markdown-it"（CommonMark，更快）或 "python-markdown"；未安裝時自動改用另一個
+MARKDOWN_ENGINE = "markdown-it"
+
+# Instagram Post Settings
+# 同時進行的IG貼文生成（ChatGPT調用）數量，與PDF渲染並行
+IG_POST_MAX_WORKERS = 4
+
+# Streamlit Background Job Settings
+# 後台處理任務的線程數（點擊「自動生成」後任務在後台執行，不阻塞頁面）
+JOB_MAX_WORKERS = 2
+# 界面輪詢任務狀態的間隔（秒）
+JOB_POLL_INTERVAL = 1.0
+# 保留的已完成任務數
+JOB_HISTORY_LIMIT = 50
+# 每個任務保留的日誌行數
+JOB_LOG_LIMIT = 200
+# 每個symbol數據載入結果的緩存條目數（按文件修改時間失效）
+STOCK_DATA_CACHE_ENTRIES = 256
+
+# Report File Server Settings
+# 報告下載由獨立的文件服務串流（支持Range/ETag），Streamlit不再把PDF讀進內存（需要配置 FILE_SERVER_BASE_URL）
+FILE_SERVER_ENABLED = True
+FILE_SERVER_HOST = "0.0.0.0"
+FILE_SERVER_PORT = 8503
+# 瀏覽器訪問文件服務的公開地址，如 "https://reports.example.com/files"（從環境變量讀取）；
+# 未配置時下載按鈕仍使用 st.download_button，避免遠程瀏覽器拿到指向自己localhost的鏈接
+FILE_SERVER_BASE_URL = os.getenv("FILE_SERVER_BASE_URL", "")
+# 每次發送的字節數
+FILE_SERVER_CHUNK_SIZE = 64 * 1024
+
+# Data Index Settings
+# 日期 -> symbol 索引的有效期（秒），過期後重新掃描 data/ 以發現其他進程寫入的日期
+DATE_INDEX_TTL = 60
+# 報告頁顯示的歷史報告天數
+REPORT_HISTORY_DAYS = 30
+# 分析結果時間序列數據庫（SQLite，位於數據根目錄下）
+ANALYSIS_DB_FILENAME = "analysis.db"
+
+# Data Retention Settings
+# Worker每天執行一次保留策略（也可以手動運行 python data_retention.py）
+RETENTION_ENABLED = True
+RETENTION_RUN_AT = "03:30"
+# PDF保留天數，更早的PDF會被刪除（可從數據重新生成）
+RETENTION_PDF_DAYS = 14
+# 日期目錄保留天數，更早的目錄打包到歸檔目錄（load_data仍可讀取）
+RETENTION_ARCHIVE_AFTER_DAYS = 30
+# 歸檔目錄（位於數據根目錄下）
+RETENTION_ARCHIVE_DIR = "archive"
+# zstd壓縮等級（未安裝zstandard時使用gzip）
+RETENTION_ZSTD_LEVEL = 10
+
+# Data File Compression Settings
+# 數據JSON的存儲格式："none"（.json，縮進格式）、"zstd"（.json.zst，共用字典）或 "gzip"（.json.gz）
+# 讀取時自動識別所有格式，切換後舊文件仍可讀取；已有文件可用 python json_codec.py convert 轉換
+JSON_COMPRESSION = "none"
+# 壓縮等級（gzip最高為9）
+JSON_COMPRESSION_LEVEL = 9
+# zstd字典目錄（位於數據根目錄下），用 python json_codec.py train 從已有數據訓練
+JSON_ZSTD_DICT_DIR = "_dicts"
+# zstd字典大小（字節）
+JSON_ZSTD_DICT_SIZE = 112640
+
+# LLM JSON Repair Settings
+# JSON無效時先在本地修復（代碼塊標記、尾隨逗號、缺少的逗號、未閉合的括號等），修復成功就不再重新調用LLM
+JSON_REPAIR_ENABLED = True
+# 是否直接接受會改變內容的修復（補全被截斷的輸出、補上缺少的逗號/冒號/值、丟棄第二個JSON值等）；
+# False 時只直接接受不改變內容的修復（代碼塊標記、前後說明文字、尾隨逗號、轉義、True/False/None、鍵的引號），
+# 其他修復先提高輸出預算重試，只在最後一次嘗試時接受
+JSON_REPAIR_ACCEPT_LOSSY = False
+
+# Raw LLM Output Settings
+# LLM原始輸出按SHA-256存入blob目錄，數據文件只保存 raw_ref（False 時仍內嵌在 raw_text 字段中）
+RAW_TEXT_BLOB_STORE = True
+# blob目錄（位於數據根目錄下）；python blob_store.py migrate 遷移舊數據，gc 清理未引用的blob
+RAW_BLOB_DIR = "_blobs"
+
 # MongoDB Settings
 MONGODB_DATABASE = "mydatabase"
 MONGODB_COLLECTION = "fundamentals_of_top_list_symbols"
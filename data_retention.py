@@ -0,0 +1,366 @@
+"""
+數據保留與歸檔：控制 data/ 目錄的大小
+
+- PDF在 RETENTION_PDF_DAYS 天後刪除（隨時可以從數據和Markdown重新生成）
+- 超過 RETENTION_ARCHIVE_AFTER_DAYS 天的日期目錄打包為 data/archive/YYYY-MM-DD.tar.zst
+  （未安裝zstandard時為 .tar.gz），同時寫出成員索引 YYYY-MM-DD.index.json，然後刪除原目錄中的symbol目錄；
+  每日摘要索引 _summary.json 留在原處，總覽頁不需要解壓歸檔
+- FileManager.load_data / file_exists 在原文件不存在時通過索引透明地讀取歸檔中的文件
+"""
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from config import (
+    RETENTION_PDF_DAYS,
+    RETENTION_ARCHIVE_AFTER_DAYS,
+    RETENTION_ARCHIVE_DIR,
+    RETENTION_ZSTD_LEVEL
+)
+from summary_index import forget_stages, SUMMARY_FILENAME, SUMMARY_LOCK_FILENAME
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ARCHIVE_SUFFIXES = (".tar.zst", ".tar.gz")
+INDEX_SUFFIX = ".index.json"
+PDF_STAGES = {"chinese": "pdf_chinese", "english": "pdf_english"}
+# 歸檔時留在日期目錄中的文件
+KEPT_FILES = {SUMMARY_FILENAME, SUMMARY_LOCK_FILENAME}
+
+
+def _archive_dir(base_data_dir: Path) -> Path:
+    return Path(base_data_dir) / RETENTION_ARCHIVE_DIR
+
+
+def _days_ago(days: int, today: str = None) -> str:
+    today_date = datetime.strptime(today, '%Y-%m-%d') if today else datetime.now()
+    return (today_date - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def _date_dirs(base_data_dir: Path) -> List[Path]:
+    """數據根目錄下的日期目錄（YYYY-MM-DD）"""
+    base = Path(base_data_dir)
+    if not base.exists():
+        return []
+    dirs = []
+    for entry in base.iterdir():
+        try:
+            datetime.strptime(entry.name, '%Y-%m-%d')
+        except ValueError:
+            continue
+        if entry.is_dir():
+            dirs.append(entry)
+    return sorted(dirs)
+
+
+def _files_to_archive(date_dir: Path) -> List[Path]:
+    """日期目錄中需要歸檔的文件（不包括留在原處的摘要索引）"""
+    if not date_dir.is_dir():
+        return []
+    return [path for path in sorted(date_dir.rglob("*"))
+            if path.is_file() and not (path.parent == date_dir and path.name in KEPT_FILES)]
+
+
+def find_archive(base_data_dir: Path, date_str: str) -> Optional[Path]:
+    """某一天的歸檔文件，不存在時返回None"""
+    for suffix in ARCHIVE_SUFFIXES:
+        path = _archive_dir(base_data_dir) / f"{date_str}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def archived_dates(base_data_dir: Path) -> List[str]:
+    """已歸檔的日期"""
+    archive_dir = _archive_dir(base_data_dir)
+    if not archive_dir.exists():
+        return []
+    return sorted({path.name[:-len(suffix)] for path in archive_dir.iterdir()
+                   for suffix in ARCHIVE_SUFFIXES if path.name.endswith(suffix)})
+
+
+def read_archive(base_data_dir: Path, date_str: str) -> Dict[str, bytes]:
+    """
+    某一天歸檔中的所有文件
+
+    Returns:
+        Dict[str, bytes]: 成員名 -> 內容，沒有歸檔時為空
+    """
+    archive_path = find_archive(base_data_dir, date_str)
+    if archive_path is None:
+        return {}
+    return _archive_members(str(archive_path), archive_path.stat().st_mtime_ns)
+
+
+def _open_tar_reader(archive_path: Path):
+    """以流模式打開歸檔（zstd需要zstandard庫）"""
+    f = open(archive_path, "rb")
+    if archive_path.name.endswith(".tar.zst"):
+        if zstandard is None:
+            f.close()
+            raise ImportError("讀取 .tar.zst 歸檔需要安裝 zstandard")
+        stream = zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+        return tarfile.open(fileobj=stream, mode="r|")
+    return tarfile.open(fileobj=f, mode="r|gz")
+
+
+@lru_cache(maxsize=2)
+def _archive_members(archive_path: str, mtime_ns: int) -> Dict[str, bytes]:
+    """
+    解壓整個歸檔到內存（流式讀取一次，最近使用的兩個歸檔保留在緩存中）
+
+    Returns:
+        Dict[str, bytes]: 成員名（SYMBOL/文件名）-> 內容
+    """
+    members = {}
+    with _open_tar_reader(Path(archive_path)) as tar:
+        for member in tar:
+            if member.isfile():
+                members[member.name] = tar.extractfile(member).read()
+    return members
+
+
+@lru_cache(maxsize=64)
+def _load_index(index_path: str, mtime_ns: int) -> Dict[str, Any]:
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_archive_index(base_data_dir: Path, date_str: str) -> Optional[Dict[str, Any]]:
+    """
+    某一天歸檔的成員索引（不需要解壓歸檔）
+
+    Returns:
+        Dict: {"date", "archive", "created_at", "members": {成員名 -> 大小}}，沒有歸檔時返回None
+    """
+    index_path = _archive_dir(base_data_dir) / f"{date_str}{INDEX_SUFFIX}"
+    try:
+        return _load_index(str(index_path), index_path.stat().st_mtime_ns)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def archived_file_exists(base_data_dir: Path, date_str: str, member_name: str) -> bool:
+    """歸檔中是否有某個文件（只讀索引）"""
+    index = load_archive_index(base_data_dir, date_str)
+    return bool(index) and member_name in index["members"]
+
+
+def read_archived_file(base_data_dir: Path, date_str: str, member_name: str) -> Optional[bytes]:
+    """
+    從歸檔中讀取一個文件
+
+    Args:
+        base_data_dir: 數據根目錄
+        date_str: 日期字符串
+        member_name: 成員名，如 "AAPL/analysis_2025-08-15.json"
+
+    Returns:
+        bytes: 文件內容，不在歸檔中時返回None
+    """
+    if not archived_file_exists(base_data_dir, date_str, member_name):
+        return None
+    archive_path = find_archive(base_data_dir, date_str)
+    if archive_path is None:
+        return None
+    return _archive_members(str(archive_path), archive_path.stat().st_mtime_ns).get(member_name)
+
+
+def _write_archive(archive_path: Path, files: Dict[str, bytes]):
+    """將 成員名 -> 內容 寫入歸檔（先寫臨時文件再替換）"""
+    fd, tmp_path = tempfile.mkstemp(prefix=".archive_", suffix=".tmp", dir=archive_path.parent)
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            if archive_path.name.endswith(".tar.zst"):
+                compressor = zstandard.ZstdCompressor(level=RETENTION_ZSTD_LEVEL)
+                with compressor.stream_writer(raw, closefd=False) as stream:
+                    with tarfile.open(fileobj=stream, mode="w|") as tar:
+                        _add_members(tar, files)
+            else:
+                with tarfile.open(fileobj=raw, mode="w:gz") as tar:
+                    _add_members(tar, files)
+        os.replace(tmp_path, archive_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _add_members(tar: tarfile.TarFile, files: Dict[str, bytes]):
+    for name in sorted(files):
+        info = tarfile.TarInfo(name)
+        info.size = len(files[name])
+        info.mtime = int(datetime.now().timestamp())
+        tar.addfile(info, io.BytesIO(files[name]))
+
+
+def archive_day(base_data_dir: Path, date_str: str, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    將一天的目錄打包為歸檔並刪除已歸檔的文件（PDF不歸檔，可從數據重新生成）
+
+    已有歸檔時合併：磁盤上的文件覆蓋歸檔中的同名文件。
+    _summary.json 留在日期目錄中，總覽頁和日期索引仍能看到這一天
+
+    Args:
+        base_data_dir: 數據根目錄
+        date_str: 日期字符串
+        dry_run: 只統計不修改
+
+    Returns:
+        Dict: date, archive, files, bytes_before, bytes_after
+    """
+    base = Path(base_data_dir)
+    date_dir = base / date_str
+    files: Dict[str, bytes] = {}
+    bytes_before = 0
+
+    pending = _files_to_archive(date_dir)
+    existing = find_archive(base, date_str)
+    if existing is not None:
+        if not pending:
+            # 已歸檔，只剩摘要索引
+            return {"date": date_str, "archive": str(existing), "files": 0, "bytes_before": 0, "bytes_after": 0}
+        files.update(_archive_members(str(existing), existing.stat().st_mtime_ns))
+
+    pdf_paths = []
+    for path in pending:
+        bytes_before += path.stat().st_size
+        if path.suffix.lower() == ".pdf":
+            pdf_paths.append(path)
+            continue
+        with open(path, "rb") as f:
+            files[path.relative_to(date_dir).as_posix()] = f.read()
+
+    suffix = ".tar.zst" if zstandard is not None else ".tar.gz"
+    archive_path = _archive_dir(base) / f"{date_str}{suffix}"
+    result = {"date": date_str, "archive": str(archive_path), "files": len(files),
+              "bytes_before": bytes_before, "bytes_after": 0}
+    if dry_run:
+        return result
+
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_archive(archive_path, files)
+    if existing is not None and existing != archive_path:
+        existing.unlink()
+
+    # 校驗：歸檔能完整讀回後才寫索引和刪除原目錄
+    archived = _archive_members(str(archive_path), archive_path.stat().st_mtime_ns)
+    if set(archived) != set(files):
+        raise IOError(f"{date_str} 歸檔校驗失敗")
+
+    index = {
+        "date": date_str,
+        "archive": archive_path.name,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "members": {name: len(content) for name, content in files.items()}
+    }
+    index_path = _archive_dir(base) / f"{date_str}{INDEX_SUFFIX}"
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+    for entry in date_dir.iterdir():
+        if entry.name in KEPT_FILES:
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry)
+        else:
+            entry.unlink()
+    # 沒有歸檔的PDF已被刪除，從摘要中移除
+    for pdf_path in pdf_paths:
+        stages = [stage for language, stage in PDF_STAGES.items() if f"_{language}_" in pdf_path.name]
+        if stages and pdf_path.parent != date_dir:
+            forget_stages(base, pdf_path.parent.name, date_str, stages)
+    result["bytes_after"] = archive_path.stat().st_size
+    print(f"📦 已歸檔 {date_str}: {len(files)} 個文件，{bytes_before / 1024:.0f} KB -> {result['bytes_after'] / 1024:.0f} KB")
+    return result
+
+
+def expire_pdfs(base_data_dir: Path, days: int = RETENTION_PDF_DAYS, today: str = None,
+                dry_run: bool = False) -> Dict[str, Any]:
+    """
+    刪除早於N天的PDF，並從每日摘要索引中移除對應階段
+
+    Args:
+        base_data_dir: 數據根目錄
+        days: 保留天數
+        today: 今日日期（測試用），默認為今日
+        dry_run: 只統計不刪除
+
+    Returns:
+        Dict: files, bytes
+    """
+    cutoff = _days_ago(days, today)
+    removed, removed_bytes = 0, 0
+
+    for date_dir in _date_dirs(base_data_dir):
+        if date_dir.name >= cutoff:
+            continue
+        for pdf_path in date_dir.glob("*/*.pdf"):
+            removed += 1
+            removed_bytes += pdf_path.stat().st_size
+            if dry_run:
+                continue
+            pdf_path.unlink()
+            stages = [stage for language, stage in PDF_STAGES.items() if f"_{language}_" in pdf_path.name]
+            if stages:
+                forget_stages(base_data_dir, pdf_path.parent.name, date_dir.name, stages)
+
+    if removed:
+        print(f"🗑️ {'將刪除' if dry_run else '已刪除'} {removed} 個早於 {cutoff} 的PDF（{removed_bytes / 1024 / 1024:.1f} MB）")
+    return {"files": removed, "bytes": removed_bytes}
+
+
+def run_retention(base_data_dir: Path = Path("data"), pdf_days: int = RETENTION_PDF_DAYS,
+                  archive_after_days: int = RETENTION_ARCHIVE_AFTER_DAYS, today: str = None,
+                  dry_run: bool = False) -> Dict[str, Any]:
+    """
+    執行一次保留策略：先刪除過期PDF，再歸檔舊日期目錄
+
+    Args:
+        base_data_dir: 數據根目錄
+        pdf_days: PDF保留天數
+        archive_after_days: 日期目錄保留天數，更早的目錄會被歸檔
+        today: 今日日期（測試用），默認為今日
+        dry_run: 只統計不修改
+
+    Returns:
+        Dict: pdfs（刪除統計）, archived（每個歸檔日期的統計）, errors
+    """
+    result = {"pdfs": expire_pdfs(base_data_dir, pdf_days, today, dry_run), "archived": [], "errors": []}
+
+    cutoff = _days_ago(archive_after_days, today)
+    for date_dir in _date_dirs(base_data_dir):
+        if date_dir.name >= cutoff or not _files_to_archive(date_dir):
+            continue
+        try:
+            result["archived"].append(archive_day(base_data_dir, date_dir.name, dry_run))
+        except Exception as e:
+            print(f"❌ 歸檔 {date_dir.name} 失敗: {e}")
+            result["errors"].append(f"{date_dir.name}: {e}")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="刪除過期PDF並歸檔舊日期目錄")
+    parser.add_argument("--data-dir", default="data", help="數據根目錄")
+    parser.add_argument("--pdf-days", type=int, default=RETENTION_PDF_DAYS, help="PDF保留天數")
+    parser.add_argument("--archive-after", type=int, default=RETENTION_ARCHIVE_AFTER_DAYS, help="日期目錄保留天數")
+    parser.add_argument("--dry-run", action="store_true", help="只顯示將要執行的操作")
+    args = parser.parse_args()
+
+    summary = run_retention(Path(args.data_dir), args.pdf_days, args.archive_after, dry_run=args.dry_run)
+    for item in summary["archived"]:
+        print(f"📦 {item['date']}: {item['files']} 個文件 -> {item['archive']}")
@@ -3,10 +3,19 @@
 """
 import os
 import json
-from datetime import datetime
-from typing import Dict, Optional, Any
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Set
 from pathlib import Path
 
+from config import DATE_INDEX_TTL, RAW_TEXT_BLOB_STORE
+from summary_index import record_stage, analysis_highlights
+from data_retention import archived_file_exists, read_archived_file, archived_dates, load_archive_index
+from json_codec import DATE_DIR_PATTERN, data_file_variants, read_json_file, write_json_file, decode_json
+from blob_store import put_text, resolve_raw_text
+from json_repair import repair_json
+
 
 class FileManager:
     """
@@ -16,6 +25,10 @@ class FileManager:
     
     def __init__(self, base_data_dir: str = "data"):
         self.base_data_dir = Path(base_data_dir)
+        # 日期 -> symbol集合 的索引（延遲構建，本進程保存數據時增量更新）
+        self._date_index: Optional[Dict[str, Set[str]]] = None
+        self._date_index_built_at = 0.0
+        self._date_index_lock = threading.Lock()
         
     def _get_date_str(self) -> str:
         """獲取今日日期字符串 (YYYY-MM-DD)"""
@@ -40,6 +53,7 @@ class FileManager:
     def _ensure_directory_exists(self, path: Path) -> None:
         """確保目錄存在，如果不存在則創建"""
         path.mkdir(parents=True, exist_ok=True)
+        self._index_directory(path)
     
     def _get_file_path(self, symbol: str, data_type: str, date_str: str = None) -> Path:
         """
@@ -73,7 +87,29 @@ class FileManager:
             bool: 文件是否存在
         """
         file_path = self._get_file_path(symbol, data_type, date_str)
-        return file_path.exists()
+        if self._find_data_file(file_path) is not None:
+            return True
+        # 已歸檔的日期只查索引，不解壓
+        date_dir = file_path.parent.parent
+        return any(
+            archived_file_exists(self.base_data_dir, date_dir.name, self._archive_member(variant))
+            for variant in data_file_variants(file_path)
+        )
+    
+    def _find_data_file(self, file_path: Path) -> Optional[Path]:
+        """
+        數據文件實際的存儲路徑（.json、.json.zst 或 .json.gz，當前配置的格式優先）
+        
+        Args:
+            file_path: _get_file_path 返回的 .json 路徑
+            
+        Returns:
+            Path: 存在的文件路徑，都不存在時返回None
+        """
+        for variant in data_file_variants(file_path):
+            if variant.exists():
+                return variant
+        return None
     
     def save_data(self, symbol: str, data_type: str, data: Any, date_str: str = None) -> bool:
         """
@@ -95,33 +131,72 @@ class FileManager:
             # 處理特殊數據類型
             processed_data = self._process_data_for_saving(data, data_type)
             
-            # 將數據保存為JSON格式
-            with open(file_path, 'w', encoding='utf-8') as f:
-                if isinstance(processed_data, str):
-                    # 如果是字符串，包裝成對象
-                    json_data = {
-                        "data": processed_data,
-                        "timestamp": datetime.now().isoformat(),
-                        "symbol": symbol.upper(),
-                        "type": data_type
-                    }
-                else:
-                    # 如果是對象，直接保存
-                    json_data = processed_data
-                    if isinstance(json_data, dict):
-                        json_data["timestamp"] = datetime.now().isoformat()
-                        json_data["symbol"] = symbol.upper()
-                        json_data["type"] = data_type
-                
-                json.dump(json_data, f, ensure_ascii=False, indent=2)
+            if isinstance(processed_data, str):
+                # 如果是字符串，包裝成對象
+                json_data = {
+                    "data": processed_data,
+                    "timestamp": datetime.now().isoformat(),
+                    "symbol": symbol.upper(),
+                    "type": data_type
+                }
+            else:
+                # 如果是對象，直接保存
+                json_data = processed_data
+                if isinstance(json_data, dict):
+                    json_data["timestamp"] = datetime.now().isoformat()
+                    json_data["symbol"] = symbol.upper()
+                    json_data["type"] = data_type
+            
+            # 按 JSON_COMPRESSION 的格式保存，並刪除其他格式的舊文件，避免讀到過期數據
+            variants = data_file_variants(file_path)
+            file_path = variants[0]
+            write_json_file(file_path, json_data, self.base_data_dir)
+            for variant in variants:
+                if variant != file_path and variant.exists():
+                    variant.unlink()
             
             print(f"✅ {data_type} 數據已保存: {file_path}")
+            self.record_stage(symbol, data_type, date_str,
+                              analysis_highlights(json_data) if data_type == "analysis" else None)
+            if data_type == "analysis":
+                self.record_analysis(symbol, json_data, date_str)
             return True
             
         except Exception as e:
             print(f"❌ 保存 {data_type} 數據失敗: {e}")
             return False
     
+    def record_stage(self, symbol: str, stage: str, date_str: str = None, fields: Dict[str, Any] = None) -> None:
+        """
+        更新每日摘要索引（失敗不影響數據保存）
+        
+        Args:
+            symbol: 股票代碼
+            stage: 階段名（數據類型、report、pdf_chinese、pdf_english）
+            date_str: 日期字符串，默認為今日
+            fields: 同時更新的摘要字段
+        """
+        try:
+            record_stage(self.base_data_dir, symbol, date_str or self._get_date_str(), stage, fields)
+        except Exception as e:
+            print(f"⚠️ 更新摘要索引失敗: {e}")
+    
+    def record_analysis(self, symbol: str, analysis: Any, date_str: str = None) -> None:
+        """
+        將分析結果追加到時間序列存儲（失敗不影響數據保存）
+        
+        Args:
+            symbol: 股票代碼
+            analysis: analysis 數據
+            date_str: 日期字符串，默認為今日
+        """
+        try:
+            # 延遲導入：pandas只在真正寫入分析結果時才載入
+            from analysis_store import get_analysis_store
+            get_analysis_store(str(self.base_data_dir)).record_analysis(symbol, date_str or self._get_date_str(), analysis)
+        except Exception as e:
+            print(f"⚠️ 寫入分析時間序列失敗: {e}")
+    
     def _process_data_for_saving(self, data: Any, data_type: str) -> Any:
         """
         處理保存前的數據格式轉換
@@ -140,7 +215,7 @@ class FileManager:
                     parsed_data = json.loads(data)
                     return {
                         "data": parsed_data,
-                        "raw_text": data  # 保留原始文本備用
+                        **self._raw_text_field(data)  # 保留原始文本備用
                     }
                 except json.JSONDecodeError:
                     # 如果不是有效JSON，嘗試清理和修復
@@ -148,13 +223,13 @@ class FileManager:
                     if cleaned_data:
                         return {
                             "data": cleaned_data,
-                            "raw_text": data
+                            **self._raw_text_field(data)
                         }
                     else:
                         # 作為純文本保存
                         return {
                             "data": {"text": data},
-                            "raw_text": data,
+                            **self._raw_text_field(data),
                             "format": "text"
                         }
             else:
@@ -165,45 +240,53 @@ class FileManager:
         else:
             return data
     
-    def _clean_and_fix_json(self, text: str) -> Optional[dict]:
+    def _raw_text_field(self, raw_text: str) -> Dict[str, str]:
         """
-        清理和修復可能不完整的JSON字符串
+        原始文本字段：存入blob存儲後只保存引用（相同內容只存一份），未啟用時直接內嵌
         
         Args:
-            text: 可能不完整的JSON文本
+            raw_text: LLM原始輸出
             
         Returns:
-            dict: 修復後的JSON對象，如果無法修復則返回None
+            Dict: {"raw_ref": "sha256:..."} 或 {"raw_text": 原始文本}
         """
-        try:
-            # 移除可能的前後綴
-            text = text.strip()
-            
-            # 如果文本被截斷，嘗試找到最後一個完整的結構
-            if not text.endswith('}') and not text.endswith(']'):
-                # 找到最後一個完整的對象或數組
-                last_brace = text.rfind('}')
-                last_bracket = text.rfind(']')
-                
-                if last_brace > last_bracket:
-                    # 嘗試以大括號結尾
-                    text = text[:last_brace + 1]
-                elif last_bracket > last_brace:
-                    # 嘗試以方括號結尾
-                    text = text[:last_bracket + 1]
-                else:
-                    # 如果找不到，嘗試添加結尾
-                    if text.count('{') > text.count('}'):
-                        text += '}'
-                    elif text.count('[') > text.count(']'):
-                        text += ']'
+        if RAW_TEXT_BLOB_STORE:
+            try:
+                return {"raw_ref": put_text(self.base_data_dir, raw_text)}
+            except OSError as e:
+                print(f"⚠️ 無法保存原始文本到blob存儲，改為內嵌: {e}")
+        return {"raw_text": raw_text}
+    
+    def load_raw_text(self, symbol: str, data_type: str, date_str: str = None) -> Optional[str]:
+        """
+        載入LLM原始輸出（用於排查解析問題，正常流程不需要）
+        
+        Args:
+            symbol: 股票代碼
+            data_type: 數據類型 (news_cn, analysis, news_en, analysis_en, desc_cn)
+            date_str: 日期字符串，默認為今日
             
-            # 嘗試解析修復後的JSON
-            return json.loads(text)
+        Returns:
+            str: 原始文本，沒有時返回None
+        """
+        return resolve_raw_text(self.base_data_dir, self.load_data(symbol, data_type, date_str))
+    
+    def _clean_and_fix_json(self, text: str) -> Optional[Any]:
+        """
+        修復無效的LLM輸出JSON（代碼塊標記、尾隨逗號、被截斷的字符串和括號等）
+        
+        Args:
+            text: 可能不完整的JSON文本
             
-        except Exception as e:
-            print(f"⚠️ JSON修復失敗: {e}")
+        Returns:
+            Any: 修復後的JSON對象，如果無法修復則返回None
+        """
+        repair = repair_json(text)
+        if not repair["success"]:
+            print(f"⚠️ JSON修復失敗: {repair['error']}")
             return None
+        print(f"🔧 JSON已修復: {', '.join(repair['fixes'])}")
+        return repair["data"]
     
     def load_data(self, symbol: str, data_type: str, date_str: str = None) -> Optional[Any]:
         """
@@ -219,12 +302,13 @@ class FileManager:
         """
         try:
             file_path = self._get_file_path(symbol, data_type, date_str)
+            stored_path = self._find_data_file(file_path)
             
-            if not file_path.exists():
-                return None
+            if stored_path is None:
+                return self._load_archived(file_path)
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            file_path = stored_path
+            data = read_json_file(file_path, self.base_data_dir)
             
             print(f"✅ {data_type} 數據已從緩存加載: {file_path}")
             return data
@@ -242,6 +326,29 @@ class FileManager:
             print(f"❌ 加載 {data_type} 數據失敗: {e}")
             return None
     
+    def _archive_member(self, file_path: Path) -> str:
+        """數據文件在日期歸檔中的成員名（SYMBOL/文件名）"""
+        return f"{file_path.parent.name}/{file_path.name}"
+    
+    def _load_archived(self, file_path: Path) -> Optional[Any]:
+        """
+        原文件不存在時從日期歸檔讀取（歸檔後日期目錄中只剩摘要索引）
+        
+        Args:
+            file_path: 數據文件路徑
+            
+        Returns:
+            Any: 加載的數據，不在歸檔中時返回None
+        """
+        date_dir = file_path.parent.parent
+        for variant in data_file_variants(file_path):
+            member_name = self._archive_member(variant)
+            content = read_archived_file(self.base_data_dir, date_dir.name, member_name)
+            if content is not None:
+                print(f"📦 數據已從歸檔加載: {variant}")
+                return decode_json(content, member_name, self.base_data_dir)
+        return None
+    
     def validate_data(self, data: Any, data_type: str) -> bool:
         """
         驗證數據格式是否正確
@@ -309,6 +416,62 @@ class FileManager:
         self._ensure_directory_exists(data_path)
         return str(data_path)
     
+    def _build_date_index(self) -> Dict[str, Set[str]]:
+        """
+        掃描數據目錄構建 日期 -> symbol集合 的索引（每個日期目錄一次scandir）
+        
+        已歸檔日期的symbol從歸檔的成員索引讀取，不需要解壓歸檔
+        """
+        index = {}
+        try:
+            with os.scandir(self.base_data_dir) as date_entries:
+                for date_entry in date_entries:
+                    if not date_entry.is_dir() or not DATE_DIR_PATTERN.match(date_entry.name):
+                        continue
+                    with os.scandir(date_entry.path) as symbol_entries:
+                        index[date_entry.name] = {entry.name for entry in symbol_entries if entry.is_dir()}
+        except FileNotFoundError:
+            pass
+        
+        for date_str in archived_dates(self.base_data_dir):
+            archive_index = load_archive_index(self.base_data_dir, date_str)
+            if archive_index:
+                index.setdefault(date_str, set()).update(
+                    name.split("/", 1)[0] for name in archive_index["members"] if "/" in name
+                )
+        return index
+    
+    def _get_date_index(self) -> Dict[str, Set[str]]:
+        """
+        獲取日期索引
+        
+        本進程寫入的目錄會即時加入索引；其他進程（如Worker）寫入的目錄
+        在索引超過 DATE_INDEX_TTL 秒後重新掃描時才會出現
+        """
+        with self._date_index_lock:
+            if self._date_index is None or time.monotonic() - self._date_index_built_at > DATE_INDEX_TTL:
+                self._date_index = self._build_date_index()
+                self._date_index_built_at = time.monotonic()
+            return self._date_index
+    
+    def _index_directory(self, path: Path) -> None:
+        """將新建的 data/YYYY-MM-DD/SYMBOL 目錄加入已構建的索引"""
+        try:
+            parts = path.relative_to(self.base_data_dir).parts
+        except ValueError:
+            return
+        with self._date_index_lock:
+            if self._date_index is None or not parts or not DATE_DIR_PATTERN.match(parts[0]):
+                return
+            symbols = self._date_index.setdefault(parts[0], set())
+            if len(parts) >= 2:
+                symbols.add(parts[1])
+    
+    def refresh_date_index(self) -> None:
+        """下次查詢時重新掃描數據目錄"""
+        with self._date_index_lock:
+            self._date_index = None
+    
     def list_available_dates(self, symbol: str = None) -> list:
         """
         列出可用的日期
@@ -319,17 +482,56 @@ class FileManager:
         Returns:
             list: 可用的日期列表
         """
-        dates = []
-        if self.base_data_dir.exists():
-            for date_dir in self.base_data_dir.iterdir():
-                if date_dir.is_dir():
-                    if symbol:
-                        symbol_dir = date_dir / symbol.upper()
-                        if symbol_dir.exists():
-                            dates.append(date_dir.name)
-                    else:
-                        dates.append(date_dir.name)
-        return sorted(dates)
+        index = self._get_date_index()
+        with self._date_index_lock:
+            if symbol:
+                return sorted(date for date, symbols in index.items() if symbol.upper() in symbols)
+            return sorted(index)
+    
+    def list_symbols(self, date_str: str = None) -> List[str]:
+        """
+        列出某一天有數據的股票
+        
+        Args:
+            date_str: 日期字符串，默認為今日
+            
+        Returns:
+            List[str]: 股票代碼列表
+        """
+        index = self._get_date_index()
+        with self._date_index_lock:
+            return sorted(index.get(date_str or self._get_date_str(), ()))
+    
+    def query_dates(self, symbol: str = None, start_date: str = None, end_date: str = None,
+                    days: int = None) -> Dict[str, List[str]]:
+        """
+        按日期範圍查詢索引，如「XPON最近30天的所有報告」
+        
+        Args:
+            symbol: 股票代碼，提供時只返回該股票有數據的日期
+            start_date: 開始日期（包含），YYYY-MM-DD
+            end_date: 結束日期（包含），默認為今日
+            days: 最近N天（提供時忽略start_date）
+            
+        Returns:
+            Dict[str, List[str]]: 日期 -> 股票代碼列表（按日期從新到舊）
+        """
+        end_date = end_date or self._get_date_str()
+        if days is not None:
+            start_date = (datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        
+        index = self._get_date_index()
+        results = {}
+        with self._date_index_lock:
+            for date in sorted(index, reverse=True):
+                if date > end_date or (start_date and date < start_date):
+                    continue
+                if symbol:
+                    if symbol.upper() in index[date]:
+                        results[date] = [symbol.upper()]
+                elif index[date]:
+                    results[date] = sorted(index[date])
+        return results
 
 
 # 使用示例
@@ -0,0 +1,255 @@
+"""
+靜態文件服務：通過HTTP直接從磁盤串流 data/ 下的報告文件（PDF、Markdown、IG貼文）
+
+Streamlit頁面只顯示下載鏈接，文件內容在用戶點擊時才由這個服務讀取並分塊發送，
+不再在每次頁面重新運行時把PDF讀進內存。支持 Range（斷點續傳、PDF分頁加載）和 ETag/304
+"""
+import email.utils
+import logging
+import mimetypes
+import os
+import re
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit, parse_qs
+
+from config import (
+    FILE_SERVER_HOST,
+    FILE_SERVER_PORT,
+    FILE_SERVER_BASE_URL,
+    FILE_SERVER_CHUNK_SIZE
+)
+
+
+# 只提供報告類文件，數據JSON不對外
+SERVED_SUFFIXES = {".pdf", ".md", ".txt"}
+MIME_TYPES = {".pdf": "application/pdf", ".md": "text/markdown; charset=utf-8", ".txt": "text/plain; charset=utf-8"}
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析單個 Range 請求頭
+
+    Args:
+        header: Range 請求頭，如 "bytes=0-1023"、"bytes=1024-"、"bytes=-500"
+        size: 文件大小
+
+    Returns:
+        Tuple[int, int]: (開始, 結束) 包含兩端；範圍無效時返回None
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+
+    start, end = match.groups()
+    if start == "":
+        # 最後N個字節
+        length = int(end)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+class ReportFileHandler(BaseHTTPRequestHandler):
+    """處理 GET/HEAD 請求，文件根目錄為 server.root_dir"""
+
+    server_version = "ReportFileServer/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logging.getLogger("FileServer").debug("%s - %s", self.address_string(), format % args)
+
+    def _resolve(self, url_path: str) -> Optional[Path]:
+        """URL路徑轉換為根目錄內的文件，拒絕目錄穿越和不提供的文件類型"""
+        root = self.server.root_dir
+        try:
+            path = (root / unquote(url_path).lstrip("/")).resolve()
+            path.relative_to(root)
+        except (ValueError, OSError):
+            return None
+        if path.suffix.lower() not in SERVED_SUFFIXES or not path.is_file():
+            return None
+        return path
+
+    def _send_empty(self, status: HTTPStatus, headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body: bool):
+        url = urlsplit(self.path)
+        path = self._resolve(url.path)
+        if path is None:
+            self._send_empty(HTTPStatus.NOT_FOUND)
+            return
+
+        stat = path.stat()
+        etag = _etag(stat)
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        cache_headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "no-cache"}
+
+        # 條件請求：文件沒變時只返回304
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match:
+            if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+                self._send_empty(HTTPStatus.NOT_MODIFIED, cache_headers)
+                return
+        elif self.headers.get("If-Modified-Since"):
+            try:
+                since = email.utils.parsedate_to_datetime(self.headers["If-Modified-Since"])
+                if int(stat.st_mtime) <= since.timestamp():
+                    self._send_empty(HTTPStatus.NOT_MODIFIED, cache_headers)
+                    return
+            except (TypeError, ValueError):
+                pass
+
+        size = stat.st_size
+        start, end = 0, size - 1
+        status = HTTPStatus.OK
+
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and size > 0 and (not if_range or if_range.strip() == etag):
+            byte_range = _parse_range(range_header, size)
+            if byte_range is None:
+                self._send_empty(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, {"Content-Range": f"bytes */{size}"})
+                return
+            start, end = byte_range
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        length = max(0, end - start + 1)
+        self.send_response(status)
+        self.send_header("Content-Type", MIME_TYPES.get(path.suffix.lower())
+                         or mimetypes.guess_type(path.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        for name, value in cache_headers.items():
+            self.send_header(name, value)
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        disposition = "attachment" if "download" in parse_qs(url.query) else "inline"
+        self.send_header("Content-Disposition", f"{disposition}; filename*=UTF-8''{quote(path.name)}")
+        self.end_headers()
+
+        if not send_body or length == 0:
+            return
+
+        # 分塊發送，內存佔用與文件大小無關
+        try:
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = length
+                while remaining > 0:
+                    chunk = f.read(min(FILE_SERVER_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客戶端中途斷開（如取消下載）
+            pass
+
+
+class ReportFileServer(ThreadingHTTPServer):
+    """每個請求一個線程的文件服務器"""
+
+    daemon_threads = True
+
+    def __init__(self, root_dir: str, host: str = FILE_SERVER_HOST, port: int = FILE_SERVER_PORT):
+        self.root_dir = Path(root_dir).resolve()
+        super().__init__((host, port), ReportFileHandler)
+
+
+# 進程內共用的文件服務（Streamlit所有會話共用）
+_shared_server: Optional[ReportFileServer] = None
+_shared_server_lock = threading.Lock()
+
+
+def ensure_file_server(root_dir: str = "data") -> bool:
+    """
+    在後台線程中啟動文件服務（每個進程只啟動一次）
+
+    Args:
+        root_dir: 文件根目錄
+
+    Returns:
+        bool: 本進程是否在提供服務（端口已被佔用時返回False，鏈接仍指向佔用端口的服務）
+    """
+    global _shared_server
+    logger = logging.getLogger("FileServer")
+    with _shared_server_lock:
+        if _shared_server is not None:
+            return True
+        try:
+            _shared_server = ReportFileServer(root_dir)
+        except OSError as e:
+            logger.warning(f"⚠️ 文件服務無法監聽 {FILE_SERVER_HOST}:{FILE_SERVER_PORT}，假設已由其他進程提供: {e}")
+            return False
+
+        thread = threading.Thread(target=_shared_server.serve_forever, name="file-server", daemon=True)
+        thread.start()
+        logger.info(f"📂 文件服務已啟動: http://{FILE_SERVER_HOST}:{FILE_SERVER_PORT} -> {_shared_server.root_dir}")
+        return True
+
+
+def file_url(root_dir: str, file_path: str, download: bool = True) -> str:
+    """
+    文件的下載鏈接
+
+    Args:
+        root_dir: 文件根目錄
+        file_path: 文件路徑（必須在根目錄內）
+        download: 是否以附件方式下載（否則在瀏覽器內打開）
+
+    Returns:
+        str: 文件URL
+
+    Raises:
+        ValueError: 未配置 FILE_SERVER_BASE_URL
+    """
+    if not FILE_SERVER_BASE_URL:
+        raise ValueError("未配置 FILE_SERVER_BASE_URL，無法生成文件服務鏈接")
+    relative = Path(file_path).resolve().relative_to(Path(root_dir).resolve())
+    url = f"{FILE_SERVER_BASE_URL.rstrip('/')}/{quote(relative.as_posix())}"
+    return url + "?download=1" if download else url
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="報告文件服務（支持Range和ETag）")
+    parser.add_argument("--root", default="data", help="文件根目錄")
+    parser.add_argument("--host", default=FILE_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=FILE_SERVER_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = ReportFileServer(args.root, args.host, args.port)
+    print(f"📂 文件服務: http://{args.host}:{args.port} -> {server.root_dir}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
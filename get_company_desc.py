@@ -3,18 +3,123 @@ Yahoo Finance 公司描述獲取器
 """
 import requests
 from bs4 import BeautifulSoup
-import time
-import random
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import html
 import re
 
+from config import YAHOO_MAX_CONCURRENCY
+from rate_limiter import HostRateScheduler, shared_scheduler
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+
+# 快速預掃描：定位 data-testid="description" 所在元素，只在該元素內部找第一個 <p>，不構建DOM
+_DESCRIPTION_MARKER_RE = re.compile(r'data-testid\s*=\s*["\']description["\']')
+_TAG_NAME_RE = re.compile(r'<([a-zA-Z][\w-]*)')
+_FIRST_P_RE = re.compile(r'<p\b[^>]*>(.*?)</p>', re.S | re.I)
+_TAG_RE = re.compile(r'<[^>]+>')
+# 描述元素最多掃描的字符數，超出時交給HTML解析器
+_PRESCAN_WINDOW = 20000
+# 公司描述常見的關鍵詞（用於全文兜底）
+_DESCRIPTION_KEYWORDS = ['company', 'corporation', 'business', 'operates', 'provides', 'engages', 'develops']
+
+
+def _prescan_description(page: str) -> Optional[str]:
+    """
+    用正則在原始HTML中直接提取描述段落
+
+    Args:
+        page: 頁面HTML
+
+    Returns:
+        str: 描述文本，未找到時返回None
+    """
+    marker = _DESCRIPTION_MARKER_RE.search(page)
+    if not marker:
+        return None
+    content = _element_content(page, marker.start(), marker.end())
+    if content is None:
+        return None
+    match = _FIRST_P_RE.search(content)
+    if not match:
+        return None
+    text = html.unescape(_TAG_RE.sub('', match.group(1))).strip()
+    return text or None
+
+
+def _element_content(page: str, marker_start: int, marker_end: int) -> Optional[str]:
+    """
+    取出屬性所在元素的內部HTML（到與之匹配的結束標籤為止）
+
+    Args:
+        page: 頁面HTML
+        marker_start: 屬性在頁面中的開始位置
+        marker_end: 屬性在頁面中的結束位置
+
+    Returns:
+        str: 元素內部HTML，無法確定元素範圍時返回None（交給HTML解析器處理）
+    """
+    tag_start = page.rfind('<', 0, marker_start)
+    if tag_start < 0 or '>' in page[tag_start:marker_start]:
+        return None
+    name = _TAG_NAME_RE.match(page, tag_start)
+    tag_end = page.find('>', marker_end)
+    if not name or tag_end < 0 or page[tag_end - 1] == '/':
+        return None
+
+    # 按同名標籤的嵌套層數找到匹配的結束標籤
+    tag_re = re.compile(rf'<(/?){re.escape(name.group(1))}\b[^>]*?(/?)>', re.I)
+    depth = 1
+    limit = min(len(page), tag_end + _PRESCAN_WINDOW)
+    for tag in tag_re.finditer(page, tag_end + 1, limit):
+        if tag.group(2):
+            continue
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return page[tag_end + 1:tag.start()]
+    return None
+
+
+def _parse_description_fast(page: str) -> Optional[str]:
+    """
+    用 selectolax 或 lxml（已安裝時）解析描述段落
+
+    Args:
+        page: 頁面HTML
+
+    Returns:
+        str: 描述文本，解析器不可用或未找到時返回None
+    """
+    if HTMLParser is not None:
+        node = HTMLParser(page).css_first('[data-testid="description"] p')
+        if node is not None:
+            return node.text(strip=True) or None
+        return None
+
+    if lxml_html is not None:
+        nodes = lxml_html.fromstring(page).xpath('//*[@data-testid="description"]//p')
+        if nodes:
+            return nodes[0].text_content().strip() or None
+    return None
+
 
 class CompanyDescScraper:
     """
     從Yahoo Finance獲取公司描述信息
     """
     
-    def __init__(self):
+    def __init__(self, scheduler: HostRateScheduler = None):
+        # 默認使用全流程共用的調度器，保證對Yahoo的總請求速率受控
+        self.scheduler = scheduler or shared_scheduler
         self.session = requests.Session()
         # 設置User-Agent來模擬真實瀏覽器
         self.session.headers.update({
@@ -44,58 +149,15 @@ class CompanyDescScraper:
             print(f"🔍 正在獲取 {symbol} 的公司描述...")
             print(f"URL: {url}")
             
-            # 添加隨機延遲避免被封IP
-            time.sleep(random.uniform(1, 3))
-            
-            # 發送請求
-            response = self.session.get(url, timeout=30)
+            # 發送請求（由調度器控制速率，429/503時自動退避）
+            response = self.scheduler.get(self.session, url, timeout=30)
             response.raise_for_status()
             
-            # 解析HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 方法1: 尋找 data-testid="description" 的元素
-            desc_element = soup.find(attrs={"data-testid": "description"})
-            
-            if desc_element:
-                # 查找其中的 <p> 標籤
-                p_tag = desc_element.find('p')
-                if p_tag:
-                    description = p_tag.get_text(strip=True)
-                    if description:
-                        print(f"✅ 成功獲取描述 (方法1)")
-                        return self._clean_description(description)
-            
-            # 方法2: 備用方案 - 尋找包含公司描述的其他可能元素
-            alternative_selectors = [
-                'span[data-testid="description"]',
-                'div[data-testid="description"] p',
-                '.quote-sub-section p',
-                '.asset-profile-container p',
-                '.Mt\\(15px\\) p'
-            ]
-            
-            for selector in alternative_selectors:
-                try:
-                    elements = soup.select(selector)
-                    for element in elements:
-                        text = element.get_text(strip=True)
-                        if text and len(text) > 50:  # 確保是實質性的描述
-                            print(f"✅ 成功獲取描述 (備用方案: {selector})")
-                            return self._clean_description(text)
-                except Exception:
-                    continue
-            
-            # 方法3: 搜索包含關鍵詞的段落
-            all_paragraphs = soup.find_all('p')
-            for p in all_paragraphs:
-                text = p.get_text(strip=True)
-                # 檢查是否像公司描述（包含關鍵詞且長度合適）
-                if (len(text) > 100 and 
-                    any(keyword in text.lower() for keyword in 
-                        ['company', 'corporation', 'business', 'operates', 'provides', 'engages', 'develops'])):
-                    print(f"✅ 成功獲取描述 (關鍵詞匹配)")
-                    return self._clean_description(text)
+            result = self._extract_description(response.text)
+            if result:
+                description, method = result
+                print(f"✅ 成功獲取描述 ({method})")
+                return self._clean_description(description)
             
             print(f"❌ 未找到 {symbol} 的公司描述")
             return None
@@ -107,6 +169,70 @@ class CompanyDescScraper:
             print(f"❌ 解析失敗: {e}")
             return None
     
+    def _extract_description(self, page: str) -> Optional[Tuple[str, str]]:
+        """
+        從頁面HTML中提取公司描述，由快到慢依次嘗試
+        
+        1. 正則預掃描 data-testid="description"
+        2. selectolax / lxml 解析
+        3. BeautifulSoup 全樹解析（備用選擇器和關鍵詞匹配）
+        
+        Args:
+            page: 頁面HTML
+            
+        Returns:
+            Tuple[str, str]: (描述, 使用的方法)，未找到時返回None
+        """
+        description = _prescan_description(page)
+        if description:
+            return description, "預掃描"
+        
+        try:
+            description = _parse_description_fast(page)
+            if description:
+                return description, "快速解析"
+        except Exception as e:
+            print(f"⚠️ 快速解析失敗，改用完整解析: {e}")
+        
+        # 全樹解析兜底
+        soup = BeautifulSoup(page, 'lxml' if lxml_html is not None else 'html.parser')
+        
+        # 方法1: 尋找 data-testid="description" 的元素
+        desc_element = soup.find(attrs={"data-testid": "description"})
+        if desc_element:
+            p_tag = desc_element.find('p')
+            if p_tag:
+                description = p_tag.get_text(strip=True)
+                if description:
+                    return description, "方法1"
+        
+        # 方法2: 備用方案 - 尋找包含公司描述的其他可能元素
+        alternative_selectors = [
+            'span[data-testid="description"]',
+            'div[data-testid="description"] p',
+            '.quote-sub-section p',
+            '.asset-profile-container p',
+            '.Mt\\(15px\\) p'
+        ]
+        
+        for selector in alternative_selectors:
+            try:
+                for element in soup.select(selector):
+                    text = element.get_text(strip=True)
+                    if text and len(text) > 50:  # 確保是實質性的描述
+                        return text, f"備用方案: {selector}"
+            except Exception:
+                continue
+        
+        # 方法3: 搜索包含關鍵詞的段落
+        for p in soup.find_all('p'):
+            text = p.get_text(strip=True)
+            # 檢查是否像公司描述（包含關鍵詞且長度合適）
+            if len(text) > 100 and any(keyword in text.lower() for keyword in _DESCRIPTION_KEYWORDS):
+                return text, "關鍵詞匹配"
+        
+        return None
+    
     def _clean_description(self, description: str) -> str:
         """
         清理描述文本
@@ -139,19 +265,14 @@ class CompanyDescScraper:
         Returns:
             dict: {symbol: description} 的字典
         """
-        results = {}
-        
-        for i, symbol in enumerate(symbols):
+        def fetch(item):
+            i, symbol = item
             print(f"\n📋 處理 {i+1}/{len(symbols)}: {symbol}")
-            
-            description = self.get_company_description(symbol, region)
-            results[symbol.upper()] = description
-            
-            # 添加延遲避免被限制
-            if i < len(symbols) - 1:
-                delay = random.uniform(2, 5)
-                print(f"⏳ 等待 {delay:.1f} 秒...")
-                time.sleep(delay)
+            return symbol.upper(), self.get_company_description(symbol, region)
+        
+        # 並發數和速率由調度器控制，這裡只負責派發
+        with ThreadPoolExecutor(max_workers=YAHOO_MAX_CONCURRENCY) as executor:
+            results = dict(executor.map(fetch, enumerate(symbols)))
         
         return results
     
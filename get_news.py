@@ -1,7 +1,120 @@
 import requests
+import hashlib
 import json
+import re
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
+from config import (
+    NEWS_API_BASE_URL,
+    NEWS_CONNECT_TIMEOUT,
+    NEWS_READ_TIMEOUT,
+    NEWS_MAX_RETRIES,
+    NEWS_MAX_CONCURRENCY,
+    NEWS_BULK_QUERY_PARAM,
+    NEWS_BULK_QUERY_BATCH,
+    NEWS_VALIDATOR_CACHE_SIZE,
+    NEWS_VALIDATOR_CACHE_TTL
+)
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate'
+}
+
+
+# Fields some feeds use to tag articles with tickers
+TICKER_FIELDS = ("symbols", "tickers", "ticker", "symbol")
+
+
+def _article_tags(article: Dict) -> set:
+    """Collect ticker tags from the article's own metadata, if the feed provides any"""
+    tags = set()
+    for field in TICKER_FIELDS:
+        value = article.get(field)
+        if not value:
+            continue
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+            if isinstance(item, dict):
+                item = item.get("symbol") or item.get("ticker") or ""
+            if isinstance(item, str) and item:
+                tags.add(item.split(":")[-1].strip().upper())
+    return tags
+
+
+def _ticker_pattern(ticker: str):
+    """
+    Regex that finds a ticker in free text
+
+    Tickers of 1-2 letters collide with ordinary words, so they only match in
+    explicit forms: $SYM, (SYM) or (NASDAQ: SYM). Longer tickers also match as
+    a whole upper-case word.
+    """
+    sym = re.escape(ticker.upper())
+    explicit = rf"\${sym}\b|\((?:[A-Za-z]+:\s*)?{sym}\)"
+    if len(ticker) <= 2:
+        return re.compile(explicit)
+    return re.compile(rf"{explicit}|(?<![A-Za-z0-9$]){sym}(?![A-Za-z0-9])")
+
+
+def _article_key(article: Dict) -> str:
+    """Dedupe key: URL, then title, then a hash of the whole article"""
+    key = article.get("url") or article.get("title")
+    if key:
+        return str(key)
+    return "sha1:" + hashlib.sha1(json.dumps(article, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def partition_articles_by_ticker(articles: List[Dict], tickers: List[str]) -> Dict[str, List[Dict]]:
+    """
+    Split a mixed news feed into per-ticker article lists
+
+    Articles tagged by the feed (symbols/tickers fields) are assigned by tag;
+    untagged articles are matched against title and description.
+
+    Args:
+        articles (List[Dict]): Articles from the bulk feed
+        tickers (List[str]): Tickers to look for
+
+    Returns:
+        Dict[str, List[Dict]]: ticker -> matching articles (may be empty)
+    """
+    tickers = [t.upper() for t in tickers]
+    patterns = {t: _ticker_pattern(t) for t in tickers}
+    result = {t: [] for t in tickers}
+    seen = {t: set() for t in tickers}
+
+    for article in articles:
+        if not isinstance(article, dict):
+            continue
+        tags = _article_tags(article)
+        if tags:
+            matched = [t for t in tickers if t in tags]
+        else:
+            text = f"{article.get('title') or ''} {article.get('description') or ''}"
+            matched = [t for t in tickers if patterns[t].search(text)]
+
+        key = _article_key(article)
+        for ticker in matched:
+            if key in seen[ticker]:
+                continue
+            seen[ticker].add(key)
+            result[ticker].append(article)
+
+    return result
+
 
 class NewsScraper:
     """
@@ -9,8 +122,9 @@ class NewsScraper:
     """
     
     def __init__(self):
-        self.base_url = "http://news.enomars.org/api/news/"
+        self.base_url = NEWS_API_BASE_URL
         self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
         
     def get_news(self, stock_ticker: Optional[str] = None) -> Dict:
         """
@@ -33,13 +147,11 @@ class NewsScraper:
                 url = self.base_url
                 
             # Make the request with retry logic
-            max_retries = 3
+            max_retries = NEWS_MAX_RETRIES
             for attempt in range(max_retries):
                 try:
-                    # Increase timeout to 300 seconds (5 minutes) and add headers
-                    response = self.session.get(url, timeout=300, headers={
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    })
+                    # Separate connect/read timeouts so a dead host fails fast
+                    response = self.session.get(url, timeout=(NEWS_CONNECT_TIMEOUT, NEWS_READ_TIMEOUT))
                     response.raise_for_status()  # Raises an HTTPError for bad responses
                     
                     return response.json()
@@ -138,6 +250,241 @@ class NewsScraper:
 
 
 
+class AsyncNewsClient:
+    """
+    Async news client that fetches many tickers concurrently
+
+    - One keep-alive connection pool shared by all requests of a batch
+    - gzip/deflate compressed responses
+    - Conditional requests (ETag / If-Modified-Since); a 304 reuses the cached body.
+      The cache is an LRU bounded by NEWS_VALIDATOR_CACHE_SIZE entries and
+      NEWS_VALIDATOR_CACHE_TTL seconds, so a long-running worker does not grow it forever
+    - Separate connect/read timeouts and a concurrency limit
+
+    Falls back to a thread pool of blocking requests when aiohttp is not installed.
+    """
+
+    def __init__(self, max_concurrency: int = NEWS_MAX_CONCURRENCY):
+        self.base_url = NEWS_API_BASE_URL
+        self.max_concurrency = max_concurrency
+        # url -> {"etag", "last_modified", "data", "stored_at"}, kept across batches (LRU order)
+        self.validators: "OrderedDict[str, Dict]" = OrderedDict()
+        self._validators_lock = threading.Lock()
+
+    def _build_url(self, stock_ticker: Optional[str]) -> str:
+        return f"{self.base_url}{stock_ticker}" if stock_ticker else self.base_url
+
+    def _cached(self, url: str) -> Optional[Dict]:
+        """Cache entry for a URL, or None if missing or expired"""
+        with self._validators_lock:
+            cached = self.validators.get(url)
+            if cached is None:
+                return None
+            if time.time() - cached["stored_at"] > NEWS_VALIDATOR_CACHE_TTL:
+                del self.validators[url]
+                return None
+            self.validators.move_to_end(url)
+            return cached
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        headers = dict(DEFAULT_HEADERS)
+        cached = self._cached(url)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
+    def _remember(self, url: str, etag: Optional[str], last_modified: Optional[str], data: Dict):
+        if not (etag or last_modified):
+            return
+        with self._validators_lock:
+            self.validators[url] = {"etag": etag, "last_modified": last_modified, "data": data,
+                                    "stored_at": time.time()}
+            self.validators.move_to_end(url)
+            while len(self.validators) > NEWS_VALIDATOR_CACHE_SIZE:
+                self.validators.popitem(last=False)
+
+    async def fetch_news(self, session, stock_ticker: Optional[str] = None) -> Dict:
+        """
+        Fetch news for one ticker using a shared aiohttp session
+
+        Args:
+            session (aiohttp.ClientSession): Shared session
+            stock_ticker (str, optional): Stock ticker symbol
+
+        Returns:
+            Dict: JSON response, or an empty news structure with "error" on failure
+        """
+        return await self._fetch_url(session, self._build_url(stock_ticker), stock_ticker)
+
+    async def _fetch_url(self, session, url: str, label: Optional[str] = None) -> Dict:
+        """GET a news URL with retries and conditional request headers"""
+        label = label or url
+        last_error = None
+
+        for attempt in range(NEWS_MAX_RETRIES):
+            try:
+                async with session.get(url, headers=self._conditional_headers(url)) as response:
+                    if response.status == 304:
+                        cached = self._cached(url)
+                        if cached is not None:
+                            return cached["data"]
+                        # Entry evicted between request and response; the retry is unconditional
+                        raise aiohttp.ClientError("304 without a cached body")
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+                    self._remember(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), data)
+                    return data
+            except asyncio.TimeoutError as e:
+                last_error = f"timeout: {e}"
+                print(f"Timeout on attempt {attempt + 1}/{NEWS_MAX_RETRIES} ({label}): {e}")
+            except aiohttp.ClientResponseError as e:
+                last_error = str(e)
+                print(f"Request error on attempt {attempt + 1}/{NEWS_MAX_RETRIES} ({label}): {e}")
+                # 4xx (except 429) will not succeed on retry
+                if 400 <= e.status < 500 and e.status != 429:
+                    break
+            except (aiohttp.ClientError, json.JSONDecodeError) as e:
+                last_error = str(e)
+                print(f"Request error on attempt {attempt + 1}/{NEWS_MAX_RETRIES} ({label}): {e}")
+
+            if attempt < NEWS_MAX_RETRIES - 1:
+                await asyncio.sleep(2 ** attempt)
+
+        return {"articles": [], "error": f"API request failed: {last_error}"}
+
+    async def fetch_many(self, tickers: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch news for many tickers concurrently over one connection pool
+
+        Args:
+            tickers (List[str]): Stock ticker symbols
+
+        Returns:
+            Dict[str, Dict]: ticker -> JSON response
+        """
+        timeout = aiohttp.ClientTimeout(
+            connect=NEWS_CONNECT_TIMEOUT,
+            sock_read=NEWS_READ_TIMEOUT
+        )
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector, auto_decompress=True) as session:
+            results = await asyncio.gather(*(self.fetch_news(session, ticker) for ticker in tickers))
+
+        return dict(zip(tickers, results))
+
+    def get_news_many(self, tickers: List[str]) -> Dict[str, Dict]:
+        """
+        Blocking wrapper around fetch_many, usable from scripts and worker threads
+
+        Args:
+            tickers (List[str]): Stock ticker symbols
+
+        Returns:
+            Dict[str, Dict]: ticker -> JSON response
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+
+        start = time.time()
+        if aiohttp is None:
+            print("aiohttp not installed, falling back to threaded requests")
+            results = self._get_news_many_threaded(tickers)
+        else:
+            results = asyncio.run(self.fetch_many(tickers))
+
+        failed = sum(1 for data in results.values() if "error" in data)
+        print(f"Fetched news for {len(tickers)} tickers in {time.time() - start:.1f}s ({failed} failed)")
+        return results
+
+    def _bulk_urls(self, tickers: List[str]) -> List[str]:
+        """URLs of the bulk feed: the general feed, or batched multi-ticker queries"""
+        if not NEWS_BULK_QUERY_PARAM:
+            return [self.base_url]
+        return [
+            f"{self.base_url}?{NEWS_BULK_QUERY_PARAM}={','.join(tickers[i:i + NEWS_BULK_QUERY_BATCH])}"
+            for i in range(0, len(tickers), NEWS_BULK_QUERY_BATCH)
+        ]
+
+    async def fetch_bulk(self, tickers: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch the bulk feed once, partition it locally, and fall back to
+        per-ticker requests only for tickers without any hit
+
+        Args:
+            tickers (List[str]): Stock ticker symbols
+
+        Returns:
+            Dict[str, Dict]: ticker -> {"articles": [...]} (or the per-ticker response)
+        """
+        timeout = aiohttp.ClientTimeout(
+            connect=NEWS_CONNECT_TIMEOUT,
+            sock_read=NEWS_READ_TIMEOUT
+        )
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector, auto_decompress=True) as session:
+            feeds = await asyncio.gather(*(self._fetch_url(session, url) for url in self._bulk_urls(tickers)))
+
+            articles = []
+            for feed in feeds:
+                if "error" in feed:
+                    print(f"Bulk feed failed: {feed['error']}")
+                articles.extend(feed.get("articles") or [])
+
+            partitioned = partition_articles_by_ticker(articles, tickers)
+            results = {t: {"articles": hits} for t, hits in partitioned.items() if hits}
+            misses = [t for t in tickers if t not in results]
+            print(f"Bulk feed: {len(articles)} articles, {len(results)}/{len(tickers)} tickers matched, "
+                  f"{len(misses)} fetched individually")
+
+            if misses:
+                fallback = await asyncio.gather(*(self.fetch_news(session, t) for t in misses))
+                results.update(zip(misses, fallback))
+
+        return results
+
+    def get_news_bulk(self, tickers: List[str]) -> Dict[str, Dict]:
+        """
+        Blocking wrapper around fetch_bulk
+
+        Args:
+            tickers (List[str]): Stock ticker symbols
+
+        Returns:
+            Dict[str, Dict]: ticker -> JSON response, keyed by the tickers as passed in
+        """
+        symbols = list(dict.fromkeys(tickers))
+        tickers = list(dict.fromkeys(t.upper() for t in symbols))
+        if not tickers:
+            return {}
+        if aiohttp is None:
+            results = self.get_news_many(tickers)
+        else:
+            start = time.time()
+            results = asyncio.run(self.fetch_bulk(tickers))
+            print(f"Fetched news for {len(tickers)} tickers in {time.time() - start:.1f}s (bulk mode)")
+        # The feed is matched case-insensitively; map results back to the caller's symbols
+        return {symbol: results[symbol.upper()] for symbol in symbols if symbol.upper() in results}
+
+    def _get_news_many_threaded(self, tickers: List[str]) -> Dict[str, Dict]:
+        """Fallback: blocking requests in a thread pool, one session per thread"""
+        def fetch(ticker):
+            scraper = NewsScraper()
+            try:
+                return scraper.get_news(ticker)
+            finally:
+                scraper.close()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return dict(zip(tickers, executor.map(fetch, tickers)))
+
+
+
 # Example usage
 if __name__ == "__main__":
     scraper = NewsScraper()
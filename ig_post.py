@@ -3,9 +3,13 @@ Instagram Post Creator for Stock Analysis Reports
 基於已生成的報告內容創建 Instagram 投資貼文
 """
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any, Optional
 from llms_chatgpt import ChatGPT
+from config import IG_POST_MAX_WORKERS
+from token_budget import TokenBudgetPlanner
+from report_templates import render_ig_post, render_ig_post_file
 
 
 class IgPostCreator:
@@ -16,6 +20,7 @@ class IgPostCreator:
     
     def __init__(self):
         self.chatgpt = ChatGPT()
+        self.planner = TokenBudgetPlanner(self.chatgpt.model)
         self.disclaimer = """
 ⚠️ DISCLAIMER: This is NOT financial advice. All information is for educational purposes only. Always do your own research and consult with a qualified financial advisor before making investment decisions. Past performance does not guarantee future results.
 """
@@ -34,14 +39,16 @@ class IgPostCreator:
         try:
             # 構建給 ChatGPT 的提示
             prompt = self._build_prompt(symbol, report_content)
+            plan = self.planner.plan("ig_post", None, prompt)
             
             # 調用 ChatGPT 生成 JSON
             response = self.chatgpt.chat(
                 prompt,
                 use_system_prompt=False,
                 json_output=True,
-                max_tokens=1000
+                max_tokens=plan["max_tokens"]
             )
+            self.planner.record_usage(plan, self.chatgpt.last_usage)
             
             # 解析 JSON 響應
             if isinstance(response, str):
@@ -67,6 +74,27 @@ class IgPostCreator:
                 "symbol": symbol.upper()
             }
     
+    def create_ig_posts(self, reports: Dict[str, str], max_workers: int = IG_POST_MAX_WORKERS) -> Dict[str, Dict[str, Any]]:
+        """
+        並行為多個股票創建 Instagram 貼文
+        
+        Args:
+            reports: 股票代碼 -> 報告內容
+            max_workers: 同時進行的 ChatGPT 調用數
+            
+        Returns:
+            Dict: 股票代碼 -> create_ig_post 的結果
+        """
+        if not reports:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(reports)))) as executor:
+            futures = {
+                symbol: executor.submit(self.create_ig_post, symbol, report_content)
+                for symbol, report_content in reports.items()
+            }
+            return {symbol: future.result() for symbol, future in futures.items()}
+    
     def _build_prompt(self, symbol: str, report_content: str) -> str:
         """
         構建給 ChatGPT 的提示詞
@@ -117,42 +145,7 @@ class IgPostCreator:
         """
         將 JSON 數據格式化為 Instagram 貼文格式
         """
-        post = f"📊 {ig_data.get('title', f'{symbol.upper()} Quick Update')}\n\n"
-        
-        # 利好因素
-        if ig_data.get('bullish_highlights'):
-            post += "✅ Bullish Highlights\n\n"
-            for highlight in ig_data['bullish_highlights']:
-                post += f"• {highlight}\n\n"
-        
-        # 風險因素
-        if ig_data.get('key_risks'):
-            post += "⚠️ Key Risks\n\n"
-            for risk in ig_data['key_risks']:
-                post += f"• {risk}\n\n"
-        
-        # 交易觀點
-        if ig_data.get('trading_view'):
-            trading_view = ig_data['trading_view']
-            post += "💡 Trading View\n\n"
-            if trading_view.get('bias'):
-                post += f"Bias: {trading_view['bias']}\n\n"
-            if trading_view.get('suggestion'):
-                post += f"{trading_view['suggestion']}\n\n"
-        
-        # 催化劑
-        if ig_data.get('catalysts'):
-            post += "📌 Short-Term Catalysts\n\n"
-            for catalyst in ig_data['catalysts']:
-                post += f"• {catalyst}\n\n"
-        
-        # 添加免責聲明
-        post += self.disclaimer
-        
-        # 添加 hashtags
-        post += f"\n\n{self._generate_hashtags(symbol)}"
-        
-        return post
+        return render_ig_post(symbol, ig_data, self.disclaimer, self._generate_hashtags(symbol))
     
     def _generate_hashtags(self, symbol: str) -> str:
         """
@@ -188,12 +181,7 @@ class IgPostCreator:
         
         try:
             with open(filename, 'w', encoding='utf-8') as f:
-                f.write("=== INSTAGRAM POST ===\n\n")
-                f.write(post_data['formatted_post'])
-                f.write(f"\n\n=== HASHTAGS ===\n\n")
-                f.write(post_data['hashtags'])
-                f.write(f"\n\n=== RAW JSON ===\n\n")
-                f.write(json.dumps(post_data['raw_json'], ensure_ascii=False, indent=2))
+                f.write(render_ig_post_file(post_data))
             
             return filename
             
@@ -0,0 +1,197 @@
+"""
+Instagram貼文存儲：貼文以結構化JSON（ig_post 數據類型）通過FileManager保存，
+文本文件 SYMBOL_ig_post_YYYY-MM-DD.txt 只是由JSON渲染的導出文件
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from file_manager import FileManager
+from report_templates import render_ig_post_file
+
+
+IG_POST_DATA_TYPE = "ig_post"
+IG_POST_FIELDS = ("formatted_post", "hashtags", "raw_json")
+
+
+def _export_path(file_manager: FileManager, symbol: str, date_str: str) -> Path:
+    """文本導出文件路徑（與Streamlit一致）"""
+    return file_manager._get_data_path(symbol, date_str) / f"{symbol.upper()}_ig_post_{date_str}.txt"
+
+
+def _parse_legacy_text(content: str) -> Dict[str, Any]:
+    """
+    解析舊格式的文本貼文（=== INSTAGRAM POST === / === HASHTAGS === / === RAW JSON ===）
+
+    Args:
+        content: 文件內容
+
+    Returns:
+        Dict: formatted_post, hashtags, raw_json
+    """
+    ig_post = ""
+    hashtags = ""
+    raw_json = {}
+
+    for section in content.split("=== "):
+        if section.startswith("INSTAGRAM POST ==="):
+            ig_post = section.replace("INSTAGRAM POST ===\n\n", "").split("\n\n=== ")[0]
+        elif section.startswith("HASHTAGS ==="):
+            hashtags = section.replace("HASHTAGS ===\n\n", "").split("\n\n=== ")[0]
+        elif section.startswith("RAW JSON ==="):
+            try:
+                raw_json = json.loads(section.replace("RAW JSON ===\n\n", ""))
+            except json.JSONDecodeError:
+                pass
+
+    return {
+        "formatted_post": ig_post.strip(),
+        "hashtags": hashtags.strip(),
+        "raw_json": raw_json
+    }
+
+
+def save_ig_post(file_manager: FileManager, symbol: str, ig_result: Dict[str, Any],
+                 date_str: str = None) -> str:
+    """
+    保存Instagram貼文：JSON為主存儲，同時寫出文本導出文件
+
+    Args:
+        file_manager: 文件管理器
+        symbol: 股票代碼
+        ig_result: IgPostCreator.create_ig_post 的結果
+        date_str: 日期字符串，默認為今日
+
+    Returns:
+        str: 文本導出文件路徑
+    """
+    date_str = date_str or datetime.now().strftime('%Y-%m-%d')
+    post = {field: ig_result[field] for field in IG_POST_FIELDS}
+
+    if not file_manager.save_data(symbol, IG_POST_DATA_TYPE, post, date_str):
+        raise IOError(f"保存 {symbol} IG貼文JSON失敗")
+
+    export_path = _export_path(file_manager, symbol, date_str)
+    with open(export_path, 'w', encoding='utf-8') as f:
+        f.write(render_ig_post_file(post))
+    return str(export_path)
+
+
+def ig_post_exists(file_manager: FileManager, symbol: str, date_str: str = None) -> bool:
+    """貼文是否已存在（JSON或舊格式文本文件）"""
+    date_str = date_str or datetime.now().strftime('%Y-%m-%d')
+    return (file_manager.file_exists(symbol, IG_POST_DATA_TYPE, date_str)
+            or _export_path(file_manager, symbol, date_str).exists())
+
+
+def load_ig_post(file_manager: FileManager, symbol: str, date_str: str = None) -> Dict[str, Any]:
+    """
+    載入已保存的Instagram貼文，優先讀取JSON，沒有時解析舊格式文本文件
+
+    Args:
+        file_manager: 文件管理器
+        symbol: 股票代碼
+        date_str: 日期字符串，默認為今日
+
+    Returns:
+        Dict: {"exists": True, "formatted_post", "hashtags", "raw_json", "filename"}，
+              不存在時為 {"exists": False}
+    """
+    date_str = date_str or datetime.now().strftime('%Y-%m-%d')
+    export_path = _export_path(file_manager, symbol, date_str)
+
+    try:
+        post = file_manager.load_data(symbol, IG_POST_DATA_TYPE, date_str)
+        if isinstance(post, dict) and "formatted_post" in post:
+            result = {field: post.get(field, {} if field == "raw_json" else "") for field in IG_POST_FIELDS}
+        elif export_path.exists():
+            with open(export_path, 'r', encoding='utf-8') as f:
+                result = _parse_legacy_text(f.read())
+        else:
+            return {"exists": False}
+
+        result.update({"exists": True, "filename": str(export_path)})
+        return result
+
+    except Exception as e:
+        return {"exists": False, "error": str(e)}
+
+
+def load_ig_posts_for_date(date_str: str, file_manager: FileManager = None) -> Dict[str, Dict[str, Any]]:
+    """
+    載入某一天所有symbol的貼文
+
+    Args:
+        date_str: 日期字符串
+        file_manager: 文件管理器，默認使用 data/
+
+    Returns:
+        Dict: symbol -> 貼文
+    """
+    file_manager = file_manager or FileManager()
+    date_dir = file_manager.base_data_dir / date_str
+    if not date_dir.is_dir():
+        return {}
+
+    posts = {}
+    for symbol_dir in sorted(date_dir.iterdir()):
+        if not symbol_dir.is_dir():
+            continue
+        post = load_ig_post(file_manager, symbol_dir.name, date_str)
+        if post.get("exists"):
+            posts[symbol_dir.name] = post
+    return posts
+
+
+def export_ig_posts(date_str: str, output_path: str = None, fmt: str = "json",
+                    file_manager: FileManager = None) -> Optional[str]:
+    """
+    導出某一天的所有貼文到一個文件
+
+    Args:
+        date_str: 日期字符串
+        output_path: 輸出文件，默認為 data/YYYY-MM-DD/ig_posts_YYYY-MM-DD.json(.txt)
+        fmt: "json"（symbol -> 貼文）或 "txt"（逐個貼文的發佈文本）
+        file_manager: 文件管理器，默認使用 data/
+
+    Returns:
+        str: 輸出文件路徑，當天沒有貼文時返回None
+    """
+    file_manager = file_manager or FileManager()
+    posts = load_ig_posts_for_date(date_str, file_manager)
+    if not posts:
+        print(f"⚠️ {date_str} 沒有IG貼文")
+        return None
+
+    if output_path is None:
+        output_path = str(file_manager.base_data_dir / date_str / f"ig_posts_{date_str}.{fmt}")
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        if fmt == "json":
+            exported = {
+                symbol: {field: post[field] for field in IG_POST_FIELDS}
+                for symbol, post in posts.items()
+            }
+            json.dump(exported, f, ensure_ascii=False, indent=2)
+        else:
+            sections: List[str] = [
+                f"=== {symbol} ===\n\n{post['formatted_post']}\n\n{post['hashtags']}"
+                for symbol, post in posts.items()
+            ]
+            f.write("\n\n\n".join(sections) + "\n")
+
+    print(f"✅ 已導出 {len(posts)} 個IG貼文: {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="導出某一天的所有Instagram貼文")
+    parser.add_argument("date", nargs="?", default=datetime.now().strftime('%Y-%m-%d'), help="日期 YYYY-MM-DD，默認今日")
+    parser.add_argument("-o", "--output", help="輸出文件路徑")
+    parser.add_argument("-f", "--format", default="json", choices=["json", "txt"])
+    args = parser.parse_args()
+
+    export_ig_posts(args.date, args.output, args.format)
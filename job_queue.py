@@ -0,0 +1,192 @@
+"""
+後台任務隊列：Streamlit界面把耗時的處理提交到後台線程池，頁面只輪詢任務狀態
+
+任務狀態保存在進程級共用的 JobManager 中（加鎖），
+頁面重新運行（rerun）或多個會話同時使用都不會中斷正在執行的任務
+"""
+import itertools
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from config import JOB_MAX_WORKERS, JOB_HISTORY_LIMIT, JOB_LOG_LIMIT
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class JobProgress:
+    """
+    傳給任務函數的進度回報接口：任務通過它寫入日誌和進度，界面從 JobManager 讀取
+    """
+
+    def __init__(self, manager: "JobManager", job_id: str):
+        self._manager = manager
+        self.job_id = job_id
+
+    def log(self, message: str):
+        """添加一條日誌"""
+        self._manager._update(self.job_id, message=message)
+
+    def update(self, progress: float, status_text: str = None):
+        """
+        更新進度
+
+        Args:
+            progress: 0.0 - 1.0
+            status_text: 狀態文本
+        """
+        self._manager._update(self.job_id, progress=progress, status_text=status_text)
+
+
+class JobManager:
+    """
+    後台任務管理器
+
+    - submit() 立即返回任務ID，任務在線程池中執行
+    - 同一個 key（如 "process:AAPL"）同時只會有一個未完成的任務，重複提交返回現有任務
+    - get() / find() / list_jobs() 返回狀態快照，輪詢成本很低
+    """
+
+    def __init__(self, max_workers: int = JOB_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.logger = logging.getLogger("JobManager")
+
+    def submit(self, key: str, label: str, func: Callable[..., Dict[str, Any]], *args, **kwargs) -> str:
+        """
+        提交任務
+
+        Args:
+            key: 任務鍵，相同鍵的未完成任務不會重複提交
+            label: 顯示名稱
+            func: 任務函數，以關鍵字參數 progress 接收 JobProgress，返回結果字典
+            *args, **kwargs: 傳給任務函數的參數
+
+        Returns:
+            str: 任務ID
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job["key"] == key and job["status"] not in JOB_FINISHED_STATES:
+                    return job["id"]
+
+            job_id = f"job-{next(self._ids)}"
+            self._jobs[job_id] = {
+                "id": job_id,
+                "key": key,
+                "label": label,
+                "status": JOB_QUEUED,
+                "progress": 0.0,
+                "status_text": "⏳ 排隊中...",
+                "logs": [],
+                "result": None,
+                "error": None,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None
+            }
+            self._prune()
+
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        self.logger.info(f"📥 已提交任務 {job_id}: {label}")
+        return job_id
+
+    def _run(self, job_id: str, func: Callable[..., Dict[str, Any]], args: tuple, kwargs: dict):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = JOB_RUNNING
+            job["started_at"] = time.time()
+            job["status_text"] = f"🔄 正在處理 {job['label']}..."
+
+        try:
+            result = func(*args, progress=JobProgress(self, job_id), **kwargs)
+            success = not isinstance(result, dict) or result.get("success", True)
+            error = None if success else result.get("error") or "; ".join(result.get("errors", [])) or "處理失敗"
+        except Exception as e:
+            self.logger.error(f"❌ 任務 {job_id} 出錯: {e}\n{traceback.format_exc()}")
+            result, success, error = None, False, str(e)
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = JOB_SUCCEEDED if success else JOB_FAILED
+            job["result"] = result
+            job["error"] = error
+            job["progress"] = 1.0
+            job["status_text"] = "✅ 處理完成！" if success else "❌ 處理失敗"
+            job["finished_at"] = time.time()
+
+    def _update(self, job_id: str, message: str = None, progress: float = None, status_text: str = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if message is not None:
+                job["logs"].append(message)
+                del job["logs"][:-JOB_LOG_LIMIT]
+            if progress is not None:
+                job["progress"] = max(0.0, min(1.0, progress))
+            if status_text is not None:
+                job["status_text"] = status_text
+
+    def _prune(self):
+        """只保留最近 JOB_HISTORY_LIMIT 個已完成任務（調用方持有鎖）"""
+        finished = sorted(
+            (job for job in self._jobs.values() if job["status"] in JOB_FINISHED_STATES),
+            key=lambda job: job["finished_at"]
+        )
+        for job in finished[:max(0, len(finished) - JOB_HISTORY_LIMIT)]:
+            del self._jobs[job["id"]]
+
+    @staticmethod
+    def _snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+        snapshot = dict(job)
+        snapshot["logs"] = list(job["logs"])
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """獲取任務狀態快照"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def find(self, key: str) -> Optional[Dict[str, Any]]:
+        """獲取某個鍵最近一次提交的任務狀態快照"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job["key"] == key]
+            if not jobs:
+                return None
+            return self._snapshot(max(jobs, key=lambda job: job["submitted_at"]))
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """所有任務的狀態快照（最新的在前，不含日誌）"""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda job: job["submitted_at"], reverse=True)
+            return [{k: v for k, v in job.items() if k != "logs"} for job in jobs]
+
+    def shutdown(self, wait: bool = True):
+        """關閉線程池"""
+        self._executor.shutdown(wait=wait)
+
+
+# 進程內共用的任務管理器（Streamlit所有會話共用）
+_shared_manager: Optional[JobManager] = None
+_shared_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """獲取共用的任務管理器"""
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is None:
+            _shared_manager = JobManager()
+        return _shared_manager
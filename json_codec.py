@@ -0,0 +1,305 @@
+"""
+數據JSON的壓縮存儲
+
+FileManager 按 JSON_COMPRESSION 保存數據文件：
+- "none": {data_type}_{date}.json（縮進2格，與舊數據相同）
+- "zstd": {data_type}_{date}.json.zst，使用從已有數據訓練的共用字典（未安裝zstandard時改用gzip）
+- "gzip": {data_type}_{date}.json.gz
+
+讀取時按文件後綴自動解壓，三種格式可以在同一個目錄中共存。
+zstd幀頭記錄了字典ID，字典保存在 data/_dicts/{字典ID}.zdict，重新訓練後舊文件仍用舊字典解壓
+"""
+import gzip
+import json
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import JSON_COMPRESSION, JSON_COMPRESSION_LEVEL, JSON_ZSTD_DICT_DIR, JSON_ZSTD_DICT_SIZE
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+CODEC_SUFFIXES = {"none": ".json", "zstd": ".json.zst", "gzip": ".json.gz"}
+# 長後綴在前，保證 strip_data_suffix 先匹配 .json.zst / .json.gz
+DATA_FILE_SUFFIXES = (".json.zst", ".json.gz", ".json")
+CURRENT_DICT_FILENAME = "current"
+# 數據目錄下的日期文件夾名
+DATE_DIR_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def storage_suffix(codec: str = None) -> str:
+    """
+    新保存的數據文件使用的後綴
+
+    Args:
+        codec: "none"、"zstd" 或 "gzip"，默認為 JSON_COMPRESSION
+
+    Returns:
+        str: ".json"、".json.zst" 或 ".json.gz"
+    """
+    codec = (codec or JSON_COMPRESSION or "none").lower()
+    if codec == "zstd" and zstandard is None:
+        codec = "gzip"
+    return CODEC_SUFFIXES.get(codec, ".json")
+
+
+def strip_data_suffix(name: str) -> Optional[str]:
+    """
+    去掉數據文件的後綴
+
+    Args:
+        name: 文件名，如 "analysis_2025-08-15.json.zst"
+
+    Returns:
+        str: 如 "analysis_2025-08-15"，不是數據文件時返回None
+    """
+    for suffix in DATA_FILE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return None
+
+
+def data_file_variants(file_path: Path) -> List[Path]:
+    """
+    數據文件可能的存儲路徑，當前配置的格式在前
+
+    Args:
+        file_path: 數據文件路徑（.json 或任一壓縮後綴）
+
+    Returns:
+        List[Path]: 同一數據文件的所有後綴變體
+    """
+    file_path = Path(file_path)
+    stem = strip_data_suffix(file_path.name) or file_path.name
+    preferred = storage_suffix()
+    suffixes = [preferred] + [suffix for suffix in DATA_FILE_SUFFIXES if suffix != preferred]
+    return [file_path.with_name(stem + suffix) for suffix in suffixes]
+
+
+def _dict_dir(base_data_dir: Path) -> Path:
+    return Path(base_data_dir) / JSON_ZSTD_DICT_DIR
+
+
+@lru_cache(maxsize=8)
+def _load_dictionary(dict_path: str, mtime_ns: int):
+    with open(dict_path, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+def _dictionary_by_id(base_data_dir: Path, dict_id: int):
+    path = _dict_dir(base_data_dir) / f"{dict_id}.zdict"
+    try:
+        return _load_dictionary(str(path), path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        raise ValueError(f"缺少zstd字典 {path}，無法解壓")
+
+
+def current_dictionary(base_data_dir: Path):
+    """當前用於壓縮的字典，未訓練時返回None"""
+    if zstandard is None:
+        return None
+    try:
+        dict_id = int((_dict_dir(base_data_dir) / CURRENT_DICT_FILENAME).read_text().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+    return _dictionary_by_id(base_data_dir, dict_id)
+
+
+def encode_json(data: Any, suffix: str, base_data_dir: Path) -> bytes:
+    """
+    按後綴序列化數據
+
+    Args:
+        data: 要保存的數據
+        suffix: 存儲後綴（見 storage_suffix）
+        base_data_dir: 數據根目錄（用於查找zstd字典）
+
+    Returns:
+        bytes: 文件內容
+    """
+    if suffix == ".json":
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+    # 壓縮文件不需要縮進，字典已覆蓋重複的鍵名
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if suffix == ".json.gz":
+        return gzip.compress(raw, compresslevel=min(JSON_COMPRESSION_LEVEL, 9), mtime=0)
+    if suffix == ".json.zst":
+        dictionary = current_dictionary(base_data_dir)
+        compressor = zstandard.ZstdCompressor(level=JSON_COMPRESSION_LEVEL, dict_data=dictionary)
+        return compressor.compress(raw)
+    raise ValueError(f"未知的數據文件後綴: {suffix}")
+
+
+def decode_json(content: bytes, name: str, base_data_dir: Path) -> Any:
+    """
+    按文件名後綴解壓並解析數據
+
+    Args:
+        content: 文件內容
+        name: 文件名或成員名（用於判斷格式）
+        base_data_dir: 數據根目錄（用於查找zstd字典）
+
+    Returns:
+        Any: 解析後的數據
+
+    Raises:
+        json.JSONDecodeError: JSON無效
+        ValueError: 無法解壓（文件損壞、缺少字典或未安裝zstandard）
+    """
+    if name.endswith(".json.gz"):
+        try:
+            content = gzip.decompress(content)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"無法解壓 {name}: {e}")
+    elif name.endswith(".json.zst"):
+        if zstandard is None:
+            raise ValueError(f"讀取 {name} 需要安裝 zstandard")
+        try:
+            dict_id = zstandard.get_frame_parameters(content).dict_id
+            dictionary = _dictionary_by_id(base_data_dir, dict_id) if dict_id else None
+            content = zstandard.ZstdDecompressor(dict_data=dictionary).decompress(content)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"無法解壓 {name}: {e}")
+    return json.loads(content.decode("utf-8"))
+
+
+def read_json_file(file_path: Path, base_data_dir: Path) -> Any:
+    """讀取任一格式的數據文件"""
+    with open(file_path, "rb") as f:
+        return decode_json(f.read(), Path(file_path).name, base_data_dir)
+
+
+def write_json_file(file_path: Path, data: Any, base_data_dir: Path):
+    """按 file_path 的後綴保存數據（先寫臨時文件再替換，讀取方不會看到寫了一半的文件）"""
+    file_path = Path(file_path)
+    stem = strip_data_suffix(file_path.name)
+    if stem is None:
+        raise ValueError(f"不是數據文件: {file_path}")
+    content = encode_json(data, file_path.name[len(stem):], base_data_dir)
+    fd, tmp_path = tempfile.mkstemp(prefix=".data_", suffix=".tmp", dir=file_path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def list_data_files(base_data_dir: Path) -> List[Path]:
+    """數據根目錄下所有日期目錄中的數據文件"""
+    return sorted(
+        path for path in Path(base_data_dir).glob("*/*/*")
+        if path.is_file() and strip_data_suffix(path.name) and DATE_DIR_PATTERN.match(path.parent.parent.name)
+    )
+
+
+def train_dictionary(base_data_dir: Path = Path("data"), dict_size: int = JSON_ZSTD_DICT_SIZE,
+                     max_samples: int = 2000) -> Dict[str, Any]:
+    """
+    用已有數據文件訓練zstd字典並設為當前字典
+
+    Args:
+        base_data_dir: 數據根目錄
+        dict_size: 字典大小（字節）
+        max_samples: 最多使用的樣本數（取最新的文件）
+
+    Returns:
+        Dict: dict_id, path, samples
+    """
+    if zstandard is None:
+        raise ImportError("訓練字典需要安裝 zstandard")
+
+    samples = []
+    for path in reversed(list_data_files(base_data_dir)):
+        try:
+            data = read_json_file(path, base_data_dir)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 跳過 {path}: {e}")
+            continue
+        # 樣本使用與壓縮時相同的緊湊格式
+        samples.append(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        if len(samples) >= max_samples:
+            break
+    if not samples:
+        raise ValueError(f"{base_data_dir} 下沒有可用於訓練的數據文件")
+
+    dictionary = zstandard.train_dictionary(dict_size, samples)
+    dict_id = dictionary.dict_id()
+    dict_dir = _dict_dir(base_data_dir)
+    dict_dir.mkdir(parents=True, exist_ok=True)
+    dict_path = dict_dir / f"{dict_id}.zdict"
+    with open(dict_path, "wb") as f:
+        f.write(dictionary.as_bytes())
+    (dict_dir / CURRENT_DICT_FILENAME).write_text(str(dict_id))
+
+    print(f"✅ 已用 {len(samples)} 個數據文件訓練zstd字典: {dict_path}")
+    return {"dict_id": dict_id, "path": str(dict_path), "samples": len(samples)}
+
+
+def convert_files(base_data_dir: Path = Path("data"), codec: str = None, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    把已有數據文件轉換為指定格式（解壓後校驗一致才刪除原文件）
+
+    Args:
+        base_data_dir: 數據根目錄
+        codec: 目標格式，默認為 JSON_COMPRESSION
+        dry_run: 只統計不修改
+
+    Returns:
+        Dict: files, bytes_before, bytes_after
+    """
+    suffix = storage_suffix(codec)
+    result = {"files": 0, "bytes_before": 0, "bytes_after": 0}
+    for path in list_data_files(base_data_dir):
+        if path.name.endswith(suffix):
+            continue
+        target = path.with_name(strip_data_suffix(path.name) + suffix)
+        data = read_json_file(path, base_data_dir)
+        content = encode_json(data, suffix, base_data_dir)
+        result["files"] += 1
+        result["bytes_before"] += path.stat().st_size
+        result["bytes_after"] += len(content)
+        if dry_run:
+            continue
+        write_json_file(target, data, base_data_dir)
+        if read_json_file(target, base_data_dir) != data:
+            target.unlink()
+            raise IOError(f"{target} 校驗失敗")
+        os.utime(target, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns))
+        path.unlink()
+
+    if result["files"]:
+        print(f"{'📊 將轉換' if dry_run else '✅ 已轉換'} {result['files']} 個數據文件為 {suffix}："
+              f"{result['bytes_before'] / 1024:.0f} KB -> {result['bytes_after'] / 1024:.0f} KB")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="數據JSON壓縮存儲工具")
+    parser.add_argument("--data-dir", default="data", help="數據根目錄")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train_parser = subparsers.add_parser("train", help="用已有數據訓練zstd字典")
+    train_parser.add_argument("--dict-size", type=int, default=JSON_ZSTD_DICT_SIZE, help="字典大小（字節）")
+    train_parser.add_argument("--max-samples", type=int, default=2000, help="最多使用的樣本數")
+    convert_parser = subparsers.add_parser("convert", help="把已有數據文件轉換為指定格式")
+    convert_parser.add_argument("--codec", choices=sorted(CODEC_SUFFIXES), default=None,
+                                help="目標格式，默認為 JSON_COMPRESSION")
+    convert_parser.add_argument("--dry-run", action="store_true", help="只顯示壓縮效果")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train_dictionary(Path(args.data_dir), args.dict_size, args.max_samples)
+    else:
+        convert_files(Path(args.data_dir), args.codec, args.dry_run)
@@ -0,0 +1,341 @@
+"""
+LLM輸出的JSON修復
+
+單次掃描LLM返回的文本，修復常見問題並報告做了哪些修改：
+- 去掉 ```json 代碼塊標記和JSON前後的說明文字
+- 刪除尾隨逗號、多餘的逗號和冒號，補上缺少的逗號和冒號
+- 字符串中的換行等控制字符和無效轉義
+- Python風格的 True/False/None、NaN，未加引號的鍵
+- 輸出被截斷：補全未閉合的字符串、數組和對象，丟棄被截斷的鍵
+
+只在修復後的文本能被 json.loads 解析時才算修復成功。
+只做了 LOSSLESS_FIXES 中的修復時結果與LLM的本意一致（lossless）；
+其他修復是猜測（補上的逗號、冒號和值，加引號的值，丟棄的第二個JSON值）或補全截斷，調用方應優先重試
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_FENCE_PATTERN = re.compile(r"^```[a-zA-Z]*\s*\n?(.*?)\n?```", re.DOTALL)
+_NUMBER_PATTERN = re.compile(r"^-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?$")
+_KEY_PATTERN = re.compile(r"^[A-Za-z_$][\w$-]*$")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_NON_JSON_NUMBERS = {"NaN": "null", "Infinity": "null", "-Infinity": "null", "undefined": "null"}
+_ESCAPES = set('"\\/bfnrtu')
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_DELIMITERS = set(' \t\r\n,:[]{}"')
+
+# 不改變內容的修復：只做了這些修復時可以直接使用結果
+LOSSLESS_FIXES = (
+    "去掉代碼塊標記",
+    "刪除JSON前的文字",
+    "刪除JSON後的文字",
+    "刪除尾隨逗號",
+    "轉義字符串中的控制字符",
+    "修復無效的轉義",
+    "轉換Python字面量（True/False/None）",
+    "為鍵加上引號",
+)
+# 表示輸出被截斷的修復（只在文本結束時仍有未閉合的結構時出現）
+TRUNCATION_FIXES = ("補全未閉合的字符串", "補全未閉合的括號", "丟棄被截斷的鍵", "補全被截斷的值")
+
+
+class _JsonRepairer:
+    """掃描狀態：輸出token、容器棧和每層容器期待的下一個token"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.out: List[str] = []
+        self.stack: List[str] = []
+        # 對象: key / colon / value / comma；數組: value / comma
+        self.expect: List[str] = []
+        self.fixes: List[str] = []
+
+    def fix(self, message: str):
+        if message not in self.fixes:
+            self.fixes.append(message)
+
+    def run(self) -> str:
+        text = self.text
+        while self.pos < len(text):
+            char = text[self.pos]
+            if char in " \t\r\n":
+                self.pos += 1
+            elif not self.stack and self.out:
+                # 頂層JSON已完整；剩下的如果還有JSON或括號（如 {"a":1}{"b":2}）會被丟棄，不能當作說明文字
+                rest = text[self.pos:]
+                self.fix("丟棄JSON後的其他內容" if any(char in rest for char in "{}[]") else "刪除JSON後的文字")
+                break
+            elif char == '"':
+                self._value(self._read_string())
+            elif char in "{[":
+                self._before_value()
+                self.out.append(char)
+                self.stack.append(char)
+                self.expect.append("key" if char == "{" else "value")
+                self.pos += 1
+            elif char in "}]":
+                self._close(char)
+                self.pos += 1
+            elif char == ":":
+                if self.stack and self.expect[-1] == "colon":
+                    self.out.append(":")
+                    self.expect[-1] = "value"
+                else:
+                    self.fix("刪除多餘的冒號")
+                self.pos += 1
+            elif char == ",":
+                if self.stack and self.expect[-1] == "comma":
+                    self.out.append(",")
+                    self.expect[-1] = "key" if self.stack[-1] == "{" else "value"
+                else:
+                    self.fix("刪除多餘的逗號")
+                self.pos += 1
+            else:
+                self._value(self._read_bare())
+
+        while self.stack:
+            self.fix("補全未閉合的括號")
+            self._close("}" if self.stack[-1] == "{" else "]", at_end=True)
+        return "".join(self.out)
+
+    def _read_string(self) -> str:
+        """讀取一個字符串token（pos 指向開頭的引號）"""
+        text = self.text
+        chars = ['"']
+        self.pos += 1
+        while self.pos < len(text):
+            char = text[self.pos]
+            if char == '"':
+                self.pos += 1
+                chars.append('"')
+                return "".join(chars)
+            if char == "\\":
+                escape = text[self.pos + 1:self.pos + 2]
+                if escape == "u" and re.match(r"^[0-9a-fA-F]{4}$", text[self.pos + 2:self.pos + 6]):
+                    chars.append(text[self.pos:self.pos + 6])
+                    self.pos += 6
+                    continue
+                if escape and escape in _ESCAPES and escape != "u":
+                    chars.append("\\" + escape)
+                    self.pos += 2
+                    continue
+                if not escape:
+                    # 在轉義符處被截斷
+                    self.pos += 1
+                    continue
+                self.fix("修復無效的轉義")
+                chars.append("\\\\")
+                self.pos += 1
+                continue
+            if ord(char) < 0x20:
+                self.fix("轉義字符串中的控制字符")
+                chars.append(_CONTROL_ESCAPES.get(char, f"\\u{ord(char):04x}"))
+            else:
+                chars.append(char)
+            self.pos += 1
+
+        self.fix("補全未閉合的字符串")
+        chars.append('"')
+        return "".join(chars)
+
+    def _read_bare(self) -> str:
+        """讀取一個未加引號的token（數字、字面量或未加引號的鍵）"""
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos] not in _DELIMITERS:
+            self.pos += 1
+        token = self.text[start:self.pos]
+        at_end = self.pos >= len(self.text)
+
+        if self.stack and self.stack[-1] == "{" and self.expect[-1] == "key":
+            if _KEY_PATTERN.match(token):
+                self.fix("為鍵加上引號")
+                return json.dumps(token)
+            return token
+        if token in ("true", "false", "null") or _NUMBER_PATTERN.match(token):
+            return token
+        if token in _PYTHON_LITERALS:
+            self.fix("轉換Python字面量（True/False/None）")
+            return _PYTHON_LITERALS[token]
+        if token in _NON_JSON_NUMBERS:
+            self.fix("把NaN/Infinity/undefined替換為null")
+            return _NON_JSON_NUMBERS[token]
+        if at_end:
+            # 被截斷的字面量或數字
+            self.fix("補全被截斷的值")
+            for literal in ("true", "false", "null"):
+                if literal.startswith(token):
+                    return literal
+            number = token.rstrip(".eE+-")
+            return number if _NUMBER_PATTERN.match(number) else "null"
+        self.fix("為字符串值加上引號")
+        return json.dumps(token, ensure_ascii=False)
+
+    def _before_value(self):
+        """值開始前：補上缺少的逗號或冒號"""
+        if not self.stack:
+            return
+        expect = self.expect[-1]
+        if expect == "comma":
+            self.fix("補上缺少的逗號")
+            self.out.append(",")
+            self.expect[-1] = "key" if self.stack[-1] == "{" else "value"
+        elif expect == "colon":
+            self.fix("補上缺少的冒號")
+            self.out.append(":")
+            self.expect[-1] = "value"
+
+    def _value(self, token: str):
+        """添加一個字符串/數字/字面量token（對象中期待鍵時作為鍵）"""
+        self._before_value()
+        self.out.append(token)
+        if not self.stack:
+            return
+        if self.stack[-1] == "{" and self.expect[-1] == "key":
+            self.expect[-1] = "colon"
+        else:
+            self.expect[-1] = "comma"
+
+    def _close(self, char: str, at_end: bool = False):
+        """關閉容器；括號不匹配時先關閉內層容器，外層沒有對應容器時當作關閉當前容器"""
+        opener = "{" if char == "}" else "["
+        if opener not in self.stack:
+            # 如 {"a": 1] —— 括號寫錯，不是輸出被截斷
+            self.fix("修復不匹配的括號")
+            char = "}" if self.stack[-1] == "{" else "]"
+            opener = self.stack[-1]
+        while self.stack[-1] != opener:
+            self.fix("補全未閉合的括號" if at_end else "修復不匹配的括號")
+            self._close("}" if self.stack[-1] == "{" else "]", at_end)
+
+        expect = self.expect[-1]
+        if expect == "colon":
+            # 只有鍵沒有值
+            if at_end:
+                self.fix("丟棄被截斷的鍵")
+                self.out.pop()
+            else:
+                self.fix("補上缺少的值")
+                self.out.append(":null")
+        elif expect == "value" and self.out[-1] == ":":
+            if at_end:
+                self.fix("丟棄被截斷的鍵")
+                self.out.pop()
+                self.out.pop()
+            else:
+                self.fix("補上缺少的值")
+                self.out.append("null")
+        if self.out[-1] == ",":
+            if not at_end:
+                self.fix("刪除尾隨逗號")
+            self.out.pop()
+
+        self.out.append(char)
+        self.stack.pop()
+        self.expect.pop()
+        if self.stack:
+            self.expect[-1] = "comma"
+
+
+def _reject_constant(name: str):
+    """json.loads 默認接受 NaN/Infinity，它們不是有效的JSON"""
+    raise ValueError(f"非JSON常量: {name}")
+
+
+def loads_strict(text: str) -> Any:
+    """
+    嚴格解析JSON（拒絕 NaN/Infinity），與 repair_json 判斷原文是否有效的標準一致
+
+    Raises:
+        ValueError: 不是有效的JSON（json.JSONDecodeError 也是 ValueError）
+    """
+    return json.loads(text, parse_constant=_reject_constant)
+
+
+def _strip_wrapping(text: str, fixes: List[str]) -> Optional[str]:
+    """去掉代碼塊標記和JSON開始前的文字，找不到對象或數組時返回None"""
+    text = text.strip()
+    fence = _FENCE_PATTERN.match(text)
+    if fence:
+        fixes.append("去掉代碼塊標記")
+        text = fence.group(1).strip()
+    elif text.startswith("```"):
+        # 只有開頭的標記（輸出被截斷）
+        fixes.append("去掉代碼塊標記")
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        return None
+    start = min(starts)
+    if start > 0:
+        fixes.append("刪除JSON前的文字")
+    return text[start:]
+
+
+def repair_json(text: str) -> Dict[str, Any]:
+    """
+    解析LLM返回的JSON，無效時嘗試修復
+
+    Args:
+        text: LLM返回的文本
+
+    Returns:
+        Dict: success, data（解析結果）, text（修復後的JSON文本）,
+              fixes（做了哪些修復，原文有效時為空）, truncated（是否補全了被截斷的輸出）,
+              lossless（是否只做了不改變內容的修復，可以直接使用）, error
+    """
+    result = {"success": False, "data": None, "text": None, "fixes": [], "truncated": False,
+              "lossless": False, "error": None}
+    if not isinstance(text, str) or not text.strip():
+        result["error"] = "空的響應"
+        return result
+
+    try:
+        data = loads_strict(text)
+        result.update({"success": True, "data": data, "text": text.strip(), "lossless": True})
+        return result
+    except ValueError as e:
+        original_error = e
+
+    fixes: List[str] = []
+    body = _strip_wrapping(text, fixes)
+    if body is None:
+        result["error"] = f"找不到JSON對象或數組: {original_error}"
+        return result
+
+    repairer = _JsonRepairer(body)
+    repaired = repairer.run()
+    fixes.extend(fix for fix in repairer.fixes if fix not in fixes)
+    result.update({"fixes": fixes, "text": repaired,
+                   "truncated": any(fix in TRUNCATION_FIXES for fix in fixes)})
+    try:
+        result.update({"success": True, "data": json.loads(repaired),
+                       "lossless": all(fix in LOSSLESS_FIXES for fix in fixes)})
+    except json.JSONDecodeError as e:
+        result["error"] = f"修復後仍無法解析: {e}"
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="修復LLM輸出的JSON")
+    parser.add_argument("file", nargs="?", help="輸入文件，默認讀取標準輸入")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            source = f.read()
+    else:
+        source = sys.stdin.read()
+
+    repair = repair_json(source)
+    for message in repair["fixes"]:
+        print(f"🔧 {message}", file=sys.stderr)
+    if not repair["success"]:
+        print(f"❌ {repair['error']}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(repair["data"], ensure_ascii=False, indent=2))
@@ -1,5 +1,6 @@
 from openai import OpenAI
 import os
+import threading
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from config import system_prompts_deepseek
@@ -27,6 +28,14 @@ class DeepSeek:
             base_url="https://api.deepseek.com"
         )
         
+        # 最近一次 chat() 的token用量（按線程記錄，並行調用時互不覆蓋）
+        self._local = threading.local()
+        
+    @property
+    def last_usage(self) -> Optional[Dict]:
+        """當前線程最近一次 chat() 的token用量"""
+        return getattr(self._local, "usage", None)
+        
     def chat(self, user_message: str, use_system_prompt: bool = True, custom_system_prompt: str = None, 
              json_output: bool = False, max_tokens: int = 2000) -> str:
         """
@@ -69,6 +78,14 @@ class DeepSeek:
             # Make API call using OpenAI SDK format
             response = self.client.chat.completions.create(**api_params)
             
+            # 記錄本次調用的token用量，供預算規劃器比對
+            usage = getattr(response, "usage", None)
+            self._local.usage = {
+                "prompt_tokens": getattr(usage, "prompt_tokens", None),
+                "completion_tokens": getattr(usage, "completion_tokens", None),
+                "finish_reason": response.choices[0].finish_reason
+            }
+            
             return response.choices[0].message.content.strip()
             
         except Exception as e:
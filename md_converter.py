@@ -0,0 +1,146 @@
+"""
+Markdown→HTML轉換器：報告顯示、PDF和Markdown文件轉換共用同一個已編譯的轉換器實例
+
+- markdown-it（CommonMark）：解析器無狀態，一個實例可在多線程中共用
+- python-markdown：Markdown實例有狀態，每個線程一個實例，轉換前 reset()
+"""
+import threading
+from functools import lru_cache
+from typing import Dict
+
+from config import MARKDOWN_ENGINE
+
+try:
+    from markdown_it import MarkdownIt
+except ImportError:
+    MarkdownIt = None
+
+try:
+    import markdown
+except ImportError:
+    markdown = None
+
+
+MARKDOWN_ENGINES = ("markdown-it", "python-markdown")
+
+
+def _available(engine: str) -> bool:
+    if engine == "markdown-it":
+        return MarkdownIt is not None
+    return markdown is not None
+
+
+class MarkdownConverter:
+    """
+    可重複使用、線程安全的Markdown→HTML轉換器
+
+    支持報告使用的語法：標題、段落、列表、表格、圍欄代碼塊和行內HTML
+    """
+
+    def __init__(self, breaks: bool = True, engine: str = MARKDOWN_ENGINE):
+        """
+        Args:
+            breaks: 段落內的換行是否轉換為<br>（與python-markdown的nl2br擴展一致）
+            engine: "markdown-it" 或 "python-markdown"，未安裝時改用另一個
+        """
+        self.breaks = breaks
+        candidates = [engine] + [name for name in MARKDOWN_ENGINES if name != engine]
+        self.engine = next((name for name in candidates if _available(name)), None)
+
+        self._parser = None
+        self._local = threading.local()
+        if self.engine == "markdown-it":
+            self._parser = MarkdownIt("commonmark", {"html": True, "breaks": breaks}).enable("table")
+
+    def _python_markdown(self):
+        """當前線程的python-markdown實例"""
+        md = getattr(self._local, "md", None)
+        if md is None:
+            extensions = ['tables', 'fenced_code'] + (['nl2br'] if self.breaks else [])
+            md = markdown.Markdown(extensions=extensions)
+            self._local.md = md
+        return md
+
+    def convert(self, text: str) -> str:
+        """
+        將Markdown轉換為HTML
+
+        Args:
+            text: Markdown內容
+
+        Returns:
+            str: HTML內容
+        """
+        if self.engine == "markdown-it":
+            return self._parser.render(text)
+        if self.engine == "python-markdown":
+            return self._python_markdown().reset().convert(text)
+        # 沒有可用的Markdown庫
+        return text.replace('\n', '<br>')
+
+
+@lru_cache(maxsize=None)
+def get_converter(breaks: bool = True) -> MarkdownConverter:
+    """
+    獲取共用的轉換器（每種換行模式每個進程只創建一次）
+
+    Args:
+        breaks: 段落內的換行是否轉換為<br>
+
+    Returns:
+        MarkdownConverter: 轉換器
+    """
+    return MarkdownConverter(breaks=breaks)
+
+
+def convert_markdown(text: str, breaks: bool = True) -> str:
+    """使用共用轉換器將Markdown轉換為HTML"""
+    return get_converter(breaks).convert(text)
+
+
+def benchmark_converters(md_path: str, runs: int = 200) -> Dict[str, float]:
+    """
+    比較各轉換方式的單份報告耗時（毫秒）
+
+    Args:
+        md_path: 用於測試的Markdown報告
+        runs: 每種方式轉換的次數
+
+    Returns:
+        Dict[str, float]: 轉換方式 -> 每份報告毫秒數
+    """
+    import time
+
+    with open(md_path, "r", encoding="utf-8") as f:
+        md_content = f.read()
+
+    cases = {}
+    for engine in MARKDOWN_ENGINES:
+        if _available(engine):
+            cases[f"{engine} (共用實例)"] = MarkdownConverter(engine=engine).convert
+    if markdown is not None:
+        # 原有方式：每次調用都創建新的Markdown實例
+        cases["python-markdown (每次新建)"] = lambda text: markdown.markdown(text, extensions=['tables', 'nl2br'])
+
+    results = {}
+    for name, convert in cases.items():
+        convert(md_content)  # 預熱
+        start = time.perf_counter()
+        for _ in range(runs):
+            convert(md_content)
+        results[name] = (time.perf_counter() - start) * 1000 / runs
+
+    for name, ms in results.items():
+        print(f"📊 {name:<28} {ms:7.2f} ms/報告")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Markdown轉換器性能測試")
+    parser.add_argument("md_path", help="用於測試的Markdown報告文件")
+    parser.add_argument("-n", "--runs", type=int, default=200, help="每種方式轉換的次數")
+    args = parser.parse_args()
+
+    benchmark_converters(args.md_path, args.runs)
@@ -0,0 +1,182 @@
+"""
+新聞基本面分析：新聞量小時單次調用DeepSeek，新聞量大時先分塊並行摘要（map），再綜合分析（reduce）
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+from config import (
+    NEWS_ANALYSIS_PROMPT,
+    NEWS_CHUNK_SUMMARY_PROMPT,
+    NEWS_MAP_REDUCE_THRESHOLD_TOKENS,
+    NEWS_MAP_REDUCE_CHUNK_TOKENS,
+    NEWS_MAP_REDUCE_MAX_WORKERS
+)
+from run import safe_json_dumps, retry_llm_call
+from token_budget import TokenBudgetPlanner
+
+
+def split_articles_into_chunks(articles: List[Any], planner: TokenBudgetPlanner,
+                               chunk_tokens: int = None) -> List[List[Any]]:
+    """
+    按token數將文章分塊，保持原有順序
+
+    Args:
+        articles: 文章列表
+        planner: 用於估算tokens的預算規劃器
+        chunk_tokens: 每塊的token上限，默認為 NEWS_MAP_REDUCE_CHUNK_TOKENS
+
+    Returns:
+        List[List]: 分塊後的文章列表
+    """
+    chunk_tokens = chunk_tokens or NEWS_MAP_REDUCE_CHUNK_TOKENS
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for article in articles:
+        article_tokens = planner.count_tokens(safe_json_dumps(article, ensure_ascii=False, indent=2))
+        # 單篇超過上限時獨立成塊，由 fit_news 負責截短
+        if current and current_tokens + article_tokens > chunk_tokens:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(article)
+        current_tokens += article_tokens
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def _summarize_chunk(deepseek, planner: TokenBudgetPlanner, chunk: List[Any], index: int, total: int) -> Dict[str, Any]:
+    """
+    摘要一個新聞分塊（map階段）
+
+    Returns:
+        Dict: 摘要結果；失敗時退回只含標題和日期的精簡新聞
+    """
+    chunk_news = planner.fit_news({"articles": chunk}, "news_chunk_summary", NEWS_CHUNK_SUMMARY_PROMPT)
+    user_prompt = safe_json_dumps(chunk_news, ensure_ascii=False, indent=2)
+    plan = planner.plan("news_chunk_summary", NEWS_CHUNK_SUMMARY_PROMPT, user_prompt)
+
+    def deepseek_chunk_call():
+        return deepseek.chat(
+            user_prompt,
+            use_system_prompt=True,
+            custom_system_prompt=NEWS_CHUNK_SUMMARY_PROMPT,
+            json_output=True,
+            max_tokens=plan["max_tokens"]
+        )
+
+    try:
+        summary_text = retry_llm_call(deepseek_chunk_call, max_retries=3, delay=2, expect_json=True, budget_plan=plan)
+        planner.record_usage(plan, deepseek.last_usage)
+        summary = json.loads(summary_text)
+        print(f"✅ 新聞分塊 {index}/{total} 摘要完成 ({len(chunk)} 篇)")
+        return summary
+    except Exception as e:
+        print(f"⚠️ 新聞分塊 {index}/{total} 摘要失敗，改用標題: {e}")
+        return {
+            "articles": [
+                {
+                    "title": article.get("title", ""),
+                    "publishedAt": article.get("publishedAt", "")
+                }
+                for article in chunk if isinstance(article, dict)
+            ]
+        }
+
+
+def analyze_news_map_reduce(deepseek, planner: TokenBudgetPlanner, news: Dict[str, Any],
+                            financial_data: Any) -> str:
+    """
+    分塊並行摘要新聞後，對摘要和基本面數據進行綜合分析
+
+    Args:
+        deepseek: DeepSeek客戶端
+        planner: DeepSeek模型的預算規劃器
+        news: 新聞數據 ({"articles": [...]})
+        financial_data: 基本面數據
+
+    Returns:
+        str: 分析結果（JSON文本）
+    """
+    articles = news.get("articles", [])
+    chunks = split_articles_into_chunks(articles, planner)
+    total = len(chunks)
+    print(f"🧩 新聞量較大 ({len(articles)} 篇)，分為 {total} 塊並行摘要...")
+
+    # map：並行摘要各分塊
+    with ThreadPoolExecutor(max_workers=min(NEWS_MAP_REDUCE_MAX_WORKERS, total)) as executor:
+        summaries = list(executor.map(
+            lambda item: _summarize_chunk(deepseek, planner, item[1], item[0], total),
+            enumerate(chunks, 1)
+        ))
+
+    # reduce：基於摘要和基本面數據進行最終分析
+    user_prompt = safe_json_dumps({
+        "news_summaries": summaries,
+        "article_count": len(articles),
+        "financial_data": financial_data
+    }, ensure_ascii=False, indent=2)
+    plan = planner.plan("analysis", NEWS_ANALYSIS_PROMPT, user_prompt)
+
+    def deepseek_reduce_call():
+        return deepseek.chat(
+            user_prompt,
+            use_system_prompt=True,
+            custom_system_prompt=NEWS_ANALYSIS_PROMPT,
+            json_output=True,
+            max_tokens=plan["max_tokens"]
+        )
+
+    report_text = retry_llm_call(deepseek_reduce_call, max_retries=5, delay=3, expect_json=True, budget_plan=plan)
+    planner.record_usage(plan, deepseek.last_usage)
+    return report_text
+
+
+def run_news_analysis(deepseek, news: Any, financial_data: Any, planner: TokenBudgetPlanner = None) -> str:
+    """
+    執行新聞基本面分析，新聞量超過閾值時自動切換為map-reduce模式
+
+    Args:
+        deepseek: DeepSeek客戶端
+        news: 新聞數據
+        financial_data: 基本面數據
+        planner: 預算規劃器，默認按DeepSeek模型創建
+
+    Returns:
+        str: 分析結果（JSON文本）
+    """
+    if planner is None:
+        planner = TokenBudgetPlanner(deepseek.model)
+
+    articles = news.get("articles") if isinstance(news, dict) else None
+    news_tokens = planner.count_tokens(safe_json_dumps(news, ensure_ascii=False, indent=2))
+
+    if isinstance(articles, list) and len(articles) > 1 and news_tokens > NEWS_MAP_REDUCE_THRESHOLD_TOKENS:
+        return analyze_news_map_reduce(deepseek, planner, news, financial_data)
+
+    # 單次分析
+    doc_tokens = planner.count_tokens(safe_json_dumps(financial_data, ensure_ascii=False, indent=2))
+    news_input = planner.fit_news(news, "analysis", NEWS_ANALYSIS_PROMPT, reserved_tokens=doc_tokens)
+    user_prompt = safe_json_dumps({
+        "news": news_input,
+        "financial_data": financial_data
+    }, ensure_ascii=False, indent=2)
+    plan = planner.plan("analysis", NEWS_ANALYSIS_PROMPT, user_prompt)
+
+    def deepseek_call():
+        return deepseek.chat(
+            user_prompt,
+            use_system_prompt=True,
+            custom_system_prompt=NEWS_ANALYSIS_PROMPT,
+            json_output=True,
+            max_tokens=plan["max_tokens"]
+        )
+
+    report_text = retry_llm_call(deepseek_call, max_retries=5, delay=3, expect_json=True, budget_plan=plan)
+    planner.record_usage(plan, deepseek.last_usage)
+    return report_text
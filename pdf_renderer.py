@@ -0,0 +1,348 @@
+"""
+PDF渲染工作池
+將HTML→PDF的渲染任務交給獨立進程執行，多個symbol和中英文報告可並行渲染
+"""
+import logging
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    PDF_RENDER_WORKERS,
+    PDF_RENDER_TIMEOUT,
+    PDF_BATCH_RENDER,
+    PDF_BATCH_SIZE,
+    PDF_REPORTLAB_IN_PROCESS
+)
+from reportlab_renderer import render_markdown_to_pdf
+
+
+# wkhtmltopdf選項（與Streamlit應用一致）
+PDF_OPTIONS = {
+    'page-size': 'A4',
+    'margin-top': '0.75in',
+    'margin-right': '0.75in',
+    'margin-bottom': '0.75in',
+    'margin-left': '0.75in',
+    'encoding': "UTF-8",
+    'no-outline': None,
+    'enable-local-file-access': None
+}
+
+
+def render_html_to_pdf(html_content: str, pdf_path: str) -> str:
+    """
+    在工作進程中將HTML渲染為PDF
+
+    Args:
+        html_content: 完整的HTML文檔
+        pdf_path: 輸出PDF路徑
+
+    Returns:
+        str: PDF文件路徑
+    """
+    import pdfkit
+
+    pdfkit.from_string(html_content, pdf_path, options=PDF_OPTIONS)
+    return pdf_path
+
+
+def _wkhtmltopdf_binary() -> str:
+    """查找wkhtmltopdf可執行文件（與pdfkit的查找邏輯一致）"""
+    try:
+        import pdfkit
+        binary = pdfkit.configuration().wkhtmltopdf
+        if isinstance(binary, bytes):
+            binary = binary.decode()
+        if binary:
+            return binary
+    except (ImportError, OSError):
+        pass
+    binary = shutil.which("wkhtmltopdf")
+    if not binary:
+        raise OSError("No wkhtmltopdf executable found")
+    return binary
+
+
+def _options_to_args(options: Dict[str, Optional[str]]) -> List[str]:
+    """將pdfkit風格的選項字典轉換為命令行參數"""
+    args = []
+    for key, value in options.items():
+        args.append(f"--{key}")
+        if value is not None:
+            args.append(str(value))
+    return args
+
+
+def _quote_arg(arg: str) -> str:
+    """wkhtmltopdf stdin參數行的引號轉義"""
+    return '"' + arg.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def render_batch_to_pdf(jobs: List[Tuple[str, str]], timeout: float = PDF_RENDER_TIMEOUT) -> Dict[str, Optional[str]]:
+    """
+    在一次wkhtmltopdf運行中渲染多個文檔
+
+    使用 --read-args-from-stdin：每行是一個文檔的參數（選項、輸入HTML、輸出PDF），
+    只需支付一次進程和WebKit的啟動成本
+
+    Args:
+        jobs: [(html_content, pdf_path), ...]
+        timeout: 整批的最長等待秒數（按文檔數放大）
+
+    Returns:
+        Dict[str, Optional[str]]: pdf_path -> 錯誤信息（成功時為None）
+    """
+    binary = _wkhtmltopdf_binary()
+    option_args = _options_to_args(PDF_OPTIONS)
+
+    with tempfile.TemporaryDirectory(prefix="pdf_batch_") as tmp_dir:
+        lines = []
+        for index, (html_content, pdf_path) in enumerate(jobs):
+            html_path = os.path.join(tmp_dir, f"doc_{index}.html")
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write(html_content)
+            # 刪除舊文件，避免把上次的輸出誤判為成功
+            if os.path.exists(pdf_path):
+                os.remove(pdf_path)
+            lines.append(" ".join(_quote_arg(arg) for arg in option_args + [html_path, str(pdf_path)]))
+
+        try:
+            process = subprocess.run(
+                [binary, "--quiet", "--read-args-from-stdin"],
+                input="\n".join(lines) + "\n",
+                capture_output=True,
+                text=True,
+                timeout=timeout * len(jobs)
+            )
+            stderr = process.stderr.strip()
+        except subprocess.TimeoutExpired:
+            stderr = "wkhtmltopdf batch timed out"
+
+    results = {}
+    for _, pdf_path in jobs:
+        if os.path.exists(pdf_path) and os.path.getsize(pdf_path) > 0:
+            results[str(pdf_path)] = None
+        else:
+            results[str(pdf_path)] = stderr or "PDF not produced"
+    return results
+
+
+class PdfRenderPool:
+    """
+    PDF渲染進程池
+
+    接受任意symbol的渲染任務，最大並發數由 PDF_RENDER_WORKERS 控制
+    （容器只有1個CPU/2GB內存時應保持較小的值）
+    """
+
+    def __init__(self, max_workers: int = PDF_RENDER_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger("PdfRenderPool")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # 延遲創建，首次提交任務時才啟動工作進程
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self.logger.info(f"🖨️ PDF渲染池已啟動 ({self.max_workers} 個工作進程)")
+            return self._executor
+
+    def submit(self, html_content: str, pdf_path: str) -> Future:
+        """
+        提交一個渲染任務
+
+        Args:
+            html_content: 完整的HTML文檔
+            pdf_path: 輸出PDF路徑
+
+        Returns:
+            Future: 結果為PDF路徑
+        """
+        return self._get_executor().submit(render_html_to_pdf, html_content, str(pdf_path))
+
+    def render_many(self, jobs: List[Tuple[str, str]],
+                    timeout: float = PDF_RENDER_TIMEOUT) -> Dict[str, Optional[str]]:
+        """
+        並行渲染多個文檔並等待全部完成
+
+        文檔數不超過工作進程數時每個文檔單獨佔用一個進程（如同一symbol的中英文PDF並行渲染）；
+        更多時才批量渲染，省去重複的wkhtmltopdf啟動成本
+
+        Args:
+            jobs: [(html_content, pdf_path), ...]
+            timeout: 每個任務的最長等待秒數
+
+        Returns:
+            Dict[str, Optional[str]]: pdf_path -> 錯誤信息（成功時為None）
+        """
+        if PDF_BATCH_RENDER and len(jobs) > self.max_workers:
+            return self.render_batches(jobs, timeout)
+
+        futures = {str(pdf_path): self.submit(html, pdf_path) for html, pdf_path in jobs}
+        results = {}
+        for pdf_path, future in futures.items():
+            try:
+                future.result(timeout=timeout)
+                results[pdf_path] = None
+            except Exception as e:
+                results[pdf_path] = str(e) or type(e).__name__
+        return results
+
+    def render_batches(self, jobs: List[Tuple[str, str]],
+                       timeout: float = PDF_RENDER_TIMEOUT) -> Dict[str, Optional[str]]:
+        """
+        將文檔分成每批最多 PDF_BATCH_SIZE 個（至少分成與工作進程數相同的批數），每批一次wkhtmltopdf運行，各批在進程池中並行
+
+        Args:
+            jobs: [(html_content, pdf_path), ...]
+            timeout: 每個文檔的最長等待秒數
+
+        Returns:
+            Dict[str, Optional[str]]: pdf_path -> 錯誤信息（成功時為None）
+        """
+        jobs = [(html, str(pdf_path)) for html, pdf_path in jobs]
+        batch_count = max(math.ceil(len(jobs) / PDF_BATCH_SIZE), min(self.max_workers, len(jobs)))
+        batch_size = math.ceil(len(jobs) / batch_count)
+        batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+        executor = self._get_executor()
+        futures = [(batch, executor.submit(render_batch_to_pdf, batch, timeout)) for batch in batches]
+
+        results = {}
+        for batch, future in futures:
+            try:
+                results.update(future.result(timeout=timeout * len(batch) + 10))
+            except Exception as e:
+                for _, pdf_path in batch:
+                    results[pdf_path] = str(e) or type(e).__name__
+
+        failed = sum(1 for error in results.values() if error)
+        self.logger.info(f"🖨️ 批量渲染 {len(jobs)} 個PDF（{len(batches)} 批），失敗 {failed} 個")
+        return results
+
+    def render_markdown_many(self, jobs: List[Tuple[str, str, str]],
+                             timeout: float = PDF_RENDER_TIMEOUT) -> Dict[str, Optional[str]]:
+        """
+        使用reportlab引擎渲染多個Markdown報告
+
+        默認提交到工作進程池並行渲染；PDF_REPORTLAB_IN_PROCESS 為True時在當前進程串行渲染
+
+        Args:
+            jobs: [(md_content, pdf_path, language), ...]
+            timeout: 每個任務的最長等待秒數
+
+        Returns:
+            Dict[str, Optional[str]]: pdf_path -> 錯誤信息（成功時為None）
+        """
+        results = {}
+
+        if PDF_REPORTLAB_IN_PROCESS:
+            for md_content, pdf_path, language in jobs:
+                try:
+                    render_markdown_to_pdf(md_content, str(pdf_path), language)
+                    results[str(pdf_path)] = None
+                except Exception as e:
+                    results[str(pdf_path)] = str(e) or type(e).__name__
+            return results
+
+        executor = self._get_executor()
+        futures = {
+            str(pdf_path): executor.submit(render_markdown_to_pdf, md_content, str(pdf_path), language)
+            for md_content, pdf_path, language in jobs
+        }
+        for pdf_path, future in futures.items():
+            try:
+                future.result(timeout=timeout)
+                results[pdf_path] = None
+            except Exception as e:
+                results[pdf_path] = str(e) or type(e).__name__
+        return results
+
+    def shutdown(self, wait: bool = True):
+        """關閉工作進程"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+# 全流程共用的渲染池
+_shared_pool: Optional[PdfRenderPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> PdfRenderPool:
+    """獲取共用的PDF渲染池"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = PdfRenderPool()
+        return _shared_pool
+
+
+def benchmark_engines(md_path: str, runs: int = 10, language: str = "chinese") -> Dict[str, float]:
+    """
+    比較各PDF引擎的吞吐量（文檔/秒）
+
+    Args:
+        md_path: 用於測試的Markdown報告
+        runs: 每個引擎渲染的文檔數
+        language: chinese 或 english
+
+    Returns:
+        Dict[str, float]: 引擎 -> 每秒文檔數
+    """
+    import time
+    from report_generator import ReportGenerator
+
+    with open(md_path, "r", encoding="utf-8") as f:
+        md_content = f.read()
+
+    html_content = ReportGenerator()._build_pdf_html("BENCH", md_content, language)
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="pdf_bench_") as tmp_dir:
+        outputs = [os.path.join(tmp_dir, f"bench_{i}.pdf") for i in range(runs)]
+
+        # 預熱：字體註冊和樣式創建不計入
+        render_markdown_to_pdf(md_content, os.path.join(tmp_dir, "warmup.pdf"), language)
+        start = time.perf_counter()
+        for output in outputs:
+            render_markdown_to_pdf(md_content, output, language)
+        results["reportlab"] = runs / (time.perf_counter() - start)
+
+        try:
+            start = time.perf_counter()
+            for output in outputs:
+                render_html_to_pdf(html_content, output)
+            results["wkhtmltopdf"] = runs / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            render_batch_to_pdf([(html_content, output) for output in outputs])
+            results["wkhtmltopdf_batch"] = runs / (time.perf_counter() - start)
+        except (ImportError, OSError) as e:
+            print(f"⚠️ 跳過wkhtmltopdf: {e}")
+
+    for engine, docs_per_second in results.items():
+        print(f"📊 {engine:<18} {docs_per_second:6.2f} 文檔/秒 ({1000 / docs_per_second:7.1f} ms/文檔)")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="PDF引擎吞吐量測試")
+    parser.add_argument("md_path", help="用於測試的Markdown報告文件")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="每個引擎渲染的文檔數")
+    parser.add_argument("-l", "--language", default="chinese", choices=["chinese", "english"])
+    args = parser.parse_args()
+
+    benchmark_engines(args.md_path, args.runs, args.language)
@@ -10,10 +10,12 @@ from mongo_db import MongoHandler
 from get_news import NewsScraper
 from llms_chatgpt import ChatGPT
 from llms_deepseek import DeepSeek
-from config import NEWS_ANALYSIS_PROMPT, news_to_traditional_chinese_prompt, news_to_english_prompt, analysis_to_english_prompt, desc_to_chinese_prompt
+from config import news_to_traditional_chinese_prompt, news_to_english_prompt, analysis_to_english_prompt, desc_to_chinese_prompt
 from file_manager import FileManager
 from get_company_desc import CompanyDescScraper
 from run import safe_json_dumps, retry_llm_call
+from token_budget import TokenBudgetPlanner
+from news_analysis import run_news_analysis
 
 def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
     """
@@ -59,6 +61,8 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
             news_scraper = NewsScraper()
             chatgpt = ChatGPT()
             deepseek = DeepSeek()
+            chatgpt_planner = TokenBudgetPlanner(chatgpt.model)
+            deepseek_planner = TokenBudgetPlanner(deepseek.model)
         except Exception as e:
             result["errors"].append(f"API初始化失敗: {e}")
             return result
@@ -148,6 +152,8 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
                 
                 if desc_en_data:
                     desc_en_text = desc_en_data.get("desc_en", "") if isinstance(desc_en_data, dict) else str(desc_en_data)
+                    desc_en_text = chatgpt_planner.fit_text(desc_en_text, "desc_cn", desc_to_chinese_prompt)
+                    desc_plan = chatgpt_planner.plan("desc_cn", desc_to_chinese_prompt, desc_en_text)
                     
                     def chatgpt_desc_call():
                         return chatgpt.chat(
@@ -155,10 +161,11 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
                             use_system_prompt=True, 
                             custom_system_prompt=desc_to_chinese_prompt,
                             json_output=True,
-                            max_tokens=2000
+                            max_tokens=desc_plan["max_tokens"]
                         )
                     
-                    desc_cn_text = retry_llm_call(chatgpt_desc_call, max_retries=3, delay=2, expect_json=True)
+                    desc_cn_text = retry_llm_call(chatgpt_desc_call, max_retries=3, delay=2, expect_json=True, budget_plan=desc_plan)
+                    chatgpt_planner.record_usage(desc_plan, chatgpt.last_usage)
                     
                     if file_manager.validate_data(desc_cn_text, "desc_cn"):
                         file_manager.save_data(symbol, "desc_cn", desc_cn_text, today_str)
@@ -182,7 +189,9 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
             try:
                 news = file_manager.load_data(symbol, "news", today_str)
                 if news:
+                    news = chatgpt_planner.fit_news(news, "news_cn", news_to_traditional_chinese_prompt)
                     news_str = safe_json_dumps(news, ensure_ascii=False, indent=2)
+                    news_cn_plan = chatgpt_planner.plan("news_cn", news_to_traditional_chinese_prompt, news_str)
                     
                     def chatgpt_cn_call():
                         return chatgpt.chat(
@@ -190,10 +199,11 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
                             use_system_prompt=True, 
                             custom_system_prompt=news_to_traditional_chinese_prompt,
                             json_output=True,
-                            max_tokens=2500
+                            max_tokens=news_cn_plan["max_tokens"]
                         )
                     
-                    news_cn_text = retry_llm_call(chatgpt_cn_call, max_retries=3, delay=2, expect_json=True)
+                    news_cn_text = retry_llm_call(chatgpt_cn_call, max_retries=3, delay=2, expect_json=True, budget_plan=news_cn_plan)
+                    chatgpt_planner.record_usage(news_cn_plan, chatgpt.last_usage)
                     
                     if file_manager.validate_data(news_cn_text, "news_cn"):
                         file_manager.save_data(symbol, "news_cn", news_cn_text, today_str)
@@ -209,21 +219,8 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
                 doc = file_manager.load_data(symbol, "fundamentals", today_str)
                 
                 if news and doc:
-                    user_prompt = safe_json_dumps({
-                        "news": news,
-                        "financial_data": doc
-                    }, ensure_ascii=False, indent=2)
-                    
-                    def deepseek_call():
-                        return deepseek.chat(
-                            user_prompt, 
-                            use_system_prompt=True, 
-                            custom_system_prompt=NEWS_ANALYSIS_PROMPT,
-                            json_output=True,
-                            max_tokens=3000
-                        )
-                    
-                    report_text = retry_llm_call(deepseek_call, max_retries=5, delay=3, expect_json=True)
+                    # 新聞量大時自動切換為分塊摘要 + 綜合分析
+                    report_text = run_news_analysis(deepseek, news, doc, deepseek_planner)
                     
                     if file_manager.validate_data(report_text, "analysis"):
                         file_manager.save_data(symbol, "analysis", report_text, today_str)
@@ -242,6 +239,7 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
                     else:
                         news_cn_content = news_cn
                     news_cn_str = json.dumps(news_cn_content, ensure_ascii=False, indent=2)
+                    news_en_plan = chatgpt_planner.plan("news_en", news_to_english_prompt, news_cn_str)
                     
                     def chatgpt_en_call():
                         return chatgpt.chat(
@@ -249,10 +247,11 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
                             use_system_prompt=True, 
                             custom_system_prompt=news_to_english_prompt,
                             json_output=True,
-                            max_tokens=2500
+                            max_tokens=news_en_plan["max_tokens"]
                         )
                     
-                    news_en_text = retry_llm_call(chatgpt_en_call, max_retries=3, delay=2, expect_json=True)
+                    news_en_text = retry_llm_call(chatgpt_en_call, max_retries=3, delay=2, expect_json=True, budget_plan=news_en_plan)
+                    chatgpt_planner.record_usage(news_en_plan, chatgpt.last_usage)
                     
                     if file_manager.validate_data(news_en_text, "news_en"):
                         file_manager.save_data(symbol, "news_en", news_en_text, today_str)
@@ -271,6 +270,7 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
                     else:
                         report_content = report
                     report_str = json.dumps(report_content, ensure_ascii=False, indent=2)
+                    analysis_en_plan = chatgpt_planner.plan("analysis_en", analysis_to_english_prompt, report_str)
                     
                     def chatgpt_analysis_en_call():
                         return chatgpt.chat(
@@ -278,10 +278,11 @@ def process_single_stock(symbol: str, force_refresh: bool = False) -> dict:
                             use_system_prompt=True, 
                             custom_system_prompt=analysis_to_english_prompt,
                             json_output=True,
-                            max_tokens=3000
+                            max_tokens=analysis_en_plan["max_tokens"]
                         )
                     
-                    analysis_en_text = retry_llm_call(chatgpt_analysis_en_call, max_retries=3, delay=2, expect_json=True)
+                    analysis_en_text = retry_llm_call(chatgpt_analysis_en_call, max_retries=3, delay=2, expect_json=True, budget_plan=analysis_en_plan)
+                    chatgpt_planner.record_usage(analysis_en_plan, chatgpt.last_usage)
                     
                     if file_manager.validate_data(analysis_en_text, "analysis_en"):
                         file_manager.save_data(symbol, "analysis_en", analysis_en_text, today_str)
@@ -0,0 +1,165 @@
+"""
+按主機限速的請求調度器：控制每個主機的請求速率和並發數，遇到429/503時退避
+整個流程共用一個調度器實例，避免多處調用各自為政
+"""
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from config import (
+    HOST_RATE_LIMITS,
+    DEFAULT_REQUESTS_PER_SECOND,
+    DEFAULT_MAX_CONCURRENCY,
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMIT_BASE_BACKOFF,
+    RATE_LIMIT_MAX_BACKOFF
+)
+
+
+# 需要退避重試的狀態碼
+RETRY_STATUS_CODES = (429, 503)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After頭（秒數或HTTP日期），返回需要等待的秒數"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostState:
+    """單個主機的限速狀態"""
+
+    def __init__(self, rate: float, concurrency: int):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+        self.failures = 0
+
+
+class HostRateScheduler:
+    """
+    按主機限速的請求調度器
+
+    - 每個主機有獨立的速率（請求/秒）和並發上限
+    - 速率允許時立即發出請求，不做固定的隨機等待
+    - 遇到429/503時按Retry-After或指數退避暫停該主機的所有請求
+    """
+
+    def __init__(self, host_limits: Dict[str, Dict[str, Any]] = None,
+                 default_rate: float = DEFAULT_REQUESTS_PER_SECOND,
+                 default_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.host_limits = host_limits if host_limits is not None else HOST_RATE_LIMITS
+        self.default_rate = default_rate
+        self.default_concurrency = default_concurrency
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _limits_for(self, host: str) -> Dict[str, Any]:
+        """按主機名後綴匹配限速配置（如 ca.finance.yahoo.com 匹配 finance.yahoo.com）"""
+        for suffix, limits in self.host_limits.items():
+            if host == suffix or host.endswith("." + suffix):
+                return limits
+        return {"rate": self.default_rate, "concurrency": self.default_concurrency}
+
+    def _state(self, host: str) -> _HostState:
+        with self._lock:
+            if host not in self._hosts:
+                limits = self._limits_for(host)
+                self._hosts[host] = _HostState(limits["rate"], limits["concurrency"])
+            return self._hosts[host]
+
+    @contextmanager
+    def slot(self, url: str):
+        """
+        獲取一個請求槽位：佔用並發名額，並等待到該主機的下一個可用時間
+
+        Args:
+            url: 請求URL
+        """
+        host = urlparse(url).hostname or ""
+        state = self._state(host)
+
+        with state.semaphore:
+            start = None
+            while True:
+                with self._lock:
+                    now = time.time()
+                    # 等待期間主機可能被退避暫停，此時重新排隊
+                    if start is None or start < state.blocked_until:
+                        start = max(now, state.next_slot, state.blocked_until)
+                        state.next_slot = start + state.interval
+                    wait = start - now
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+            yield
+
+    def report(self, url: str, status_code: int, retry_after: Optional[str] = None) -> float:
+        """
+        回報請求結果；429/503時暫停該主機並返回退避秒數
+
+        Args:
+            url: 請求URL
+            status_code: HTTP狀態碼
+            retry_after: 響應的Retry-After頭
+
+        Returns:
+            float: 退避秒數（成功時為0）
+        """
+        state = self._state(urlparse(url).hostname or "")
+
+        with self._lock:
+            if status_code not in RETRY_STATUS_CODES:
+                state.failures = 0
+                return 0.0
+
+            state.failures += 1
+            delay = _parse_retry_after(retry_after)
+            if delay is None:
+                delay = RATE_LIMIT_BASE_BACKOFF * (2 ** (state.failures - 1))
+            delay = min(delay, RATE_LIMIT_MAX_BACKOFF)
+            state.blocked_until = max(state.blocked_until, time.time() + delay)
+            return delay
+
+    def get(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        """
+        通過調度器發送GET請求，429/503時退避後重試
+
+        Args:
+            session: requests會話
+            url: 請求URL
+            **kwargs: 傳給 session.get 的參數
+
+        Returns:
+            requests.Response: 最後一次的響應
+        """
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            with self.slot(url):
+                response = session.get(url, **kwargs)
+
+            delay = self.report(url, response.status_code, response.headers.get("Retry-After"))
+            if not delay or attempt == RATE_LIMIT_MAX_RETRIES:
+                return response
+
+            host = urlparse(url).hostname
+            print(f"⏳ {host} 返回 {response.status_code}，退避 {delay:.1f} 秒後重試 ({attempt + 1}/{RATE_LIMIT_MAX_RETRIES})")
+
+        return response
+
+
+# 全流程共用的調度器
+shared_scheduler = HostRateScheduler()
@@ -5,14 +5,20 @@
 直接使用Streamlit應用中的報告生成邏輯，確保完全一致
 """
 
-import json
-import os
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import logging
 
 from file_manager import FileManager
+from pdf_renderer import get_render_pool
+from report_templates import render_report_markdown, render_report_html, markdown_to_html, ReportRenderContext
+from config import PDF_ENGINE
+
+
+LANGUAGE_LABELS = {"chinese": "中文", "english": "英文"}
+# 可用的PDF引擎
+PDF_ENGINES = ("reportlab", "wkhtmltopdf")
 
 
 class ReportGenerator:
@@ -23,9 +29,14 @@ class ReportGenerator:
     直接使用Streamlit應用中的方法，確保文件結構和內容完全一致
     """
     
-    def __init__(self):
-        self.file_manager = FileManager()
-        self.today_str = datetime.now().strftime('%Y-%m-%d')
+    def __init__(self, file_manager: FileManager = None, date_str: str = None):
+        """
+        Args:
+            file_manager: 數據文件管理器，默認新建
+            date_str: 報告日期，默認為今日
+        """
+        self.file_manager = file_manager or FileManager()
+        self.today_str = date_str or datetime.now().strftime('%Y-%m-%d')
         self.logger = logging.getLogger("ReportGenerator")
     
     def load_stock_data(self, symbol: str) -> Dict[str, Any]:
@@ -61,7 +72,7 @@ class ReportGenerator:
     
     def generate_chinese_report_content(self, symbol: str, data: Dict[str, Any]) -> str:
         """
-        生成中文報告內容（與Streamlit應用完全一致）
+        生成中文報告內容（與Streamlit應用共用同一模板）
         
         Args:
             symbol: 股票代碼
@@ -71,250 +82,24 @@ class ReportGenerator:
             str: Markdown格式的報告內容
         """
         try:
-            # 使用與Streamlit應用完全相同的邏輯
-            md_content = f"""# 📊 {symbol} 股票分析報告
-
-<strong>生成日期:</strong> {self.today_str}
-
----
-
-## 🏢 公司簡介
-
-"""
-            
-            # 公司描述 - 中文（與Streamlit完全一致）
-            if data.get('desc_cn'):
-                desc_cn_data = data['desc_cn'].get('data', {}) if isinstance(data['desc_cn'], dict) else data['desc_cn']
-                if isinstance(desc_cn_data, dict) and 'desc_cn' in desc_cn_data:
-                    desc_text = desc_cn_data['desc_cn']
-                    if isinstance(desc_text, str) and len(desc_text.strip()) > 0:
-                        md_content += f"<strong>公司描述:</strong> {desc_text}\n\n"
-            
-            # 基本面數據（與Streamlit完全一致）
-            if data.get('fundamentals'):
-                fundamentals = data['fundamentals']
-                md_content += "## 📊 基本面數據\n\n"
-                
-                if fundamentals.get('current_price'):
-                    md_content += f"<strong>目前股價:</strong> ${fundamentals['current_price']}\n"
-                if fundamentals.get('market_cap'):
-                    md_content += f"<strong>市值:</strong> {fundamentals['market_cap']}\n"
-                if fundamentals.get('pe_ratio'):
-                    md_content += f"<strong>本益比:</strong> {fundamentals['pe_ratio']}\n"
-                if fundamentals.get('volume'):
-                    md_content += f"<strong>交易量:</strong> {fundamentals['volume']}\n"
-                
-                md_content += "\n"
-            
-            # 最新新聞（與Streamlit完全一致）
-            if data.get('news_cn'):
-                news_cn_data = data['news_cn'].get('data', {}) if isinstance(data['news_cn'], dict) else data['news_cn']
-                md_content += "## 📰 最新新聞\n\n"
-                
-                if isinstance(news_cn_data, dict) and 'articles' in news_cn_data:
-                    articles = news_cn_data['articles']
-                    for i, article in enumerate(articles[:5], 1):
-                        title = article.get('title', '無標題')
-                        summary = article.get('summary', '')
-                        md_content += f"### {i}. {title}\n"
-                        if summary:
-                            md_content += f"{summary}\n\n"
-                        else:
-                            md_content += "\n"
-                else:
-                    md_content += "暫無相關新聞\n\n"
-            
-            # 分析報告（與Streamlit完全一致）
-            if data.get('analysis'):
-                analysis_data = data['analysis'].get('data', {}) if isinstance(data['analysis'], dict) else data['analysis']
-                md_content += "## 💡 投資分析\n\n"
-                
-                if isinstance(analysis_data, dict):
-                    # 投資建議
-                    if 'investment_recommendation' in analysis_data:
-                        rec = analysis_data['investment_recommendation']
-                        md_content += "### 🎯 投資建議\n\n"
-                        if isinstance(rec, dict):
-                            md_content += f"<strong>評級:</strong> {rec.get('rating', 'N/A')}\n"
-                            md_content += f"<strong>目標價:</strong> {rec.get('target_price', 'N/A')}\n"
-                            md_content += f"<strong>理由:</strong> {rec.get('rationale', 'N/A')}\n\n"
-                    
-                    # 風險評估
-                    if 'risk_assessment' in analysis_data:
-                        risk = analysis_data['risk_assessment']
-                        md_content += "### ⚠️ 風險評估\n\n"
-                        if isinstance(risk, dict):
-                            md_content += f"<strong>風險等級:</strong> {risk.get('risk_level', 'N/A')}\n"
-                            md_content += f"<strong>主要風險:</strong> {risk.get('main_risks', 'N/A')}\n\n"
-                    
-                    # 關鍵指標
-                    if 'key_metrics' in analysis_data:
-                        metrics = analysis_data['key_metrics']
-                        md_content += "### 📊 關鍵指標\n\n"
-                        if isinstance(metrics, dict):
-                            for key, value in metrics.items():
-                                md_content += f"<strong>{key}:</strong> {value}\n"
-                            md_content += "\n"
-                    
-                    # 財務健康狀況
-                    if 'financial_health' in analysis_data:
-                        health = analysis_data['financial_health']
-                        md_content += "### 💰 財務健康狀況\n\n"
-                        if isinstance(health, dict):
-                            md_content += f"<strong>流動性:</strong> {health.get('liquidity', 'N/A')}\n"
-                            md_content += f"<strong>債務狀況:</strong> {health.get('debt_status', 'N/A')}\n\n"
-                    
-                    # 交易建議
-                    if 'trading_recommendation' in analysis_data:
-                        trading = analysis_data['trading_recommendation']
-                        md_content += "### 💡 交易建議\n\n"
-                        if isinstance(trading, dict):
-                            md_content += f"<strong>傾向:</strong> {trading.get('bias', 'N/A')}\n"
-                            md_content += f"<strong>建議:</strong> {trading.get('suggestion', 'N/A')}\n"
-                            if 'catalysts' in trading and isinstance(trading['catalysts'], list):
-                                md_content += "<strong>關鍵催化劑:</strong>\n"
-                                for catalyst in trading['catalysts']:
-                                    md_content += f"- {catalyst}\n"
-                                md_content += "\n"
-                else:
-                    md_content += "❌ 無分析數據\n\n"
-            
-            # 免責聲明（與Streamlit完全一致）
-            md_content += """---
-
-*本報告由AI自動生成，僅供參考，不構成投資建議。投資有風險，請謹慎決策。*
-"""
-            
-            return md_content
-            
+            return render_report_markdown(symbol, data, "chinese", self.today_str)
         except Exception as e:
             self.logger.error(f"❌ 生成中文報告內容失敗: {e}")
             return f"# {symbol} 股票分析報告\n\n報告生成失敗: {str(e)}"
     
     def generate_english_report_content(self, symbol: str, data: Dict[str, Any]) -> str:
         """
-        生成英文報告內容（Markdown格式）
+        生成英文報告內容（與Streamlit應用共用同一模板）
         
         Args:
             symbol: 股票代碼
             data: 股票數據
             
         Returns:
-            str: Markdown格式的英文報告內容
+            str: Markdown格式的報告內容
         """
         try:
-            # 獲取英文數據
-            analysis_en = data.get('analysis_en', {})
-            news_en = data.get('news_en', {})
-            desc_en = data.get('desc_en', {})
-            fundamentals = data.get('fundamentals', {})
-            
-            # 處理嵌套的數據結構
-            if isinstance(analysis_en, dict) and 'data' in analysis_en:
-                analysis_en = analysis_en['data']
-            if isinstance(news_en, dict) and 'data' in news_en:
-                news_en = news_en['data']
-            if isinstance(desc_en, dict) and 'desc_en' in desc_en:
-                desc_en = desc_en['desc_en']
-            
-            # 構建英文報告內容
-            content = f"""# {symbol} Stock Analysis Report
-
-## 📊 Report Date
-{self.today_str}
-
----
-
-"""
-            
-            # Company Description
-            if desc_en:
-                content += f"""## 🏢 Company Overview
-
-{desc_en}
-
----
-
-"""
-            
-            # Fundamentals
-            if fundamentals:
-                content += """## 📈 Fundamental Data
-
-"""
-                if fundamentals.get('current_price'):
-                    content += f"**Current Price**: ${fundamentals.get('current_price', 'N/A')}\n\n"
-                if fundamentals.get('market_cap'):
-                    content += f"**Market Cap**: {fundamentals.get('market_cap', 'N/A')}\n\n"
-                if fundamentals.get('pe_ratio'):
-                    content += f"**P/E Ratio**: {fundamentals.get('pe_ratio', 'N/A')}\n\n"
-                
-                content += "---\n\n"
-            
-            # Latest News
-            if news_en and isinstance(news_en, dict):
-                content += """## 📰 Latest News
-
-"""
-                articles = news_en.get('articles', [])
-                if articles:
-                    for i, article in enumerate(articles[:5], 1):
-                        title = article.get('title', 'No Title')
-                        summary = article.get('summary', 'No Summary')
-                        content += f"### {i}. {title}\n\n{summary}\n\n"
-                else:
-                    content += "No relevant news available\n\n"
-                
-                content += "---\n\n"
-            
-            # Investment Analysis
-            if analysis_en and isinstance(analysis_en, dict):
-                content += """## 💡 Investment Analysis
-
-"""
-                
-                # Investment Recommendation
-                if analysis_en.get('investment_recommendation'):
-                    rec = analysis_en['investment_recommendation']
-                    content += f"""### 🎯 Investment Recommendation
-**Rating**: {rec.get('rating', 'N/A')}
-**Target Price**: ${rec.get('target_price', 'N/A')}
-**Rationale**: {rec.get('rationale', 'None')}
-
-"""
-                
-                # Risk Assessment
-                if analysis_en.get('risk_assessment'):
-                    risk = analysis_en['risk_assessment']
-                    content += f"""### ⚠️ Risk Assessment
-**Risk Level**: {risk.get('risk_level', 'N/A')}
-**Main Risks**: {risk.get('main_risks', 'None')}
-
-"""
-                
-                # Key Metrics
-                if analysis_en.get('key_metrics'):
-                    metrics = analysis_en['key_metrics']
-                    content += """### 📊 Key Metrics
-"""
-                    for key, value in metrics.items():
-                        content += f"- **{key}**: {value}\n"
-                    content += "\n"
-                
-                content += "---\n\n"
-            
-            # Disclaimer
-            content += """## ⚠️ Disclaimer
-
-This report is for informational purposes only and does not constitute investment advice. Investing involves risks, and you should conduct your own research and consult with qualified financial advisors before making investment decisions.
-
----
-
-*Report generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
-"""
-            
-            return content
-            
+            return render_report_markdown(symbol, data, "english", self.today_str)
         except Exception as e:
             self.logger.error(f"❌ 生成英文報告內容失敗: {e}")
             return f"# {symbol} Stock Analysis Report\n\nReport generation failed: {str(e)}"
@@ -340,6 +125,7 @@ This report is for informational purposes only and does not constitute investmen
             with open(md_file_path, 'w', encoding='utf-8') as f:
                 f.write(md_content)
             
+            self.file_manager.record_stage(symbol, "report", self.today_str)
             self.logger.info(f"✅ Markdown報告已保存: {md_file_path}")
             return str(md_file_path)
             
@@ -358,89 +144,7 @@ This report is for informational purposes only and does not constitute investmen
         Returns:
             Optional[str]: PDF文件路徑，失敗則返回None
         """
-        try:
-            # 使用與Streamlit完全相同的路徑邏輯
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            pdf_path = data_path / f"{symbol}_report_chinese_{self.today_str}.pdf"
-            
-            # 生成中文報告內容
-            chinese_content = self.generate_chinese_report_content(symbol, data)
-            
-            # 嘗試使用pdfkit（與Streamlit一致）
-            try:
-                import pdfkit
-                
-                # 清理並轉換為HTML
-                cleaned_content = self._clean_markdown_content(chinese_content)
-                
-                # 創建完整的HTML文檔
-                html_content = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <title>{symbol} 股票分析報告</title>
-                    <style>
-                        body {{
-                            font-family: 'Microsoft YaHei', '微軟雅黑', SimSun, serif;
-                            line-height: 1.6;
-                            margin: 20px;
-                            color: #333;
-                        }}
-                        h1, h2, h3 {{
-                            color: #2c3e50;
-                            margin-top: 20px;
-                            margin-bottom: 10px;
-                        }}
-                        h1 {{ font-size: 24px; text-align: center; }}
-                        h2 {{ font-size: 20px; border-bottom: 2px solid #3498db; padding-bottom: 5px; }}
-                        h3 {{ font-size: 16px; color: #e74c3c; }}
-                        strong {{ color: #2980b9; }}
-                        .date {{ text-align: center; color: #7f8c8d; margin-bottom: 30px; }}
-                        .section {{ margin-bottom: 25px; }}
-                        .disclaimer {{ 
-                            background-color: #f8f9fa; 
-                            padding: 15px; 
-                            border-left: 4px solid #ffc107; 
-                            margin-top: 30px; 
-                            font-style: italic; 
-                        }}
-                    </style>
-                </head>
-                <body>
-                    {cleaned_content}
-                </body>
-                </html>
-                """
-                
-                # 設置PDF選項
-                options = {
-                    'page-size': 'A4',
-                    'margin-top': '0.75in',
-                    'margin-right': '0.75in',
-                    'margin-bottom': '0.75in',
-                    'margin-left': '0.75in',
-                    'encoding': "UTF-8",
-                    'no-outline': None,
-                    'enable-local-file-access': None
-                }
-                
-                # 生成PDF
-                pdfkit.from_string(html_content, str(pdf_path), options=options)
-                self.logger.info(f"✅ 中文PDF報告已生成: {pdf_path}")
-                return str(pdf_path)
-                
-            except ImportError:
-                self.logger.warning("⚠️ pdfkit未安裝，嘗試使用reportlab")
-                return self._generate_pdf_with_reportlab(symbol, chinese_content, "chinese")
-            except Exception as e:
-                self.logger.warning(f"⚠️ pdfkit生成失敗，嘗試使用reportlab: {e}")
-                return self._generate_pdf_with_reportlab(symbol, chinese_content, "chinese")
-                
-        except Exception as e:
-            self.logger.error(f"❌ 生成中文PDF報告失敗: {e}")
-            return None
+        return self.generate_pdf_reports(symbol, data, languages=("chinese",)).get("chinese")
     
     def generate_english_pdf_report_html(self, symbol: str, data: dict) -> Optional[str]:
         """
@@ -453,288 +157,275 @@ This report is for informational purposes only and does not constitute investmen
         Returns:
             Optional[str]: PDF文件路徑，失敗則返回None
         """
-        try:
-            # 使用與Streamlit完全相同的路徑邏輯
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            pdf_path = data_path / f"{symbol}_report_english_{self.today_str}.pdf"
-            
-            # 生成英文報告內容
-            english_content = self.generate_english_report_content(symbol, data)
-            
-            # 嘗試使用pdfkit（與Streamlit一致）
-            try:
-                import pdfkit
-                
-                # 清理並轉換為HTML
-                cleaned_content = self._clean_markdown_content(english_content)
-                
-                # 創建完整的HTML文檔
-                html_content = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <title>{symbol} Stock Analysis Report</title>
-                    <style>
-                        body {{
-                            font-family: Arial, sans-serif;
-                            line-height: 1.6;
-                            margin: 20px;
-                            color: #333;
-                        }}
-                        h1, h2, h3 {{
-                            color: #2c3e50;
-                            margin-top: 20px;
-                            margin-bottom: 10px;
-                        }}
-                        h1 {{ font-size: 24px; text-align: center; }}
-                        h2 {{ font-size: 20px; border-bottom: 2px solid #3498db; padding-bottom: 5px; }}
-                        h3 {{ font-size: 16px; color: #e74c3c; }}
-                        strong {{ color: #2980b9; }}
-                        .date {{ text-align: center; color: #7f8c8d; margin-bottom: 30px; }}
-                        .section {{ margin-bottom: 25px; }}
-                        .disclaimer {{ 
-                            background-color: #f8f9fa; 
-                            padding: 15px; 
-                            border-left: 4px solid #ffc107; 
-                            margin-top: 30px; 
-                            font-style: italic; 
-                        }}
-                    </style>
-                </head>
-                <body>
-                    {cleaned_content}
-                </body>
-                </html>
-                """
-                
-                # 設置PDF選項
-                options = {
-                    'page-size': 'A4',
-                    'margin-top': '0.75in',
-                    'margin-right': '0.75in',
-                    'margin-bottom': '0.75in',
-                    'margin-left': '0.75in',
-                    'encoding': "UTF-8",
-                    'no-outline': None,
-                    'enable-local-file-access': None
-                }
-                
-                # 生成PDF
-                pdfkit.from_string(html_content, str(pdf_path), options=options)
-                self.logger.info(f"✅ 英文PDF報告已生成: {pdf_path}")
-                return str(pdf_path)
-                
-            except ImportError:
-                self.logger.warning("⚠️ pdfkit未安裝，嘗試使用reportlab")
-                return self._generate_pdf_with_reportlab(symbol, english_content, "english")
-            except Exception as e:
-                self.logger.warning(f"⚠️ pdfkit生成失敗，嘗試使用reportlab: {e}")
-                return self._generate_pdf_with_reportlab(symbol, english_content, "english")
-                
-        except Exception as e:
-            self.logger.error(f"❌ 生成英文PDF報告失敗: {e}")
-            return None
+        return self.generate_pdf_reports(symbol, data, languages=("english",)).get("english")
     
-    def _clean_markdown_content(self, content: str) -> str:
-        """
-        清理Markdown內容為HTML（與Streamlit一致）
+    def generate_pdf_reports(self, symbol: str, data: dict,
+                             languages: Tuple[str, ...] = ("chinese", "english")) -> Dict[str, Optional[str]]:
         """
-        import re
+        並行生成多個語言的PDF報告（提交到PDF渲染池）
         
-        # 簡單的Markdown到HTML轉換
-        html_content = content
+        Args:
+            symbol: 股票代碼
+            data: 股票數據
+            languages: 要生成的語言
+            
+        Returns:
+            Dict[str, Optional[str]]: 語言 -> PDF文件路徑（失敗為None）
+        """
+        return self.generate_pdf_reports_batch({symbol: data}, languages).get(symbol, {})
+    
+    def generate_pdf_reports_batch(self, symbols_data: Dict[str, Any],
+                                   languages: Tuple[str, ...] = ("chinese", "english")) -> Dict[str, Dict[str, Optional[str]]]:
+        """
+        為多個symbol批量生成PDF報告，所有文檔一起提交到渲染池
+        （批量模式下多個文檔共用一次wkhtmltopdf運行）
         
-        # 轉換標題
-        html_content = re.sub(r'^# (.+)$', r'<h1>\1</h1>', html_content, flags=re.MULTILINE)
-        html_content = re.sub(r'^## (.+)$', r'<h2>\1</h2>', html_content, flags=re.MULTILINE)
-        html_content = re.sub(r'^### (.+)$', r'<h3>\1</h3>', html_content, flags=re.MULTILINE)
+        Args:
+            symbols_data: symbol -> 股票數據或已構建的 ReportRenderContext
+            languages: 要生成的語言
+            
+        Returns:
+            Dict: symbol -> {語言 -> PDF文件路徑（失敗為None）}
+        """
+        results = {symbol: {} for symbol in symbols_data}
+        pending = {}
         
-        # 轉換粗體
-        html_content = re.sub(r'<strong>(.+?)</strong>', r'<strong>\1</strong>', html_content)
+        for symbol, data in symbols_data.items():
+            context = self._as_render_context(symbol, data)
+            for language in languages:
+                try:
+                    context.markdown(language)
+                    pending[(symbol, language)] = (context, str(self._get_pdf_path(symbol, language)))
+                except Exception as e:
+                    self.logger.error(f"❌ 生成 {symbol} {LANGUAGE_LABELS[language]}PDF報告內容失敗: {e}")
+                    results[symbol][language] = None
         
-        # 轉換段落
-        html_content = re.sub(r'\n\n', '</p><p>', html_content)
-        html_content = '<p>' + html_content + '</p>'
+        # 先用主引擎，失敗的文檔再交給另一個引擎
+        engines = [PDF_ENGINE] + [engine for engine in PDF_ENGINES if engine != PDF_ENGINE]
+        for engine in engines:
+            if not pending:
+                break
+            errors = self._render_with_engine(engine, pending)
+            
+            failed = {}
+            for (symbol, language), (context, pdf_path) in pending.items():
+                error = errors.get(pdf_path)
+                if error is None:
+                    self.logger.info(f"✅ {LANGUAGE_LABELS[language]}PDF報告已生成（{engine}）: {pdf_path}")
+                    results[symbol][language] = pdf_path
+                    self.file_manager.record_stage(symbol, f"pdf_{language}", self.today_str)
+                else:
+                    self.logger.warning(f"⚠️ {engine}生成 {symbol} {LANGUAGE_LABELS[language]}PDF失敗: {error}")
+                    failed[(symbol, language)] = (context, pdf_path)
+            pending = failed
         
-        # 清理空段落
-        html_content = re.sub(r'<p></p>', '', html_content)
-        html_content = re.sub(r'<p>\s*</p>', '', html_content)
+        for symbol, language in pending:
+            self.logger.error(f"❌ 生成 {symbol} {LANGUAGE_LABELS[language]}PDF報告失敗")
+            results[symbol][language] = None
         
-        return html_content
+        return results
     
-    def _generate_pdf_with_reportlab(self, symbol: str, content: str, language: str) -> Optional[str]:
+    def _render_with_engine(self, engine: str,
+                            documents: Dict[Tuple[str, str], Tuple[ReportRenderContext, str]]) -> Dict[str, Optional[str]]:
         """
-        使用reportlab生成PDF的備用方法
+        使用指定引擎渲染一組文檔
+        
+        Args:
+            engine: "reportlab" 或 "wkhtmltopdf"
+            documents: (symbol, language) -> (渲染上下文, PDF路徑)
+            
+        Returns:
+            Dict[str, Optional[str]]: pdf_path -> 錯誤信息（成功時為None）
         """
+        if engine == "reportlab":
+            jobs = [(context.markdown(language), pdf_path, language)
+                    for (_, language), (context, pdf_path) in documents.items()]
+            return get_render_pool().render_markdown_many(jobs)
+        
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-            
-            # 設置字體
-            try:
-                if language == "chinese" and os.name == 'nt':
-                    pdfmetrics.registerFont(TTFont('SimHei', 'C:/Windows/Fonts/simhei.ttf'))
-                    font_name = 'SimHei'
-                else:
-                    font_name = 'Helvetica'
-            except:
-                font_name = 'Helvetica'
-            
-            # 設置PDF路徑
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            
-            if language == "chinese":
-                pdf_filename = f"{symbol}_report_chinese_{self.today_str}.pdf"
-            else:
-                pdf_filename = f"{symbol}_report_english_{self.today_str}.pdf"
-            
-            pdf_path = data_path / pdf_filename
-            
-            # 創建PDF文檔
-            doc = SimpleDocTemplate(str(pdf_path), pagesize=A4, topMargin=0.8*inch, bottomMargin=0.8*inch)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # 自定義樣式
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                spaceAfter=20,
-                alignment=1,
-                fontName=font_name
-            )
-            
-            normal_style = ParagraphStyle(
-                'CustomNormal',
-                parent=styles['Normal'],
-                fontSize=10,
-                spaceAfter=6,
-                fontName=font_name
-            )
+            import pdfkit  # noqa: F401  僅檢查是否安裝
+        except ImportError:
+            return {pdf_path: "pdfkit未安裝" for _, pdf_path in documents.values()}
+        
+        jobs = [(context.html(language), pdf_path) for (_, language), (context, pdf_path) in documents.items()]
+        return get_render_pool().render_many(jobs)
+    
+    def create_render_context(self, symbol: str, data: Dict[str, Any]) -> ReportRenderContext:
+        """
+        創建symbol的渲染上下文（Markdown/HTML/純文本只生成一次）
+        
+        Args:
+            symbol: 股票代碼
+            data: 股票數據
             
-            # 簡化的內容處理
-            lines = content.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line:
-                    if line.startswith('# '):
-                        story.append(Paragraph(line[2:], title_style))
-                    else:
-                        story.append(Paragraph(line, normal_style))
-                else:
-                    story.append(Spacer(1, 6))
+        Returns:
+            ReportRenderContext: 渲染上下文
+        """
+        return ReportRenderContext(symbol, data, self.today_str)
+    
+    def _as_render_context(self, symbol: str, data: Any) -> ReportRenderContext:
+        """股票數據轉換為渲染上下文（已是上下文時直接返回）"""
+        if isinstance(data, ReportRenderContext):
+            return data
+        return self.create_render_context(symbol, data)
+    
+    def _get_pdf_path(self, symbol: str, language: str) -> Path:
+        """PDF文件路徑（與Streamlit完全相同的路徑邏輯）"""
+        data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
+        data_path.mkdir(parents=True, exist_ok=True)
+        return data_path / f"{symbol}_report_{language}_{self.today_str}.pdf"
+    
+    def _build_pdf_html(self, symbol: str, content: str, language: str) -> str:
+        """
+        將Markdown報告內容包裝成完整的HTML文檔
+        
+        Args:
+            symbol: 股票代碼
+            content: Markdown內容
+            language: chinese 或 english
             
-            # 生成PDF
-            doc.build(story)
-            self.logger.info(f"✅ {language.title()} PDF報告已生成（reportlab）: {pdf_path}")
-            return str(pdf_path)
+        Returns:
+            str: HTML文檔
+        """
+        return render_report_html(symbol, self._clean_markdown_content(content), language)
+    
+    def _clean_markdown_content(self, content: str) -> str:
+        """
+        將Markdown內容轉換為HTML（與Streamlit一致）
+        
+        Args:
+            content: 原始Markdown內容
             
-        except ImportError:
-            self.logger.error("❌ 需要安裝reportlab: pip install reportlab")
-            return None
-        except Exception as e:
-            self.logger.error(f"❌ reportlab生成PDF失敗: {e}")
-            return None
+        Returns:
+            str: HTML內容
+        """
+        return markdown_to_html(content)
     
-    def generate_complete_report(self, symbol: str) -> Dict[str, Any]:
+    def generate_complete_report(self, symbol: str,
+                                 on_content_ready: Optional[Callable[[str, ReportRenderContext], None]] = None) -> Dict[str, Any]:
         """
         生成完整的股票報告（與Streamlit應用完全一致的流程）
         
         Args:
             symbol: 股票代碼
+            on_content_ready: Markdown報告保存後、PDF渲染前的回調
             
         Returns:
             Dict: 生成結果
         """
-        result = {
-            "success": False,
-            "symbol": symbol,
-            "generated_files": [],
-            "errors": []
-        }
+        return self.generate_complete_reports([symbol], on_content_ready)[symbol]
+    
+    def generate_complete_reports(self, symbols: List[str],
+                                  on_content_ready: Optional[Callable[[str, ReportRenderContext], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        批量生成多個symbol的完整報告：先逐個生成Markdown，再一次性批量渲染所有PDF
         
-        try:
-            self.logger.info(f"📝 開始生成 {symbol} 完整報告...")
-            
-            # 載入股票數據
-            data = self.load_stock_data(symbol)
-            
-            if not data:
-                result["errors"].append("無法載入股票數據")
-                return result
-            
-            # 檢查必要數據（與Streamlit一致）
-            required_data = ['news_cn', 'analysis', 'news_en', 'analysis_en']
-            missing_data = [dt for dt in required_data if not data.get(dt)]
-            
-            if missing_data:
-                result["errors"].append(f"缺少必要數據: {', '.join(missing_data)}")
-                return result
-            
-            # 生成Markdown報告（使用中文版本作為主報告，與Streamlit一致）
-            md_content = self.generate_chinese_report_content(symbol, data)
-            
-            # 保存Markdown文件
-            md_path = self.save_markdown_report(symbol, md_content)
+        Args:
+            symbols: 股票代碼列表
+            on_content_ready: 每個symbol的Markdown報告保存後立即調用 (symbol, 渲染上下文)，
+                              用於啟動只依賴報告內容的後續任務（如IG貼文），與PDF渲染並行
             
-            if md_path:
-                result["generated_files"].append(md_path)
-                self.logger.info(f"✅ {symbol} Markdown報告生成成功")
-            else:
-                result["errors"].append("Markdown報告生成失敗")
-                return result
+        Returns:
+            Dict: symbol -> 生成結果
+        """
+        results = {}
+        ready = {}
+        
+        # 1. 逐個載入數據並生成Markdown報告
+        for symbol in symbols:
+            result = {
+                "success": False,
+                "symbol": symbol,
+                "generated_files": [],
+                "errors": []
+            }
+            results[symbol] = result
             
-            # 生成中英文分離PDF（與Streamlit一致）
             try:
-                # 生成中文PDF（使用HTML轉換）
-                chinese_pdf = self.generate_chinese_pdf_report_html(symbol, data)
-                if chinese_pdf:
-                    result["generated_files"].append(chinese_pdf)
-                    self.logger.info(f"✅ {symbol} 中文PDF報告生成成功")
+                self.logger.info(f"📝 開始生成 {symbol} 完整報告...")
+                
+                # 載入股票數據
+                data = self.load_stock_data(symbol)
+                
+                if not data:
+                    result["errors"].append("無法載入股票數據")
+                    continue
+                
+                # 檢查必要數據（與Streamlit一致）
+                required_data = ['news_cn', 'analysis', 'news_en', 'analysis_en']
+                missing_data = [dt for dt in required_data if not data.get(dt)]
+                
+                if missing_data:
+                    result["errors"].append(f"缺少必要數據: {', '.join(missing_data)}")
+                    continue
                 
-                # 生成英文PDF（使用HTML轉換）
-                english_pdf = self.generate_english_pdf_report_html(symbol, data)
-                if english_pdf:
-                    result["generated_files"].append(english_pdf)
-                    self.logger.info(f"✅ {symbol} 英文PDF報告生成成功")
+                # 渲染上下文：Markdown只生成一次，PDF和IG貼文共用
+                context = self.create_render_context(symbol, data)
+                result["render_context"] = context
                 
-                # 報告生成結果（與Streamlit一致的邏輯）
-                if chinese_pdf and english_pdf:
-                    self.logger.info("✅ 中英文PDF報告生成完成!")
-                elif chinese_pdf:
-                    self.logger.warning("⚠️ 僅中文PDF生成成功")
-                elif english_pdf:
-                    self.logger.warning("⚠️ 僅英文PDF生成成功")
+                # 生成Markdown報告（使用中文版本作為主報告，與Streamlit一致）
+                md_content = context.markdown("chinese")
+                
+                # 保存Markdown文件
+                md_path = self.save_markdown_report(symbol, md_content)
+                
+                if md_path:
+                    result["generated_files"].append(md_path)
+                    result["success"] = True  # 成功條件：至少有Markdown報告
+                    ready[symbol] = context
+                    self.logger.info(f"✅ {symbol} Markdown報告生成成功")
+                    
+                    if on_content_ready:
+                        try:
+                            on_content_ready(symbol, context)
+                        except Exception as e:
+                            self.logger.warning(f"⚠️ {symbol} 報告內容回調失敗: {e}")
                 else:
-                    self.logger.warning("⚠️ PDF生成失敗，但Markdown報告可用")
-                    result["errors"].append("PDF生成失敗")
-                        
+                    result["errors"].append("Markdown報告生成失敗")
+                    
             except Exception as e:
-                self.logger.warning(f"⚠️ PDF生成過程出錯: {e}")
-                result["errors"].append(f"PDF生成失敗: {e}")
-            
-            # 成功條件：至少有Markdown報告
-            if md_path:
-                result["success"] = True
-                self.logger.info(f"🎉 {symbol} 報告生成完成，共生成 {len(result['generated_files'])} 個文件")
-            else:
-                result["errors"].append("沒有成功生成任何報告文件")
-            
-            return result
-            
+                error_msg = f"生成報告過程中發生異常: {str(e)}"
+                result["errors"].append(error_msg)
+                self.logger.error(f"❌ {error_msg}")
+        
+        if not ready:
+            return results
+        
+        # 2. 所有symbol的中英文PDF一起提交到渲染池
+        try:
+            pdf_results = self.generate_pdf_reports_batch(ready)
         except Exception as e:
-            error_msg = f"生成報告過程中發生異常: {str(e)}"
-            result["errors"].append(error_msg)
-            self.logger.error(f"❌ {error_msg}")
-            return result
+            self.logger.warning(f"⚠️ PDF生成過程出錯: {e}")
+            pdf_results = {}
+            for symbol in ready:
+                results[symbol]["errors"].append(f"PDF生成失敗: {e}")
+        
+        # 3. 匯總結果（與Streamlit一致的邏輯）
+        for symbol in ready:
+            result = results[symbol]
+            chinese_pdf = pdf_results.get(symbol, {}).get("chinese")
+            english_pdf = pdf_results.get(symbol, {}).get("english")
+            
+            if chinese_pdf:
+                result["generated_files"].append(chinese_pdf)
+                self.logger.info(f"✅ {symbol} 中文PDF報告生成成功")
+            if english_pdf:
+                result["generated_files"].append(english_pdf)
+                self.logger.info(f"✅ {symbol} 英文PDF報告生成成功")
+            
+            if chinese_pdf and english_pdf:
+                self.logger.info("✅ 中英文PDF報告生成完成!")
+            elif chinese_pdf:
+                self.logger.warning("⚠️ 僅中文PDF生成成功")
+            elif english_pdf:
+                self.logger.warning("⚠️ 僅英文PDF生成成功")
+            elif pdf_results:
+                self.logger.warning("⚠️ PDF生成失敗，但Markdown報告可用")
+                result["errors"].append("PDF生成失敗")
+            
+            self.logger.info(f"🎉 {symbol} 報告生成完成，共生成 {len(result['generated_files'])} 個文件")
+        
+        return results
 
 
 # 獨立函數供外部調用
@@ -752,6 +443,20 @@ def generate_stock_report(symbol: str) -> Dict[str, Any]:
     return generator.generate_complete_report(symbol)
 
 
+def generate_stock_reports(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    批量生成多個股票報告的便捷函數（PDF批量渲染）
+    
+    Args:
+        symbols: 股票代碼列表
+        
+    Returns:
+        Dict: symbol -> 生成結果
+    """
+    generator = ReportGenerator()
+    return generator.generate_complete_reports(symbols)
+
+
 if __name__ == "__main__":
     # 測試用例
     import sys
@@ -760,22 +465,23 @@ if __name__ == "__main__":
     # 設置日誌
     logging.basicConfig(level=logging.INFO)
     
-    if len(sys.argv) != 2:
-        print("使用方法: python report_generator.py <SYMBOL>")
+    if len(sys.argv) < 2:
+        print("使用方法: python report_generator.py <SYMBOL> [SYMBOL ...]")
         sys.exit(1)
     
-    symbol = sys.argv[1]
-    result = generate_stock_report(symbol)
-    
-    print(f"\n報告生成結果: {symbol}")
-    print(f"成功: {result['success']}")
+    symbols = [arg.upper() for arg in sys.argv[1:]]
+    results = generate_stock_reports(symbols)
     
-    if result['generated_files']:
-        print("生成的文件:")
-        for file_path in result['generated_files']:
-            print(f"  - {file_path}")
-    
-    if result['errors']:
-        print("錯誤:")
-        for error in result['errors']:
-            print(f"  - {error}")
+    for symbol, result in results.items():
+        print(f"\n報告生成結果: {symbol}")
+        print(f"成功: {result['success']}")
+        
+        if result['generated_files']:
+            print("生成的文件:")
+            for file_path in result['generated_files']:
+                print(f"  - {file_path}")
+        
+        if result['errors']:
+            print("錯誤:")
+            for error in result['errors']:
+                print(f"  - {error}")
@@ -0,0 +1,305 @@
+"""
+報告模板層：Markdown報告、PDF的HTML外殼和IG貼文統一使用Jinja2模板渲染
+模板只編譯一次並緩存，Worker（ReportGenerator）和Streamlit界面共用同一套模板
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Any, Optional
+
+from jinja2 import Environment, FileSystemLoader, Template
+
+from md_converter import convert_markdown
+
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# wkhtmltopdf無法正常渲染的emoji（轉換HTML時移除）
+PDF_UNSUPPORTED_EMOJI = (
+    '📊', '📰', '🏢', '✅', '⚠️', '💰', '💡', '📋',
+    '🔑', '📄', '💵', '🔥', '⚡', '📈', '💭', '🚀',
+    '🔴', '🟡', '🟢', '❌', '🎉', '🔄', '🈶'
+)
+
+_HTML_TAG = re.compile(r'<[^>]+>')
+_BR_TAG = re.compile(r'<br\s*/?>')
+
+# 各語言的HTML外殼配置
+REPORT_LANGUAGES = {
+    "chinese": {
+        "title": "{symbol} 股票分析報告",
+        "font_family": "'Microsoft YaHei', 'SimHei', 'SimSun', sans-serif",
+        "disclaimer": "本報告由AI自動生成，僅供教育和娛樂用途，不構成投資建議。投資決策請諮詢您的專業理財顧問。"
+    },
+    "english": {
+        "title": "{symbol} Stock Analysis Report",
+        "font_family": "'Helvetica', 'Arial', sans-serif",
+        "disclaimer": "This report is generated by AI for educational and entertainment purposes only. Not investment advice. Please consult your professional financial advisor for investment decisions."
+    }
+}
+
+
+def _br(value: Any) -> str:
+    """換行轉換為<br>（表格單元格內不能換行）"""
+    return str(value).replace('\n', '<br>')
+
+
+def _bullets(items: Any) -> str:
+    """列表轉換為單元格內的項目符號"""
+    return "<br>".join(f"• {item}" for item in items)
+
+
+def _risk_color(value: Any, high: str, medium: str) -> str:
+    """風險等級對應的顏色標記"""
+    return "🔴" if value == high else "🟡" if value == medium else "🟢"
+
+
+def _bias_color(value: Any, bullish: str, bearish: str) -> str:
+    """投資傾向對應的顏色標記"""
+    return "🟢" if value == bullish else "🔴" if value == bearish else "🟡"
+
+
+def _json_pretty(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, indent=2)
+
+
+@lru_cache(maxsize=1)
+def get_environment() -> Environment:
+    """
+    獲取共用的Jinja2環境（每個進程只創建一次）
+
+    Returns:
+        Environment: Jinja2環境
+    """
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        auto_reload=False
+    )
+    env.filters.update({
+        "br": _br,
+        "bullets": _bullets,
+        "risk_color": _risk_color,
+        "bias_color": _bias_color,
+        "json_pretty": _json_pretty
+    })
+    return env
+
+
+@lru_cache(maxsize=None)
+def get_template(name: str) -> Template:
+    """獲取已編譯的模板"""
+    return get_environment().get_template(name)
+
+
+def _unwrap(value: Any) -> Any:
+    """取出LLM結果的 data 部分（保存格式為 {"data": ..., "raw_ref": ...}）"""
+    return value.get('data', {}) if isinstance(value, dict) else value
+
+
+def _section(data: Dict[str, Any], key: str) -> Any:
+    """報告區塊數據：缺失時為None（模板顯示提示），否則為解包後的數據"""
+    return _unwrap(data[key]) if data.get(key) else None
+
+
+def _description(data: Dict[str, Any], language: str) -> Optional[str]:
+    """
+    提取公司描述
+
+    Args:
+        data: 股票數據
+        language: chinese 或 english
+
+    Returns:
+        str: 公司描述，沒有有效描述時返回None
+    """
+    key = "desc_cn" if language == "chinese" else "desc_en"
+    if not data.get(key):
+        return None
+
+    desc_data = _unwrap(data[key])
+    if not isinstance(desc_data, dict):
+        return None
+
+    desc_text = None
+    if key in desc_data:
+        desc_text = desc_data[key]
+    elif language == "english" and key in data[key]:  # 英文描述可能直接在根級別
+        desc_text = data[key][key]
+
+    if isinstance(desc_text, str) and len(desc_text.strip()) > 0:
+        return desc_text
+    return None
+
+
+def build_report_context(symbol: str, data: Dict[str, Any], language: str, date_str: str) -> Dict[str, Any]:
+    """
+    構建報告模板的上下文
+
+    Args:
+        symbol: 股票代碼
+        data: 股票數據
+        language: chinese 或 english
+        date_str: 報告日期
+
+    Returns:
+        Dict: 模板上下文
+    """
+    suffix = "" if language == "chinese" else "_en"
+    return {
+        "symbol": symbol,
+        "date_str": date_str,
+        "description": _description(data, language),
+        "news": _section(data, "news_cn" if language == "chinese" else "news_en"),
+        "analysis": _section(data, "analysis" + suffix)
+    }
+
+
+def render_report_markdown(symbol: str, data: Dict[str, Any], language: str, date_str: str) -> str:
+    """
+    渲染Markdown報告
+
+    Args:
+        symbol: 股票代碼
+        data: 股票數據
+        language: chinese 或 english
+        date_str: 報告日期
+
+    Returns:
+        str: Markdown內容
+    """
+    context = build_report_context(symbol, data, language, date_str)
+    return get_template(f"report_{language}.md.j2").render(context)
+
+
+def render_report_html(symbol: str, body_html: str, language: str) -> str:
+    """
+    將已轉換的報告HTML包裝成完整的HTML文檔（用於PDF）
+
+    Args:
+        symbol: 股票代碼
+        body_html: 報告正文HTML
+        language: chinese 或 english
+
+    Returns:
+        str: HTML文檔
+    """
+    settings = REPORT_LANGUAGES[language]
+    return get_template("report.html.j2").render(
+        language=language,
+        title=settings["title"].format(symbol=symbol),
+        font_family=settings["font_family"],
+        disclaimer=settings["disclaimer"],
+        body=body_html
+    )
+
+
+def render_ig_post(symbol: str, ig_data: Dict[str, Any], disclaimer: str, hashtags: str) -> str:
+    """
+    渲染Instagram貼文文本
+
+    Args:
+        symbol: 股票代碼
+        ig_data: LLM生成的貼文JSON
+        disclaimer: 免責聲明
+        hashtags: hashtags
+
+    Returns:
+        str: 貼文文本
+    """
+    return get_template("ig_post.txt.j2").render(
+        symbol=symbol,
+        ig=ig_data,
+        disclaimer=disclaimer,
+        hashtags=hashtags
+    )
+
+
+def render_ig_post_file(post_data: Dict[str, Any]) -> str:
+    """
+    渲染Instagram貼文的保存文件內容
+
+    Args:
+        post_data: 貼文數據（formatted_post, hashtags, raw_json）
+
+    Returns:
+        str: 文件內容
+    """
+    return get_template("ig_post_file.txt.j2").render(
+        formatted_post=post_data['formatted_post'],
+        hashtags=post_data['hashtags'],
+        raw_json=post_data['raw_json']
+    )
+
+
+def markdown_to_html(content: str) -> str:
+    """
+    將報告Markdown轉換為HTML正文（PDF和Streamlit顯示共用）
+
+    Args:
+        content: Markdown內容
+
+    Returns:
+        str: HTML內容
+    """
+    # 移除可能導致PDF渲染問題的emoji
+    for emoji in PDF_UNSUPPORTED_EMOJI:
+        content = content.replace(emoji, '')
+
+    # 轉換後將$符號替換為HTML實體，避免被解析為數學公式
+    return convert_markdown(content).replace('$', '&#36;')
+
+
+def markdown_to_plain_text(content: str) -> str:
+    """
+    去掉報告Markdown中的HTML標籤，得到純文本（用作LLM提示詞）
+
+    Args:
+        content: Markdown內容
+
+    Returns:
+        str: 純文本
+    """
+    return _HTML_TAG.sub('', _BR_TAG.sub(' ', content))
+
+
+class ReportRenderContext:
+    """
+    單個symbol的報告渲染上下文
+
+    每種語言的Markdown只渲染一次，HTML正文、完整HTML文檔和純文本都由同一份Markdown派生並緩存，
+    .md文件、中英文PDF和IG貼文提示詞共用同一次構建結果
+    """
+
+    def __init__(self, symbol: str, data: Dict[str, Any], date_str: str):
+        self.symbol = symbol
+        self.data = data
+        self.date_str = date_str
+        self._cache: Dict[tuple, str] = {}
+
+    def _memo(self, kind: str, language: str, build) -> str:
+        key = (kind, language)
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def markdown(self, language: str) -> str:
+        """報告Markdown"""
+        return self._memo("markdown", language,
+                          lambda: render_report_markdown(self.symbol, self.data, language, self.date_str))
+
+    def body_html(self, language: str) -> str:
+        """報告HTML正文"""
+        return self._memo("body_html", language, lambda: markdown_to_html(self.markdown(language)))
+
+    def html(self, language: str) -> str:
+        """用於PDF的完整HTML文檔"""
+        return self._memo("html", language,
+                          lambda: render_report_html(self.symbol, self.body_html(language), language))
+
+    def plain_text(self, language: str) -> str:
+        """去掉HTML標籤的純文本"""
+        return self._memo("plain_text", language, lambda: markdown_to_plain_text(self.markdown(language)))
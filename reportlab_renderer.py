@@ -0,0 +1,219 @@
+"""
+reportlab PDF渲染引擎：在當前進程內直接將Markdown報告渲染為PDF，無需啟動wkhtmltopdf子進程
+
+- CJK字體只註冊一次（模塊級緩存）
+- 段落樣式只創建一次並重複使用
+- Markdown表格渲染為reportlab表格
+"""
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+
+from config import PDF_CJK_FONT_CANDIDATES, PDF_CJK_CID_FONT
+
+
+# 字體不支持的emoji等BMP以外字符及變體選擇符
+_UNSUPPORTED_CHARS = re.compile('[\U00010000-\U0010ffff\u2600-\u27bf\ufe0f\u200d]')
+_BOLD_MARKDOWN = re.compile(r'\*\*(.+?)\*\*')
+_TABLE_SEPARATOR = re.compile(r'^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$')
+
+
+@lru_cache(maxsize=None)
+def register_cjk_font() -> str:
+    """
+    註冊CJK字體（每個進程只執行一次）
+
+    依次嘗試 PDF_CJK_FONT_CANDIDATES 中的TrueType字體，都不可用時使用reportlab內置的CID字體。
+    注意：Noto Sans CJK 是CFF輪廓的OpenType字體，reportlab的TTFont無法加載。
+
+    Returns:
+        str: 已註冊的字體名稱
+    """
+    for font_name, font_path, subfont_index in PDF_CJK_FONT_CANDIDATES:
+        if not os.path.exists(font_path):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont(font_name, font_path, subfontIndex=subfont_index))
+            pdfmetrics.registerFontFamily(font_name, normal=font_name, bold=font_name,
+                                          italic=font_name, boldItalic=font_name)
+            print(f"🔤 已註冊CJK字體: {font_name} ({font_path})")
+            return font_name
+        except Exception as e:
+            print(f"⚠️ 無法加載字體 {font_path}: {e}")
+
+    pdfmetrics.registerFont(UnicodeCIDFont(PDF_CJK_CID_FONT))
+    pdfmetrics.registerFontFamily(PDF_CJK_CID_FONT, normal=PDF_CJK_CID_FONT, bold=PDF_CJK_CID_FONT,
+                                  italic=PDF_CJK_CID_FONT, boldItalic=PDF_CJK_CID_FONT)
+    print(f"🔤 使用內置CID字體: {PDF_CJK_CID_FONT}")
+    return PDF_CJK_CID_FONT
+
+
+@lru_cache(maxsize=None)
+def get_styles(language: str) -> Dict[str, ParagraphStyle]:
+    """
+    獲取語言對應的段落樣式（每個進程每種語言只創建一次）
+
+    Args:
+        language: chinese 或 english
+
+    Returns:
+        Dict[str, ParagraphStyle]: 樣式名 -> 樣式
+    """
+    if language == "chinese":
+        font_name = register_cjk_font()
+        word_wrap = 'CJK'
+    else:
+        font_name = 'Helvetica'
+        word_wrap = None
+
+    base = getSampleStyleSheet()
+    common = {"fontName": font_name, "wordWrap": word_wrap}
+
+    return {
+        "h1": ParagraphStyle('ReportH1', parent=base['Heading1'], fontSize=18, leading=24,
+                             alignment=TA_CENTER, spaceAfter=12,
+                             textColor=colors.HexColor('#2c3e50'), **common),
+        "h2": ParagraphStyle('ReportH2', parent=base['Heading2'], fontSize=14, leading=20,
+                             spaceBefore=12, spaceAfter=6,
+                             textColor=colors.HexColor('#2c3e50'), **common),
+        "h3": ParagraphStyle('ReportH3', parent=base['Heading3'], fontSize=12, leading=16,
+                             spaceBefore=8, spaceAfter=4,
+                             textColor=colors.HexColor('#e74c3c'), **common),
+        "body": ParagraphStyle('ReportBody', parent=base['Normal'], fontSize=10, leading=15,
+                               spaceAfter=6, **common),
+        "bullet": ParagraphStyle('ReportBullet', parent=base['Normal'], fontSize=10, leading=15,
+                                 leftIndent=14, bulletIndent=4, spaceAfter=2, **common),
+        "cell": ParagraphStyle('ReportCell', parent=base['Normal'], fontSize=9, leading=13, **common),
+    }
+
+
+def _inline(text: str) -> str:
+    """
+    將Markdown行內格式轉換為reportlab段落標記
+
+    Args:
+        text: Markdown文本
+
+    Returns:
+        str: reportlab段落標記
+    """
+    text = _UNSUPPORTED_CHARS.sub('', text)
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    # 報告中直接使用的少量HTML標籤
+    text = re.sub(r'&lt;(/?)strong&gt;', r'<\1b>', text)
+    text = re.sub(r'&lt;br\s*/?&gt;', '<br/>', text)
+    text = _BOLD_MARKDOWN.sub(r'<b>\1</b>', text)
+    return text.strip()
+
+
+def _split_row(line: str) -> List[str]:
+    """拆分Markdown表格行"""
+    return [cell.strip() for cell in line.strip().strip('|').split('|')]
+
+
+def _build_table(rows: List[List[str]], styles: Dict[str, ParagraphStyle], width: float) -> Table:
+    """將Markdown表格行轉換為reportlab表格"""
+    column_count = max(len(row) for row in rows)
+    data = [
+        [Paragraph(_inline(cell), styles["cell"]) for cell in row + [''] * (column_count - len(row))]
+        for row in rows
+    ]
+
+    # 兩列表格（項目 | 內容）讓第一列窄一些
+    if column_count == 2:
+        col_widths = [width * 0.28, width * 0.72]
+    else:
+        col_widths = [width / column_count] * column_count
+
+    table = Table(data, colWidths=col_widths, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ecf0f1')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#bdc3c7')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 4),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    return table
+
+
+def markdown_to_flowables(md_content: str, language: str, width: float) -> list:
+    """
+    將報告Markdown轉換為reportlab flowables
+
+    支持標題、段落、列表、表格和分隔線（報告中使用的子集）
+
+    Args:
+        md_content: Markdown內容
+        language: chinese 或 english
+        width: 可用寬度
+
+    Returns:
+        list: flowables
+    """
+    styles = get_styles(language)
+    story = []
+    table_rows: List[List[str]] = []
+
+    def flush_table():
+        if table_rows:
+            story.append(_build_table(table_rows, styles, width))
+            story.append(Spacer(1, 8))
+            table_rows.clear()
+
+    for raw_line in md_content.split('\n'):
+        line = raw_line.strip()
+
+        if line.startswith('|'):
+            if not _TABLE_SEPARATOR.match(line):
+                table_rows.append(_split_row(line))
+            continue
+        flush_table()
+
+        if not line:
+            continue
+        if line == '---':
+            story.append(HRFlowable(width="100%", thickness=0.5, color=colors.HexColor('#bdc3c7'),
+                                    spaceBefore=6, spaceAfter=6))
+        elif line.startswith('### '):
+            story.append(Paragraph(_inline(line[4:]), styles["h3"]))
+        elif line.startswith('## '):
+            story.append(Paragraph(_inline(line[3:]), styles["h2"]))
+        elif line.startswith('# '):
+            story.append(Paragraph(_inline(line[2:]), styles["h1"]))
+        elif line.startswith(('- ', '* ', '• ')):
+            story.append(Paragraph(_inline(line[2:]), styles["bullet"], bulletText='•'))
+        else:
+            story.append(Paragraph(_inline(line), styles["body"]))
+
+    flush_table()
+    return story
+
+
+def render_markdown_to_pdf(md_content: str, pdf_path: str, language: str) -> str:
+    """
+    將Markdown報告渲染為PDF
+
+    Args:
+        md_content: Markdown內容
+        pdf_path: 輸出PDF路徑
+        language: chinese 或 english
+
+    Returns:
+        str: PDF文件路徑
+    """
+    doc = SimpleDocTemplate(str(pdf_path), pagesize=A4,
+                            topMargin=0.75 * inch, bottomMargin=0.75 * inch,
+                            leftMargin=0.75 * inch, rightMargin=0.75 * inch)
+    doc.build(markdown_to_flowables(md_content, language, doc.width))
+    return str(pdf_path)
@@ -4,9 +4,12 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from llms_chatgpt import ChatGPT
 from llms_deepseek import DeepSeek
-from config import NEWS_ANALYSIS_PROMPT, news_to_traditional_chinese_prompt, news_to_english_prompt, analysis_to_english_prompt, desc_to_chinese_prompt
+from config import news_to_traditional_chinese_prompt, news_to_english_prompt, analysis_to_english_prompt, desc_to_chinese_prompt
 from file_manager import FileManager
 from get_company_desc import CompanyDescScraper
+from token_budget import TokenBudgetPlanner, escalate_budget
+from json_repair import repair_json, loads_strict
+from config import JSON_REPAIR_ENABLED, JSON_REPAIR_ACCEPT_LOSSY
 import json
 import sys
 import time
@@ -33,15 +36,20 @@ def safe_json_dumps(obj, **kwargs):
     return json.dumps(obj, default=default_serializer, **kwargs)
 
 
-def retry_llm_call(llm_func, max_retries=3, delay=2, expect_json=False):
+def retry_llm_call(llm_func, max_retries=3, delay=2, expect_json=False, budget_plan=None):
     """
     重試LLM調用，處理中斷和失敗情況
     
+    JSON無效但能在本地無損修復時（見 json_repair.LOSSLESS_FIXES）直接返回修復後的JSON文本，不再重試；
+    其他修復（補全截斷、猜測缺少的內容）只在 JSON_REPAIR_ACCEPT_LOSSY 或最後一次嘗試時接受
+    
     Args:
         llm_func: LLM調用函數
         max_retries: 最大重試次數
         delay: 重試間隔（秒）
         expect_json: 是否期望JSON格式響應
+        budget_plan: TokenBudgetPlanner.plan() 的預算計劃；JSON無效（多為輸出被截斷）時
+                     會先提高輸出預算再重試，llm_func 需在調用時讀取 budget_plan["max_tokens"]
         
     Returns:
         LLM響應結果
@@ -55,12 +63,22 @@ def retry_llm_call(llm_func, max_retries=3, delay=2, expect_json=False):
                 # 如果期望JSON格式，驗證JSON有效性
                 if expect_json:
                     try:
-                        json.loads(result.strip())
+                        # 與 repair_json 相同的嚴格解析，NaN/Infinity 不算有效JSON
+                        loads_strict(result.strip())
                         print(f"✅ JSON格式驗證通過")
                         return result
-                    except json.JSONDecodeError as e:
+                    except ValueError as e:
                         print(f"⚠️ JSON格式無效 (嘗試 {attempt + 1}/{max_retries}): {e}")
+                        # 先在本地修復，無損修復就省去一次完整的LLM調用；需要猜測或補全的修復默認仍提高預算重試
+                        repair = repair_json(result) if JSON_REPAIR_ENABLED else None
+                        if repair and repair["success"] and (
+                                repair["lossless"] or JSON_REPAIR_ACCEPT_LOSSY or attempt == max_retries - 1):
+                            print(f"🔧 JSON已在本地修復: {', '.join(repair['fixes'])}")
+                            return json.dumps(repair["data"], ensure_ascii=False)
                         if attempt < max_retries - 1:
+                            # 以相同預算重試只會再次被截斷，先提高輸出預算（完整但格式有誤的輸出不需要）
+                            if budget_plan is not None and not (repair and repair["success"] and not repair["truncated"]):
+                                escalate_budget(budget_plan)
                             time.sleep(delay)
                             continue
                         else:
@@ -223,7 +241,10 @@ def main():
             print("🔄 緩存中無描述翻譯，開始翻譯...")
             try:
                 chatgpt = ChatGPT()
+                planner = TokenBudgetPlanner(chatgpt.model)
                 desc_en_text = desc_en.get("desc_en", "") if isinstance(desc_en, dict) else str(desc_en)
+                desc_en_text = planner.fit_text(desc_en_text, "desc_cn", desc_to_chinese_prompt)
+                desc_plan = planner.plan("desc_cn", desc_to_chinese_prompt, desc_en_text)
                 
                 def chatgpt_desc_call():
                     return chatgpt.chat(
@@ -231,10 +252,11 @@ def main():
                         use_system_prompt=True, 
                         custom_system_prompt=desc_to_chinese_prompt,
                         json_output=True,
-                        max_tokens=2000
+                        max_tokens=desc_plan["max_tokens"]
                     )
                 
-                desc_cn_text = retry_llm_call(chatgpt_desc_call, max_retries=3, delay=2, expect_json=True)
+                desc_cn_text = retry_llm_call(chatgpt_desc_call, max_retries=3, delay=2, expect_json=True, budget_plan=desc_plan)
+                planner.record_usage(desc_plan, chatgpt.last_usage)
                 
                 if file_manager.validate_data(desc_cn_text, "desc_cn"):
                     file_manager.save_data(symbol, "desc_cn", desc_cn_text, today_str)
@@ -255,7 +277,10 @@ def main():
         print("🔄 緩存中無翻譯數據，開始翻譯新聞...")
         try:
             chatgpt = ChatGPT()
-            news_str = safe_json_dumps(news, ensure_ascii=False, indent=2)
+            planner = TokenBudgetPlanner(chatgpt.model)
+            news_input = planner.fit_news(news, "news_cn", news_to_traditional_chinese_prompt)
+            news_str = safe_json_dumps(news_input, ensure_ascii=False, indent=2)
+            news_cn_plan = planner.plan("news_cn", news_to_traditional_chinese_prompt, news_str)
             
             # 使用重試機制調用ChatGPT，啟用JSON模式
             def chatgpt_call():
@@ -264,10 +289,11 @@ def main():
                     use_system_prompt=True, 
                     custom_system_prompt=news_to_traditional_chinese_prompt,
                     json_output=True,  # 啟用JSON Output（如果支持）
-                    max_tokens=2500
+                    max_tokens=news_cn_plan["max_tokens"]
                 )
             
-            news_cn_text = retry_llm_call(chatgpt_call, max_retries=3, delay=2, expect_json=True)
+            news_cn_text = retry_llm_call(chatgpt_call, max_retries=3, delay=2, expect_json=True, budget_plan=news_cn_plan)
+            planner.record_usage(news_cn_plan, chatgpt.last_usage)
             
             # 保存翻譯結果
             if file_manager.validate_data(news_cn_text, "news_cn"):
@@ -291,23 +317,11 @@ def main():
     if report is None or not file_manager.validate_data(report, "analysis"):
         print("🔄 緩存中無分析數據，開始分析...")
         try:
-            deepseek = DeepSeek()
-            user_prompt = safe_json_dumps({
-                "news": news,
-                "financial_data": doc
-            }, ensure_ascii=False, indent=2)
-            
-            # 使用重試機制調用DeepSeek，啟用JSON Output功能
-            def deepseek_call():
-                return deepseek.chat(
-                    user_prompt, 
-                    use_system_prompt=True, 
-                    custom_system_prompt=NEWS_ANALYSIS_PROMPT,
-                    json_output=True,  # 啟用JSON Output
-                    max_tokens=3000    # 增加token數量避免截斷
-                )
+            from news_analysis import run_news_analysis
             
-            report_text = retry_llm_call(deepseek_call, max_retries=5, delay=3, expect_json=True)  # DeepSeek更多重試，期望JSON
+            deepseek = DeepSeek()
+            # 新聞量大時自動切換為分塊摘要 + 綜合分析，均使用重試機制和JSON Output
+            report_text = run_news_analysis(deepseek, news, doc)
             
             # 保存分析結果
             if file_manager.validate_data(report_text, "analysis"):
@@ -338,6 +352,8 @@ def main():
             else:
                 news_cn_content = news_cn
             news_cn_str = json.dumps(news_cn_content, ensure_ascii=False, indent=2)
+            planner = TokenBudgetPlanner(chatgpt.model)
+            news_en_plan = planner.plan("news_en", news_to_english_prompt, news_cn_str)
             
             # 使用重試機制調用ChatGPT進行英文翻譯
             def chatgpt_en_call():
@@ -346,10 +362,11 @@ def main():
                     use_system_prompt=True, 
                     custom_system_prompt=news_to_english_prompt,
                     json_output=True,
-                    max_tokens=2500
+                    max_tokens=news_en_plan["max_tokens"]
                 )
             
-            news_en_text = retry_llm_call(chatgpt_en_call, max_retries=3, delay=2, expect_json=True)
+            news_en_text = retry_llm_call(chatgpt_en_call, max_retries=3, delay=2, expect_json=True, budget_plan=news_en_plan)
+            planner.record_usage(news_en_plan, chatgpt.last_usage)
             
             # 保存英文翻譯結果
             if file_manager.validate_data(news_en_text, "news_en"):
@@ -379,6 +396,8 @@ def main():
             else:
                 report_content = report
             report_str = json.dumps(report_content, ensure_ascii=False, indent=2)
+            planner = TokenBudgetPlanner(chatgpt.model)
+            analysis_en_plan = planner.plan("analysis_en", analysis_to_english_prompt, report_str)
             
             # 使用重試機制調用ChatGPT進行英文翻譯
             def chatgpt_analysis_en_call():
@@ -387,10 +406,11 @@ def main():
                     use_system_prompt=True, 
                     custom_system_prompt=analysis_to_english_prompt,
                     json_output=True,
-                    max_tokens=3000
+                    max_tokens=analysis_en_plan["max_tokens"]
                 )
             
-            analysis_en_text = retry_llm_call(chatgpt_analysis_en_call, max_retries=3, delay=2, expect_json=True)
+            analysis_en_text = retry_llm_call(chatgpt_analysis_en_call, max_retries=3, delay=2, expect_json=True, budget_plan=analysis_en_plan)
+            planner.record_usage(analysis_en_plan, chatgpt.last_usage)
             
             # 保存英文翻譯結果
             if file_manager.validate_data(analysis_en_text, "analysis_en"):
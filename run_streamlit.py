@@ -3,9 +3,8 @@ Streamlit Web應用：股票分析報告生成器
 """
 import streamlit as st
 import pandas as pd
-import json
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 import time
 import os
@@ -16,19 +15,105 @@ from mongo_db import MongoHandler
 from get_news import NewsScraper
 from llms_chatgpt import ChatGPT
 from llms_deepseek import DeepSeek
-from config import NEWS_ANALYSIS_PROMPT, news_to_traditional_chinese_prompt, news_to_english_prompt, analysis_to_english_prompt, desc_to_chinese_prompt
+from config import JOB_POLL_INTERVAL, STOCK_DATA_CACHE_ENTRIES, FILE_SERVER_ENABLED, FILE_SERVER_BASE_URL, REPORT_HISTORY_DAYS, ANALYSIS_DB_FILENAME, NEWS_ANALYSIS_PROMPT, news_to_traditional_chinese_prompt, news_to_english_prompt, analysis_to_english_prompt, desc_to_chinese_prompt
 from zoneinfo import ZoneInfo
 from ig_post import IgPostCreator
+from report_templates import ReportRenderContext
+from report_generator import ReportGenerator
+from ig_post_store import IG_POST_DATA_TYPE, save_ig_post, load_ig_post
+from summary_index import load_summary, rebuild_summary, summary_path
+from data_retention import load_archive_index
+from json_codec import DATA_FILE_SUFFIXES, strip_data_suffix
+from file_server import ensure_file_server, file_url
+from analysis_store import get_analysis_store
+from job_queue import JobProgress, get_job_manager, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_FINISHED_STATES
 
 # 導入自定義處理函數
 from process_stock import process_single_stock
 
+# 每個symbol需要載入的數據類型
+STOCK_DATA_TYPES = ['news', 'fundamentals', 'desc_en', 'desc_cn', 'news_cn', 'analysis', 'news_en', 'analysis_en']
+# 生成報告必需的數據類型
+REQUIRED_DATA_TYPES = ['news_cn', 'analysis', 'news_en', 'analysis_en']
+
+
+@st.cache_resource(show_spinner=False)
+def get_file_manager() -> FileManager:
+    """進程內共用的文件管理器"""
+    return FileManager()
+
+
+@st.cache_resource(show_spinner=False)
+def get_ig_creator() -> IgPostCreator:
+    """進程內共用的IG貼文創建器（首次使用時才創建OpenAI客戶端）"""
+    return IgPostCreator()
+
+
+def _data_files_signature(file_manager: FileManager, symbol: str, date_str: str) -> tuple:
+    """
+    symbol數據文件的簽名（文件名、修改時間、大小），一次scandir完成，用作緩存鍵
+    
+    Args:
+        file_manager: 文件管理器
+        symbol: 股票代碼
+        date_str: 日期字符串
+        
+    Returns:
+        tuple: ((文件名, mtime_ns, 大小), ...)
+    """
+    try:
+        with os.scandir(file_manager._get_data_path(symbol, date_str)) as entries:
+            return tuple(sorted(
+                (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in entries if entry.name.endswith(DATA_FILE_SUFFIXES)
+            ))
+    except FileNotFoundError:
+        return ()
+
+
+@st.cache_data(show_spinner=False, max_entries=STOCK_DATA_CACHE_ENTRIES)
+def _load_stock_data_cached(symbol: str, date_str: str, base_data_dir: str, signature: tuple) -> tuple:
+    """
+    載入並驗證symbol的所有數據（文件簽名不變時直接返回緩存結果）
+    
+    Returns:
+        tuple: (數據字典, 錯誤信息列表)
+    """
+    file_manager = FileManager(base_data_dir)
+    data = {}
+    errors = []
+    
+    for data_type in STOCK_DATA_TYPES:
+        try:
+            loaded_data = file_manager.load_data(symbol, data_type, date_str)
+            if loaded_data and file_manager.validate_data(loaded_data, data_type):
+                data[data_type] = loaded_data
+            else:
+                data[data_type] = None
+        except Exception as e:
+            errors.append(f"載入 {symbol} 的 {data_type} 數據時出錯: {e}")
+            data[data_type] = None
+    
+    return data, errors
+
+
 class StockAnalysisApp:
-    def __init__(self):
-        self.file_manager = FileManager()
-        self.today_str = datetime.now().strftime('%Y-%m-%d')
-        self.ig_creator = IgPostCreator()
+    def __init__(self, date_str: str = None):
+        """
+        Args:
+            date_str: 查看的日期，默認為今日（歷史日期只能查看和重新生成報告，不能下載新數據）
+        """
+        # 構造成本很低：長期存在的對象都來自緩存資源，IG創建器延遲到首次使用
+        self.file_manager = get_file_manager()
+        self.today_str = date_str or datetime.now().strftime('%Y-%m-%d')
+        self.is_today = self.today_str == datetime.now().strftime('%Y-%m-%d')
+        self._render_contexts = {}
         print(f"🗓️ Streamlit應用使用日期: {self.today_str}")  # 調試信息
+    
+    @property
+    def ig_creator(self) -> IgPostCreator:
+        """共用的IG貼文創建器"""
+        return get_ig_creator()
         
     def clean_symbol_list(self, symbols_input: str) -> list:
         """
@@ -58,7 +143,7 @@ class StockAnalysisApp:
     
     def load_stock_data(self, symbol: str) -> dict:
         """
-        加載股票的所有數據
+        加載股票的所有數據（按文件修改時間緩存，頁面重新運行時不重複解析）
         
         Args:
             symbol: 股票代碼
@@ -66,257 +151,14 @@ class StockAnalysisApp:
         Returns:
             dict: 包含所有數據的字典
         """
-        data = {}
-        data_types = ['news', 'fundamentals', 'desc_en', 'desc_cn', 'news_cn', 'analysis', 'news_en', 'analysis_en']
-        
-        for data_type in data_types:
-            try:
-                loaded_data = self.file_manager.load_data(symbol, data_type, self.today_str)
-                if loaded_data and self.file_manager.validate_data(loaded_data, data_type):
-                    data[data_type] = loaded_data
-                else:
-                    data[data_type] = None
-            except Exception as e:
-                st.error(f"載入 {symbol} 的 {data_type} 數據時出錯: {e}")
-                data[data_type] = None
-        
+        signature = _data_files_signature(self.file_manager, symbol, self.today_str)
+        data, errors = _load_stock_data_cached(
+            symbol.upper(), self.today_str, str(self.file_manager.base_data_dir), signature
+        )
+        for error in errors:
+            st.error(error)
         return data
     
-    def generate_markdown_report_old(self, symbol: str, data: dict) -> str:
-        """
-        生成Markdown報告
-        
-        Args:
-            symbol: 股票代碼
-            data: 股票數據
-            
-        Returns:
-            str: Markdown格式的報告
-        """
-        md_content = f"""# 📊 {symbol} 股票分析報告
-
-<strong>生成日期:</strong> {self.today_str}
-
----
-
-## 🏢 公司簡介
-
-"""
-        
-        # 公司描述 (中文)
-        if data.get('desc_cn'):
-            desc_cn_data = data['desc_cn'].get('data', {}) if isinstance(data['desc_cn'], dict) else data['desc_cn']
-            if isinstance(desc_cn_data, dict):
-                if 'desc_cn' in desc_cn_data:
-                    md_content += f"<strong>公司描述:</strong> {desc_cn_data['desc_cn']}\n\n"
-                if 'summary' in desc_cn_data:
-                    md_content += f"<strong>簡介:</strong> {desc_cn_data['summary']}\n\n"
-                if 'business_type' in desc_cn_data:
-                    md_content += f"<strong>業務類型:</strong> {desc_cn_data['business_type']}\n\n"
-                if 'key_products' in desc_cn_data:
-                    md_content += "<strong>主要產品:</strong>\n"
-                    for product in desc_cn_data['key_products']:
-                        md_content += f"- {product}\n"
-                    md_content += "\n"
-        elif data.get('desc_en'):
-            desc_en_data = data['desc_en']
-            if isinstance(desc_en_data, dict) and 'desc_en' in desc_en_data:
-                md_content += f"<strong>公司描述:</strong> {desc_en_data['desc_en']}\n\n"
-        else:
-            md_content += "❌ 暫無公司描述資料\n\n"
-
-        md_content += """---
-
-## 📰 新聞翻譯 (繁體中文)
-
-"""
-        
-        # 新聞中文 - 使用表格布局
-        if data.get('news_cn'):
-            news_cn_data = data['news_cn'].get('data', {}) if isinstance(data['news_cn'], dict) else data['news_cn']
-            if isinstance(news_cn_data, dict):
-                md_content += "| 項目 | 內容 |\n"
-                md_content += "|------|------|\n"
-                
-                if 'summary' in news_cn_data:
-                    md_content += f"| <strong>摘要</strong> | {news_cn_data['summary']} |\n"
-                
-                if 'key_points' in news_cn_data:
-                    key_points_str = "<br>".join([f"• {point}" for point in news_cn_data['key_points']])
-                    md_content += f"| <strong>要點</strong> | {key_points_str} |\n"
-                
-                if 'news_cn' in news_cn_data:
-                    # 限制新聞內容長度，避免表格過寬
-                    news_content = news_cn_data['news_cn'][:300] + "..." if len(news_cn_data['news_cn']) > 300 else news_cn_data['news_cn']
-                    md_content += f"| <strong>完整內容</strong> | {news_content} |\n"
-                
-                md_content += "\n"
-        else:
-            md_content += "❌ 暫無中文新聞數據\n\n"
-        
-        md_content += """---
-
-## 📰 News Translation (English)
-
-"""
-        
-        # 新聞英文
-        if data.get('news_en'):
-            news_en_data = data['news_en'].get('data', {}) if isinstance(data['news_en'], dict) else data['news_en']
-            if isinstance(news_en_data, dict):
-                if 'news_en' in news_en_data:
-                    md_content += f"{news_en_data['news_en']}\n\n"
-                if 'summary' in news_en_data:
-                    md_content += f"<strong>Summary:</strong> {news_en_data['summary']}\n\n"
-                if 'key_points' in news_en_data:
-                    md_content += "<strong>Key Points:</strong>\n"
-                    for point in news_en_data['key_points']:
-                        md_content += f"- {point}\n"
-                    md_content += "\n"
-        else:
-            md_content += "❌ No English news data available\n\n"
-        
-        md_content += """---
-
-## 📊 基本面分析 (中文)
-
-"""
-        
-        # 分析中文 - 使用表格布局
-        if data.get('analysis'):
-            analysis_data = data['analysis'].get('data', {}) if isinstance(data['analysis'], dict) else data['analysis']
-            if isinstance(analysis_data, dict):
-                # 基本信息表格
-                md_content += "### 📋 基本信息\n\n"
-                md_content += "| 項目 | 內容 |\n"
-                md_content += "|------|------|\n"
-                md_content += f"| <strong>公司</strong> | {analysis_data.get('company', 'N/A')} |\n"
-                md_content += f"| <strong>股票代碼</strong> | {analysis_data.get('ticker', 'N/A')} |\n"
-                md_content += f"| <strong>季度</strong> | {analysis_data.get('quarter', 'N/A')} |\n\n"
-                
-                # 利好因素表格
-                if 'positive_factors' in analysis_data:
-                    md_content += "### ✅ 利好因素\n\n"
-                    md_content += "| 利好因素 | 詳細說明 |\n"
-                    md_content += "|----------|----------|\n"
-                    for factor in analysis_data['positive_factors']:
-                        if isinstance(factor, dict):
-                            title = f"<strong>{factor.get('title', 'N/A')}</strong>"
-                            detail = factor.get('detail', 'N/A').replace('\n', '<br>')
-                            md_content += f"| {title} | {detail} |\n"
-                    md_content += "\n"
-                
-                # 風險因素表格
-                if 'risks' in analysis_data:
-                    md_content += "### ⚠️ 風險因素\n\n"
-                    md_content += "| 風險因素 | 詳細說明 |\n"
-                    md_content += "|----------|----------|\n"
-                    for risk in analysis_data['risks']:
-                        if isinstance(risk, dict):
-                            title = f"<strong>{risk.get('title', 'N/A')}</strong>"
-                            detail = risk.get('detail', 'N/A').replace('\n', '<br>')
-                            md_content += f"| {title} | {detail} |\n"
-                    md_content += "\n"
-                
-                # 流動性分析表格
-                if 'liquidity_risk' in analysis_data:
-                    md_content += "### 💰 流動性分析\n\n"
-                    md_content += "| 分析項目 | 評估結果 |\n"
-                    md_content += "|----------|----------|\n"
-                    liquidity = analysis_data['liquidity_risk']
-                    if isinstance(liquidity, dict):
-                        if liquidity.get('cash'):
-                            md_content += f"| <strong>現金狀況</strong> | {liquidity['cash']} |\n"
-                        if liquidity.get('burn_rate'):
-                            md_content += f"| <strong>燒錢速度</strong> | {liquidity['burn_rate']} |\n"
-                        if liquidity.get('atm_risk'):
-                            atm_color = "🔴" if liquidity['atm_risk'] == "高" else "🟡" if liquidity['atm_risk'] == "中" else "🟢"
-                            md_content += f"| <strong>ATM風險</strong> | {atm_color} {liquidity['atm_risk']} |\n"
-                        if liquidity.get('debt_status'):
-                            md_content += f"| <strong>債務狀況</strong> | {liquidity['debt_status']} |\n"
-                    md_content += "\n"
-                
-                # 投資建議表格
-                if 'trading_recommendation' in analysis_data:
-                    rec = analysis_data['trading_recommendation']
-                    md_content += "### 💡 投資建議\n\n"
-                    md_content += "| 建議項目 | 內容 |\n"
-                    md_content += "|----------|------|\n"
-                    
-                    # 投資傾向用顏色標示
-                    bias = rec.get('bias', 'N/A')
-                    bias_color = "🟢" if bias == "看多" else "🔴" if bias == "看空" else "🟡"
-                    md_content += f"| <strong>投資傾向</strong> | {bias_color} <strong>{bias}</strong> |\n"
-                    
-                    if rec.get('suggestion'):
-                        suggestion = rec['suggestion'].replace('\n', '<br>')
-                        md_content += f"| <strong>投資建議</strong> | {suggestion} |\n"
-                    
-                    if 'catalysts' in rec and rec['catalysts']:
-                        catalysts_str = "<br>".join([f"• {catalyst}" for catalyst in rec['catalysts']])
-                        md_content += f"| <strong>催化劑</strong> | {catalysts_str} |\n"
-                    md_content += "\n"
-        else:
-            md_content += "❌ 暫無中文分析數據\n\n"
-        
-        md_content += """---
-
-## 📊 Fundamental Analysis (English)
-
-"""
-        
-        # 分析英文
-        if data.get('analysis_en'):
-            analysis_en_data = data['analysis_en'].get('data', {}) if isinstance(data['analysis_en'], dict) else data['analysis_en']
-            if isinstance(analysis_en_data, dict):
-                md_content += f"<strong>Company:</strong> {analysis_en_data.get('company', 'N/A')}\n"
-                md_content += f"<strong>Ticker:</strong> {analysis_en_data.get('ticker', 'N/A')}\n"
-                md_content += f"<strong>Quarter:</strong> {analysis_en_data.get('quarter', 'N/A')}\n\n"
-                
-                # Positive factors
-                if 'positive_factors' in analysis_en_data:
-                    md_content += "### ✅ Positive Factors\n\n"
-                    for factor in analysis_en_data['positive_factors']:
-                        md_content += f"<strong>{factor.get('title', '')}</strong>\n"
-                        md_content += f"{factor.get('detail', '')}\n\n"
-                
-                # Risk factors
-                if 'risks' in analysis_en_data:
-                    md_content += "### ⚠️ Risk Factors\n\n"
-                    for risk in analysis_en_data['risks']:
-                        md_content += f"<strong>{risk.get('title', '')}</strong>\n"
-                        md_content += f"{risk.get('detail', '')}\n\n"
-                
-                # Liquidity risk
-                if 'liquidity_risk' in analysis_en_data:
-                    liquidity = analysis_en_data['liquidity_risk']
-                    md_content += "### 💰 Liquidity Analysis\n\n"
-                    md_content += f"<strong>Cash Status:</strong> {liquidity.get('cash', 'N/A')}\n\n"
-                    md_content += f"<strong>Burn Rate:</strong> {liquidity.get('burn_rate', 'N/A')}\n\n"
-                    md_content += f"<strong>ATM Risk:</strong> {liquidity.get('atm_risk', 'N/A')}\n\n"
-                    md_content += f"<strong>Debt Status:</strong> {liquidity.get('debt_status', 'N/A')}\n\n"
-                
-                # Trading recommendation
-                if 'trading_recommendation' in analysis_en_data:
-                    rec = analysis_en_data['trading_recommendation']
-                    md_content += "### 💡 Trading Recommendation\n\n"
-                    md_content += f"<strong>Bias:</strong> {rec.get('bias', 'N/A')}\n"
-                    md_content += f"<strong>Suggestion:</strong> {rec.get('suggestion', 'N/A')}\n"
-                    if 'catalysts' in rec:
-                        md_content += "<strong>Key Catalysts:</strong>\n"
-                        for catalyst in rec['catalysts']:
-                            md_content += f"- {catalyst}\n"
-                        md_content += "\n"
-        else:
-            md_content += "❌ No English analysis data available\n\n"
-        
-        md_content += """---
-
-*本報告由AI自動生成，僅供參考，不構成投資建議。投資有風險，請謹慎決策。*
-"""
-        
-        return md_content
-    
     def save_markdown_report(self, symbol: str, md_content: str) -> str:
         """
         保存Markdown報告到文件
@@ -336,8 +178,26 @@ class StockAnalysisApp:
         with open(md_file_path, 'w', encoding='utf-8') as f:
             f.write(md_content)
         
+        self.file_manager.record_stage(symbol, "report", self.today_str)
         return str(md_file_path)
     
+    def get_render_context(self, symbol: str, data: dict) -> ReportRenderContext:
+        """
+        獲取symbol的渲染上下文（同一份數據只渲染一次Markdown/HTML）
+        
+        Args:
+            symbol: 股票代碼
+            data: 股票數據
+            
+        Returns:
+            ReportRenderContext: 渲染上下文
+        """
+        context = self._render_contexts.get(symbol)
+        if context is None or context.data is not data or context.date_str != self.today_str:
+            context = ReportRenderContext(symbol, data, self.today_str)
+            self._render_contexts[symbol] = context
+        return context
+    
     def generate_chinese_report_content(self, symbol: str, data: dict) -> str:
         """
         生成中文報告內容
@@ -349,148 +209,7 @@ class StockAnalysisApp:
         Returns:
             str: 中文Markdown內容
         """
-        md_content = f"""# 📊 {symbol} 股票分析報告
-
-<strong>生成日期:</strong> {self.today_str}
-
----
-
-## 🏢 公司簡介
-
-"""
-        
-        # 公司描述 - 中文
-        if data.get('desc_cn'):
-            desc_cn_data = data['desc_cn'].get('data', {}) if isinstance(data['desc_cn'], dict) else data['desc_cn']
-            if isinstance(desc_cn_data, dict) and 'desc_cn' in desc_cn_data:
-                # 確保描述不包含新聞內容 (基本檢查)
-                desc_text = desc_cn_data['desc_cn']
-                if isinstance(desc_text, str) and len(desc_text.strip()) > 0:
-                    md_content += f"<strong>公司描述:</strong> {desc_text}\n\n"
-                else:
-                    md_content += "❌ 沒有公司介紹\n\n"
-            else:
-                md_content += "❌ 沒有公司介紹\n\n"
-        else:
-            md_content += "❌ 沒有公司介紹\n\n"
-
-        md_content += """---
-
-## 📰 新聞
-
-"""
-        
-        # 新聞中文 - 使用表格布局
-        if data.get('news_cn'):
-            news_cn_data = data['news_cn'].get('data', {}) if isinstance(data['news_cn'], dict) else data['news_cn']
-            if isinstance(news_cn_data, dict):
-                md_content += "| 項目 | 內容 |\n"
-                md_content += "|------|------|\n"
-                
-                if 'summary' in news_cn_data:
-                    md_content += f"| <strong>摘要</strong> | {news_cn_data['summary']} |\n"
-                
-                if 'key_points' in news_cn_data:
-                    key_points_str = "<br>".join([f"• {point}" for point in news_cn_data['key_points']])
-                    md_content += f"| <strong>要點</strong> | {key_points_str} |\n"
-                
-                if 'news_cn' in news_cn_data:
-                    # 完整新聞內容，不截斷
-                    md_content += f"| <strong>完整內容</strong> | {news_cn_data['news_cn']} |\n"
-                
-                md_content += "\n"
-        else:
-            md_content += "❌ 暫無中文新聞數據\n\n"
-        
-        md_content += """---
-
-## 📊 基本面分析
-
-"""
-        
-        # 分析中文 - 使用表格布局
-        if data.get('analysis'):
-            analysis_data = data['analysis'].get('data', {}) if isinstance(data['analysis'], dict) else data['analysis']
-            if isinstance(analysis_data, dict):
-                # 股票代碼驗證
-                if analysis_data.get('ticker') and analysis_data['ticker'].upper() != symbol.upper():
-                    md_content += f"❌ 錯誤：股票代碼不匹配 (期望: {symbol.upper()}, 實際: {analysis_data.get('ticker', 'N/A')})\n\n"
-                    md_content += "❌ 暫無基本面資料\n\n"
-                else:
-                    # 基本信息表格
-                    md_content += "### 📋 基本信息\n\n"
-                    md_content += "| 項目 | 內容 |\n"
-                    md_content += "|------|------|\n"
-                    md_content += f"| <strong>公司</strong> | {analysis_data.get('company', 'N/A')} |\n"
-                    md_content += f"| <strong>股票代碼</strong> | {analysis_data.get('ticker', 'N/A')} |\n"
-                    md_content += f"| <strong>季度</strong> | {analysis_data.get('quarter', 'N/A')} |\n\n"
-                    
-                    # 利好因素表格
-                    if 'positive_factors' in analysis_data:
-                        md_content += "### ✅ 利好因素\n\n"
-                        md_content += "| 利好因素 | 詳細說明 |\n"
-                        md_content += "|----------|----------|\n"
-                        for factor in analysis_data['positive_factors']:
-                            if isinstance(factor, dict):
-                                title = f"<strong>{factor.get('title', 'N/A')}</strong>"
-                                detail = factor.get('detail', 'N/A').replace('\n', '<br>')
-                                md_content += f"| {title} | {detail} |\n"
-                        md_content += "\n"
-                    
-                    # 風險因素表格
-                    if 'risks' in analysis_data:
-                        md_content += "### ⚠️ 風險因素\n\n"
-                        md_content += "| 風險因素 | 詳細說明 |\n"
-                        md_content += "|----------|----------|\n"
-                        for risk in analysis_data['risks']:
-                            if isinstance(risk, dict):
-                                title = f"<strong>{risk.get('title', 'N/A')}</strong>"
-                                detail = risk.get('detail', 'N/A').replace('\n', '<br>')
-                                md_content += f"| {title} | {detail} |\n"
-                        md_content += "\n"
-                    
-                    # 流動性分析表格
-                    if 'liquidity_risk' in analysis_data:
-                        md_content += "### 💰 流動性分析\n\n"
-                        md_content += "| 分析項目 | 評估結果 |\n"
-                        md_content += "|----------|----------|\n"
-                        liquidity = analysis_data['liquidity_risk']
-                        if isinstance(liquidity, dict):
-                            if liquidity.get('cash'):
-                                md_content += f"| <strong>現金狀況</strong> | {liquidity['cash']} |\n"
-                            if liquidity.get('burn_rate'):
-                                md_content += f"| <strong>燒錢速度</strong> | {liquidity['burn_rate']} |\n"
-                            if liquidity.get('atm_risk'):
-                                atm_color = "🔴" if liquidity['atm_risk'] == "高" else "🟡" if liquidity['atm_risk'] == "中" else "🟢"
-                                md_content += f"| <strong>ATM風險</strong> | {atm_color} {liquidity['atm_risk']} |\n"
-                            if liquidity.get('debt_status'):
-                                md_content += f"| <strong>債務狀況</strong> | {liquidity['debt_status']} |\n"
-                        md_content += "\n"
-                    
-                    # 投資建議表格
-                    if 'trading_recommendation' in analysis_data:
-                        rec = analysis_data['trading_recommendation']
-                        md_content += "### 💡 投資建議\n\n"
-                        md_content += "| 建議項目 | 內容 |\n"
-                        md_content += "|----------|------|\n"
-                        
-                        # 投資傾向用顏色標示
-                        bias = rec.get('bias', 'N/A')
-                        bias_color = "🟢" if bias == "看多" else "🔴" if bias == "看空" else "🟡"
-                        md_content += f"| <strong>投資傾向</strong> | {bias_color} <strong>{bias}</strong> |\n"
-                        
-                        if rec.get('suggestion'):
-                            suggestion = rec['suggestion'].replace('\n', '<br>')
-                            md_content += f"| <strong>投資建議</strong> | {suggestion} |\n"
-                        
-                        if 'catalysts' in rec and rec['catalysts']:
-                            catalysts_str = "<br>".join([f"• {catalyst}" for catalyst in rec['catalysts']])
-                            md_content += f"| <strong>催化劑</strong> | {catalysts_str} |\n"
-                        md_content += "\n"
-        else:
-            md_content += "❌ 暫無基本面分析數據\n\n"
-        
-        return md_content
+        return self.get_render_context(symbol, data).markdown("chinese")
     
     def generate_english_report_content(self, symbol: str, data: dict) -> str:
         """
@@ -503,170 +222,20 @@ class StockAnalysisApp:
         Returns:
             str: 英文Markdown內容
         """
-        md_content = f"""# 📊 {symbol} Stock Analysis Report
-
-<strong>Generated:</strong> {self.today_str}
-
----
-
-## 🏢 Company Overview
-
-"""
-        
-        # 公司描述 - 英文（支持兩種數據格式）
-        if data.get('desc_en'):
-            desc_en_data = data['desc_en'].get('data', {}) if isinstance(data['desc_en'], dict) else data['desc_en']
-            if isinstance(desc_en_data, dict):
-                desc_text = None
-                if 'desc_en' in desc_en_data:
-                    desc_text = desc_en_data['desc_en']
-                elif 'desc_en' in data['desc_en']:  # 直接在根級別
-                    desc_text = data['desc_en']['desc_en']
-                
-                # 確保描述不包含新聞內容 (基本檢查)
-                if desc_text and isinstance(desc_text, str) and len(desc_text.strip()) > 0:
-                    md_content += f"<strong>Company Description:</strong> {desc_text}\n\n"
-                else:
-                    md_content += "❌ Company Description Not Available\n\n"
-            else:
-                md_content += "❌ Company Description Not Available\n\n"
-        else:
-            md_content += "❌ Company Description Not Available\n\n"
-
-        md_content += """---
-
-## 📰 News
-
-"""
-        
-        # 新聞英文 - 使用表格布局
-        if data.get('news_en'):
-            news_en_data = data['news_en'].get('data', {}) if isinstance(data['news_en'], dict) else data['news_en']
-            if isinstance(news_en_data, dict):
-                md_content += "| Item | Content |\n"
-                md_content += "|------|------|\n"
-                
-                if 'summary' in news_en_data:
-                    md_content += f"| <strong>Summary</strong> | {news_en_data['summary']} |\n"
-                
-                if 'key_points' in news_en_data:
-                    key_points_str = "<br>".join([f"• {point}" for point in news_en_data['key_points']])
-                    md_content += f"| <strong>Key Points</strong> | {key_points_str} |\n"
-                
-                if 'news_en' in news_en_data:
-                    # 完整新聞內容，不截斷
-                    md_content += f"| <strong>Full Content</strong> | {news_en_data['news_en']} |\n"
-                
-                md_content += "\n"
-        else:
-            md_content += "❌ No English news data available\n\n"
-        
-        md_content += """---
-
-## 📊 Fundamental Analysis
-
-"""
-        
-        # 分析英文 - 使用表格布局
-        if data.get('analysis_en'):
-            analysis_en_data = data['analysis_en'].get('data', {}) if isinstance(data['analysis_en'], dict) else data['analysis_en']
-            if isinstance(analysis_en_data, dict):
-                # 股票代碼驗證
-                if analysis_en_data.get('ticker') and analysis_en_data['ticker'].upper() != symbol.upper():
-                    md_content += f"❌ Error: Stock symbol mismatch (Expected: {symbol.upper()}, Actual: {analysis_en_data.get('ticker', 'N/A')})\n\n"
-                    md_content += "❌ No fundamental data available\n\n"
-                else:
-                    # 基本信息表格
-                    md_content += "### 📋 Basic Information\n\n"
-                    md_content += "| Item | Content |\n"
-                    md_content += "|------|------|\n"
-                    md_content += f"| <strong>Company</strong> | {analysis_en_data.get('company', 'N/A')} |\n"
-                    md_content += f"| <strong>Ticker</strong> | {analysis_en_data.get('ticker', 'N/A')} |\n"
-                    md_content += f"| <strong>Quarter</strong> | {analysis_en_data.get('quarter', 'N/A')} |\n\n"
-                    
-                    # 利好因素表格
-                    if 'positive_factors' in analysis_en_data:
-                        md_content += "### ✅ Positive Factors\n\n"
-                        md_content += "| Positive Factor | Details |\n"
-                        md_content += "|----------------|----------|\n"
-                        for factor in analysis_en_data['positive_factors']:
-                            if isinstance(factor, dict):
-                                title = f"<strong>{factor.get('title', 'N/A')}</strong>"
-                                detail = factor.get('detail', 'N/A').replace('\n', '<br>')
-                                md_content += f"| {title} | {detail} |\n"
-                        md_content += "\n"
-                    
-                    # 風險因素表格
-                    if 'risks' in analysis_en_data:
-                        md_content += "### ⚠️ Risk Factors\n\n"
-                        md_content += "| Risk Factor | Details |\n"
-                        md_content += "|-------------|----------|\n"
-                        for risk in analysis_en_data['risks']:
-                            if isinstance(risk, dict):
-                                title = f"<strong>{risk.get('title', 'N/A')}</strong>"
-                                detail = risk.get('detail', 'N/A').replace('\n', '<br>')
-                                md_content += f"| {title} | {detail} |\n"
-                        md_content += "\n"
-                    
-                    # 流動性分析表格
-                    if 'liquidity_risk' in analysis_en_data:
-                        md_content += "### 💰 Liquidity Analysis\n\n"
-                        md_content += "| Analysis Item | Assessment |\n"
-                        md_content += "|---------------|------------|\n"
-                        liquidity = analysis_en_data['liquidity_risk']
-                        if isinstance(liquidity, dict):
-                            if liquidity.get('cash'):
-                                md_content += f"| <strong>Cash Status</strong> | {liquidity['cash']} |\n"
-                            if liquidity.get('burn_rate'):
-                                md_content += f"| <strong>Burn Rate</strong> | {liquidity['burn_rate']} |\n"
-                            if liquidity.get('atm_risk'):
-                                atm_color = "🔴" if liquidity['atm_risk'] == "High" else "🟡" if liquidity['atm_risk'] == "Medium" else "🟢"
-                                md_content += f"| <strong>ATM Risk</strong> | {atm_color} {liquidity['atm_risk']} |\n"
-                            if liquidity.get('debt_status'):
-                                md_content += f"| <strong>Debt Status</strong> | {liquidity['debt_status']} |\n"
-                        md_content += "\n"
-                    
-                    # 投資建議表格
-                    if 'trading_recommendation' in analysis_en_data:
-                        rec = analysis_en_data['trading_recommendation']
-                        md_content += "### 💡 Investment Recommendation\n\n"
-                        md_content += "| Recommendation Item | Content |\n"
-                        md_content += "|--------------------|------|\n"
-                        
-                        # 投資傾向用顏色標示
-                        bias = rec.get('bias', 'N/A')
-                        bias_color = "🟢" if bias == "Bullish" else "🔴" if bias == "Bearish" else "🟡"
-                        md_content += f"| <strong>Investment Bias</strong> | {bias_color} <strong>{bias}</strong> |\n"
-                        
-                        if rec.get('suggestion'):
-                            suggestion = rec['suggestion'].replace('\n', '<br>')
-                            md_content += f"| <strong>Suggestion</strong> | {suggestion} |\n"
-                        
-                        if 'catalysts' in rec and rec['catalysts']:
-                            catalysts_str = "<br>".join([f"• {catalyst}" for catalyst in rec['catalysts']])
-                            md_content += f"| <strong>Catalysts</strong> | {catalysts_str} |\n"
-                        md_content += "\n"
-        else:
-            md_content += "❌ No English analysis data available\n\n"
-        
-        return md_content
+        return self.get_render_context(symbol, data).markdown("english")
 
-    def process_with_progress(self, symbol: str, log_messages: list, log_container, progress_bar, status_text, force_refresh: bool = False) -> dict:
+    def process_with_progress(self, symbol: str, progress: JobProgress, force_refresh: bool = False) -> dict:
         """
-        帶進度顯示的股票數據處理
+        帶進度回報的股票數據處理（在後台任務中執行）
         
         Args:
             symbol: 股票代碼
-            log_messages: 日誌消息列表
-            log_container: Streamlit容器用於顯示日誌
-            progress_bar: 進度條
-            status_text: 狀態文本顯示
+            progress: 任務進度回報接口，界面輪詢顯示
             force_refresh: 是否強制刷新
             
         Returns:
             dict: 處理結果
         """
-        import time
         from mongo_db import MongoHandler
         from get_news import NewsScraper
         from llms_deepseek import DeepSeek
@@ -674,14 +243,16 @@ class StockAnalysisApp:
         from get_company_desc import CompanyDescScraper
         
         try:
+            self._add_log(progress, f"🔄 開始處理 {symbol}...")
+            
             # 步驟1: 連接數據庫
-            self._add_log(log_messages, log_container, "📊 連接MongoDB數據庫...")
-            progress_bar.progress(0.15)
+            self._add_log(progress, "📊 連接MongoDB數據庫...")
+            progress.update(0.15)
             mongo = MongoHandler()
             
             # 步驟2: 獲取新聞數據
-            self._add_log(log_messages, log_container, f"📰 獲取 {symbol} 新聞數據...")
-            progress_bar.progress(0.25)
+            self._add_log(progress, f"📰 獲取 {symbol} 新聞數據...")
+            progress.update(0.25)
             
             if not self.file_manager.file_exists(symbol, 'news', self.today_str) or force_refresh:
                 news_scraper = NewsScraper()
@@ -689,17 +260,17 @@ class StockAnalysisApp:
                     news = news_scraper.get_news(stock_ticker=symbol)
                     if news and not news.get('error'):
                         self.file_manager.save_data(symbol, 'news', news, self.today_str)
-                        self._add_log(log_messages, log_container, f"✅ {symbol} 新聞數據獲取成功")
+                        self._add_log(progress, f"✅ {symbol} 新聞數據獲取成功")
                     else:
-                        self._add_log(log_messages, log_container, f"⚠️ {symbol} 新聞數據獲取失敗")
+                        self._add_log(progress, f"⚠️ {symbol} 新聞數據獲取失敗")
                 finally:
                     news_scraper.close()
             else:
-                self._add_log(log_messages, log_container, f"✅ news 數據已從緩存加載")
+                self._add_log(progress, f"✅ news 數據已從緩存加載")
             
             # 步驟3: 獲取基本面數據
-            self._add_log(log_messages, log_container, f"💼 獲取 {symbol} 基本面數據...")
-            progress_bar.progress(0.35)
+            self._add_log(progress, f"💼 獲取 {symbol} 基本面數據...")
+            progress.update(0.35)
             
             if not self.file_manager.file_exists(symbol, 'fundamentals', self.today_str) or force_refresh:
                 fundamentals = mongo.get_fundamentals(symbol)
@@ -707,19 +278,19 @@ class StockAnalysisApp:
                     # 驗證股票代碼匹配
                     ticker_in_data = fundamentals.get('ticker', '').upper()
                     if ticker_in_data and ticker_in_data != symbol.upper():
-                        self._add_log(log_messages, log_container, f"❌ 錯誤：股票代碼不匹配 (期望: {symbol.upper()}, 實際: {ticker_in_data})")
+                        self._add_log(progress, f"❌ 錯誤：股票代碼不匹配 (期望: {symbol.upper()}, 實際: {ticker_in_data})")
                         return {"success": False, "error": "股票代碼不匹配"}
                     
                     self.file_manager.save_data(symbol, 'fundamentals', fundamentals, self.today_str)
-                    self._add_log(log_messages, log_container, f"✅ {symbol} 基本面數據獲取成功")
+                    self._add_log(progress, f"✅ {symbol} 基本面數據獲取成功")
                 else:
-                    self._add_log(log_messages, log_container, f"❌ 暫無基本面資料")
+                    self._add_log(progress, f"❌ 暫無基本面資料")
             else:
-                self._add_log(log_messages, log_container, f"✅ fundamentals 數據已從緩存加載")
+                self._add_log(progress, f"✅ fundamentals 數據已從緩存加載")
             
             # 步驟4: 獲取公司描述
-            self._add_log(log_messages, log_container, f"🏢 獲取 {symbol} 公司描述...")
-            progress_bar.progress(0.45)
+            self._add_log(progress, f"🏢 獲取 {symbol} 公司描述...")
+            progress.update(0.45)
             
             if not self.file_manager.file_exists(symbol, 'desc_en', self.today_str) or force_refresh:
                 scraper = CompanyDescScraper()
@@ -727,16 +298,16 @@ class StockAnalysisApp:
                 if desc_en:
                     desc_data = {"desc_en": desc_en}
                     self.file_manager.save_data(symbol, 'desc_en', desc_data, self.today_str)
-                    self._add_log(log_messages, log_container, f"✅ {symbol} 公司描述獲取成功")
+                    self._add_log(progress, f"✅ {symbol} 公司描述獲取成功")
                 else:
-                    self._add_log(log_messages, log_container, f"⚠️ {symbol} 公司描述獲取失敗")
+                    self._add_log(progress, f"⚠️ {symbol} 公司描述獲取失敗")
                 scraper.close()
             else:
-                self._add_log(log_messages, log_container, f"✅ desc_en 數據已從緩存加載")
+                self._add_log(progress, f"✅ desc_en 數據已從緩存加載")
             
             # 步驟5: 翻譯公司描述
-            self._add_log(log_messages, log_container, f"🈶 開始 {symbol} 公司描述翻譯...")
-            progress_bar.progress(0.55)
+            self._add_log(progress, f"🈶 開始 {symbol} 公司描述翻譯...")
+            progress.update(0.55)
             
             if not self.file_manager.file_exists(symbol, 'desc_cn', self.today_str) or force_refresh:
                 desc_en_data = self.file_manager.load_data(symbol, 'desc_en', self.today_str)
@@ -756,21 +327,21 @@ class StockAnalysisApp:
                     desc_cn_result = chatgpt.chat(desc_en_text, custom_system_prompt=desc_to_chinese_prompt, json_output=True)
                     if desc_cn_result:
                         self.file_manager.save_data(symbol, 'desc_cn', desc_cn_result, self.today_str)
-                        self._add_log(log_messages, log_container, f"✅ {symbol} 公司描述翻譯成功!")
+                        self._add_log(progress, f"✅ {symbol} 公司描述翻譯成功!")
                     else:
-                        self._add_log(log_messages, log_container, f"⚠️ {symbol} 公司描述翻譯失敗")
+                        self._add_log(progress, f"⚠️ {symbol} 公司描述翻譯失敗")
                 else:
-                    self._add_log(log_messages, log_container, f"⚠️ 無法加載英文描述進行翻譯")
+                    self._add_log(progress, f"⚠️ 無法加載英文描述進行翻譯")
             else:
-                self._add_log(log_messages, log_container, f"✅ desc_cn 數據已從緩存加載")
+                self._add_log(progress, f"✅ desc_cn 數據已從緩存加載")
             
             print("DEBUG: About to set progress to 0.7")  # 調試輸出
-            progress_bar.progress(0.7)
+            progress.update(0.7)
             print("DEBUG: Progress set to 0.7")  # 調試輸出
             
             # 步驟6: 執行實際的數據處理（新聞分析、翻譯等）
             print("DEBUG: About to add log for step 6")  # 調試輸出
-            self._add_log(log_messages, log_container, f"🔄 進行新聞分析和翻譯處理...")
+            self._add_log(progress, f"🔄 進行新聞分析和翻譯處理...")
             print("DEBUG: Log added for step 6")  # 調試輸出
             
             # 調用實際的處理邏輯
@@ -779,1472 +350,722 @@ class StockAnalysisApp:
                 processing_result = process_single_stock(symbol, force_refresh=force_refresh)
                 
                 if processing_result.get("success", False):
-                    self._add_log(log_messages, log_container, f"✅ {symbol} 新聞分析和翻譯完成!")
+                    self._add_log(progress, f"✅ {symbol} 新聞分析和翻譯完成!")
                 else:
                     error_msgs = processing_result.get("errors", [])
                     for error in error_msgs[:3]:  # 只顯示前3個錯誤
-                        self._add_log(log_messages, log_container, f"⚠️ {error}")
+                        self._add_log(progress, f"⚠️ {error}")
                     
             except Exception as e:
-                self._add_log(log_messages, log_container, f"⚠️ 數據處理出現問題: {str(e)}")
+                self._add_log(progress, f"⚠️ 數據處理出現問題: {str(e)}")
                 print(f"DEBUG: Processing error: {e}")
             
             print("DEBUG: Processing completed")  # 調試輸出
             
-            progress_bar.progress(0.9)
+            progress.update(0.9)
             print("DEBUG: Progress set to 0.9")  # 調試輸出
-            self._add_log(log_messages, log_container, f"🎉 {symbol} 所有數據處理完成!")
+            self._add_log(progress, f"🎉 {symbol} 所有數據處理完成!")
             print("DEBUG: Final log added")  # 調試輸出
             
             return {"success": True}
             
         except Exception as e:
-            self._add_log(log_messages, log_container, f"❌ 處理過程出錯: {str(e)}")
+            self._add_log(progress, f"❌ 處理過程出錯: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def _add_log(self, log_messages: list, log_container, message: str):
-        """添加日誌消息並更新顯示"""
-        import time
+    def _add_log(self, progress: JobProgress, message: str):
+        """添加日誌消息（界面從任務狀態讀取顯示）"""
         print(f"LOG: {message}")  # 添加調試輸出
-        log_messages.append(f"{message}")
-        log_text = "\n".join(log_messages[-10:])  # 只顯示最近10條消息
-        try:
-            log_container.text_area("處理日誌", log_text, height=200, disabled=True)
-            time.sleep(0.1)  # 短暫延遲讓用戶看到更新
-        except Exception as e:
-            print(f"LOG ERROR: {e}")  # 調試 UI 更新錯誤
+        progress.log(message)
 
-    def generate_chinese_pdf_report_html(self, symbol: str, data: dict) -> str:
+    def generate_pdf_reports(self, symbol: str, data: dict,
+                             languages: tuple = ("chinese", "english")) -> dict:
         """
-        使用HTML到PDF轉換生成中文PDF報告（保持美觀樣式）
+        生成PDF報告（與自動Worker相同的渲染池和引擎回退邏輯）
         
         Args:
             symbol: 股票代碼
             data: 股票數據
+            languages: 要生成的語言
             
         Returns:
-            str: PDF文件路徑
+            dict: 語言 -> PDF文件路徑（失敗為None）
         """
-        try:
-            import pdfkit
-            
-            # 設置PDF路徑
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            pdf_path = data_path / f"{symbol}_report_chinese_{self.today_str}.pdf"
-            
-            # 生成中文報告內容
-            chinese_content = self.generate_chinese_report_content(symbol, data)
-            
-            # 清理並轉換為HTML
-            cleaned_content = self._clean_markdown_content(chinese_content)
-            
-            # 創建完整的HTML文檔
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <style>
-                    body {{
-                        font-family: 'Microsoft YaHei', 'SimHei', 'SimSun', sans-serif;
-                        font-size: 12px;
-                        line-height: 1.6;
-                        color: #333;
-                        margin: 20px;
-                        background: white;
-                    }}
-                    
-                    h1 {{
-                        color: #2c3e50;
-                        font-size: 18px;
-                        text-align: center;
-                        margin-bottom: 20px;
-                        border-bottom: 2px solid #2c3e50;
-                        padding-bottom: 10px;
-                    }}
-                    
-                    h2 {{
-                        color: #34495e;
-                        font-size: 16px;
-                        margin-top: 25px;
-                        margin-bottom: 15px;
-                        border-left: 4px solid #3498db;
-                        padding-left: 15px;
-                    }}
-                    
-                    h3 {{
-                        color: #2c3e50;
-                        font-size: 14px;
-                        margin-top: 20px;
-                        margin-bottom: 10px;
-                    }}
-                    
-                    p {{
-                        margin-bottom: 10px;
-                        text-align: justify;
-                        word-wrap: break-word;
-                    }}
-                    
-                    table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin: 15px 0;
-                        background: white;
-                        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-                        border-radius: 8px;
-                        overflow: hidden;
-                    }}
-                    
-                    th {{
-                        background: #34495e;
-                        color: white;
-                        padding: 12px 15px;
-                        text-align: left;
-                        font-weight: bold;
-                        font-size: 13px;
-                    }}
-                    
-                    td {{
-                        padding: 12px 15px;
-                        border-bottom: 1px solid #ecf0f1;
-                        vertical-align: top;
-                        word-wrap: break-word;
-                        max-width: 300px;
-                    }}
-                    
-                    td:first-child {{
-                        background: #f8f9fa;
-                        font-weight: bold;
-                        color: #2c3e50;
-                        width: 25%;
-                        min-width: 120px;
-                    }}
-                    
-                    td:last-child {{
-                        background: white;
-                        text-align: justify;
-                        line-height: 1.5;
-                    }}
-                    
-                    tr:hover {{
-                        background: rgba(52, 152, 219, 0.1);
-                    }}
-                    
-                    .positive-table td:first-child {{
-                        background: #d5f4e6;
-                        color: #27ae60;
-                    }}
-                    
-                    .risk-table td:first-child {{
-                        background: #fadbd8;
-                        color: #e74c3c;
-                    }}
-                    
-                    .liquidity-table td:first-child {{
-                        background: #fdebd0;
-                        color: #f39c12;
-                    }}
-                    
-                    .recommendation-table td:first-child {{
-                        background: #ebdef0;
-                        color: #9b59b6;
-                    }}
-                    
-                    .disclaimer {{
-                        margin-top: 30px;
-                        padding: 15px;
-                        background: #f8f9fa;
-                        border-left: 4px solid #3498db;
-                        font-size: 11px;
-                        color: #7f8c8d;
-                    }}
-                </style>
-            </head>
-            <body>
-                {cleaned_content}
-                <div class="disclaimer">
-                    本報告由AI自動生成，僅供教育和娛樂用途，不構成投資建議。投資決策請諮詢您的專業理財顧問。
-                </div>
-            </body>
-            </html>
-            """
-            
-            # 配置 wkhtmltopdf 選項
-            options = {
-                'page-size': 'A4',
-                'margin-top': '0.75in',
-                'margin-right': '0.75in',
-                'margin-bottom': '0.75in',
-                'margin-left': '0.75in',
-                'encoding': "UTF-8",
-                'no-outline': None,
-                'enable-local-file-access': None,
-                'print-media-type': None,
-            }
-            
-            # 嘗試設置 wkhtmltopdf 路徑
-            try:
-                config = pdfkit.configuration(wkhtmltopdf=r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe")
-                pdfkit.from_string(html_content, str(pdf_path), options=options, configuration=config)
-            except:
-                # 如果路徑不正確，嘗試默認配置
-                pdfkit.from_string(html_content, str(pdf_path), options=options)
-            
-            return str(pdf_path)
-            
-        except Exception as e:
-            print(f"HTML to PDF 轉換錯誤: {e}")
-            # 如果失敗，回退到舊方法
-            return self.generate_chinese_pdf_report_old(symbol, data)
-
-    def generate_chinese_pdf_report(self, symbol: str, data: dict) -> str:
+        generator = ReportGenerator(self.file_manager, self.today_str)
+        context = self.get_render_context(symbol, data)
+        return generator.generate_pdf_reports_batch({symbol: context}, languages).get(symbol, {})
+    
+    def generate_ig_post(self, symbol: str, data: dict) -> dict:
         """
-        生成完整的中文PDF報告（使用reportlab）
+        生成 Instagram 貼文
         
         Args:
             symbol: 股票代碼
             data: 股票數據
             
         Returns:
-            str: PDF文件路徑
+            dict: Instagram 貼文結果
         """
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib.colors import HexColor
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-            
-            # 註冊中文字體
-            try:
-                pdfmetrics.registerFont(TTFont('SimHei', 'C:/Windows/Fonts/simhei.ttf'))
-                chinese_font = 'SimHei'
-            except:
-                try:
-                    pdfmetrics.registerFont(TTFont('SimSun', 'C:/Windows/Fonts/simsun.ttc'))
-                    chinese_font = 'SimSun'
-                except:
-                    chinese_font = 'Helvetica'
-            
-            # 設置PDF路徑
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            pdf_path = data_path / f"{symbol}_report_chinese_{self.today_str}.pdf"
-            
-            # 創建PDF文檔
-            doc = SimpleDocTemplate(str(pdf_path), pagesize=A4, 
-                                  topMargin=0.6*inch, bottomMargin=0.6*inch)
-            story = []
-            
-            # 自定義樣式
-            title_style = ParagraphStyle('CustomTitle',
-                                       fontSize=16, spaceAfter=15, alignment=1,
-                                       textColor=HexColor('#2c3e50'),
-                                       fontName=chinese_font,
-                                       wordWrap='CJK')
-            
-            heading_style = ParagraphStyle('CustomHeading',
-                                         fontSize=12, spaceBefore=12, spaceAfter=8,
-                                         textColor=HexColor('#34495e'),
-                                         fontName=chinese_font,
-                                         wordWrap='CJK')
-            
-            normal_style = ParagraphStyle('CustomNormal',
-                                        fontSize=10, spaceBefore=3, spaceAfter=6,
-                                        fontName=chinese_font,
-                                        wordWrap='CJK',
-                                        leading=14)
-            
-            # 生成中文報告內容
-            chinese_content = self.generate_chinese_report_content(symbol, data)
-            
-            # 將Markdown轉換為PDF段落
-            lines = chinese_content.split('\n')
-            in_table = False
-            table_data = []
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                if line.startswith('# '):
-                    # 主標題
-                    title_text = line[2:].strip()
-                    story.append(Paragraph(title_text, title_style))
-                    story.append(Spacer(1, 15))
-                    
-                elif line.startswith('## '):
-                    # 二級標題
-                    heading_text = line[3:].strip()
-                    story.append(Paragraph(heading_text, heading_style))
-                    story.append(Spacer(1, 10))
-                    
-                elif line.startswith('### '):
-                    # 三級標題
-                    subheading_text = line[4:].strip()
-                    story.append(Paragraph(subheading_text, heading_style))
-                    story.append(Spacer(1, 8))
-                    
-                elif line.startswith('|') and '|' in line[1:]:
-                    # 表格行
-                    if not in_table:
-                        in_table = True
-                        table_data = []
-                    
-                    # 解析表格行
-                    cells = [cell.strip() for cell in line.split('|')[1:-1]]
-                    if cells and not all(cell.startswith('-') for cell in cells):  # 跳過分隔行
-                        # 清理HTML標籤
-                        cleaned_cells = []
-                        for cell in cells:
-                            cell = cell.replace('<br>', '\n')
-                            cell = cell.replace('**', '')
-                            cell = cell.replace('*', '')
-                            cleaned_cells.append(cell)
-                        table_data.append(cleaned_cells)
-                        
-                else:
-                    # 如果之前在處理表格，現在結束表格
-                    if in_table and table_data:
-                        try:
-                            # 創建表格
-                            if len(table_data) > 0:
-                                table = Table(table_data, colWidths=[1.8*inch, 4.2*inch])
-                                table.setStyle(TableStyle([
-                                    ('BACKGROUND', (0, 0), (0, -1), HexColor('#34495e')),
-                                    ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#ffffff')),
-                                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                    ('FONTNAME', (0, 0), (-1, -1), chinese_font),
-                                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                                    ('TOPPADDING', (0, 0), (-1, -1), 12),
-                                    ('BACKGROUND', (1, 0), (-1, -1), HexColor('#ecf0f1')),
-                                    ('GRID', (0, 0), (-1, -1), 1, HexColor('#bdc3c7')),
-                                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                                ]))
-                                story.append(table)
-                                story.append(Spacer(1, 10))
-                        except Exception as e:
-                            print(f"表格創建錯誤: {e}")
-                        
-                        in_table = False
-                        table_data = []
-                    
-                    # 普通段落
-                    if line.startswith('**') and line.endswith('**'):
-                        # 粗體文字
-                        text = line[2:-2]
-                        story.append(Paragraph(text, normal_style))
-                    elif line.startswith('**'):
-                        # 帶標籤的內容
-                        story.append(Paragraph(line.replace('**', ''), normal_style))
-                    elif line.startswith('❌') or line.startswith('✅'):
-                        # 狀態消息
-                        story.append(Paragraph(line, normal_style))
-                    elif line.startswith('---'):
-                        # 分隔線
-                        story.append(Spacer(1, 15))
-                    else:
-                        # 普通文字
-                        if line:
-                            story.append(Paragraph(line, normal_style))
-            
-            # 處理最後的表格
-            if in_table and table_data:
-                try:
-                    table = Table(table_data, colWidths=[1.8*inch, 4.2*inch])
-                    table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (0, -1), HexColor('#34495e')),
-                        ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#ffffff')),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, -1), chinese_font),
-                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                        ('TOPPADDING', (0, 0), (-1, -1), 12),
-                        ('BACKGROUND', (1, 0), (-1, -1), HexColor('#ecf0f1')),
-                        ('GRID', (0, 0), (-1, -1), 1, HexColor('#bdc3c7')),
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ]))
-                    story.append(table)
-                except Exception as e:
-                    print(f"最後表格創建錯誤: {e}")
+            # 中文報告作為基礎（與報告文件同一次渲染）
+            report_content = self.get_render_context(symbol, data).plain_text("chinese")
             
-            # 添加免責聲明
-            story.append(Spacer(1, 20))
-            disclaimer = Paragraph("本報告由AI自動生成，僅供教育和娛樂用途，不構成投資建議。投資決策請諮詢您的專業理財顧問。", normal_style)
-            story.append(disclaimer)
+            # 使用 IgPostCreator 生成 Instagram 貼文
+            result = self.ig_creator.create_ig_post(symbol, report_content)
             
-            # 生成PDF
-            doc.build(story)
-            return str(pdf_path)
+            return result
             
         except Exception as e:
-            print(f"PDF生成錯誤: {e}")
-            return None
-
-    def generate_english_pdf_report_html(self, symbol: str, data: dict) -> str:
+            return {
+                "success": False,
+                "error": str(e),
+                "symbol": symbol.upper()
+            }
+    
+    def save_ig_post(self, symbol: str, ig_result: dict) -> str:
         """
-        使用HTML到PDF轉換生成英文PDF報告（保持美觀樣式）
+        保存 Instagram 貼文（JSON存儲，並導出文本文件）
         
         Args:
             symbol: 股票代碼
-            data: 股票數據
+            ig_result: Instagram 貼文結果
             
         Returns:
-            str: PDF文件路徑
+            str: 導出的文本文件路徑
         """
         try:
-            import pdfkit
-            
-            # 設置PDF路徑
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            pdf_path = data_path / f"{symbol}_report_english_{self.today_str}.pdf"
-            
-            # 生成英文報告內容
-            english_content = self.generate_english_report_content(symbol, data)
-            
-            # 清理並轉換為HTML
-            cleaned_content = self._clean_markdown_content(english_content)
-            
-            # 創建完整的HTML文檔
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <style>
-                    body {{
-                        font-family: 'Helvetica', 'Arial', sans-serif;
-                        font-size: 12px;
-                        line-height: 1.6;
-                        color: #333;
-                        margin: 20px;
-                        background: white;
-                        text-align: justify;
-                    }}
-                    
-                    h1 {{
-                        color: #2c3e50;
-                        font-size: 18px;
-                        text-align: center;
-                        margin-bottom: 20px;
-                        border-bottom: 2px solid #2c3e50;
-                        padding-bottom: 10px;
-                    }}
-                    
-                    h2 {{
-                        color: #34495e;
-                        font-size: 16px;
-                        margin-top: 25px;
-                        margin-bottom: 15px;
-                        border-left: 4px solid #3498db;
-                        padding-left: 15px;
-                    }}
-                    
-                    h3 {{
-                        color: #2c3e50;
-                        font-size: 14px;
-                        margin-top: 20px;
-                        margin-bottom: 10px;
-                    }}
-                    
-                    p {{
-                        margin-bottom: 10px;
-                        text-align: justify;
-                        word-wrap: break-word;
-                        hyphens: auto;
-                    }}
-                    
-                    table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin: 15px 0;
-                        background: white;
-                        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-                        border-radius: 8px;
-                        overflow: hidden;
-                    }}
-                    
-                    th {{
-                        background: #34495e;
-                        color: white;
-                        padding: 12px 15px;
-                        text-align: left;
-                        font-weight: bold;
-                        font-size: 13px;
-                    }}
-                    
-                    td {{
-                        padding: 12px 15px;
-                        border-bottom: 1px solid #ecf0f1;
-                        vertical-align: top;
-                        word-wrap: break-word;
-                        max-width: 300px;
-                        hyphens: auto;
-                    }}
-                    
-                    td:first-child {{
-                        background: #f8f9fa;
-                        font-weight: bold;
-                        color: #2c3e50;
-                        width: 25%;
-                        min-width: 120px;
-                    }}
-                    
-                    td:last-child {{
-                        background: white;
-                        text-align: justify;
-                        line-height: 1.5;
-                    }}
-                    
-                    tr:hover {{
-                        background: rgba(52, 152, 219, 0.1);
-                    }}
-                    
-                    .positive-table td:first-child {{
-                        background: #d5f4e6;
-                        color: #27ae60;
-                    }}
-                    
-                    .risk-table td:first-child {{
-                        background: #fadbd8;
-                        color: #e74c3c;
-                    }}
-                    
-                    .liquidity-table td:first-child {{
-                        background: #fdebd0;
-                        color: #f39c12;
-                    }}
-                    
-                    .recommendation-table td:first-child {{
-                        background: #ebdef0;
-                        color: #9b59b6;
-                    }}
-                    
-                    .disclaimer {{
-                        margin-top: 30px;
-                        padding: 15px;
-                        background: #f8f9fa;
-                        border-left: 4px solid #3498db;
-                        font-size: 11px;
-                        color: #7f8c8d;
-                    }}
-                </style>
-            </head>
-            <body>
-                {cleaned_content}
-                <div class="disclaimer">
-                    This report is generated by AI for educational and entertainment purposes only. Not investment advice. Please consult your professional financial advisor for investment decisions.
-                </div>
-            </body>
-            </html>
-            """
-            
-            # 配置 wkhtmltopdf 選項
-            options = {
-                'page-size': 'A4',
-                'margin-top': '0.75in',
-                'margin-right': '0.75in',
-                'margin-bottom': '0.75in',
-                'margin-left': '0.75in',
-                'encoding': "UTF-8",
-                'no-outline': None,
-                'enable-local-file-access': None,
-                'print-media-type': None,
-            }
-            
-            # 嘗試設置 wkhtmltopdf 路徑
-            try:
-                config = pdfkit.configuration(wkhtmltopdf=r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe")
-                pdfkit.from_string(html_content, str(pdf_path), options=options, configuration=config)
-            except:
-                # 如果路徑不正確，嘗試默認配置
-                pdfkit.from_string(html_content, str(pdf_path), options=options)
-            
-            return str(pdf_path)
-            
-        except Exception as e:
-            print(f"HTML to PDF conversion error: {e}")
-            # 如果失敗，回退到舊方法
-            return self.generate_english_pdf_report_old(symbol, data)
-
-    def generate_english_pdf_report(self, symbol: str, data: dict) -> str:
-        """
-        生成完整的英文PDF報告（使用reportlab）
-        
-        Args:
-            symbol: 股票代碼
-            data: 股票數據
+            return save_ig_post(self.file_manager, symbol, ig_result, self.today_str)
+        except Exception as e:
+            raise Exception(f"保存 Instagram 貼文失敗: {str(e)}")
+    
+    def load_ig_post(self, symbol: str) -> dict:
+        """
+        載入已保存的 Instagram 貼文
+        
+        Args:
+            symbol: 股票代碼
             
         Returns:
-            str: PDF文件路徑
+            dict: Instagram 貼文內容
         """
-        try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib.colors import HexColor
-            
-            # 設置PDF路徑
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            pdf_path = data_path / f"{symbol}_report_english_{self.today_str}.pdf"
-            
-            # 創建PDF文檔
-            doc = SimpleDocTemplate(str(pdf_path), pagesize=A4, 
-                                  topMargin=0.6*inch, bottomMargin=0.6*inch)
-            story = []
-            
-            # 自定義樣式
-            title_style = ParagraphStyle('CustomTitle',
-                                       fontSize=16, spaceAfter=15, alignment=1,
-                                       textColor=HexColor('#2c3e50'),
-                                       fontName='Helvetica-Bold')
-            
-            heading_style = ParagraphStyle('CustomHeading',
-                                         fontSize=12, spaceBefore=12, spaceAfter=8,
-                                         textColor=HexColor('#34495e'),
-                                         fontName='Helvetica-Bold')
-            
-            normal_style = ParagraphStyle('CustomNormal',
-                                        fontSize=10, spaceBefore=3, spaceAfter=6,
-                                        fontName='Helvetica',
-                                        alignment=4,  # 左右對齊
-                                        leading=14,
-                                        wordWrap='LTR')
-            
-            # 生成英文報告內容
-            english_content = self.generate_english_report_content(symbol, data)
-            
-            # 將Markdown轉換為PDF段落
-            lines = english_content.split('\n')
-            in_table = False
-            table_data = []
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                if line.startswith('# '):
-                    # 主標題
-                    title_text = line[2:].strip()
-                    story.append(Paragraph(title_text, title_style))
-                    story.append(Spacer(1, 15))
-                    
-                elif line.startswith('## '):
-                    # 二級標題
-                    heading_text = line[3:].strip()
-                    story.append(Paragraph(heading_text, heading_style))
-                    story.append(Spacer(1, 10))
-                    
-                elif line.startswith('### '):
-                    # 三級標題
-                    subheading_text = line[4:].strip()
-                    story.append(Paragraph(subheading_text, heading_style))
-                    story.append(Spacer(1, 8))
-                    
-                elif line.startswith('|') and '|' in line[1:]:
-                    # 表格行
-                    if not in_table:
-                        in_table = True
-                        table_data = []
-                    
-                    # 解析表格行
-                    cells = [cell.strip() for cell in line.split('|')[1:-1]]
-                    if cells and not all(cell.startswith('-') for cell in cells):  # 跳過分隔行
-                        # 清理HTML標籤
-                        cleaned_cells = []
-                        for cell in cells:
-                            cell = cell.replace('<br>', '\n')
-                            cell = cell.replace('**', '')
-                            cell = cell.replace('*', '')
-                            cleaned_cells.append(cell)
-                        table_data.append(cleaned_cells)
-                        
-                else:
-                    # 如果之前在處理表格，現在結束表格
-                    if in_table and table_data:
-                        try:
-                            # 創建表格
-                            if len(table_data) > 0:
-                                table = Table(table_data, colWidths=[1.8*inch, 4.2*inch])
-                                table.setStyle(TableStyle([
-                                    ('BACKGROUND', (0, 0), (0, -1), HexColor('#34495e')),
-                                    ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#ffffff')),
-                                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                                    ('TOPPADDING', (0, 0), (-1, -1), 12),
-                                    ('BACKGROUND', (1, 0), (-1, -1), HexColor('#ecf0f1')),
-                                    ('GRID', (0, 0), (-1, -1), 1, HexColor('#bdc3c7')),
-                                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                                ]))
-                                story.append(table)
-                                story.append(Spacer(1, 10))
-                        except Exception as e:
-                            print(f"Table creation error: {e}")
-                        
-                        in_table = False
-                        table_data = []
-                    
-                    # 普通段落
-                    if line.startswith('**') and line.endswith('**'):
-                        # 粗體文字
-                        text = line[2:-2]
-                        story.append(Paragraph(text, normal_style))
-                    elif line.startswith('**'):
-                        # 帶標籤的內容
-                        story.append(Paragraph(line.replace('**', ''), normal_style))
-                    elif line.startswith('❌') or line.startswith('✅'):
-                        # 狀態消息
-                        story.append(Paragraph(line, normal_style))
-                    elif line.startswith('---'):
-                        # 分隔線
-                        story.append(Spacer(1, 15))
-                    else:
-                        # 普通文字
-                        if line:
-                            story.append(Paragraph(line, normal_style))
-            
-            # 處理最後的表格
-            if in_table and table_data:
-                try:
-                    table = Table(table_data, colWidths=[1.8*inch, 4.2*inch])
-                    table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (0, -1), HexColor('#34495e')),
-                        ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#ffffff')),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                        ('TOPPADDING', (0, 0), (-1, -1), 12),
-                        ('BACKGROUND', (1, 0), (-1, -1), HexColor('#ecf0f1')),
-                        ('GRID', (0, 0), (-1, -1), 1, HexColor('#bdc3c7')),
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ]))
-                    story.append(table)
-                except Exception as e:
-                    print(f"Final table creation error: {e}")
-            
-            # 添加免責聲明
-            story.append(Spacer(1, 20))
-            disclaimer = Paragraph("This report is generated by AI for educational and entertainment purposes only. Not investment advice. Please consult your professional financial advisor for investment decisions.", normal_style)
-            story.append(disclaimer)
-            
-            # 生成PDF
-            doc.build(story)
-            return str(pdf_path)
-            
-        except Exception as e:
-            print(f"PDF generation error: {e}")
-            return None
+        return load_ig_post(self.file_manager, symbol, self.today_str)
 
-    def _clean_markdown_content(self, content: str) -> str:
-        """
-        清理Markdown內容，防止KaTeX渲染問題
+def submit_process_job(app: StockAnalysisApp, symbol: str, force_refresh: bool = False) -> str:
+    """
+    提交symbol的數據處理任務到後台（同一symbol同時只有一個任務）
+    
+    Args:
+        app: 應用實例
+        symbol: 股票代碼
+        force_refresh: 是否強制刷新
         
-        Args:
-            content: 原始Markdown內容
-            
-        Returns:
-            str: 清理後的內容
-        """
-        import re
+    Returns:
+        str: 任務ID
+    """
+    label = f"{symbol} 重新下載並處理" if force_refresh else f"{symbol} 自動生成缺失數據"
+    return get_job_manager().submit(
+        f"process:{symbol}", label, app.process_with_progress, symbol, force_refresh=force_refresh
+    )
+
+
+def _show_job(job: dict):
+    """顯示任務的進度、狀態和日誌"""
+    st.progress(job["progress"])
+    st.text(job["status_text"])
+    if job["status"] == JOB_FAILED and job.get("error"):
+        st.error(f"❌ {job['error']}")
+    if job["logs"]:
+        with st.expander("📋 處理詳情", expanded=job["status"] not in JOB_FINISHED_STATES):
+            st.text_area("處理日誌", "\n".join(job["logs"][-10:]), height=200, disabled=True)
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def _poll_job(symbol: str):
+    """定時刷新進行中的任務（只重跑這個片段，不重跑整個頁面）"""
+    job = get_job_manager().find(f"process:{symbol}")
+    if job is None:
+        return
+    if job["status"] in JOB_FINISHED_STATES:
+        # 任務完成：重新運行整個頁面以載入新數據
+        st.rerun()
+    _show_job(job)
+
+
+def render_job_status(symbol: str):
+    """
+    顯示symbol最近一次後台任務的狀態：進行中時輪詢，已完成時靜態顯示
+    
+    Args:
+        symbol: 股票代碼
+    """
+    job = get_job_manager().find(f"process:{symbol}")
+    if job is None:
+        return
+    if job["status"] in JOB_FINISHED_STATES:
+        _show_job(job)
+    else:
+        _poll_job(symbol)
+
+
+def _show_job_list(jobs: list):
+    """顯示任務列表"""
+    status_icons = {JOB_QUEUED: "⏳", JOB_RUNNING: "🔄", JOB_SUCCEEDED: "✅", JOB_FAILED: "❌"}
+    st.markdown("### 🧵 後台任務")
+    for job in jobs[:10]:
+        st.caption(f"{status_icons[job['status']]} {job['label']} ({job['progress']:.0%})")
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def _poll_job_list():
+    """定時刷新側邊欄的任務列表"""
+    _show_job_list(get_job_manager().list_jobs())
+
+
+def render_job_sidebar():
+    """側邊欄的後台任務列表：有進行中的任務時才輪詢"""
+    jobs = get_job_manager().list_jobs()
+    if not jobs:
+        return
+    if any(job["status"] not in JOB_FINISHED_STATES for job in jobs):
+        _poll_job_list()
+    else:
+        _show_job_list(jobs)
+
+
+@st.cache_resource(show_spinner=False)
+def start_file_server(root_dir: str) -> bool:
+    """啟動報告文件服務（每個進程只嘗試一次）"""
+    return ensure_file_server(root_dir)
+
+
+def file_download_button(app: StockAnalysisApp, label: str, file_path: Path, mime: str):
+    """
+    報告文件的下載按鈕
+    
+    文件服務啟用並配置了公開地址時只顯示指向文件服務的鏈接，文件在點擊時才從磁盤串流；
+    否則回退為 st.download_button（每次頁面運行都要把文件讀進內存）
+    
+    Args:
+        app: 應用實例
+        label: 按鈕文字
+        file_path: 文件路徑
+        mime: MIME類型
+    """
+    if FILE_SERVER_ENABLED and FILE_SERVER_BASE_URL:
+        root_dir = str(app.file_manager.base_data_dir)
+        start_file_server(root_dir)
+        st.link_button(label, file_url(root_dir, file_path))
+        return
+    
+    with open(file_path, 'rb') as f:
+        st.download_button(label=label, data=f.read(), file_name=file_path.name, mime=mime)
+
+
+def scan_symbol_status(file_manager: FileManager, symbol: str, date_str: str) -> dict:
+    """
+    symbol的輕量狀態摘要：一次scandir只檢查文件是否存在，不讀取任何文件內容
+    （symbol目錄已歸檔時改查歸檔的成員索引）
+    
+    Args:
+        file_manager: 文件管理器
+        symbol: 股票代碼
+        date_str: 日期字符串
         
-        # 只移除可能導致PDF渲染問題的emoji，不替換為文字
-        # 保持標題的簡潔性
-        emoji_to_remove = [
-            '📊', '📰', '🏢', '✅', '⚠️', '💰', '💡', '📋', 
-            '🔑', '📄', '💵', '🔥', '⚡', '📈', '💭', '🚀',
-            '🔴', '🟡', '🟢', '❌', '🎉', '🔄', '🈶'
-        ]
+    Returns:
+        dict: missing_data（缺少的必要數據）, markdown, chinese_pdf, english_pdf, ig_post
+    """
+    try:
+        with os.scandir(file_manager._get_data_path(symbol, date_str)) as entries:
+            names = {entry.name for entry in entries}
+    except FileNotFoundError:
+        index = load_archive_index(file_manager.base_data_dir, date_str)
+        prefix = f"{symbol.upper()}/"
+        names = {member[len(prefix):] for member in (index or {}).get("members", {}) if member.startswith(prefix)}
+    # 數據文件可能是 .json、.json.zst 或 .json.gz
+    data_names = {strip_data_suffix(name) for name in names}
+    
+    return {
+        "missing_data": [dt for dt in REQUIRED_DATA_TYPES if f"{dt}_{date_str}" not in data_names],
+        "markdown": f"{symbol}_report_{date_str}.md" in names,
+        "chinese_pdf": f"{symbol}_report_chinese_{date_str}.pdf" in names,
+        "english_pdf": f"{symbol}_report_english_{date_str}.pdf" in names,
+        "ig_post": f"{IG_POST_DATA_TYPE}_{date_str}" in data_names or f"{symbol}_ig_post_{date_str}.txt" in names
+    }
+
+
+def _status_label(symbol: str, status: dict) -> str:
+    """收起狀態下顯示的摘要標題"""
+    job = get_job_manager().find(f"process:{symbol}")
+    if job and job["status"] not in JOB_FINISHED_STATES:
+        return f"📈 {symbol} - 🔄 後台處理中"
+    if status["missing_data"]:
+        return f"📈 {symbol} - ⚠️ 缺少 {len(status['missing_data'])} 項必要數據"
+    
+    pdf_count = int(status["chinese_pdf"]) + int(status["english_pdf"])
+    return (f"📈 {symbol} - ✅ 數據 | 📝 報告 {'✅' if status['markdown'] else '❌'} | "
+            f"📄 PDF {pdf_count}/2 | 📱 IG {'✅' if status['ig_post'] else '❌'}")
+
+
+def render_symbol(app: StockAnalysisApp, symbol: str, status: dict, expanded: bool):
+    """
+    顯示symbol的折疊面板：標題是輕量狀態摘要，報告內容只在打開「顯示報告內容」後才載入
+    
+    Streamlit會執行折疊面板內的所有代碼（即使沒有展開），
+    所以詳細內容放在開關後面，未打開的symbol只花費一次scandir
+    
+    Args:
+        app: 應用實例
+        symbol: 股票代碼
+        status: scan_symbol_status 的結果
+        expanded: 是否默認展開並載入
+    """
+    with st.expander(_status_label(symbol, status), expanded=expanded):
+        if st.toggle("📂 顯示報告內容", value=expanded, key=f"show_detail_{symbol}"):
+            render_symbol_detail(app, symbol)
+        else:
+            st.caption("💡 打開上方開關後才載入數據、報告和 Instagram 貼文")
+
+
+def _switch_date(date_str: str):
+    """切換查看的日期（按鈕回調，在頁面重新運行前執行）"""
+    st.session_state["view_date"] = date_str
+
+
+def render_report_history(app: StockAnalysisApp, symbol: str):
+    """
+    顯示symbol最近 REPORT_HISTORY_DAYS 天有數據的日期（從日期索引查詢，不掃描目錄），可切換到該日期
+    
+    Args:
+        app: 應用實例
+        symbol: 股票代碼
+    """
+    dates = [date for date in app.file_manager.query_dates(symbol, days=REPORT_HISTORY_DAYS) if date != app.today_str]
+    if not dates:
+        return
+    
+    col_date, col_switch = st.columns([3, 1])
+    with col_date:
+        selected = st.selectbox(f"📚 {symbol} 最近 {REPORT_HISTORY_DAYS} 天的其他報告", dates, key=f"history_{symbol}")
+    with col_switch:
+        st.button("➡️ 查看此日期", key=f"history_open_{symbol}", on_click=_switch_date, args=(selected,))
+
+
+def _analysis_db_signature(file_manager: FileManager) -> tuple:
+    """分析數據庫（含WAL文件）的修改時間，用作緩存鍵"""
+    db_path = file_manager.base_data_dir / ANALYSIS_DB_FILENAME
+    signature = []
+    for path in (db_path, Path(f"{db_path}-wal")):
+        try:
+            signature.append(path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            signature.append(0)
+    return tuple(signature)
+
+
+@st.cache_data(show_spinner=False, max_entries=STOCK_DATA_CACHE_ENTRIES)
+def _symbol_history_cached(base_data_dir: str, symbol: str, start_date: str, signature: tuple) -> pd.DataFrame:
+    """某個股票的歷史分析（數據庫沒有變化時直接返回緩存結果）"""
+    return get_analysis_store(base_data_dir).symbol_history(symbol, start_date=start_date)
+
+
+def render_analysis_trend(app: StockAnalysisApp, symbol: str):
+    """
+    顯示symbol最近 REPORT_HISTORY_DAYS 天的投資傾向、目標價和風險趨勢（來自分析時間序列存儲）
+    
+    Args:
+        app: 應用實例
+        symbol: 股票代碼
+    """
+    if not (app.file_manager.base_data_dir / ANALYSIS_DB_FILENAME).exists():
+        return
+    
+    start_date = (datetime.strptime(app.today_str, '%Y-%m-%d') - timedelta(days=REPORT_HISTORY_DAYS - 1)).strftime('%Y-%m-%d')
+    history = _symbol_history_cached(str(app.file_manager.base_data_dir), symbol, start_date,
+                                     _analysis_db_signature(app.file_manager))
+    history = history[history["date"] <= pd.Timestamp(app.today_str)]
+    if len(history) < 2:
+        return
+    
+    st.markdown(f"### 📈 最近 {REPORT_HISTORY_DAYS} 天分析趨勢")
+    chart = history.set_index("date")
+    col_bias, col_price = st.columns(2)
+    with col_bias:
+        st.caption("投資傾向（1 = 看多，0 = 中性，-1 = 看空）")
+        st.line_chart(chart["bias_score"])
+    with col_price:
+        if chart["target_price"].notna().any():
+            st.caption("目標價")
+            st.line_chart(chart["target_price"])
+    
+    st.dataframe(
+        history[["date", "rating", "target_price", "risk_level", "bias"]].rename(columns={
+            "date": "日期", "rating": "評級", "target_price": "目標價", "risk_level": "風險等級", "bias": "投資傾向"
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+
+
+def render_symbol_detail(app: StockAnalysisApp, symbol: str):
+    """
+    載入並顯示symbol的數據、報告、PDF和Instagram貼文
+    
+    Args:
+        app: 應用實例
+        symbol: 股票代碼
+    """
+    # 檢查是否已有報告文件
+    data_path = Path(app.file_manager._get_data_path(symbol, app.today_str))
+    md_file_path = data_path / f"{symbol}_report_{app.today_str}.md"
+    chinese_pdf_path = data_path / f"{symbol}_report_chinese_{app.today_str}.pdf"
+    english_pdf_path = data_path / f"{symbol}_report_english_{app.today_str}.pdf"
+    
+    # 載入數據
+    data = app.load_stock_data(symbol)
+    
+    # 檢查數據完整性 - 公司描述為可選項
+    required_data = REQUIRED_DATA_TYPES
+    optional_data = ['desc_en', 'desc_cn']
+    missing_data = [dt for dt in required_data if not data.get(dt)]
+    missing_optional = [dt for dt in optional_data if not data.get(dt)]
+    
+    if missing_data:
+        st.warning(f"⚠️ {symbol} 缺少以下必要數據: {', '.join(missing_data)}")
         
-        # 直接移除emoji，不替換為方括號文字
-        for emoji in emoji_to_remove:
-            content = content.replace(emoji, '')
+        if not app.is_today:
+            # 新聞只能按今日下載，歷史日期無法補齊
+            render_report_history(app, symbol)
+            return
         
-        # 轉換為HTML並清理
-        try:
-            import markdown
-            # 將$符號替換為HTML實體，避免被解析為數學公式
-            content = content.replace('$', '&#36;')
-            
-            # 轉換Markdown為HTML
-            html_content = markdown.markdown(content, extensions=['tables', 'nl2br'])
-            
-            return html_content
-        except ImportError:
-            # 如果沒有markdown庫，直接清理特殊字符
-            content = content.replace('$', '&#36;')
-            content = content.replace('\n', '<br>')
-            return content
-    
-    def generate_chinese_pdf_report_old(self, symbol: str, data: dict) -> str:
-        """
-        生成中文PDF報告（使用reportlab）
+        # 提供自動生成選項 (只有缺少必要數據時才提供)
+        if st.button(f"🔄 自動生成 {symbol} 的缺失數據", key=f"generate_{symbol}"):
+            # 提交到後台執行，頁面不會被阻塞
+            submit_process_job(app, symbol, force_refresh=False)
         
-        Args:
-            symbol: 股票代碼
-            data: 股票數據
-            
-        Returns:
-            str: PDF文件路徑
-        """
-        try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib.colors import HexColor
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-            
-            # 註冊中文字體
-            try:
-                # 嘗試註冊系統中文字體
-                pdfmetrics.registerFont(TTFont('SimHei', 'C:/Windows/Fonts/simhei.ttf'))
-                chinese_font = 'SimHei'
-            except:
-                try:
-                    pdfmetrics.registerFont(TTFont('SimSun', 'C:/Windows/Fonts/simsun.ttc'))
-                    chinese_font = 'SimSun'
-                except:
-                    # 如果沒有中文字體，使用默認字體
-                    chinese_font = 'Helvetica'
-            
-            # 設置PDF路徑
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            pdf_path = data_path / f"{symbol}_report_chinese_{self.today_str}.pdf"
-            
-            # 創建PDF文檔
-            doc = SimpleDocTemplate(str(pdf_path), pagesize=A4, 
-                                  topMargin=0.6*inch, bottomMargin=0.6*inch)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # 自定義樣式 - 較小字體和中文字體
-            title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
-                                       fontSize=16, spaceAfter=15, alignment=1,
-                                       textColor=HexColor('#2c3e50'),
-                                       fontName=chinese_font,
-                                       wordWrap='CJK')
-            
-            heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'],
-                                         fontSize=12, spaceBefore=12, spaceAfter=8,
-                                         textColor=HexColor('#34495e'),
-                                         fontName=chinese_font,
-                                         wordWrap='CJK')
-            
-            normal_style = ParagraphStyle('CustomNormal', parent=styles['Normal'],
-                                        fontSize=10, spaceBefore=3, spaceAfter=6,
-                                        fontName=chinese_font,
-                                        wordWrap='CJK',
-                                        leading=14)
-            
-            # 標題
-            story.append(Paragraph(f"📊 {symbol} 股票分析報告（中文版）", title_style))
-            story.append(Paragraph(f"生成日期: {self.today_str}", normal_style))
-            story.append(Spacer(1, 15))
-            
-            # 公司簡介
-            if data.get('desc_cn'):
-                story.append(Paragraph("🏢 公司簡介", heading_style))
-                desc_cn_data = data['desc_cn'].get('data', {}) if isinstance(data['desc_cn'], dict) else data['desc_cn']
-                if isinstance(desc_cn_data, dict):
-                    if 'summary' in desc_cn_data:
-                        story.append(Paragraph(f"簡介: {desc_cn_data['summary']}", normal_style))
-                    if 'business_type' in desc_cn_data:
-                        story.append(Paragraph(f"業務類型: {desc_cn_data['business_type']}", normal_style))
-                story.append(Spacer(1, 10))
-            
-            # 新聞翻譯
-            if data.get('news_cn'):
-                story.append(Paragraph("📰 新聞翻譯", heading_style))
-                news_cn_data = data['news_cn'].get('data', {}) if isinstance(data['news_cn'], dict) else data['news_cn']
-                if isinstance(news_cn_data, dict):
-                    if 'summary' in news_cn_data:
-                        story.append(Paragraph(f"摘要: {news_cn_data['summary']}", normal_style))
-                story.append(Spacer(1, 10))
-            
-            # 基本面分析
-            if data.get('analysis'):
-                story.append(Paragraph("📊 基本面分析", heading_style))
-                analysis_data = data['analysis'].get('data', {}) if isinstance(data['analysis'], dict) else data['analysis']
-                if isinstance(analysis_data, dict):
-                    story.append(Paragraph(f"公司: {analysis_data.get('company', 'N/A')}", normal_style))
-                    story.append(Paragraph(f"股票代碼: {analysis_data.get('ticker', 'N/A')}", normal_style))
-                    
-                    # 投資建議
-                    if 'trading_recommendation' in analysis_data:
-                        rec = analysis_data['trading_recommendation']
-                        story.append(Paragraph("💡 投資建議", heading_style))
-                        story.append(Paragraph(f"投資傾向: {rec.get('bias', 'N/A')}", normal_style))
-                        if len(rec.get('suggestion', '')) > 0:
-                            story.append(Paragraph(f"建議: {rec.get('suggestion', 'N/A')[:200]}...", normal_style))
-                story.append(Spacer(1, 10))
-            
-            # 免責聲明
-            story.append(Spacer(1, 20))
-            disclaimer_style = ParagraphStyle('Disclaimer', parent=normal_style,
-                                            fontSize=8, textColor=HexColor('#7f8c8d'),
-                                            alignment=1)
-            story.append(Paragraph("本報告由AI自動生成，僅供參考，不構成投資建議。投資有風險，請謹慎決策。", disclaimer_style))
-            
-            # 生成PDF
-            doc.build(story)
-            return str(pdf_path)
-            
-        except ImportError:
-            st.error("❌ 缺少reportlab依賴。請運行: pip install reportlab")
-            return None
-        except Exception as e:
-            st.error(f"❌ 中文PDF生成失敗: {e}")
-            return None
+        render_job_status(symbol)
+        
+        st.info("💡 或者運行命令: `python process_stock.py " + symbol + "`")
+        return  # 只有在缺少必要數據時才跳過報告生成
     
-    def generate_english_pdf_report_old(self, symbol: str, data: dict) -> str:
-        """
-        生成英文PDF報告（使用reportlab）
+    # 顯示可選數據缺失信息（不阻止報告生成）
+    if missing_optional:
+        st.info(f"ℹ️ {symbol} 缺少以下可選數據（不影響報告生成）: {', '.join(missing_optional)}")
+    
+    # 顯示數據摘要
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    
+    with col1:
+        st.metric("🏢 英文描述", "✅" if data.get('desc_en') else "❌")
+    with col2:
+        st.metric("🏢 中文描述", "✅" if data.get('desc_cn') else "❌")
+    with col3:
+        st.metric("📰 中文新聞", "✅" if data.get('news_cn') else "❌")
+    with col4:
+        st.metric("📰 英文新聞", "✅" if data.get('news_en') else "❌")
+    with col5:
+        st.metric("📊 中文分析", "✅" if data.get('analysis') else "❌")
+    with col6:
+        st.metric("📊 英文分析", "✅" if data.get('analysis_en') else "❌")
+    
+    # 添加重新下載新聞按鈕（只有今日可以重新下載）
+    st.markdown("---")
+    if app.is_today:
+        col_refresh1, col_refresh2 = st.columns([1, 3])
         
-        Args:
-            symbol: 股票代碼
-            data: 股票數據
-            
-        Returns:
-            str: PDF文件路徑
-        """
-        try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib.colors import HexColor
-            
-            # 設置PDF路徑
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            pdf_path = data_path / f"{symbol}_report_english_{self.today_str}.pdf"
-            
-            # 創建PDF文檔
-            doc = SimpleDocTemplate(str(pdf_path), pagesize=A4, 
-                                  topMargin=0.6*inch, bottomMargin=0.6*inch)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # 自定義樣式 - 較小字體和左右對齊
-            title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
-                                       fontSize=16, spaceAfter=15, alignment=1,
-                                       textColor=HexColor('#2c3e50'),
-                                       fontName='Helvetica-Bold')
-            
-            heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'],
-                                         fontSize=12, spaceBefore=12, spaceAfter=8,
-                                         textColor=HexColor('#34495e'),
-                                         fontName='Helvetica-Bold')
-            
-            # 英文內容使用左右對齊
-            normal_style = ParagraphStyle('CustomNormal', parent=styles['Normal'],
-                                        fontSize=10, spaceBefore=3, spaceAfter=6,
-                                        fontName='Helvetica',
-                                        alignment=4,  # 左右對齊
-                                        leading=14,
-                                        wordWrap='LTR')
-            
-            # 標題
-            story.append(Paragraph(f"📊 {symbol} Stock Analysis Report (English)", title_style))
-            story.append(Paragraph(f"Generated: {self.today_str}", normal_style))
-            story.append(Spacer(1, 15))
-            
-            # Company Description
-            if data.get('desc_en'):
-                story.append(Paragraph("🏢 Company Profile", heading_style))
-                desc_en_data = data['desc_en']
-                if isinstance(desc_en_data, dict) and 'desc_en' in desc_en_data:
-                    # 截取前500字符避免過長
-                    desc_text = desc_en_data['desc_en'][:500] + "..." if len(desc_en_data['desc_en']) > 500 else desc_en_data['desc_en']
-                    story.append(Paragraph(desc_text, normal_style))
-                story.append(Spacer(1, 10))
-            
-            # News Translation
-            if data.get('news_en'):
-                story.append(Paragraph("📰 News Translation", heading_style))
-                news_en_data = data['news_en'].get('data', {}) if isinstance(data['news_en'], dict) else data['news_en']
-                if isinstance(news_en_data, dict):
-                    if 'summary' in news_en_data:
-                        story.append(Paragraph(f"Summary: {news_en_data['summary']}", normal_style))
-                story.append(Spacer(1, 10))
-            
-            # Fundamental Analysis
-            if data.get('analysis_en'):
-                story.append(Paragraph("📊 Fundamental Analysis", heading_style))
-                analysis_en_data = data['analysis_en'].get('data', {}) if isinstance(data['analysis_en'], dict) else data['analysis_en']
-                if isinstance(analysis_en_data, dict):
-                    story.append(Paragraph(f"Company: {analysis_en_data.get('company', 'N/A')}", normal_style))
-                    story.append(Paragraph(f"Ticker: {analysis_en_data.get('ticker', 'N/A')}", normal_style))
-                    
-                    # Trading recommendation
-                    if 'trading_recommendation' in analysis_en_data:
-                        rec = analysis_en_data['trading_recommendation']
-                        story.append(Paragraph("💡 Trading Recommendation", heading_style))
-                        story.append(Paragraph(f"Bias: {rec.get('bias', 'N/A')}", normal_style))
-                        if len(rec.get('suggestion', '')) > 0:
-                            story.append(Paragraph(f"Suggestion: {rec.get('suggestion', 'N/A')[:200]}...", normal_style))
-                story.append(Spacer(1, 10))
-            
-            # Disclaimer
-            story.append(Spacer(1, 20))
-            disclaimer_style = ParagraphStyle('Disclaimer', parent=normal_style,
-                                            fontSize=8, textColor=HexColor('#7f8c8d'),
-                                            alignment=1)
-            story.append(Paragraph("This report is generated by AI for reference only. Not investment advice. Investment involves risks.", disclaimer_style))
-            
-            # 生成PDF
-            doc.build(story)
-            return str(pdf_path)
-            
-        except ImportError:
-            st.error("❌ 缺少reportlab依賴。請運行: pip install reportlab")
-            return None
-        except Exception as e:
-            st.error(f"❌ 英文PDF生成失敗: {e}")
-            return None
-
-    def convert_md_to_pdf_alternative(self, symbol: str, data: dict) -> str:
-        """
-        使用reportlab創建PDF報告（不需要wkhtmltopdf）
+        with col_refresh1:
+            if st.button(f"📰 重新下載 {symbol} 新聞", key=f"refresh_news_{symbol}", help="重新獲取新聞並重新處理所有數據"):
+                # force_refresh=True 會重新下載所有數據（後台執行）
+                submit_process_job(app, symbol, force_refresh=True)
         
-        Args:
-            symbol: 股票代碼
-            data: 股票數據
-            
-        Returns:
-            str: PDF文件路徑
-        """
-        try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib.colors import HexColor
-            
-            # 設置PDF路徑
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            pdf_path = data_path / f"{symbol}_report_{self.today_str}.pdf"
-            
-            # 創建PDF文檔
-            doc = SimpleDocTemplate(str(pdf_path), pagesize=A4, 
-                                  topMargin=0.75*inch, bottomMargin=0.75*inch)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # 自定義樣式
-            title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
-                                       fontSize=20, spaceAfter=20, alignment=1,
-                                       textColor=HexColor('#2c3e50'))
-            
-            heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'],
-                                         fontSize=14, spaceBefore=15, spaceAfter=10,
-                                         textColor=HexColor('#34495e'))
-            
-            # 標題
-            story.append(Paragraph(f"📊 {symbol} 股票分析報告", title_style))
-            story.append(Paragraph(f"生成日期: {self.today_str}", styles['Normal']))
-            story.append(Spacer(1, 20))
-            
-            # 新聞翻譯 (中文)
-            if data.get('news_cn'):
-                story.append(Paragraph("📰 新聞翻譯 (繁體中文)", heading_style))
-                news_cn_data = data['news_cn'].get('data', {}) if isinstance(data['news_cn'], dict) else data['news_cn']
-                if isinstance(news_cn_data, dict):
-                    if 'summary' in news_cn_data:
-                        story.append(Paragraph(f"重點摘要: {news_cn_data['summary']}", styles['Normal']))
-                        story.append(Spacer(1, 10))
-                
-            # 新聞翻譯 (英文)
-            if data.get('news_en'):
-                story.append(Paragraph("📰 News Translation (English)", heading_style))
-                news_en_data = data['news_en'].get('data', {}) if isinstance(data['news_en'], dict) else data['news_en']
-                if isinstance(news_en_data, dict):
-                    if 'summary' in news_en_data:
-                        story.append(Paragraph(f"Summary: {news_en_data['summary']}", styles['Normal']))
-                        story.append(Spacer(1, 10))
-            
-            # 基本面分析 (中文)
-            if data.get('analysis'):
-                story.append(Paragraph("📊 基本面分析 (中文)", heading_style))
-                analysis_data = data['analysis'].get('data', {}) if isinstance(data['analysis'], dict) else data['analysis']
-                if isinstance(analysis_data, dict):
-                    story.append(Paragraph(f"公司: {analysis_data.get('company', 'N/A')}", styles['Normal']))
-                    story.append(Paragraph(f"股票代碼: {analysis_data.get('ticker', 'N/A')}", styles['Normal']))
-                    
-                    # 投資建議
-                    if 'trading_recommendation' in analysis_data:
-                        rec = analysis_data['trading_recommendation']
-                        story.append(Paragraph("💡 投資建議", styles['Heading3']))
-                        story.append(Paragraph(f"投資傾向: {rec.get('bias', 'N/A')}", styles['Normal']))
-                        story.append(Paragraph(f"建議: {rec.get('suggestion', 'N/A')}", styles['Normal']))
-                        story.append(Spacer(1, 10))
-            
-            # 基本面分析 (英文)
-            if data.get('analysis_en'):
-                story.append(Paragraph("📊 Fundamental Analysis (English)", heading_style))
-                analysis_en_data = data['analysis_en'].get('data', {}) if isinstance(data['analysis_en'], dict) else data['analysis_en']
-                if isinstance(analysis_en_data, dict):
-                    story.append(Paragraph(f"Company: {analysis_en_data.get('company', 'N/A')}", styles['Normal']))
-                    story.append(Paragraph(f"Ticker: {analysis_en_data.get('ticker', 'N/A')}", styles['Normal']))
-                    
-                    # Trading recommendation
-                    if 'trading_recommendation' in analysis_en_data:
-                        rec = analysis_en_data['trading_recommendation']
-                        story.append(Paragraph("💡 Trading Recommendation", styles['Heading3']))
-                        story.append(Paragraph(f"Bias: {rec.get('bias', 'N/A')}", styles['Normal']))
-                        story.append(Paragraph(f"Suggestion: {rec.get('suggestion', 'N/A')}", styles['Normal']))
-            
-            # 免責聲明
-            story.append(Spacer(1, 30))
-            disclaimer_style = ParagraphStyle('Disclaimer', parent=styles['Normal'],
-                                            fontSize=10, textColor=HexColor('#7f8c8d'),
-                                            alignment=1)
-            story.append(Paragraph("本報告由AI自動生成，僅供參考，不構成投資建議。投資有風險，請謹慎決策。", disclaimer_style))
-            
-            # 生成PDF
-            doc.build(story)
-            return str(pdf_path)
-            
-        except ImportError:
-            st.error("❌ 缺少reportlab依賴。請運行: pip install reportlab")
-            return None
-        except Exception as e:
-            st.error(f"❌ PDF生成失敗: {e}")
-            return None
-    
-    def convert_md_to_pdf(self, md_file_path: str) -> str:
-        """
-        將Markdown轉換為PDF
+        with col_refresh2:
+            st.info("💡 此按鈕會重新下載新聞並重新處理所有數據（包括翻譯和分析）")
         
-        Args:
-            md_file_path: Markdown文件路徑
-            
-        Returns:
-            str: PDF文件路徑
-        """
-        try:
-            import markdown
-            try:
-                import pdfkit
-                # 配置wkhtmltopdf路徑 (Windows)
-                import platform
-                if platform.system().lower() == "windows":
-                    config = pdfkit.configuration(wkhtmltopdf=r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe")
-                else:
-                    config = None
-            except ImportError:
-                st.error("❌ 缺少pdfkit依賴。請運行: pip install pdfkit")
-                st.info("💡 並安裝wkhtmltopdf系統依賴")
-                return None
-            from pathlib import Path
-            
-            # 讀取Markdown文件
-            with open(md_file_path, 'r', encoding='utf-8') as f:
-                md_content = f.read()
-            
-            # 轉換為HTML
-            html_content = markdown.markdown(md_content, extensions=['tables', 'fenced_code'])
-            
-            # 添加CSS樣式
-            html_with_style = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <style>
-                    body {{ 
-                        font-family: 'Microsoft YaHei', 'Arial Unicode MS', Arial, sans-serif; 
-                        margin: 40px; 
-                        line-height: 1.8; 
-                        word-spacing: 1px;
-                        letter-spacing: 0.5px;
-                    }}
-                    h1 {{ 
-                        color: #2c3e50; 
-                        border-bottom: 3px solid #3498db; 
-                        padding-bottom: 10px; 
-                        margin-bottom: 20px;
-                    }}
-                    h2 {{ 
-                        color: #34495e; 
-                        border-bottom: 1px solid #bdc3c7; 
-                        padding-bottom: 5px; 
-                        margin-top: 25px;
-                        margin-bottom: 15px;
-                    }}
-                    h3 {{ 
-                        color: #7f8c8d; 
-                        margin-top: 20px;
-                        margin-bottom: 10px;
-                    }}
-                    p {{ 
-                        margin-bottom: 12px; 
-                        text-align: justify;
-                        word-wrap: break-word;
-                        white-space: pre-wrap;
-                    }}
-                    ul {{ 
-                        margin-left: 20px; 
-                        margin-bottom: 15px;
-                    }}
-                    li {{ 
-                        margin-bottom: 8px; 
-                        line-height: 1.6;
-                    }}
-                    strong {{ 
-                        color: #2c3e50; 
-                        font-weight: bold;
-                    }}
-                    .emoji {{ 
-                        font-size: 1.2em; 
-                        margin-right: 5px;
-                    }}
-                    code {{
-                        background-color: #f8f9fa;
-                        padding: 2px 4px;
-                        border-radius: 3px;
-                        font-family: 'Courier New', monospace;
-                    }}
-                    pre {{
-                        background-color: #f8f9fa;
-                        padding: 10px;
-                        border-radius: 5px;
-                        overflow-x: auto;
-                        white-space: pre-wrap;
-                        word-wrap: break-word;
-                    }}
-                </style>
-            </head>
-            <body>
-                {html_content}
-            </body>
-            </html>
-            """
-            
-            # 設置PDF路徑
-            pdf_path = md_file_path.replace('.md', '.pdf')
-            
-            # 配置wkhtmltopdf選項
-            options = {
-                'page-size': 'A4',
-                'margin-top': '0.75in',
-                'margin-right': '0.75in',
-                'margin-bottom': '0.75in',
-                'margin-left': '0.75in',
-                'encoding': "UTF-8",
-                'no-outline': None,
-                'enable-local-file-access': None,
-                'print-media-type': None,
-                'disable-smart-shrinking': None,
-                'zoom': '1.0',
-                'dpi': 96,
-                'javascript-delay': 1000,
-                'load-error-handling': 'ignore',
-                'load-media-error-handling': 'ignore'
-            }
-            
-            # 轉換為PDF
-            try:
-                if config:
-                    pdfkit.from_string(html_with_style, pdf_path, options=options, configuration=config)
-                else:
-                    pdfkit.from_string(html_with_style, pdf_path, options=options)
-                return pdf_path
-            except Exception as pdf_error:
-                st.warning(f"高級PDF轉換失敗，嘗試簡單格式: {pdf_error}")
-                
-                # 備用方案：使用簡單的HTML格式
-                simple_html = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <style>
-                        body {{ 
-                            font-family: Arial, sans-serif; 
-                            margin: 30px; 
-                            line-height: 1.6; 
-                        }}
-                        h1, h2, h3 {{ margin-top: 20px; margin-bottom: 10px; }}
-                        p {{ margin-bottom: 10px; }}
-                        ul {{ margin-bottom: 10px; }}
-                        li {{ margin-bottom: 5px; }}
-                    </style>
-                </head>
-                <body>
-                    {html_content}
-                </body>
-                </html>
-                """
-                
-                simple_options = {
-                    'page-size': 'A4',
-                    'margin-top': '0.75in',
-                    'margin-right': '0.75in', 
-                    'margin-bottom': '0.75in',
-                    'margin-left': '0.75in',
-                    'encoding': "UTF-8"
-                }
-                
-                try:
-                    if config:
-                        pdfkit.from_string(simple_html, pdf_path, options=simple_options, configuration=config)
-                    else:
-                        pdfkit.from_string(simple_html, pdf_path, options=simple_options)
-                    return pdf_path
-                except Exception as simple_error:
-                    st.error(f"簡單PDF轉換也失敗: {simple_error}")
-                    return None
-            
-        except Exception as e:
-            st.error(f"PDF轉換失敗: {e}")
-            st.info("💡 建議：1) 安裝 wkhtmltopdf 2) 檢查系統字體支持")
-            return None
+        render_job_status(symbol)
     
-    def generate_ig_post(self, symbol: str, data: dict) -> dict:
-        """
-        生成 Instagram 貼文
-        
-        Args:
-            symbol: 股票代碼
-            data: 股票數據
-            
-        Returns:
-            dict: Instagram 貼文結果
-        """
-        try:
-            # 生成中文報告內容作為基礎
-            report_content = self.generate_chinese_report_content(symbol, data)
-            
-            # 使用 IgPostCreator 生成 Instagram 貼文
-            result = self.ig_creator.create_ig_post(symbol, report_content)
-            
-            return result
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "symbol": symbol.upper()
-            }
+    render_report_history(app, symbol)
     
-    def save_ig_post(self, symbol: str, ig_result: dict) -> str:
-        """
-        保存 Instagram 貼文到文件
-        
-        Args:
-            symbol: 股票代碼
-            ig_result: Instagram 貼文結果
-            
-        Returns:
-            str: 保存的文件路徑
-        """
-        try:
-            # 創建數據目錄
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            
-            # 生成文件名
-            filename = data_path / f"{symbol}_ig_post_{self.today_str}.txt"
-            
-            # 保存內容
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write("=== INSTAGRAM POST ===\n\n")
-                f.write(ig_result['formatted_post'])
-                f.write(f"\n\n=== HASHTAGS ===\n\n")
-                f.write(ig_result['hashtags'])
-                f.write(f"\n\n=== RAW JSON ===\n\n")
-                f.write(json.dumps(ig_result['raw_json'], ensure_ascii=False, indent=2))
-            
-            return str(filename)
-            
-        except Exception as e:
-            raise Exception(f"保存 Instagram 貼文失敗: {str(e)}")
+    st.markdown("---")
     
-    def load_ig_post(self, symbol: str) -> dict:
-        """
-        載入已保存的 Instagram 貼文
+    # 生成或載入報告
+    if md_file_path.exists() and chinese_pdf_path.exists() and english_pdf_path.exists():
+        st.success("✅ 發現現有報告文件（含中英文PDF）")
         
-        Args:
-            symbol: 股票代碼
-            
-        Returns:
-            dict: Instagram 貼文內容
-        """
-        try:
-            data_path = Path(self.file_manager._get_data_path(symbol, self.today_str))
-            filename = data_path / f"{symbol}_ig_post_{self.today_str}.txt"
-            
-            if filename.exists():
-                with open(filename, 'r', encoding='utf-8') as f:
-                    content = f.read()
+        # 讀取現有Markdown內容
+        with open(md_file_path, 'r', encoding='utf-8') as f:
+            md_content = f.read()
+        
+    elif not app.is_today:
+        # 歷史日期的PDF可能已被保留策略刪除或整天已歸檔，自動生成會把清理掉的文件寫回日期目錄
+        st.info("📚 歷史日期：報告內容由已載入的數據顯示，不會自動生成文件；需要PDF時請點擊下方「重新生成PDF」")
+        
+    else:
+        st.info("🔄 生成新的報告...")
+        
+        # 生成Markdown報告（使用中文版本作為主報告）
+        md_content = app.generate_chinese_report_content(symbol, data)
+        
+        # 保存Markdown文件
+        md_path = app.save_markdown_report(symbol, md_content)
+        
+        # 生成中英文分離PDF
+        st.info("📄 生成中英文PDF報告...")
+        
+        # 中英文PDF一起提交到渲染池
+        pdf_paths = app.generate_pdf_reports(symbol, data)
+        chinese_pdf = pdf_paths.get("chinese")
+        english_pdf = pdf_paths.get("english")
+        
+        if chinese_pdf and english_pdf:
+            st.success("✅ 中英文PDF報告生成完成!")
+        elif chinese_pdf:
+            st.warning("⚠️ 僅中文PDF生成成功")
+        elif english_pdf:
+            st.warning("⚠️ 僅英文PDF生成成功")
+        else:
+            st.warning("⚠️ PDF生成失敗，但Markdown報告可用")
+    
+    # 顯示報告內容 - 使用標籤頁
+    st.markdown("### 📄 分析報告")
+    
+    # 創建中英文標籤頁
+    tab_chinese, tab_english = st.tabs(["📊 中文報告", "📈 English Report"])
+    
+    # 設置自定義CSS來修復文字問題和美化表格
+    st.markdown("""
+    <style>
+    .report-content {
+        color: rgba(255, 255, 255, 0.9) !important;
+        text-align: justify;
+        line-height: 1.6;
+    }
+    .report-content p {
+        margin-bottom: 1rem;
+        text-align: justify;
+    }
+    .katex {
+        display: none !important;
+    }
+    
+    /* 表格樣式美化 */
+    .report-content table {
+        width: 100%;
+        border-collapse: collapse;
+        margin: 1rem 0;
+        background: rgba(25, 39, 52, 0.6) !important;
+        border-radius: 8px;
+        overflow: hidden;
+    }
+    
+    .report-content th {
+        background: rgba(25, 39, 52, 0.8) !important;
+        color: rgba(255, 255, 255, 0.95) !important;
+        padding: 12px 16px;
+        text-align: left;
+        font-weight: bold;
+        font-size: 1.1em;
+        border-bottom: 2px solid rgba(52, 73, 94, 0.8);
+    }
+    
+    .report-content td {
+        padding: 12px 16px;
+        border-bottom: 1px solid rgba(52, 73, 94, 0.4);
+        vertical-align: top;
+        line-height: 1.5;
+    }
+    
+    .report-content td:first-child {
+        font-weight: bold;
+        color: rgba(255, 255, 255, 0.95) !important;
+        width: 25%;
+        font-size: 1.05em;
+    }
+    
+    .report-content td:last-child {
+        color: rgba(255, 255, 255, 0.85) !important;
+        text-align: justify;
+        word-wrap: break-word;
+    }
+    
+    .report-content tr:hover {
+        background: rgba(52, 73, 94, 0.3) !important;
+    }
+    
+    /* 投資建議顏色 */
+    .report-content td:contains("看多") {
+        color: #2ecc71 !important;
+    }
+    .report-content td:contains("看空") {
+        color: #e74c3c !important;
+    }
+    .report-content td:contains("中性") {
+        color: #f39c12 !important;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+    
+    # 中英文報告內容（與PDF共用同一次渲染）
+    render_context = app.get_render_context(symbol, data)
+    
+    # 中文標籤頁
+    with tab_chinese:
+        cleaned_chinese = render_context.body_html("chinese")
+        st.markdown(f'<div class="report-content">{cleaned_chinese}</div>', unsafe_allow_html=True)
+    
+    # 英文標籤頁
+    with tab_english:
+        cleaned_english = render_context.body_html("english")
+        st.markdown(f'<div class="report-content">{cleaned_english}</div>', unsafe_allow_html=True)
+    
+    # 下載按鈕
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        if md_file_path.exists():
+            file_download_button(app, "📝 下載 Markdown", md_file_path, "text/markdown")
+    
+    with col2:
+        # 中文PDF下載
+        chinese_pdf_path = data_path / f"{symbol}_report_chinese_{app.today_str}.pdf"
+        if chinese_pdf_path.exists():
+            file_download_button(app, "📄 下載中文PDF", chinese_pdf_path, "application/pdf")
+    
+    with col3:
+        # 英文PDF下載
+        english_pdf_path = data_path / f"{symbol}_report_english_{app.today_str}.pdf"
+        if english_pdf_path.exists():
+            file_download_button(app, "📄 下載英文PDF", english_pdf_path, "application/pdf")
+    
+    with col4:
+        if md_file_path.exists() or not app.is_today:
+            if st.button(f"🔄 重新生成PDF", key=f"regenerate_pdf_{symbol}"):
+                with st.spinner("正在重新生成中英文PDF..."):
+                    # 刪除舊的PDF文件
+                    chinese_pdf_path = data_path / f"{symbol}_report_chinese_{app.today_str}.pdf"
+                    english_pdf_path = data_path / f"{symbol}_report_english_{app.today_str}.pdf"
                     
-                # 解析文件內容
-                sections = content.split("=== ")
-                ig_post = ""
-                hashtags = ""
-                raw_json = {}
-                
-                for section in sections:
-                    if section.startswith("INSTAGRAM POST ==="):
-                        ig_post = section.replace("INSTAGRAM POST ===\n\n", "").split("\n\n=== ")[0]
-                    elif section.startswith("HASHTAGS ==="):
-                        hashtags = section.replace("HASHTAGS ===\n\n", "").split("\n\n=== ")[0]
-                    elif section.startswith("RAW JSON ==="):
-                        json_text = section.replace("RAW JSON ===\n\n", "")
-                        try:
-                            raw_json = json.loads(json_text)
-                        except:
-                            pass
-                
-                return {
-                    "exists": True,
-                    "formatted_post": ig_post.strip(),
-                    "hashtags": hashtags.strip(),
-                    "raw_json": raw_json,
-                    "filename": str(filename)
-                }
-            else:
-                return {"exists": False}
-                
-        except Exception as e:
-            return {"exists": False, "error": str(e)}
-
-def main():
-    st.set_page_config(
-        page_title="股票分析報告生成器",
-        page_icon="📊",
-        layout="wide"
-    )
+                    if chinese_pdf_path.exists():
+                        chinese_pdf_path.unlink()
+                    if english_pdf_path.exists():
+                        english_pdf_path.unlink()
+                    
+                    # 重新生成中英文PDF（一起提交到渲染池）
+                    pdf_paths = app.generate_pdf_reports(symbol, data)
+                    chinese_pdf = pdf_paths.get("chinese")
+                    english_pdf = pdf_paths.get("english")
+                    
+                    if chinese_pdf and english_pdf:
+                        st.success("✅ 中英文PDF重新生成成功!")
+                        st.rerun()
+                    elif chinese_pdf:
+                        st.warning("⚠️ 僅中文PDF重新生成成功")
+                        st.rerun()
+                    elif english_pdf:
+                        st.warning("⚠️ 僅英文PDF重新生成成功")
+                        st.rerun()
+                    else:
+                        st.error("❌ PDF重新生成失敗，請檢查依賴")
     
-    app = StockAnalysisApp()
+    # 歷史分析趨勢
+    render_analysis_trend(app, symbol)
     
-    st.title("📊 股票分析報告生成器")
-    st.markdown("輸入股票代碼，生成中英文分析報告")
+    # Instagram 貼文功能
+    st.markdown("---")
+    st.markdown("### 📱 Instagram 投資貼文")
     
-    # 側邊欄
-    st.sidebar.header("⚙️ 設定")
+    # 檢查是否已有 IG 貼文
+    ig_post_data = app.load_ig_post(symbol)
     
+    if ig_post_data.get("exists"):
+        st.success("✅ 發現現有 Instagram 貼文")
+        
+        # 顯示貼文內容
+        ig_tab1, ig_tab2 = st.tabs(["📱 Instagram 貼文", "🏷️ Hashtags"])
+        
+        with ig_tab1:
+            st.text_area(
+                "Instagram 貼文內容",
+                value=ig_post_data["formatted_post"],
+                height=400,
+                disabled=True
+            )
+        
+        with ig_tab2:
+            st.text_area(
+                "Hashtags",
+                value=ig_post_data["hashtags"],
+                height=100,
+                disabled=True
+            )
+        
+        # IG 貼文操作按鈕
+        ig_col1, ig_col2, ig_col3 = st.columns(3)
+        
+        with ig_col1:
+            # 下載 IG 貼文
+            if st.download_button(
+                label="📱 下載 IG 貼文",
+                data=ig_post_data["formatted_post"] + "\n\n" + ig_post_data["hashtags"],
+                file_name=f"{symbol}_ig_post_{app.today_str}.txt",
+                mime="text/plain"
+            ):
+                st.success("✅ IG 貼文下載完成!")
+        
+        with ig_col2:
+            # 重新生成 IG 貼文
+            if st.button(f"🔄 重新生成 IG 貼文", key=f"regenerate_ig_{symbol}"):
+                with st.spinner("正在重新生成 Instagram 貼文..."):
+                    try:
+                        ig_result = app.generate_ig_post(symbol, data)
+                        
+                        if ig_result["success"]:
+                            # 保存新的 IG 貼文
+                            filename = app.save_ig_post(symbol, ig_result)
+                            st.success("✅ Instagram 貼文重新生成完成!")
+                            st.rerun()
+                        else:
+                            st.error(f"❌ 生成失敗: {ig_result.get('error', '未知錯誤')}")
+                    except Exception as e:
+                        st.error(f"❌ 重新生成過程出錯: {str(e)}")
+        
+        with ig_col3:
+            # 查看原始 JSON
+            if st.button("🔍 查看原始數據", key=f"view_ig_json_{symbol}"):
+                if ig_post_data.get("raw_json"):
+                    st.json(ig_post_data["raw_json"])
+                else:
+                    st.warning("⚠️ 無原始 JSON 數據")
+    
+    else:
+        # 自動生成 IG 貼文（當報告存在時）
+        if md_file_path.exists():
+            st.info("📱 檢測到報告已生成，可以創建 Instagram 貼文")
+            
+            if st.button(f"🎨 生成 {symbol} Instagram 貼文", key=f"create_ig_{symbol}"):
+                with st.spinner("正在生成 Instagram 貼文..."):
+                    try:
+                        ig_result = app.generate_ig_post(symbol, data)
+                        
+                        if ig_result["success"]:
+                            # 保存 IG 貼文
+                            filename = app.save_ig_post(symbol, ig_result)
+                            st.success("✅ Instagram 貼文生成完成!")
+                            st.rerun()
+                        else:
+                            st.error(f"❌ 生成失敗: {ig_result.get('error', '未知錯誤')}")
+                    except Exception as e:
+                        st.error(f"❌ 生成過程出錯: {str(e)}")
+        else:
+            st.warning("⚠️ 請先生成股票分析報告，然後才能創建 Instagram 貼文")
+
+
+def render_report_view(app: StockAnalysisApp):
+    """報告生成頁：輸入股票代碼，逐個顯示分析報告"""
     # 股票代碼輸入
     symbols_input = st.text_input(
         "📝 請輸入股票代碼 (用逗號分隔)",
         placeholder="例如: AAPL, TSLA, XPON",
-        help="支持多個股票代碼，用逗號分隔。程序會自動清理格式。"
+        help="支持多個股票代碼，用逗號分隔。程序會自動清理格式。",
+        key="symbols_input"
     )
     
     if symbols_input:
@@ -2254,451 +1075,155 @@ def main():
         if symbols:
             st.success(f"✅ 識別到 {len(symbols)} 個股票代碼: {', '.join(symbols)}")
             
+            # 每個symbol一次scandir得到狀態摘要，數據和報告只在打開時才載入
+            statuses = {symbol: scan_symbol_status(app.file_manager, symbol, app.today_str) for symbol in symbols}
+            
+            # 一次把所有缺少必要數據的symbol加入後台隊列
+            incomplete = [symbol for symbol in symbols if statuses[symbol]["missing_data"]]
+            if app.is_today and len(incomplete) > 1 and st.button(f"🔄 自動生成全部 {len(incomplete)} 個股票的缺失數據", key="generate_all"):
+                for symbol in incomplete:
+                    submit_process_job(app, symbol, force_refresh=False)
+            
             # 為每個股票顯示分析結果
             for i, symbol in enumerate(symbols):
-                with st.expander(f"📈 {symbol} - 點擊查看分析報告", expanded=(i==0)):
-                    
-                    # 檢查是否已有報告文件
-                    data_path = Path(app.file_manager._get_data_path(symbol, app.today_str))
-                    md_file_path = data_path / f"{symbol}_report_{app.today_str}.md"
-                    chinese_pdf_path = data_path / f"{symbol}_report_chinese_{app.today_str}.pdf"
-                    english_pdf_path = data_path / f"{symbol}_report_english_{app.today_str}.pdf"
-                    
-                    # 載入數據
-                    data = app.load_stock_data(symbol)
-                    
-                    # 檢查數據完整性 - 公司描述為可選項
-                    required_data = ['news_cn', 'analysis', 'news_en', 'analysis_en']
-                    optional_data = ['desc_en', 'desc_cn']
-                    missing_data = [dt for dt in required_data if not data.get(dt)]
-                    missing_optional = [dt for dt in optional_data if not data.get(dt)]
-                    
-                    if missing_data:
-                        st.warning(f"⚠️ {symbol} 缺少以下必要數據: {', '.join(missing_data)}")
-                        
-                        # 提供自動生成選項 (只有缺少必要數據時才提供)
-                        if st.button(f"🔄 自動生成 {symbol} 的缺失數據", key=f"generate_{symbol}"):
-                            # 創建進度顯示區域
-                            with st.container():
-                                progress_col1, progress_col2 = st.columns([3, 1])
-                                
-                                with progress_col1:
-                                    progress_bar = st.progress(0)
-                                    status_text = st.empty()
-                                
-                                with progress_col2:
-                                    # 添加旋轉動畫
-                                    spinner_placeholder = st.empty()
-                                
-                                # 創建可滾動的進度日誌窗口
-                                progress_log = st.expander("📋 處理詳情", expanded=True)
-                                with progress_log:
-                                    log_container = st.empty()
-                                    log_messages = []
-                                
-                                try:
-                                    # 開始處理動畫
-                                    with spinner_placeholder:
-                                        st.markdown("""
-                                        <div style="text-align: center;">
-                                            <div class="spinner">⏳</div>
-                                        </div>
-                                        <style>
-                                        .spinner {
-                                            font-size: 2rem;
-                                            animation: spin 1s linear infinite;
-                                        }
-                                        @keyframes spin {
-                                            from { transform: rotate(0deg); }
-                                            to { transform: rotate(360deg); }
-                                        }
-                                        </style>
-                                        """, unsafe_allow_html=True)
-                                    
-                                    status_text.text(f"🔄 正在處理 {symbol}...")
-                                    progress_bar.progress(0.1)
-                                    
-                                    # 添加初始日誌
-                                    log_messages.append(f"🔄 開始處理 {symbol}...")
-                                    log_container.text_area("處理日誌", "\n".join(log_messages), height=200, disabled=True)
-                                    
-                                    # 調用處理函數
-                                    result = app.process_with_progress(symbol, log_messages, log_container, progress_bar, status_text, force_refresh=False)
-                                    
-                                    # 完成處理
-                                    spinner_placeholder.empty()
-                                    progress_bar.progress(1.0)
-                                    
-                                    if result.get("success", False):
-                                        status_text.text("✅ 處理完成！")
-                                        log_messages.append("🎉 所有數據處理完成!")
-                                        log_container.text_area("處理日誌", "\n".join(log_messages), height=200, disabled=True)
-                                        st.success(f"✅ {symbol} 數據生成完成!")
-                                        st.rerun()
-                                    else:
-                                        status_text.text("❌ 處理失敗")
-                                        log_messages.append("❌ 數據處理失敗")
-                                        log_container.text_area("處理日誌", "\n".join(log_messages), height=200, disabled=True)
-                                        st.error(f"❌ {symbol} 數據生成失敗")
-                                        
-                                except Exception as e:
-                                    spinner_placeholder.empty()
-                                    status_text.text("❌ 處理出錯")
-                                    log_messages.append(f"❌ 處理過程出錯: {str(e)}")
-                                    log_container.text_area("處理日誌", "\n".join(log_messages), height=200, disabled=True)
-                                    st.error(f"❌ 處理過程出錯: {str(e)}")
-                                    # 修復：檢查 result 是否存在且有 errors 屬性
-                                    if 'result' in locals() and result and isinstance(result, dict) and "errors" in result:
-                                        for error in result["errors"]:
-                                            st.error(f"  - {error}")
-                        
-                        st.info("💡 或者運行命令: `python process_stock.py " + symbol + "`")
-                        continue  # 只有在缺少必要數據時才跳過報告生成
-                    
-                    # 顯示可選數據缺失信息（不阻止報告生成）
-                    if missing_optional:
-                        st.info(f"ℹ️ {symbol} 缺少以下可選數據（不影響報告生成）: {', '.join(missing_optional)}")
-                    
-                    # 顯示數據摘要
-                    col1, col2, col3, col4, col5, col6 = st.columns(6)
-                    
-                    with col1:
-                        st.metric("🏢 英文描述", "✅" if data.get('desc_en') else "❌")
-                    with col2:
-                        st.metric("🏢 中文描述", "✅" if data.get('desc_cn') else "❌")
-                    with col3:
-                        st.metric("📰 中文新聞", "✅" if data.get('news_cn') else "❌")
-                    with col4:
-                        st.metric("📰 英文新聞", "✅" if data.get('news_en') else "❌")
-                    with col5:
-                        st.metric("📊 中文分析", "✅" if data.get('analysis') else "❌")
-                    with col6:
-                        st.metric("📊 英文分析", "✅" if data.get('analysis_en') else "❌")
-                    
-                    # 添加重新下載新聞按鈕
-                    st.markdown("---")
-                    col_refresh1, col_refresh2 = st.columns([1, 3])
-                    
-                    with col_refresh1:
-                        if st.button(f"📰 重新下載 {symbol} 新聞", key=f"refresh_news_{symbol}", help="重新獲取新聞並重新處理所有數據"):
-                            with st.spinner(f"正在重新下載 {symbol} 的新聞並重新處理..."):
-                                try:
-                                    # 創建進度顯示
-                                    progress_container = st.container()
-                                    with progress_container:
-                                        progress_bar = st.progress(0)
-                                        status_text = st.empty()
-                                        log_container = st.empty()
-                                        log_messages = []
-                                        
-                                        # 調用處理函數，force_refresh=True 會重新下載所有數據
-                                        status_text.text(f"🔄 重新處理 {symbol} 所有數據...")
-                                        result = app.process_with_progress(symbol, log_messages, log_container, progress_bar, status_text, force_refresh=True)
-                                        
-                                        if result.get("success", False):
-                                            st.success(f"✅ {symbol} 新聞重新下載並處理完成!")
-                                            st.rerun()  # 重新加載頁面以顯示新數據
-                                        else:
-                                            st.error(f"❌ {symbol} 重新處理失敗")
-                                            if result.get("errors"):
-                                                for error in result["errors"]:
-                                                    st.error(f"  - {error}")
-                                except Exception as e:
-                                    st.error(f"❌ 重新處理過程出錯: {str(e)}")
-                    
-                    with col_refresh2:
-                        st.info("💡 此按鈕會重新下載新聞並重新處理所有數據（包括翻譯和分析）")
-                    
-                    st.markdown("---")
-                    
-                    # 生成或載入報告
-                    if md_file_path.exists() and chinese_pdf_path.exists() and english_pdf_path.exists():
-                        st.success("✅ 發現現有報告文件（含中英文PDF）")
-                        
-                        # 讀取現有Markdown內容
-                        with open(md_file_path, 'r', encoding='utf-8') as f:
-                            md_content = f.read()
-                        
-                    else:
-                        st.info("🔄 生成新的報告...")
-                        
-                        # 生成Markdown報告（使用中文版本作為主報告）
-                        md_content = app.generate_chinese_report_content(symbol, data)
-                        
-                        # 保存Markdown文件
-                        md_path = app.save_markdown_report(symbol, md_content)
-                        
-                        # 生成中英文分離PDF
-                        st.info("📄 生成中英文PDF報告...")
-                        
-                        # 生成中文PDF（使用HTML轉換）
-                        chinese_pdf = app.generate_chinese_pdf_report_html(symbol, data)
-                        
-                        # 生成英文PDF（使用HTML轉換）
-                        english_pdf = app.generate_english_pdf_report_html(symbol, data)
-                        
-                        if chinese_pdf and english_pdf:
-                            st.success("✅ 中英文PDF報告生成完成!")
-                        elif chinese_pdf:
-                            st.warning("⚠️ 僅中文PDF生成成功")
-                        elif english_pdf:
-                            st.warning("⚠️ 僅英文PDF生成成功")
-                        else:
-                            st.warning("⚠️ PDF生成失敗，但Markdown報告可用")
-                    
-                    # 顯示報告內容 - 使用標籤頁
-                    st.markdown("### 📄 分析報告")
-                    
-                    # 創建中英文標籤頁
-                    tab_chinese, tab_english = st.tabs(["📊 中文報告", "📈 English Report"])
-                    
-                    # 設置自定義CSS來修復文字問題和美化表格
-                    st.markdown("""
-                    <style>
-                    .report-content {
-                        color: rgba(255, 255, 255, 0.9) !important;
-                        text-align: justify;
-                        line-height: 1.6;
-                    }
-                    .report-content p {
-                        margin-bottom: 1rem;
-                        text-align: justify;
-                    }
-                    .katex {
-                        display: none !important;
-                    }
-                    
-                    /* 表格樣式美化 */
-                    .report-content table {
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin: 1rem 0;
-                        background: rgba(25, 39, 52, 0.6) !important;
-                        border-radius: 8px;
-                        overflow: hidden;
-                    }
-                    
-                    .report-content th {
-                        background: rgba(25, 39, 52, 0.8) !important;
-                        color: rgba(255, 255, 255, 0.95) !important;
-                        padding: 12px 16px;
-                        text-align: left;
-                        font-weight: bold;
-                        font-size: 1.1em;
-                        border-bottom: 2px solid rgba(52, 73, 94, 0.8);
-                    }
-                    
-                    .report-content td {
-                        padding: 12px 16px;
-                        border-bottom: 1px solid rgba(52, 73, 94, 0.4);
-                        vertical-align: top;
-                        line-height: 1.5;
-                    }
-                    
-                    .report-content td:first-child {
-                        font-weight: bold;
-                        color: rgba(255, 255, 255, 0.95) !important;
-                        width: 25%;
-                        font-size: 1.05em;
-                    }
-                    
-                    .report-content td:last-child {
-                        color: rgba(255, 255, 255, 0.85) !important;
-                        text-align: justify;
-                        word-wrap: break-word;
-                    }
-                    
-                    .report-content tr:hover {
-                        background: rgba(52, 73, 94, 0.3) !important;
-                    }
-                    
-                    /* 投資建議顏色 */
-                    .report-content td:contains("看多") {
-                        color: #2ecc71 !important;
-                    }
-                    .report-content td:contains("看空") {
-                        color: #e74c3c !important;
-                    }
-                    .report-content td:contains("中性") {
-                        color: #f39c12 !important;
-                    }
-                    </style>
-                    """, unsafe_allow_html=True)
-                    
-                    # 生成中英文報告內容
-                    chinese_content = app.generate_chinese_report_content(symbol, data)
-                    english_content = app.generate_english_report_content(symbol, data)
-                    
-                    # 中文標籤頁
-                    with tab_chinese:
-                        cleaned_chinese = app._clean_markdown_content(chinese_content)
-                        st.markdown(f'<div class="report-content">{cleaned_chinese}</div>', unsafe_allow_html=True)
-                    
-                    # 英文標籤頁
-                    with tab_english:
-                        cleaned_english = app._clean_markdown_content(english_content)
-                        st.markdown(f'<div class="report-content">{cleaned_english}</div>', unsafe_allow_html=True)
-                    
-                    # 下載按鈕
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        if md_file_path.exists():
-                            with open(md_file_path, 'r', encoding='utf-8') as f:
-                                md_data = f.read()
-                            st.download_button(
-                                label="📝 下載 Markdown",
-                                data=md_data,
-                                file_name=f"{symbol}_report_{app.today_str}.md",
-                                mime="text/markdown"
-                            )
-                    
-                    with col2:
-                        # 中文PDF下載
-                        chinese_pdf_path = data_path / f"{symbol}_report_chinese_{app.today_str}.pdf"
-                        if chinese_pdf_path.exists():
-                            with open(chinese_pdf_path, 'rb') as f:
-                                pdf_data = f.read()
-                            st.download_button(
-                                label="📄 下載中文PDF",
-                                data=pdf_data,
-                                file_name=f"{symbol}_report_chinese_{app.today_str}.pdf",
-                                mime="application/pdf"
-                            )
-                    
-                    with col3:
-                        # 英文PDF下載
-                        english_pdf_path = data_path / f"{symbol}_report_english_{app.today_str}.pdf"
-                        if english_pdf_path.exists():
-                            with open(english_pdf_path, 'rb') as f:
-                                pdf_data = f.read()
-                            st.download_button(
-                                label="📄 下載英文PDF",
-                                data=pdf_data,
-                                file_name=f"{symbol}_report_english_{app.today_str}.pdf",
-                                mime="application/pdf"
-                            )
-                    
-                    with col4:
-                        if md_file_path.exists():
-                            if st.button(f"🔄 重新生成PDF", key=f"regenerate_pdf_{symbol}"):
-                                with st.spinner("正在重新生成中英文PDF..."):
-                                    # 刪除舊的PDF文件
-                                    chinese_pdf_path = data_path / f"{symbol}_report_chinese_{app.today_str}.pdf"
-                                    english_pdf_path = data_path / f"{symbol}_report_english_{app.today_str}.pdf"
-                                    
-                                    if chinese_pdf_path.exists():
-                                        chinese_pdf_path.unlink()
-                                    if english_pdf_path.exists():
-                                        english_pdf_path.unlink()
-                                    
-                                    # 重新生成中英文PDF（使用HTML轉換）
-                                    chinese_pdf = app.generate_chinese_pdf_report_html(symbol, data)
-                                    english_pdf = app.generate_english_pdf_report_html(symbol, data)
-                                    
-                                    if chinese_pdf and english_pdf:
-                                        st.success("✅ 中英文PDF重新生成成功!")
-                                        st.rerun()
-                                    elif chinese_pdf:
-                                        st.warning("⚠️ 僅中文PDF重新生成成功")
-                                        st.rerun()
-                                    elif english_pdf:
-                                        st.warning("⚠️ 僅英文PDF重新生成成功")
-                                        st.rerun()
-                                    else:
-                                        st.error("❌ PDF重新生成失敗，請檢查依賴")
-                    
-                    # Instagram 貼文功能
-                    st.markdown("---")
-                    st.markdown("### 📱 Instagram 投資貼文")
-                    
-                    # 檢查是否已有 IG 貼文
-                    ig_post_data = app.load_ig_post(symbol)
-                    
-                    if ig_post_data.get("exists"):
-                        st.success("✅ 發現現有 Instagram 貼文")
-                        
-                        # 顯示貼文內容
-                        ig_tab1, ig_tab2 = st.tabs(["📱 Instagram 貼文", "🏷️ Hashtags"])
-                        
-                        with ig_tab1:
-                            st.text_area(
-                                "Instagram 貼文內容",
-                                value=ig_post_data["formatted_post"],
-                                height=400,
-                                disabled=True
-                            )
-                        
-                        with ig_tab2:
-                            st.text_area(
-                                "Hashtags",
-                                value=ig_post_data["hashtags"],
-                                height=100,
-                                disabled=True
-                            )
-                        
-                        # IG 貼文操作按鈕
-                        ig_col1, ig_col2, ig_col3 = st.columns(3)
-                        
-                        with ig_col1:
-                            # 下載 IG 貼文
-                            if st.download_button(
-                                label="📱 下載 IG 貼文",
-                                data=ig_post_data["formatted_post"] + "\n\n" + ig_post_data["hashtags"],
-                                file_name=f"{symbol}_ig_post_{app.today_str}.txt",
-                                mime="text/plain"
-                            ):
-                                st.success("✅ IG 貼文下載完成!")
-                        
-                        with ig_col2:
-                            # 重新生成 IG 貼文
-                            if st.button(f"🔄 重新生成 IG 貼文", key=f"regenerate_ig_{symbol}"):
-                                with st.spinner("正在重新生成 Instagram 貼文..."):
-                                    try:
-                                        ig_result = app.generate_ig_post(symbol, data)
-                                        
-                                        if ig_result["success"]:
-                                            # 保存新的 IG 貼文
-                                            filename = app.save_ig_post(symbol, ig_result)
-                                            st.success("✅ Instagram 貼文重新生成完成!")
-                                            st.rerun()
-                                        else:
-                                            st.error(f"❌ 生成失敗: {ig_result.get('error', '未知錯誤')}")
-                                    except Exception as e:
-                                        st.error(f"❌ 重新生成過程出錯: {str(e)}")
-                        
-                        with ig_col3:
-                            # 查看原始 JSON
-                            if st.button("🔍 查看原始數據", key=f"view_ig_json_{symbol}"):
-                                if ig_post_data.get("raw_json"):
-                                    st.json(ig_post_data["raw_json"])
-                                else:
-                                    st.warning("⚠️ 無原始 JSON 數據")
-                    
-                    else:
-                        # 自動生成 IG 貼文（當報告存在時）
-                        if md_file_path.exists():
-                            st.info("📱 檢測到報告已生成，可以創建 Instagram 貼文")
-                            
-                            if st.button(f"🎨 生成 {symbol} Instagram 貼文", key=f"create_ig_{symbol}"):
-                                with st.spinner("正在生成 Instagram 貼文..."):
-                                    try:
-                                        ig_result = app.generate_ig_post(symbol, data)
-                                        
-                                        if ig_result["success"]:
-                                            # 保存 IG 貼文
-                                            filename = app.save_ig_post(symbol, ig_result)
-                                            st.success("✅ Instagram 貼文生成完成!")
-                                            st.rerun()
-                                        else:
-                                            st.error(f"❌ 生成失敗: {ig_result.get('error', '未知錯誤')}")
-                                    except Exception as e:
-                                        st.error(f"❌ 生成過程出錯: {str(e)}")
-                        else:
-                            st.warning("⚠️ 請先生成股票分析報告，然後才能創建 Instagram 貼文")
+                render_symbol(app, symbol, statuses[symbol], expanded=(i==0))
         
         else:
             st.error("❌ 未識別到有效的股票代碼")
+
+
+VIEW_REPORTS = "📝 報告生成"
+VIEW_DASHBOARD = "📅 每日總覽"
+
+
+@st.cache_data(show_spinner=False)
+def _load_summary_cached(base_data_dir: str, date_str: str, mtime_ns: int) -> dict:
+    """讀取摘要索引（索引文件修改時間不變時直接返回緩存結果）"""
+    return load_summary(Path(base_data_dir), date_str)
+
+
+def _summary_mtime(file_manager: FileManager, date_str: str) -> int:
+    try:
+        return summary_path(file_manager.base_data_dir, date_str).stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _open_symbol(symbol: str):
+    """從每日總覽跳轉到該股票的報告頁（按鈕回調，在頁面重新運行前執行）"""
+    st.session_state["symbols_input"] = symbol
+    st.session_state["view_mode"] = VIEW_REPORTS
+
+
+def _format_time(timestamp: str) -> str:
+    """ISO時間只顯示時分秒"""
+    return timestamp[11:19] if timestamp else "-"
+
+
+def render_dashboard(app: StockAnalysisApp):
+    """
+    每日總覽頁：列出某一天所有股票的處理狀態和分析結論
+    
+    只讀取當天的摘要索引（_summary.json），不打開任何股票的數據文件
+    """
+    st.markdown(f"### 📅 每日總覽 - {app.today_str}")
+    
+    date_str = app.today_str
+    summary = _load_summary_cached(str(app.file_manager.base_data_dir), date_str,
+                                   _summary_mtime(app.file_manager, date_str))
+    entries = summary["symbols"]
+    
+    if st.button("🔄 從現有文件重建索引", key="rebuild_summary",
+                 help="掃描當天所有股票目錄重新生成摘要索引（用於索引建立之前的舊數據）"):
+        with st.spinner("正在重建摘要索引..."):
+            rebuild_summary(app.file_manager.base_data_dir, date_str)
+        st.rerun()
+    
+    if not entries:
+        st.info(f"ℹ️ {date_str} 沒有摘要索引，可以點擊上方按鈕從現有文件重建")
+        return
+    
+    rows = []
+    for symbol in sorted(entries):
+        entry = entries[symbol]
+        stages = entry.get("stages", {})
+        data_done = sum(1 for dt in REQUIRED_DATA_TYPES if dt in stages)
+        rows.append({
+            "股票": symbol,
+            "公司": entry.get("company") or "-",
+            "數據": f"{data_done}/{len(REQUIRED_DATA_TYPES)}",
+            "報告": "✅" if "report" in stages else "❌",
+            "中文PDF": "✅" if "pdf_chinese" in stages else "❌",
+            "英文PDF": "✅" if "pdf_english" in stages else "❌",
+            "IG貼文": "✅" if "ig_post" in stages else "❌",
+            "評級": entry.get("rating") or "-",
+            "投資傾向": entry.get("bias") or "-",
+            "風險等級": entry.get("risk_level") or "-",
+            "分析時間": _format_time(stages.get("analysis")),
+            "報告時間": _format_time(stages.get("report")),
+            "最後更新": _format_time(entry.get("updated_at"))
+        })
+    df = pd.DataFrame(rows)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("📈 股票數", len(rows))
+    with col2:
+        st.metric("📝 已生成報告", int((df["報告"] == "✅").sum()))
+    with col3:
+        st.metric("📄 PDF齊全", int(((df["中文PDF"] == "✅") & (df["英文PDF"] == "✅")).sum()))
+    with col4:
+        st.metric("📱 IG貼文", int((df["IG貼文"] == "✅").sum()))
+    
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    
+    # 跳轉到單個股票的報告頁（同一日期）
+    col_symbol, col_open = st.columns([3, 1])
+    with col_symbol:
+        selected = st.selectbox("📈 查看股票報告", sorted(entries), key="dashboard_symbol")
+    with col_open:
+        st.button("➡️ 打開報告", key="dashboard_open", on_click=_open_symbol, args=(selected,))
+
+
+def render_date_picker(app: StockAnalysisApp):
+    """側邊欄日期選擇器：選項來自FileManager的日期索引，今日總是可選"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    dates = sorted(set(app.file_manager.list_available_dates()) | {today, app.today_str}, reverse=True)
+    st.session_state.setdefault("view_date", app.today_str)
+    st.sidebar.selectbox(
+        "📅 報告日期",
+        dates,
+        key="view_date",
+        help="選擇歷史日期查看當天的報告（只有今日可以下載新數據）"
+    )
+
+
+def main():
+    st.set_page_config(
+        page_title="股票分析報告生成器",
+        page_icon="📊",
+        layout="wide"
+    )
+    
+    # 查看日期（側邊欄的日期選擇器在本次運行前已寫入session_state）
+    app = StockAnalysisApp(st.session_state.get("view_date"))
+    
+    st.title("📊 股票分析報告生成器")
+    st.markdown("輸入股票代碼，生成中英文分析報告")
+    
+    # 側邊欄
+    st.sidebar.header("⚙️ 設定")
+    view_mode = st.sidebar.radio("📂 頁面", [VIEW_REPORTS, VIEW_DASHBOARD], key="view_mode")
+    render_date_picker(app)
+    
+    if view_mode == VIEW_DASHBOARD:
+        render_dashboard(app)
+    else:
+        render_report_view(app)
+    
+    # 後台任務
+    with st.sidebar:
+        render_job_sidebar()
     
     # 使用說明
     with st.sidebar:
@@ -8,15 +8,15 @@
 
 import os
 import time
-import json
 import logging
 import schedule
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 import traceback
 from pathlib import Path
-from typing import List, Dict, Set
+from typing import Callable, List, Dict, Set, Optional
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import signal
 import sys
 
@@ -26,6 +26,12 @@ from process_stock import process_single_stock
 from ig_post import IgPostCreator
 from file_manager import FileManager
 from report_generator import ReportGenerator
+from report_templates import ReportRenderContext
+from ig_post_store import save_ig_post, ig_post_exists
+from get_news import AsyncNewsClient
+from pdf_renderer import get_render_pool
+from data_retention import run_retention
+from config import NEWS_BULK_MODE, IG_POST_MAX_WORKERS, RETENTION_ENABLED, RETENTION_RUN_AT
 
 class AutoWorker:
     """
@@ -48,6 +54,9 @@ class AutoWorker:
         self.ig_creator = IgPostCreator()
         self.file_manager = FileManager()
         self.report_generator = ReportGenerator()
+        self.news_client = AsyncNewsClient()
+        # IG POST生成線程池（與報告PDF渲染並行）
+        self.ig_executor = ThreadPoolExecutor(max_workers=IG_POST_MAX_WORKERS, thread_name_prefix="ig_post")
         
         # 運行狀態控制
         self.is_running = False
@@ -164,7 +173,7 @@ class AutoWorker:
             md_file_path = data_path / f"{symbol}_report_{today_str}.md"
             chinese_pdf_path = data_path / f"{symbol}_report_chinese_{today_str}.pdf"
             english_pdf_path = data_path / f"{symbol}_report_english_{today_str}.pdf"
-            ig_file_path = data_path / f"{symbol}_ig_post_{today_str}.txt"
+            ig_post_saved = ig_post_exists(self.file_manager, symbol, today_str)
             
             # 檢查是否需要處理
             needs_processing = False
@@ -180,7 +189,7 @@ class AutoWorker:
                     self.logger.debug(f"📝 {symbol}: 缺少報告文件（MD: {md_file_path.exists()}, CN PDF: {chinese_pdf_path.exists()}, EN PDF: {english_pdf_path.exists()}）")
                 
                 # 另外檢查IG POST
-                if not ig_file_path.exists():
+                if not ig_post_saved:
                     needs_processing = True
                     self.logger.debug(f"📱 {symbol}: 缺少IG POST文件")
             
@@ -195,7 +204,7 @@ class AutoWorker:
                     missing_files.append("中文PDF")
                 if not english_pdf_path.exists():
                     missing_files.append("英文PDF")
-                if not ig_file_path.exists():
+                if not ig_post_saved:
                     missing_files.append("IG POST")
                 
                 if missing_files and not self.force_regenerate:
@@ -213,6 +222,44 @@ class AutoWorker:
         
         return symbols_to_process
     
+    def prefetch_news(self, symbols: List[str]) -> int:
+        """
+        並發預取多個symbols的新聞並保存，後續 process_single_stock 會直接使用已保存的新聞
+        
+        Args:
+            symbols: 股票代碼列表
+            
+        Returns:
+            int: 成功保存的新聞數量
+        """
+        today_str = datetime.now().strftime('%Y-%m-%d')
+        missing = [s for s in symbols if not self.file_manager.file_exists(s, "news", today_str)]
+        if not missing:
+            return 0
+        
+        self.logger.info(f"📰 並發預取 {len(missing)} 個symbols的新聞...")
+        saved = 0
+        try:
+            if NEWS_BULK_MODE:
+                results = self.news_client.get_news_bulk(missing)
+            else:
+                results = self.news_client.get_news_many(missing)
+        except Exception as e:
+            self.logger.warning(f"⚠️ 新聞預取失敗，將逐個獲取: {e}")
+            return 0
+        
+        for symbol, news in results.items():
+            # 失敗的留給 process_single_stock 重試
+            if "error" in news:
+                self.logger.warning(f"⚠️ {symbol} 新聞預取失敗: {news['error']}")
+                continue
+            if self.file_manager.validate_data(news, "news"):
+                self.file_manager.save_data(symbol, "news", news, today_str)
+                saved += 1
+        
+        self.logger.info(f"✅ 新聞預取完成: {saved}/{len(missing)}")
+        return saved
+    
     def process_symbol_auto(self, symbol: str) -> Dict:
         """
         自動處理單個symbol（生成報告和IG POST）
@@ -223,95 +270,161 @@ class AutoWorker:
         Returns:
             Dict: 處理結果
         """
-        result = {
-            "symbol": symbol,
-            "success": False,
-            "report_generated": False,
-            "ig_post_generated": False,
-            "errors": []
-        }
+        return self.process_symbols_auto([symbol])[symbol]
+    
+    def process_symbols_auto(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        自動處理多個symbol：逐個處理股票數據，再一次性批量生成報告（PDF批量渲染），
+        IG POST在每個報告的Markdown保存後即開始生成，與PDF渲染並行
         
-        try:
-            self.logger.info(f"🔄 開始自動處理 {symbol}...")
-            
-            # 1. 首先處理股票數據（生成所有必要的數據文件）
-            stock_result = process_single_stock(symbol, force_refresh=False)
-            
-            if not stock_result.get("success", False):
-                result["errors"].extend(stock_result.get("errors", []))
-                self.logger.error(f"❌ {symbol} 股票數據處理失敗")
-                return result
-            
-            self.logger.info(f"✅ {symbol} 股票數據處理成功")
-            
-            # 2. 檢查是否需要生成報告
-            today_str = datetime.now().strftime('%Y-%m-%d')
-            data_path = Path(self.file_manager._get_data_path(symbol, today_str))
-            md_file_path = data_path / f"{symbol}_report_{today_str}.md"
+        Args:
+            symbols: 股票代碼列表
             
-            # 如果報告文件不存在，生成報告
-            if not md_file_path.exists():
-                self.logger.info(f"📝 開始生成 {symbol} 報告...")
-                report_result = self.generate_report(symbol)
+        Returns:
+            Dict: symbol -> 處理結果
+        """
+        results = {
+            symbol: {
+                "symbol": symbol,
+                "success": False,
+                "report_generated": False,
+                "ig_post_generated": False,
+                "errors": []
+            }
+            for symbol in symbols
+        }
+        today_str = datetime.now().strftime('%Y-%m-%d')
+        
+        # 1. 首先處理股票數據（生成所有必要的數據文件）
+        ready = []
+        for symbol in symbols:
+            try:
+                self.logger.info(f"🔄 開始自動處理 {symbol}...")
+                stock_result = process_single_stock(symbol, force_refresh=False)
+                
+                if not stock_result.get("success", False):
+                    results[symbol]["errors"].extend(stock_result.get("errors", []))
+                    self.logger.error(f"❌ {symbol} 股票數據處理失敗")
+                    continue
                 
+                self.logger.info(f"✅ {symbol} 股票數據處理成功")
+                ready.append(symbol)
+            except Exception as e:
+                error_msg = f"處理 {symbol} 時發生異常: {str(e)}"
+                results[symbol]["errors"].append(error_msg)
+                self.logger.error(f"❌ {error_msg}")
+                self.logger.debug(traceback.format_exc())
+        
+        # 2. 檢查哪些symbol需要生成報告和IG POST
+        need_report = []
+        need_ig_post = set()
+        for symbol in ready:
+            data_path = Path(self.file_manager._get_data_path(symbol, today_str))
+            if not (data_path / f"{symbol}_report_{today_str}.md").exists():
+                need_report.append(symbol)
+            else:
+                results[symbol]["report_generated"] = True
+                self.logger.info(f"✅ {symbol} 報告已存在，跳過生成")
+            if not ig_post_exists(self.file_manager, symbol, today_str):
+                need_ig_post.add(symbol)
+            else:
+                results[symbol]["ig_post_generated"] = True
+                self.logger.info(f"✅ {symbol} IG POST已存在，跳過生成")
+        
+        # IG POST只依賴報告內容：Markdown報告一保存就開始生成，與PDF渲染並行
+        ig_futures = {}
+        
+        def start_ig_post(ready_symbol: str, render_context: ReportRenderContext):
+            if ready_symbol in need_ig_post:
+                self.logger.info(f"📱 開始生成 {ready_symbol} IG POST（與PDF渲染並行）...")
+                ig_futures[ready_symbol] = self.ig_executor.submit(self.generate_ig_post, ready_symbol, render_context)
+        
+        # 報告已存在的symbol不需要等待報告生成，一起批量生成IG POST
+        existing_reports = [symbol for symbol in ready if symbol in need_ig_post and symbol not in need_report]
+        ig_batch_future = self.ig_executor.submit(self.generate_ig_posts, existing_reports) if existing_reports else None
+        
+        # 3. 所有需要報告的symbol一起生成，PDF一次性提交到渲染池
+        if need_report:
+            self.logger.info(f"📝 開始批量生成 {len(need_report)} 個報告...")
+            for symbol, report_result in self.generate_reports(need_report, on_content_ready=start_ig_post).items():
                 if report_result["success"]:
-                    result["report_generated"] = True
+                    results[symbol]["report_generated"] = True
                     self.logger.info(f"✅ {symbol} 報告生成成功")
                 else:
-                    result["errors"].extend(report_result.get("errors", []))
+                    results[symbol]["errors"].extend(report_result.get("errors", []))
                     self.logger.error(f"❌ {symbol} 報告生成失敗")
-                    return result
-            else:
-                result["report_generated"] = True
-                self.logger.info(f"✅ {symbol} 報告已存在，跳過生成")
-            
-            # 3. 檢查是否需要生成IG POST
-            ig_file_path = data_path / f"{symbol}_ig_post_{today_str}.txt"
-            
-            if not ig_file_path.exists():
-                self.logger.info(f"📱 開始生成 {symbol} IG POST...")
-                ig_result = self.generate_ig_post(symbol)
-                
-                if ig_result["success"]:
-                    result["ig_post_generated"] = True
-                    self.logger.info(f"✅ {symbol} IG POST生成成功")
-                else:
-                    result["errors"].extend(ig_result.get("errors", []))
-                    self.logger.error(f"❌ {symbol} IG POST生成失敗")
+        
+        # 4. 等待IG POST
+        ig_results = {}
+        if ig_batch_future is not None:
+            try:
+                ig_results.update(ig_batch_future.result())
+            except Exception as e:
+                for symbol in existing_reports:
+                    ig_results[symbol] = {"success": False, "symbol": symbol, "errors": [f"IG POST生成失敗: {str(e)}"]}
+        for symbol, ig_future in ig_futures.items():
+            try:
+                ig_results[symbol] = ig_future.result()
+            except Exception as e:
+                ig_results[symbol] = {"success": False, "symbol": symbol, "errors": [f"IG POST生成失敗: {str(e)}"]}
+        
+        for symbol, ig_result in ig_results.items():
+            if ig_result["success"]:
+                results[symbol]["ig_post_generated"] = True
+                self.logger.info(f"✅ {symbol} IG POST生成成功")
             else:
-                result["ig_post_generated"] = True
-                self.logger.info(f"✅ {symbol} IG POST已存在，跳過生成")
-            
-            result["success"] = True
-            self.logger.info(f"🎉 {symbol} 自動處理完成!")
-            
-        except Exception as e:
-            error_msg = f"處理 {symbol} 時發生異常: {str(e)}"
-            result["errors"].append(error_msg)
-            self.logger.error(f"❌ {error_msg}")
-            self.logger.debug(traceback.format_exc())
+                results[symbol]["errors"].extend(ig_result.get("errors", []))
+                self.logger.error(f"❌ {symbol} IG POST生成失敗")
         
-        return result
+        # 報告生成失敗的symbol算作處理失敗（IG POST失敗只記錄錯誤，與之前一致）
+        for symbol in ready:
+            if results[symbol]["report_generated"]:
+                results[symbol]["success"] = True
+                self.logger.info(f"🎉 {symbol} 自動處理完成!")
+        
+        return results
     
-    def generate_report(self, symbol: str) -> Dict:
+    def generate_report(self, symbol: str,
+                        on_content_ready: Optional[Callable[[str, ReportRenderContext], None]] = None) -> Dict:
         """
         生成股票報告（調用報告生成器）
         
         Args:
             symbol: 股票代碼
+            on_content_ready: Markdown報告保存後、PDF渲染前的回調
             
         Returns:
             Dict: 生成結果
         """
+        return self.generate_reports([symbol], on_content_ready)[symbol]
+    
+    def generate_reports(self, symbols: List[str],
+                         on_content_ready: Optional[Callable[[str, ReportRenderContext], None]] = None) -> Dict[str, Dict]:
+        """
+        批量生成股票報告（所有symbol的PDF一起批量渲染）
+        
+        Args:
+            symbols: 股票代碼列表
+            on_content_ready: 每個symbol的Markdown報告保存後、PDF渲染前的回調
+            
+        Returns:
+            Dict: symbol -> 生成結果
+        """
         try:
-            self.logger.info(f"📝 正在生成 {symbol} 報告...")
+            self.logger.info(f"📝 正在生成 {', '.join(symbols)} 的報告...")
             
             # 調用報告生成器
-            result = self.report_generator.generate_complete_report(symbol)
-            
+            batch_results = self.report_generator.generate_complete_reports(symbols, on_content_ready)
+        except Exception as e:
+            error_msg = f"報告生成失敗: {str(e)}"
+            self.logger.error(f"❌ {error_msg}")
+            return {symbol: {"success": False, "symbol": symbol, "errors": [error_msg]} for symbol in symbols}
+        
+        results = {}
+        for symbol, result in batch_results.items():
             if result["success"]:
                 self.logger.info(f"✅ {symbol} 報告生成成功，生成了 {len(result['generated_files'])} 個文件")
-                return {
+                results[symbol] = {
                     "success": True,
                     "symbol": symbol,
                     "generated_files": result["generated_files"],
@@ -319,27 +432,20 @@ class AutoWorker:
                 }
             else:
                 self.logger.error(f"❌ {symbol} 報告生成失敗: {result['errors']}")
-                return {
+                results[symbol] = {
                     "success": False,
                     "symbol": symbol,
                     "errors": result["errors"]
                 }
-            
-        except Exception as e:
-            error_msg = f"報告生成失敗: {str(e)}"
-            self.logger.error(f"❌ {error_msg}")
-            return {
-                "success": False,
-                "symbol": symbol,
-                "errors": [error_msg]
-            }
+        return results
     
-    def generate_ig_post(self, symbol: str) -> Dict:
+    def generate_ig_post(self, symbol: str, render_context: Optional[ReportRenderContext] = None) -> Dict:
         """
         生成IG POST（與Streamlit應用完全一致）
         
         Args:
             symbol: 股票代碼
+            render_context: 報告的渲染上下文，為空時重新載入數據並創建
             
         Returns:
             Dict: 生成結果
@@ -347,45 +453,86 @@ class AutoWorker:
         try:
             self.logger.info(f"📱 開始生成 {symbol} IG POST...")
             
-            # 載入股票數據（與Streamlit一致）
-            data = self.report_generator.load_stock_data(symbol)
-            
-            if not data:
-                return {
-                    "success": False,
-                    "symbol": symbol,
-                    "errors": [f"無法載入 {symbol} 的股票數據"]
-                }
+            if render_context is None:
+                # 載入股票數據（與Streamlit一致）
+                data = self.report_generator.load_stock_data(symbol)
+                
+                if not data:
+                    return {
+                        "success": False,
+                        "symbol": symbol,
+                        "errors": [f"無法載入 {symbol} 的股票數據"]
+                    }
+                render_context = self.report_generator.create_render_context(symbol, data)
             
-            # 生成中文報告內容作為基礎（與Streamlit完全一致）
-            report_content = self.report_generator.generate_chinese_report_content(symbol, data)
+            # 中文報告作為基礎（與報告文件同一次渲染）
+            report_content = render_context.plain_text("chinese")
             
             # 使用IgPostCreator生成Instagram貼文（與Streamlit一致）
             ig_result = self.ig_creator.create_ig_post(symbol, report_content)
-            
-            if ig_result["success"]:
-                # 保存IG POST到文件（與Streamlit一致的方式）
-                filename = self.save_ig_post_streamlit_style(symbol, ig_result)
+            return self._finish_ig_post(symbol, ig_result)
                 
-                return {
-                    "success": True,
+        except Exception as e:
+            return {
+                "success": False,
+                "symbol": symbol,
+                "errors": [f"IG POST生成失敗: {str(e)}"]
+            }
+    
+    def generate_ig_posts(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        批量並行生成多個symbol的IG POST
+        
+        Args:
+            symbols: 股票代碼列表
+            
+        Returns:
+            Dict: symbol -> 生成結果
+        """
+        results = {}
+        reports = {}
+        
+        for symbol in symbols:
+            data = self.report_generator.load_stock_data(symbol)
+            if not data:
+                results[symbol] = {
+                    "success": False,
                     "symbol": symbol,
-                    "filename": filename,
-                    "message": f"{symbol} IG POST生成成功"
+                    "errors": [f"無法載入 {symbol} 的股票數據"]
                 }
-            else:
-                return {
+                continue
+            reports[symbol] = self.report_generator.create_render_context(symbol, data).plain_text("chinese")
+        
+        self.logger.info(f"📱 批量生成 {len(reports)} 個IG POST...")
+        for symbol, ig_result in self.ig_creator.create_ig_posts(reports).items():
+            try:
+                results[symbol] = self._finish_ig_post(symbol, ig_result)
+            except Exception as e:
+                results[symbol] = {
                     "success": False,
                     "symbol": symbol,
-                    "errors": [ig_result.get("error", "IG POST生成失敗")]
+                    "errors": [f"IG POST生成失敗: {str(e)}"]
                 }
-                
-        except Exception as e:
+        
+        return results
+    
+    def _finish_ig_post(self, symbol: str, ig_result: Dict) -> Dict:
+        """保存成功的IG POST並轉換為Worker的結果格式"""
+        if ig_result["success"]:
+            # 保存IG POST到文件（與Streamlit一致的方式）
+            filename = self.save_ig_post_streamlit_style(symbol, ig_result)
+            
             return {
-                "success": False,
+                "success": True,
                 "symbol": symbol,
-                "errors": [f"IG POST生成失敗: {str(e)}"]
+                "filename": filename,
+                "message": f"{symbol} IG POST生成成功"
             }
+        return {
+            "success": False,
+            "symbol": symbol,
+            "errors": [ig_result.get("error", "IG POST生成失敗")]
+        }
     
     def save_ig_post_streamlit_style(self, symbol: str, ig_result: dict) -> str:
         """
@@ -399,22 +546,8 @@ class AutoWorker:
             str: 保存的文件路徑
         """
         try:
-            # 使用與Streamlit完全相同的路徑和格式
-            today_str = datetime.now().strftime('%Y-%m-%d')
-            data_path = Path(self.file_manager._get_data_path(symbol, today_str))
-            data_path.mkdir(parents=True, exist_ok=True)
-            
-            # 生成文件名（與Streamlit一致）
-            filename = data_path / f"{symbol}_ig_post_{today_str}.txt"
-            
-            # 保存內容（與Streamlit完全一致的格式）
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write("=== INSTAGRAM POST ===\n\n")
-                f.write(ig_result['formatted_post'])
-                f.write(f"\n\n=== HASHTAGS ===\n\n")
-                f.write(ig_result['hashtags'])
-                f.write(f"\n\n=== RAW JSON ===\n\n")
-                f.write(json.dumps(ig_result['raw_json'], ensure_ascii=False, indent=2))
+            # JSON存儲，並導出與Streamlit一致的文本文件
+            filename = save_ig_post(self.file_manager, symbol, ig_result)
             
             self.logger.info(f"✅ IG POST已保存: {filename}")
             return str(filename)
@@ -444,48 +577,38 @@ class AutoWorker:
                 self.logger.info("✅ 沒有新的symbols需要處理")
                 return
             
-            # 處理每個新symbol
+            # 並發預取新聞，避免逐個symbol串行等待新聞API
+            self.prefetch_news(new_symbols)
+            
+            # 所有新symbol一起處理，報告PDF批量渲染
             successful_count = 0
             failed_count = 0
             
-            for symbol in new_symbols:
-                try:
-                    result = self.process_symbol_auto(symbol)
+            for symbol, result in self.process_symbols_auto(new_symbols).items():
+                if result["success"]:
+                    successful_count += 1
+                    self.processed_symbols.add(symbol)
                     
-                    if result["success"]:
-                        successful_count += 1
-                        self.processed_symbols.add(symbol)
-                        
-                        if result["report_generated"]:
-                            self.stats["successful_reports"] += 1
-                        
-                        if result["ig_post_generated"]:
-                            self.stats["ig_posts_created"] += 1
-                            
-                        self.logger.info(f"✅ {symbol} 處理成功")
-                    else:
-                        failed_count += 1
-                        self.stats["failed_reports"] += 1
-                        
-                        # 記錄錯誤
-                        for error in result.get("errors", []):
-                            self.stats["errors"].append({
-                                "timestamp": datetime.now().isoformat(),
-                                "symbol": symbol,
-                                "error": error
-                            })
+                    if result["report_generated"]:
+                        self.stats["successful_reports"] += 1
+                    
+                    if result["ig_post_generated"]:
+                        self.stats["ig_posts_created"] += 1
                         
-                        self.logger.error(f"❌ {symbol} 處理失敗: {result.get('errors', [])}")
-                
-                except Exception as e:
+                    self.logger.info(f"✅ {symbol} 處理成功")
+                else:
                     failed_count += 1
-                    error_msg = f"處理 {symbol} 時發生異常: {str(e)}"
-                    self.logger.error(error_msg)
-                    self.stats["errors"].append({
-                        "timestamp": datetime.now().isoformat(),
-                        "symbol": symbol,
-                        "error": error_msg
-                    })
+                    self.stats["failed_reports"] += 1
+                    
+                    # 記錄錯誤
+                    for error in result.get("errors", []):
+                        self.stats["errors"].append({
+                            "timestamp": datetime.now().isoformat(),
+                            "symbol": symbol,
+                            "error": error
+                        })
+                    
+                    self.logger.error(f"❌ {symbol} 處理失敗: {result.get('errors', [])}")
             
             # 更新統計
             if successful_count > 0:
@@ -515,6 +638,18 @@ class AutoWorker:
             for error in recent_errors:
                 self.logger.info(f"  - {error['timestamp']}: {error['symbol']} - {error['error']}")
     
+    def run_retention(self):
+        """執行數據保留策略（刪除過期PDF、歸檔舊日期目錄）"""
+        try:
+            result = run_retention(self.file_manager.base_data_dir)
+            self.file_manager.refresh_date_index()
+            self.logger.info(f"🗄️ 數據保留: 刪除 {result['pdfs']['files']} 個PDF，歸檔 {len(result['archived'])} 天")
+            for error in result["errors"]:
+                self.logger.error(f"❌ 歸檔失敗: {error}")
+        except Exception as e:
+            self.logger.error(f"❌ 數據保留策略執行失敗: {e}")
+            self.logger.debug(traceback.format_exc())
+    
     def setup_schedule(self):
         """設置排程任務"""
         # 每30分鐘執行一次
@@ -523,6 +658,11 @@ class AutoWorker:
         # 每小時打印統計（可選）
         schedule.every().hour.do(self.print_stats)
         
+        # 每天刪除過期PDF並歸檔舊日期目錄
+        if RETENTION_ENABLED:
+            schedule.every().day.at(RETENTION_RUN_AT).do(self.run_retention)
+            self.logger.info(f"⏰ 數據保留策略: 每天 {RETENTION_RUN_AT} 執行")
+        
         self.logger.info("⏰ 排程設置完成: 每30分鐘執行一次任務")
     
     def signal_handler(self, signum, frame):
@@ -578,6 +718,10 @@ class AutoWorker:
         self.is_running = False
         self.stop_requested = True
         
+        # 關閉PDF渲染工作進程
+        get_render_pool().shutdown(wait=False)
+        self.ig_executor.shutdown(wait=False)
+        
         # 打印最終統計
         self.print_stats()
         
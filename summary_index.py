@@ -0,0 +1,263 @@
+"""
+每日摘要索引：data/YYYY-MM-DD/_summary.json
+
+流程在保存數據、報告、PDF和IG貼文時逐步更新索引（每個symbol的各階段完成時間、投資傾向和風險等級），
+每日總覽頁只讀這一個文件，不需要打開每個symbol的JSON
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from json_codec import DATE_DIR_PATTERN, strip_data_suffix, data_file_variants, read_json_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SUMMARY_FILENAME = "_summary.json"
+# 跨進程互斥用的鎖文件（與索引在同一目錄）
+SUMMARY_LOCK_FILENAME = ".summary.lock"
+
+# 報告文件對應的階段名（數據文件的階段名就是數據類型）
+REPORT_STAGES = {
+    "report": "{symbol}_report_{date_str}.md",
+    "pdf_chinese": "{symbol}_report_chinese_{date_str}.pdf",
+    "pdf_english": "{symbol}_report_english_{date_str}.pdf",
+    "ig_post": "{symbol}_ig_post_{date_str}.txt"
+}
+
+# 同一進程內的讀-改-寫需要串行（Worker的多個線程會同時更新）
+_summary_lock = threading.Lock()
+
+
+@contextmanager
+def _locked_summary(base_data_dir: Path, date_str: str):
+    """
+    索引讀-改-寫的互斥鎖：線程鎖 + 鎖文件上的 flock
+
+    Worker、Streamlit後台任務和保留任務是不同的進程，只有線程鎖時會互相覆蓋對方的更新。
+    沒有fcntl的平台（Windows）只有進程內互斥
+    """
+    with _summary_lock:
+        if fcntl is None:
+            yield
+            return
+        lock_path = Path(base_data_dir) / date_str / SUMMARY_LOCK_FILENAME
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def summary_path(base_data_dir: Path, date_str: str) -> Path:
+    """某一天的摘要索引文件路徑"""
+    return Path(base_data_dir) / date_str / SUMMARY_FILENAME
+
+
+def _empty_summary(date_str: str) -> Dict[str, Any]:
+    return {"date": date_str, "updated_at": None, "symbols": {}}
+
+
+def load_summary(base_data_dir: Path, date_str: str) -> Dict[str, Any]:
+    """
+    讀取某一天的摘要索引
+
+    Args:
+        base_data_dir: 數據根目錄
+        date_str: 日期字符串
+
+    Returns:
+        Dict: {"date", "updated_at", "symbols": {symbol -> 摘要}}，索引不存在或損壞時symbols為空
+    """
+    try:
+        with open(summary_path(base_data_dir, date_str), 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+        if isinstance(summary, dict) and isinstance(summary.get("symbols"), dict):
+            return summary
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return _empty_summary(date_str)
+
+
+def _write_summary(base_data_dir: Path, date_str: str, summary: Dict[str, Any]):
+    """原子寫入：先寫臨時文件再替換，讀取方不會看到寫了一半的索引"""
+    path = summary_path(base_data_dir, date_str)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".summary_", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def analysis_highlights(analysis: Any) -> Dict[str, Optional[str]]:
+    """
+    從分析結果提取總覽需要的字段
+
+    Args:
+        analysis: analysis 數據（保存格式 {"data": {...}} 或直接是分析字典）
+
+    Returns:
+        Dict: company, rating, bias, risk_level（缺失時為None）
+    """
+    if isinstance(analysis, dict) and isinstance(analysis.get("data"), dict):
+        analysis = analysis["data"]
+    if not isinstance(analysis, dict):
+        return {"company": None, "rating": None, "bias": None, "risk_level": None}
+
+    def _get(section: str, key: str) -> Optional[str]:
+        value = analysis.get(section)
+        return value.get(key) if isinstance(value, dict) else None
+
+    return {
+        "company": analysis.get("company"),
+        "rating": _get("investment_recommendation", "rating"),
+        "bias": _get("trading_recommendation", "bias"),
+        # 沒有單獨的風險評估時使用流動性分析的ATM風險
+        "risk_level": _get("risk_assessment", "risk_level") or _get("liquidity_risk", "atm_risk")
+    }
+
+
+def record_stage(base_data_dir: Path, symbol: str, date_str: str, stage: str,
+                 fields: Optional[Dict[str, Any]] = None, timestamp: str = None):
+    """
+    記錄symbol某個階段完成
+
+    Args:
+        base_data_dir: 數據根目錄
+        symbol: 股票代碼
+        date_str: 日期字符串
+        stage: 階段名（數據類型、report、pdf_chinese、pdf_english）
+        fields: 同時更新的摘要字段（如 analysis_highlights 的結果）
+        timestamp: 完成時間，默認為現在
+    """
+    timestamp = timestamp or datetime.now().isoformat(timespec="seconds")
+    symbol = symbol.upper()
+
+    with _locked_summary(base_data_dir, date_str):
+        summary = load_summary(base_data_dir, date_str)
+        entry = summary["symbols"].setdefault(symbol, {"symbol": symbol, "stages": {}})
+        entry["stages"][stage] = timestamp
+        if fields:
+            entry.update(fields)
+        entry["updated_at"] = timestamp
+        summary["updated_at"] = timestamp
+        _write_summary(base_data_dir, date_str, summary)
+
+
+def forget_stages(base_data_dir: Path, symbol: str, date_str: str, stages: List[str]):
+    """
+    移除symbol的某些階段（如過期PDF被刪除後）
+
+    Args:
+        base_data_dir: 數據根目錄
+        symbol: 股票代碼
+        date_str: 日期字符串
+        stages: 要移除的階段名
+    """
+    symbol = symbol.upper()
+    with _locked_summary(base_data_dir, date_str):
+        summary = load_summary(base_data_dir, date_str)
+        entry = summary["symbols"].get(symbol)
+        if not entry or not any(stage in entry["stages"] for stage in stages):
+            return
+        for stage in stages:
+            entry["stages"].pop(stage, None)
+        _write_summary(base_data_dir, date_str, summary)
+
+
+def _scan_symbol(symbol_dir: Path, date_str: str) -> Dict[str, Any]:
+    """從文件（一次scandir）重建一個symbol的摘要，階段時間使用文件修改時間"""
+    symbol = symbol_dir.name
+    report_files = {
+        pattern.format(symbol=symbol, date_str=date_str): stage
+        for stage, pattern in REPORT_STAGES.items()
+    }
+    date_suffix = f"_{date_str}"
+
+    entry = {"symbol": symbol, "stages": {}}
+    with os.scandir(symbol_dir) as entries:
+        for file_entry in entries:
+            data_name = strip_data_suffix(file_entry.name)
+            if file_entry.name in report_files:
+                stage = report_files[file_entry.name]
+            elif data_name and data_name.endswith(date_suffix):
+                stage = data_name[:-len(date_suffix)]
+            else:
+                continue
+            modified = datetime.fromtimestamp(file_entry.stat().st_mtime).isoformat(timespec="seconds")
+            entry["stages"][stage] = modified
+
+    analysis_file = next((path for path in data_file_variants(symbol_dir / f"analysis{date_suffix}.json")
+                          if path.exists()), None)
+    if analysis_file is not None:
+        try:
+            entry.update(analysis_highlights(read_json_file(analysis_file, symbol_dir.parent.parent)))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 無法讀取 {analysis_file}: {e}")
+
+    entry["updated_at"] = max(entry["stages"].values(), default=None)
+    return entry
+
+
+def rebuild_summary(base_data_dir: Path, date_str: str) -> Dict[str, Any]:
+    """
+    掃描某一天的所有symbol目錄重建摘要索引（用於舊數據或索引丟失時）
+
+    Args:
+        base_data_dir: 數據根目錄
+        date_str: 日期字符串
+
+    Returns:
+        Dict: 重建後的摘要索引
+    """
+    summary = _empty_summary(date_str)
+    date_dir = Path(base_data_dir) / date_str
+    if not date_dir.is_dir():
+        return summary
+
+    symbol_dirs = [path for path in sorted(date_dir.iterdir()) if path.is_dir()]
+    if not symbol_dirs:
+        # 已歸檔的日期只剩摘要索引，不能用空目錄覆蓋
+        existing = load_summary(base_data_dir, date_str)
+        if existing["symbols"]:
+            print(f"ℹ️ {date_str} 的數據已歸檔，保留現有摘要索引")
+            return existing
+
+    for symbol_dir in symbol_dirs:
+        summary["symbols"][symbol_dir.name] = _scan_symbol(symbol_dir, date_str)
+
+    summary["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    with _locked_summary(base_data_dir, date_str):
+        _write_summary(base_data_dir, date_str, summary)
+    print(f"✅ 已重建 {date_str} 摘要索引（{len(summary['symbols'])} 個股票）")
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="重建每日摘要索引")
+    parser.add_argument("dates", nargs="*", help="日期 YYYY-MM-DD，默認為所有日期")
+    parser.add_argument("--data-dir", default="data", help="數據根目錄")
+    args = parser.parse_args()
+
+    base = Path(args.data_dir)
+    dates = args.dates
+    if not dates and base.exists():
+        dates = sorted(d.name for d in base.iterdir() if d.is_dir() and DATE_DIR_PATTERN.match(d.name))
+    for date in dates:
+        rebuild_summary(base, date)
@@ -0,0 +1,81 @@
+"""
+分析結果時間序列存儲測試（使用臨時目錄）
+運行: python -m pytest test_analysis_store.py
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from analysis_store import AnalysisStore
+
+
+def _analysis(rating: str, bias: str, target_price, risks: int = 1) -> dict:
+    return {
+        "company": "Apple Inc.",
+        "investment_recommendation": {"rating": rating, "target_price": target_price},
+        "trading_recommendation": {"bias": bias},
+        "risk_assessment": {"risk_level": "中"},
+        "positive_factors": [{"title": "iPhone"}, {"title": "服務"}],
+        "risks": [{"title": f"risk {i}"} for i in range(risks)]
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AnalysisStore(tmp_path / "analysis.db")
+
+
+def test_record_analysis_replaces_row_for_same_day(store):
+    """同一天重新運行時更新原有的行，不會追加重複記錄"""
+    store.record_analysis("aapl", "2025-08-15", {"data": _analysis("買入", "看多", 200)})
+    store.record_analysis("AAPL", "2025-08-15", {"data": _analysis("持有", "中性", "$180.50", risks=3)})
+
+    history = store.symbol_history("AAPL")
+    assert len(history) == 1
+    row = history.iloc[0]
+    assert (row["rating"], row["bias"], row["target_price"]) == ("持有", "中性", 180.5)
+    assert (row["positive_count"], row["risk_count"]) == (2, 3)
+
+
+def test_symbol_history_filters_dates_and_maps_bias(store):
+    """按日期範圍（包含兩端）查詢，投資傾向轉換為 bias_score"""
+    for date_str, bias in [("2025-08-13", "看空"), ("2025-08-14", "Neutral"),
+                           ("2025-08-15", "偏多"), ("2025-08-16", "觀望")]:
+        store.record_analysis("AAPL", date_str, _analysis("持有", bias, 190))
+    store.record_analysis("TSLA", "2025-08-14", _analysis("買入", "看多", 300))
+
+    history = store.symbol_history("aapl", start_date="2025-08-14", end_date="2025-08-16")
+    assert list(history["date"]) == list(pd.to_datetime(["2025-08-14", "2025-08-15", "2025-08-16"]))
+    assert list(history["bias_score"][:2]) == [0, 1]
+    # 未知的投資傾向沒有分數
+    assert pd.isna(history["bias_score"].iloc[2])
+    assert set(history["symbol"]) == {"AAPL"}
+
+
+def test_daily_view_and_backfill_from_saved_json(store, tmp_path):
+    """從已保存的 analysis JSON 導入，之後按日期查詢橫截面"""
+    data_dir = tmp_path / "data"
+    saved = {
+        ("2025-08-15", "AAPL"): _analysis("買入", "看多", 200),
+        ("2025-08-15", "TSLA"): _analysis("賣出", "看空", "250"),
+        ("2025-08-16", "AAPL"): _analysis("持有", "中性", 195),
+    }
+    for (date_str, symbol), analysis in saved.items():
+        symbol_dir = data_dir / date_str / symbol
+        symbol_dir.mkdir(parents=True)
+        (symbol_dir / f"analysis_{date_str}.json").write_text(
+            json.dumps({"data": analysis}, ensure_ascii=False), encoding="utf-8")
+    # 不是當天分析文件的JSON不導入
+    (data_dir / "2025-08-15" / "AAPL" / "analysis_en_2025-08-15.json").write_text("{}", encoding="utf-8")
+
+    assert store.backfill(str(data_dir)) == 3
+    # 再次導入只會更新原有的行
+    assert store.backfill(str(data_dir)) == 3
+
+    daily = store.daily_view("2025-08-15")
+    assert list(daily["symbol"]) == ["AAPL", "TSLA"]
+    assert list(daily["target_price"]) == [200.0, 250.0]
+    assert list(daily["bias_score"]) == [1, -1]
+    assert len(store.symbol_history("AAPL")) == 2
+    assert store.daily_view("2025-08-17").empty
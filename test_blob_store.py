@@ -0,0 +1,83 @@
+"""
+LLM原始輸出blob存儲測試
+運行: python -m pytest test_blob_store.py
+"""
+import shutil
+from pathlib import Path
+
+import pytest
+
+import blob_store
+from blob_store import put_text, get_text, find_blob, resolve_raw_text, migrate_raw_text, collect_garbage
+from data_retention import archive_day
+from file_manager import FileManager
+
+DATE = "2025-08-15"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    base = tmp_path / "data"
+    shutil.copytree(Path(__file__).parent / "data" / DATE, base / DATE)
+    return base
+
+
+def test_put_text_stores_each_content_once(tmp_path):
+    """相同內容返回相同引用，只保存一個文件"""
+    ref = put_text(tmp_path, "原始輸出 {\"a\": 1}")
+    assert ref.startswith(blob_store.REF_PREFIX)
+    assert put_text(tmp_path, "原始輸出 {\"a\": 1}") == ref
+    assert put_text(tmp_path, "另一段輸出") != ref
+    assert len(list((tmp_path / blob_store.RAW_BLOB_DIR).glob("*/*"))) == 2
+    assert get_text(tmp_path, ref) == "原始輸出 {\"a\": 1}"
+
+
+def test_get_text_missing_or_invalid_ref(tmp_path):
+    assert get_text(tmp_path, "sha256:" + "0" * 64) is None
+    with pytest.raises(ValueError):
+        find_blob(tmp_path, "md5:abc")
+
+
+def test_resolve_raw_text_supports_refs_and_legacy_records(tmp_path):
+    ref = put_text(tmp_path, "new format")
+    assert resolve_raw_text(tmp_path, {"data": {}, "raw_ref": ref}) == "new format"
+    assert resolve_raw_text(tmp_path, {"data": {}, "raw_text": "legacy"}) == "legacy"
+    assert resolve_raw_text(tmp_path, {"data": {}}) is None
+    assert resolve_raw_text(tmp_path, None) is None
+
+
+def test_file_manager_saves_reference(data_dir, monkeypatch):
+    """保存LLM輸出時數據文件只記錄引用，load_raw_text 按需讀取"""
+    monkeypatch.setattr("file_manager.RAW_TEXT_BLOB_STORE", True)
+    file_manager = FileManager(str(data_dir))
+    raw = '```json\n{"summary": "ok",}\n```'
+    assert file_manager.save_data("AAPL", "news_cn", raw, DATE)
+
+    record = file_manager.load_data("AAPL", "news_cn", DATE)
+    assert record["data"] == {"summary": "ok"}
+    assert "raw_text" not in record and record["raw_ref"].startswith("sha256:")
+    assert file_manager.load_raw_text("AAPL", "news_cn", DATE) == raw
+
+
+def test_migrate_and_collect_garbage(data_dir):
+    """遷移內嵌的raw_text後，清理只刪除沒有被引用的blob（包括歸檔中的引用）"""
+    file_manager = FileManager(str(data_dir))
+    symbol = sorted(path.name for path in (data_dir / DATE).iterdir() if path.is_dir())[0]
+    file_manager.save_data(symbol, "desc_cn", '{"description": "legacy"}', DATE)
+    record_path = data_dir / DATE / symbol / f"desc_cn_{DATE}.json"
+    record = blob_store.read_json_file(record_path, data_dir)
+    # 模擬blob存儲之前的舊數據：原始文本內嵌在數據文件中
+    record.pop("raw_ref")
+    record["raw_text"] = '{"description": "legacy"}'
+    blob_store.write_json_file(record_path, record, data_dir)
+    shutil.rmtree(data_dir / blob_store.RAW_BLOB_DIR)
+
+    assert migrate_raw_text(data_dir)["files"] >= 1
+    assert file_manager.load_raw_text(symbol, "desc_cn", DATE) == '{"description": "legacy"}'
+
+    orphan = put_text(data_dir, "nobody references this")
+    archive_day(data_dir, DATE)
+    result = collect_garbage(data_dir)
+    assert result["files"] == 1
+    assert find_blob(data_dir, orphan) is None
+    assert FileManager(str(data_dir)).load_raw_text(symbol, "desc_cn", DATE) == '{"description": "legacy"}'
@@ -0,0 +1,79 @@
+"""
+數據保留與歸檔測試（在數據副本上運行）
+運行: python -m pytest test_data_retention.py
+"""
+import shutil
+from pathlib import Path
+
+import pytest
+
+from data_retention import archive_day, run_retention, find_archive, read_archived_file
+from file_manager import FileManager
+from summary_index import record_stage, load_summary, rebuild_summary, SUMMARY_FILENAME
+
+DATE = "2025-08-14"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    base = tmp_path / "data"
+    shutil.copytree(Path(__file__).parent / "data" / DATE, base / DATE)
+    return base
+
+
+def test_archived_day_still_loads(data_dir):
+    """歸檔後通過FileManager透明讀取，日期索引仍列出這一天的symbol"""
+    before = FileManager(str(data_dir)).load_data("AAPL", "analysis", DATE)
+    assert before is not None
+
+    archive_day(data_dir, DATE)
+    assert find_archive(data_dir, DATE) is not None
+    assert not (data_dir / DATE / "AAPL").exists()
+
+    file_manager = FileManager(str(data_dir))
+    assert file_manager.file_exists("AAPL", "analysis", DATE)
+    assert file_manager.load_data("AAPL", "analysis", DATE) == before
+    assert file_manager.list_symbols(DATE) == ["AAPL", "XPON"]
+    assert DATE in file_manager.list_available_dates("XPON")
+
+
+def test_summary_stays_in_place(data_dir):
+    """摘要索引留在日期目錄中，不被打包，重建時不會被清空"""
+    record_stage(data_dir, "AAPL", DATE, "report")
+    pdf_path = data_dir / DATE / "AAPL" / f"AAPL_report_chinese_{DATE}.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    record_stage(data_dir, "AAPL", DATE, "pdf_chinese")
+
+    archive_day(data_dir, DATE)
+    assert (data_dir / DATE / SUMMARY_FILENAME).exists()
+    assert read_archived_file(data_dir, DATE, SUMMARY_FILENAME) is None
+    stages = load_summary(data_dir, DATE)["symbols"]["AAPL"]["stages"]
+    # PDF不歸檔，摘要中不再記錄
+    assert "report" in stages and "pdf_chinese" not in stages
+
+    rebuild_summary(data_dir, DATE)
+    assert "AAPL" in load_summary(data_dir, DATE)["symbols"]
+
+
+def test_retention_does_not_rearchive(data_dir):
+    """已歸檔且只剩摘要的日期不會在下次運行時重新打包"""
+    record_stage(data_dir, "AAPL", DATE, "report")
+    first = run_retention(data_dir, pdf_days=1, archive_after_days=1, today="2025-09-01")
+    assert [item["date"] for item in first["archived"]] == [DATE]
+    archive_mtime = find_archive(data_dir, DATE).stat().st_mtime_ns
+
+    second = run_retention(data_dir, pdf_days=1, archive_after_days=1, today="2025-09-01")
+    assert second["archived"] == [] and second["errors"] == []
+    assert find_archive(data_dir, DATE).stat().st_mtime_ns == archive_mtime
+
+
+def test_new_files_merge_into_existing_archive(data_dir):
+    """歸檔後新寫入的文件與已有歸檔合併"""
+    archive_day(data_dir, DATE)
+    file_manager = FileManager(str(data_dir))
+    assert file_manager.save_data("TSLA", "fundamentals", {"symbol": "TSLA"}, DATE)
+
+    archive_day(data_dir, DATE)
+    file_manager = FileManager(str(data_dir))
+    assert file_manager.load_data("TSLA", "fundamentals", DATE)["symbol"] == "TSLA"
+    assert file_manager.load_data("AAPL", "analysis", DATE) is not None
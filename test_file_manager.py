@@ -0,0 +1,92 @@
+"""
+FileManager 日期索引測試（增量更新、TTL過期、日期範圍查詢）
+運行: python -m pytest test_file_manager.py
+"""
+import pytest
+
+import file_manager as file_manager_module
+from data_retention import archive_day
+from file_manager import FileManager
+
+
+class FakeMonotonic:
+    """可手動推進的 time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeMonotonic()
+    monkeypatch.setattr(file_manager_module, "time", clock)
+    monkeypatch.setattr(file_manager_module, "DATE_INDEX_TTL", 60)
+    return clock
+
+
+@pytest.fixture
+def fm(tmp_path, clock):
+    manager = FileManager(str(tmp_path / "data"))
+    for date_str, symbol in [("2025-08-01", "AAPL"), ("2025-08-10", "AAPL"), ("2025-08-10", "XPON"),
+                             ("2025-08-15", "XPON")]:
+        manager.save_data(symbol, "analysis", {"company": symbol}, date_str)
+    return manager
+
+
+def test_save_updates_index_without_rescan(fm, monkeypatch):
+    """本進程保存數據時索引即時更新，不重新掃描目錄"""
+    assert fm.list_symbols("2025-08-10") == ["AAPL", "XPON"]
+
+    def fail_rescan():
+        raise AssertionError("不應重新掃描")
+
+    monkeypatch.setattr(fm, "_build_date_index", fail_rescan)
+    fm.save_data("TSLA", "analysis", {"company": "TSLA"}, "2025-08-10")
+    fm.save_data("TSLA", "analysis", {"company": "TSLA"}, "2025-08-20")
+    assert fm.list_symbols("2025-08-10") == ["AAPL", "TSLA", "XPON"]
+    assert fm.list_available_dates("tsla") == ["2025-08-10", "2025-08-20"]
+
+
+def test_index_rescans_after_ttl(fm, clock):
+    """其他進程寫入的目錄在索引超過 DATE_INDEX_TTL 後才出現"""
+    assert fm.list_symbols("2025-08-15") == ["XPON"]
+    # 模擬Worker進程直接寫入
+    (fm.base_data_dir / "2025-08-15" / "NVDA").mkdir()
+    assert fm.list_symbols("2025-08-15") == ["XPON"]
+
+    clock.now += 59
+    assert fm.list_symbols("2025-08-15") == ["XPON"]
+    clock.now += 2
+    assert fm.list_symbols("2025-08-15") == ["NVDA", "XPON"]
+
+    (fm.base_data_dir / "2025-08-16" / "AMD").mkdir(parents=True)
+    fm.refresh_date_index()
+    assert fm.list_symbols("2025-08-16") == ["AMD"]
+
+
+def test_query_dates_by_range(fm):
+    """days / start_date / end_date 範圍查詢（包含兩端，從新到舊）"""
+    assert fm.query_dates(end_date="2025-08-15") == {
+        "2025-08-15": ["XPON"], "2025-08-10": ["AAPL", "XPON"], "2025-08-01": ["AAPL"]
+    }
+    assert list(fm.query_dates("aapl", end_date="2025-08-15")) == ["2025-08-10", "2025-08-01"]
+    # 最近6天：2025-08-10 至 2025-08-15
+    assert list(fm.query_dates(days=6, end_date="2025-08-15")) == ["2025-08-15", "2025-08-10"]
+    assert list(fm.query_dates(days=5, end_date="2025-08-15")) == ["2025-08-15"]
+    assert list(fm.query_dates(start_date="2025-08-02", end_date="2025-08-10")) == ["2025-08-10"]
+    assert fm.query_dates("XPON", start_date="2025-08-02", end_date="2025-08-09") == {}
+
+
+def test_query_dates_includes_archived_days(fm):
+    """已歸檔的日期（symbol目錄已刪除）仍從歸檔索引列出"""
+    archive_day(fm.base_data_dir, "2025-08-01")
+    assert not (fm.base_data_dir / "2025-08-01" / "AAPL").exists()
+
+    fm.refresh_date_index()
+    assert fm.query_dates("AAPL", start_date="2025-08-01", end_date="2025-08-10") == {
+        "2025-08-10": ["AAPL"], "2025-08-01": ["AAPL"]
+    }
+    assert fm.list_symbols("2025-08-01") == ["AAPL"]
@@ -0,0 +1,76 @@
+"""
+報告文件服務測試（Range解析、條件請求）
+運行: python -m pytest test_file_server.py
+"""
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from file_server import ReportFileServer, _parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=95-200", (95, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    (" bytes=0-0 ", (0, 0)),
+])
+def test_parse_range_valid(header, expected):
+    assert _parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=-", "bytes=-0", "bytes=100-", "bytes=10-5", "bytes=0-1,5-9", "items=0-9", "bytes=a-b",
+])
+def test_parse_range_invalid(header):
+    assert _parse_range(header, 100) is None
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "AAPL").mkdir()
+    (tmp_path / "AAPL" / "report.pdf").write_bytes(bytes(range(256)) * 4)
+    (tmp_path / "AAPL" / "news.json").write_text("{}")
+    server = ReportFileServer(str(tmp_path), "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url, headers=None):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_serves_ranges_and_not_modified(server):
+    status, headers, body = _get(f"{server}/AAPL/report.pdf")
+    assert status == 200 and len(body) == 1024
+
+    status, headers, body = _get(f"{server}/AAPL/report.pdf", {"Range": "bytes=10-19"})
+    assert status == 206
+    assert headers["Content-Range"] == "bytes 10-19/1024"
+    assert body == bytes(range(10, 20))
+
+    status, headers, _ = _get(f"{server}/AAPL/report.pdf", {"Range": "bytes=2000-"})
+    assert status == 416 and headers["Content-Range"] == "bytes */1024"
+
+    etag = _get(f"{server}/AAPL/report.pdf")[1]["ETag"]
+    assert _get(f"{server}/AAPL/report.pdf", {"If-None-Match": etag})[0] == 304
+    # If-Range 不匹配時返回完整文件
+    status, _, body = _get(f"{server}/AAPL/report.pdf", {"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert status == 200 and len(body) == 1024
+
+
+def test_rejects_data_files_and_traversal(server):
+    assert _get(f"{server}/AAPL/news.json")[0] == 404
+    assert _get(f"{server}/../etc/passwd")[0] == 404
+    assert _get(f"{server}/AAPL/%2e%2e/%2e%2e/etc/passwd")[0] == 404
@@ -0,0 +1,43 @@
+"""
+公司描述預掃描測試
+運行: python -m pytest test_get_company_desc.py
+"""
+from get_company_desc import _prescan_description, CompanyDescScraper
+
+
+def test_prescan_reads_first_paragraph_in_description():
+    """描述元素內的第一個段落，去掉標籤並反轉義"""
+    page = ('<section data-testid="description"><h3>Description</h3>'
+            '<p>Apple Inc. designs <b>smartphones</b> &amp; computers.</p><p>Second</p></section>')
+    assert _prescan_description(page) == "Apple Inc. designs smartphones & computers."
+
+
+def test_prescan_skips_nested_same_tag_elements():
+    """同名標籤嵌套時按匹配的結束標籤確定範圍"""
+    page = ('<div data-testid="description"><div><span>Header</span></div>'
+            '<div><p>The company operates stores.</p></div></div>')
+    assert _prescan_description(page) == "The company operates stores."
+
+
+def test_prescan_does_not_read_past_the_element():
+    """描述元素沒有段落時不使用之後的其他段落"""
+    page = ('<section data-testid="description"><h3>Description</h3><span>No text</span></section>'
+            '<footer><p>Copyright Yahoo</p></footer>')
+    assert _prescan_description(page) is None
+
+
+def test_prescan_gives_up_on_unclosed_element():
+    """找不到結束標籤時返回None，由HTML解析器處理"""
+    page = '<section data-testid="description"><p>Truncated page'
+    assert _prescan_description(page) is None
+    assert _prescan_description('<section data-testid="description"/><p>Other</p>') is None
+
+
+def test_extract_description_falls_back_to_parser():
+    """預掃描失敗時由後續的解析器取得描述"""
+    page = ('<html><body><section data-testid="description"><h3>Description</h3>'
+            '<div><p>Shopify Inc. provides a commerce platform.</div></section>'
+            '<footer><p>Copyright Yahoo</p></footer></body></html>')
+    assert _prescan_description(page) is None
+    description, _ = CompanyDescScraper()._extract_description(page)
+    assert description.startswith("Shopify Inc. provides a commerce platform.")
@@ -0,0 +1,121 @@
+"""
+新聞客戶端測試（條件請求緩存、批量新聞分組）
+運行: python -m pytest test_get_news.py
+"""
+import asyncio
+
+import pytest
+
+import get_news
+from get_news import AsyncNewsClient
+
+
+def test_validator_cache_evicts_least_recently_used(monkeypatch):
+    """緩存超過 NEWS_VALIDATOR_CACHE_SIZE 時淘汰最久未使用的URL"""
+    monkeypatch.setattr(get_news, "NEWS_VALIDATOR_CACHE_SIZE", 2)
+    client = AsyncNewsClient()
+    client._remember("u1", '"e1"', None, {"articles": [1]})
+    client._remember("u2", '"e2"', None, {"articles": [2]})
+    assert client._cached("u1") is not None  # u1 變為最近使用
+    client._remember("u3", '"e3"', None, {"articles": [3]})
+
+    assert list(client.validators) == ["u1", "u3"]
+    assert client._conditional_headers("u2").get("If-None-Match") is None
+    assert client._conditional_headers("u3")["If-None-Match"] == '"e3"'
+
+
+def test_validator_cache_expires(monkeypatch):
+    """過期的緩存不再發送條件請求頭"""
+    client = AsyncNewsClient()
+    client._remember("u1", '"e1"', "Mon, 01 Jan 2024 00:00:00 GMT", {"articles": []})
+    assert "If-Modified-Since" in client._conditional_headers("u1")
+
+    monkeypatch.setattr(get_news, "NEWS_VALIDATOR_CACHE_TTL", -1)
+    assert client._cached("u1") is None
+    assert "u1" not in client.validators
+
+
+def test_responses_without_validators_are_not_cached():
+    """沒有ETag/Last-Modified的響應不保存內容"""
+    client = AsyncNewsClient()
+    client._remember("u1", None, None, {"articles": [1]})
+    assert not client.validators
+
+
+@pytest.mark.skipif(get_news.aiohttp is None, reason="需要aiohttp")
+def test_fetch_reuses_cached_body_on_304():
+    """第二次請求帶 If-None-Match，304 時返回緩存內容"""
+    from aiohttp import web
+
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.json_response({"articles": [{"title": "A"}]}, headers={"ETag": '"v1"'})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/news/{ticker}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            client = AsyncNewsClient()
+            client.base_url = f"http://127.0.0.1:{port}/news/"
+            first = await client.fetch_many(["AAPL"])
+            second = await client.fetch_many(["AAPL"])
+            return first, second
+        finally:
+            await runner.cleanup()
+
+    first, second = asyncio.run(run())
+    assert first["AAPL"] == second["AAPL"] == {"articles": [{"title": "A"}]}
+    assert requests_seen == [None, '"v1"']
+
+
+def test_partition_matches_tags_and_text():
+    """有標籤的文章按標籤分組，沒有標籤的按標題/描述匹配"""
+    articles = [
+        {"url": "u1", "title": "Apple beats estimates", "symbols": ["NASDAQ:AAPL"]},
+        {"url": "u2", "title": "Why TSLA fell today"},
+        {"url": "u3", "title": "A day in the market"},
+        {"url": "u4", "title": "Shares of (NASDAQ: AI) jump"},
+    ]
+    result = get_news.partition_articles_by_ticker(articles, ["aapl", "TSLA", "AI"])
+    assert [a["url"] for a in result["AAPL"]] == ["u1"]
+    assert [a["url"] for a in result["TSLA"]] == ["u2"]
+    # 兩個字母的代碼只匹配明確形式，"A day" 不會命中
+    assert [a["url"] for a in result["AI"]] == ["u4"]
+
+
+def test_partition_dedupes_without_dropping_keyless_articles():
+    """同一篇文章只保留一次；沒有url和title的不同文章不會被當作重複"""
+    articles = [
+        {"url": "u1", "title": "TSLA up"},
+        {"url": "u1", "title": "TSLA up"},
+        {"description": "TSLA recall announced"},
+        {"description": "TSLA opens new factory"},
+        {"description": "TSLA opens new factory"},
+    ]
+    result = get_news.partition_articles_by_ticker(articles, ["TSLA"])
+    assert [a.get("url") or a["description"] for a in result["TSLA"]] == [
+        "u1", "TSLA recall announced", "TSLA opens new factory"
+    ]
+
+
+def test_get_news_bulk_keeps_caller_symbols(monkeypatch):
+    """結果鍵與調用方傳入的代碼一致（不強制大寫）"""
+    client = AsyncNewsClient()
+
+    async def fake_fetch_bulk(tickers):
+        return {t: {"articles": [{"title": t}]} for t in tickers}
+
+    monkeypatch.setattr(client, "fetch_bulk", fake_fetch_bulk)
+    monkeypatch.setattr(client, "get_news_many", lambda tickers: {t: {"articles": [{"title": t}]} for t in tickers})
+    result = client.get_news_bulk(["aapl", "TSLA", "aapl"])
+    assert list(result) == ["aapl", "TSLA"]
+    assert result["aapl"] == {"articles": [{"title": "AAPL"}]}
@@ -0,0 +1,99 @@
+"""
+Instagram貼文存儲測試（使用臨時數據目錄）
+運行: python -m pytest test_ig_post_store.py
+"""
+import json
+
+import pytest
+
+from file_manager import FileManager
+from ig_post_store import (
+    IG_POST_DATA_TYPE, save_ig_post, load_ig_post, ig_post_exists, export_ig_posts, _parse_legacy_text
+)
+
+DATE = "2025-08-15"
+
+
+def _post(symbol: str) -> dict:
+    return {
+        "success": True,
+        "formatted_post": f"📈 {symbol} 今日分析\n\n重點一\n重點二",
+        "hashtags": f"#{symbol} #美股",
+        "raw_json": {"title": f"{symbol} 分析", "points": ["重點一", "重點二"]}
+    }
+
+
+@pytest.fixture
+def file_manager(tmp_path):
+    return FileManager(str(tmp_path / "data"))
+
+
+def test_save_and_load_round_trip(file_manager):
+    """JSON為主存儲，同時寫出文本導出文件；載入結果與保存的內容一致"""
+    assert not ig_post_exists(file_manager, "aapl", DATE)
+    export_path = save_ig_post(file_manager, "aapl", _post("AAPL"), DATE)
+
+    assert export_path.endswith(f"AAPL_ig_post_{DATE}.txt")
+    assert file_manager.file_exists("AAPL", IG_POST_DATA_TYPE, DATE)
+    assert ig_post_exists(file_manager, "AAPL", DATE)
+
+    post = load_ig_post(file_manager, "AAPL", DATE)
+    expected = _post("AAPL")
+    assert post["exists"] and post["filename"] == export_path
+    assert {field: post[field] for field in ("formatted_post", "hashtags", "raw_json")} == {
+        field: expected[field] for field in ("formatted_post", "hashtags", "raw_json")
+    }
+    assert load_ig_post(file_manager, "TSLA", DATE) == {"exists": False}
+
+
+def test_legacy_text_is_parsed(file_manager):
+    """只有舊格式文本文件時解析其中的貼文、hashtags和原始JSON"""
+    raw = {"title": "TSLA 分析"}
+    content = (
+        "=== INSTAGRAM POST ===\n\n🚗 TSLA 今日分析\n\n第二段\n\n"
+        "=== HASHTAGS ===\n\n#TSLA #EV\n\n"
+        f"=== RAW JSON ===\n\n{json.dumps(raw, ensure_ascii=False)}\n"
+    )
+    assert _parse_legacy_text(content) == {
+        "formatted_post": "🚗 TSLA 今日分析\n\n第二段",
+        "hashtags": "#TSLA #EV",
+        "raw_json": raw
+    }
+    # 原始JSON損壞時其他部分仍可使用
+    assert _parse_legacy_text(content.replace('{"title"', '{"title'))["raw_json"] == {}
+
+    symbol_dir = file_manager._get_data_path("TSLA", DATE)
+    symbol_dir.mkdir(parents=True)
+    (symbol_dir / f"TSLA_ig_post_{DATE}.txt").write_text(content, encoding="utf-8")
+    post = load_ig_post(file_manager, "TSLA", DATE)
+    assert post["exists"] and post["hashtags"] == "#TSLA #EV"
+
+
+def test_rendered_export_file_parses_back(file_manager):
+    """保存時寫出的文本文件可以被舊格式解析器讀回"""
+    export_path = save_ig_post(file_manager, "AAPL", _post("AAPL"), DATE)
+    with open(export_path, encoding="utf-8") as f:
+        parsed = _parse_legacy_text(f.read())
+    assert parsed["hashtags"] == "#AAPL #美股"
+    assert parsed["raw_json"] == _post("AAPL")["raw_json"]
+
+
+def test_export_json_and_txt(file_manager, tmp_path):
+    """導出某一天的所有貼文：json 為 symbol -> 貼文，txt 為逐個貼文的發佈文本"""
+    assert export_ig_posts(DATE, file_manager=file_manager) is None
+    for symbol in ("TSLA", "AAPL"):
+        save_ig_post(file_manager, symbol, _post(symbol), DATE)
+
+    json_path = export_ig_posts(DATE, fmt="json", file_manager=file_manager)
+    assert json_path.endswith(f"ig_posts_{DATE}.json")
+    with open(json_path, encoding="utf-8") as f:
+        exported = json.load(f)
+    assert list(exported) == ["AAPL", "TSLA"]
+    assert exported["TSLA"]["hashtags"] == "#TSLA #美股"
+    assert exported["AAPL"]["raw_json"] == _post("AAPL")["raw_json"]
+
+    txt_path = export_ig_posts(DATE, str(tmp_path / "posts.txt"), fmt="txt", file_manager=file_manager)
+    with open(txt_path, encoding="utf-8") as f:
+        text = f.read()
+    assert text.index("=== AAPL ===") < text.index("=== TSLA ===")
+    assert "#TSLA #美股" in text and "RAW JSON" not in text
@@ -0,0 +1,106 @@
+"""
+後台任務隊列測試
+運行: python -m pytest test_job_queue.py
+"""
+import threading
+import time
+
+import pytest
+
+import job_queue
+from job_queue import JobManager, JOB_FAILED, JOB_SUCCEEDED, JOB_FINISHED_STATES
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=2)
+    yield manager
+    manager.shutdown()
+
+
+def _wait(manager: JobManager, job_id: str, timeout: float = 5.0) -> dict:
+    """等待任務完成並返回狀態快照"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in JOB_FINISHED_STATES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"{job_id} 未在 {timeout} 秒內完成")
+
+
+def test_submit_dedupes_unfinished_jobs_with_same_key(manager):
+    """相同鍵的任務未完成時重複提交返回現有任務，完成後可以再次提交"""
+    release = threading.Event()
+    calls = []
+
+    def task(progress):
+        calls.append(1)
+        release.wait(5)
+        return {"success": True}
+
+    first = manager.submit("process:AAPL", "AAPL", task)
+    assert manager.submit("process:AAPL", "AAPL", task) == first
+    other = manager.submit("process:TSLA", "TSLA", task)
+    assert other != first
+
+    release.set()
+    assert _wait(manager, first)["status"] == JOB_SUCCEEDED
+    _wait(manager, other)
+    assert len(calls) == 2
+
+    again = manager.submit("process:AAPL", "AAPL", task)
+    assert again != first
+    _wait(manager, again)
+    assert manager.find("process:AAPL")["id"] == again
+
+
+def test_failed_result_and_exception_mark_job_failed(manager):
+    """返回 success=False 或拋出異常的任務以 JOB_FAILED 結束並記錄錯誤"""
+    failed = manager.submit("a", "A", lambda progress: {"success": False, "errors": ["新聞下載失敗", "分析失敗"]})
+    job = _wait(manager, failed)
+    assert job["status"] == JOB_FAILED
+    assert job["error"] == "新聞下載失敗; 分析失敗"
+
+    def boom(progress):
+        raise RuntimeError("連接中斷")
+
+    job = _wait(manager, manager.submit("b", "B", boom))
+    assert job["status"] == JOB_FAILED
+    assert job["error"] == "連接中斷"
+    assert job["result"] is None
+
+    job = _wait(manager, manager.submit("c", "C", lambda progress: {"success": True, "symbol": "C"}))
+    assert job["status"] == JOB_SUCCEEDED and job["error"] is None
+    assert job["result"]["symbol"] == "C"
+
+
+def test_prune_keeps_history_limit_finished_jobs(manager, monkeypatch):
+    """只保留最近 JOB_HISTORY_LIMIT 個已完成任務"""
+    monkeypatch.setattr(job_queue, "JOB_HISTORY_LIMIT", 2)
+    job_ids = []
+    for index in range(4):
+        job_id = manager.submit(f"key-{index}", f"job {index}", lambda progress: {"success": True})
+        _wait(manager, job_id)
+        job_ids.append(job_id)
+    # 下一次提交時清理
+    last = manager.submit("key-last", "last", lambda progress: {"success": True})
+    _wait(manager, last)
+
+    remaining = {job["id"] for job in manager.list_jobs()}
+    assert remaining == {job_ids[2], job_ids[3], last}
+
+
+def test_logs_are_truncated_to_limit(manager, monkeypatch):
+    """每個任務只保留最近 JOB_LOG_LIMIT 行日誌"""
+    monkeypatch.setattr(job_queue, "JOB_LOG_LIMIT", 3)
+
+    def task(progress):
+        for index in range(10):
+            progress.log(f"line {index}")
+        return {"success": True}
+
+    job_id = manager.submit("logs", "logs", task)
+    job = _wait(manager, job_id)
+    assert job["logs"] == ["line 7", "line 8", "line 9"]
+    assert "logs" not in manager.list_jobs()[0]
@@ -0,0 +1,100 @@
+"""
+數據JSON壓縮存儲測試
+運行: python -m pytest test_json_codec.py
+"""
+import shutil
+from pathlib import Path
+
+import pytest
+
+import json_codec
+from json_codec import (
+    encode_json, decode_json, strip_data_suffix, data_file_variants, storage_suffix,
+    train_dictionary, convert_files, list_data_files
+)
+from file_manager import FileManager
+
+DATE = "2025-08-15"
+SAMPLE = {"symbol": "AAPL", "title": "蘋果公司財報", "values": [1, 2.5, None, True], "nested": {"a": "b"}}
+
+
+def _key(path: Path, base: Path) -> str:
+    """不含後綴的相對路徑，如 2025-08-15/AAPL/analysis_2025-08-15"""
+    return strip_data_suffix(path.relative_to(base).as_posix())
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    base = tmp_path / "data"
+    shutil.copytree(Path(__file__).parent / "data" / DATE, base / DATE)
+    return base
+
+
+@pytest.mark.parametrize("suffix", [".json", ".json.gz", ".json.zst"])
+def test_round_trip_without_dictionary(tmp_path, suffix):
+    """三種格式都能讀回相同數據"""
+    if suffix == ".json.zst" and json_codec.zstandard is None:
+        pytest.skip("需要zstandard")
+    content = encode_json(SAMPLE, suffix, tmp_path)
+    assert decode_json(content, f"x{suffix}", tmp_path) == SAMPLE
+
+
+def test_gzip_output_is_deterministic(tmp_path):
+    """gzip不寫入時間戳，相同數據得到相同字節"""
+    assert encode_json(SAMPLE, ".json.gz", tmp_path) == encode_json(SAMPLE, ".json.gz", tmp_path)
+
+
+def test_corrupt_or_unknown_content_raises(tmp_path):
+    with pytest.raises(ValueError):
+        decode_json(b"not gzip", "x.json.gz", tmp_path)
+    with pytest.raises(ValueError):
+        encode_json(SAMPLE, ".json.bz2", tmp_path)
+
+
+def test_suffix_helpers(monkeypatch):
+    assert strip_data_suffix("analysis_2025-08-15.json.zst") == "analysis_2025-08-15"
+    assert strip_data_suffix("analysis_2025-08-15.json.gz") == "analysis_2025-08-15"
+    assert strip_data_suffix("analysis_2025-08-15.json") == "analysis_2025-08-15"
+    assert strip_data_suffix("AAPL_report_2025-08-15.md") is None
+
+    monkeypatch.setattr(json_codec, "JSON_COMPRESSION", "gzip")
+    assert storage_suffix() == ".json.gz"
+    variants = data_file_variants(Path("d/AAPL/news_2025-08-15.json.zst"))
+    assert [path.name for path in variants] == [
+        "news_2025-08-15.json.gz", "news_2025-08-15.json.zst", "news_2025-08-15.json"
+    ]
+
+
+@pytest.mark.skipif(json_codec.zstandard is None, reason="需要zstandard")
+def test_dictionary_compression_and_convert(data_dir):
+    """訓練字典後轉換為zstd，FileManager透明讀取，數據不變"""
+    file_manager = FileManager(str(data_dir))
+    before = {_key(path, data_dir): json_codec.read_json_file(path, data_dir) for path in list_data_files(data_dir)}
+
+    info = train_dictionary(data_dir, dict_size=8192)
+    assert Path(info["path"]).exists()
+    # 字典壓縮的文件依賴字典ID
+    content = encode_json(SAMPLE, ".json.zst", data_dir)
+    assert json_codec.zstandard.get_frame_parameters(content).dict_id == info["dict_id"]
+    assert decode_json(content, "x.json.zst", data_dir) == SAMPLE
+
+    result = convert_files(data_dir, "zstd")
+    assert result["files"] == len(before) and result["bytes_after"] < result["bytes_before"]
+    files = list_data_files(data_dir)
+    assert all(path.name.endswith(".json.zst") for path in files)
+    assert {_key(path, data_dir): json_codec.read_json_file(path, data_dir) for path in files} == before
+
+    assert file_manager.file_exists("AAPL", "analysis", DATE)
+    assert file_manager.load_data("AAPL", "analysis", DATE) == before[f"{DATE}/AAPL/analysis_{DATE}"]
+
+
+def test_save_replaces_other_formats(data_dir, monkeypatch):
+    """按當前格式保存時刪除其他格式的舊文件"""
+    monkeypatch.setattr(json_codec, "JSON_COMPRESSION", "gzip")
+    file_manager = FileManager(str(data_dir))
+    assert file_manager.save_data("AAPL", "fundamentals", {"pe": 30}, DATE)
+
+    symbol_dir = data_dir / DATE / "AAPL"
+    assert (symbol_dir / f"fundamentals_{DATE}.json.gz").exists()
+    assert not (symbol_dir / f"fundamentals_{DATE}.json").exists()
+    assert file_manager.load_data("AAPL", "fundamentals", DATE)["pe"] == 30
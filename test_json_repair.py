@@ -0,0 +1,96 @@
+"""
+LLM輸出JSON修復測試：每類修復的結果以及 truncated / lossless 標記
+運行: python -m pytest test_json_repair.py
+"""
+import pytest
+
+from json_repair import repair_json, LOSSLESS_FIXES, TRUNCATION_FIXES
+
+
+# (輸入, 修復結果, 修復項, truncated, lossless)
+CASES = [
+    ('{"a": 1}', {"a": 1}, [], False, True),
+    ('```json\n{"a": 1}\n```', {"a": 1}, ["去掉代碼塊標記"], False, True),
+    ('Here is the JSON: {"a": 1}', {"a": 1}, ["刪除JSON前的文字"], False, True),
+    ('{"a": 1} Hope this helps.', {"a": 1}, ["刪除JSON後的文字"], False, True),
+    ('{"a": [1, 2,],}', {"a": [1, 2]}, ["刪除尾隨逗號"], False, True),
+    ('{"a": "line1\nline2"}', {"a": "line1\nline2"}, ["轉義字符串中的控制字符"], False, True),
+    ('{"a": "C:\\path"}', {"a": "C:\\path"}, ["修復無效的轉義"], False, True),
+    ('{"a": True, "b": None}', {"a": True, "b": None}, ["轉換Python字面量（True/False/None）"], False, True),
+    ('{a: 1, b_c: 2}', {"a": 1, "b_c": 2}, ["為鍵加上引號"], False, True),
+    # 猜測的修復：不是截斷，但不能直接接受
+    ('{"a": NaN}', {"a": None}, ["把NaN/Infinity/undefined替換為null"], False, False),
+    ('{"a": some words here}', {"a": "some", "words": "here"},
+     ["為字符串值加上引號", "補上缺少的逗號", "補上缺少的冒號"], False, False),
+    ('{"a": 1 "b": 2}', {"a": 1, "b": 2}, ["補上缺少的逗號"], False, False),
+    ('{"a" 1}', {"a": 1}, ["補上缺少的冒號"], False, False),
+    ('{"a": }', {"a": None}, ["補上缺少的值"], False, False),
+    ('[1,,2]', [1, 2], ["刪除多餘的逗號"], False, False),
+    ('{"a":: 1}', {"a": 1}, ["刪除多餘的冒號"], False, False),
+    ('{"a": 1]', {"a": 1}, ["修復不匹配的括號"], False, False),
+    ('{"a": [1, 2}', {"a": [1, 2]}, ["修復不匹配的括號"], False, False),
+    ('{"a": 1}{"b": 2}', {"a": 1}, ["丟棄JSON後的其他內容"], False, False),
+    ('{"a": 1}]', {"a": 1}, ["丟棄JSON後的其他內容"], False, False),
+    # 輸出被截斷
+    ('{"a": [1, 2', {"a": [1, 2]}, ["補全未閉合的括號"], True, False),
+    ('{"a": "unfinished', {"a": "unfinished"}, ["補全未閉合的字符串", "補全未閉合的括號"], True, False),
+    ('{"a": 1, "b":', {"a": 1}, ["丟棄被截斷的鍵", "補全未閉合的括號"], True, False),
+    ('{"a": 1, "b"', {"a": 1}, ["丟棄被截斷的鍵", "補全未閉合的括號"], True, False),
+    ('{"a": tr', {"a": True}, ["補全被截斷的值", "補全未閉合的括號"], True, False),
+    ('{"a": 1.5e', {"a": 1.5}, ["補全被截斷的值", "補全未閉合的括號"], True, False),
+]
+
+
+@pytest.mark.parametrize("text, data, fixes, truncated, lossless", CASES)
+def test_repair_flags(text, data, fixes, truncated, lossless):
+    result = repair_json(text)
+    assert result["success"], result["error"]
+    assert result["data"] == data
+    assert sorted(result["fixes"]) == sorted(fixes)
+    assert result["truncated"] is truncated
+    assert result["lossless"] is lossless
+
+
+def test_every_fix_kind_is_covered():
+    """每一種修復都至少有一個用例，新增修復時需要決定它是否無損"""
+    covered = {fix for case in CASES for fix in case[2]}
+    assert set(LOSSLESS_FIXES) <= covered
+    assert set(TRUNCATION_FIXES) <= covered
+    assert not set(LOSSLESS_FIXES) & set(TRUNCATION_FIXES)
+
+
+@pytest.mark.parametrize("text", ["", "   ", "no json here", None])
+def test_unrepairable_input(text):
+    result = repair_json(text)
+    assert not result["success"] and result["error"]
+    assert not result["lossless"]
+
+
+def test_retry_accepts_only_lossless_repairs(monkeypatch):
+    """無損修復直接返回；需要猜測的修復先重試，最後一次嘗試才接受"""
+    run = pytest.importorskip("run")
+    monkeypatch.setattr(run.time, "sleep", lambda seconds: None)
+
+    calls = []
+
+    def llm(responses):
+        def call():
+            calls.append(1)
+            return responses[min(len(calls), len(responses)) - 1]
+        return call
+
+    assert run.retry_llm_call(llm(['```json\n{"rating": "buy",}\n```']), expect_json=True) == '{"rating": "buy"}'
+    assert len(calls) == 1
+
+    calls.clear()
+    result = run.retry_llm_call(llm(['{"a": 1}{"b": 2}', '{"a": 1, "b": 2}']), expect_json=True)
+    assert result == '{"a": 1, "b": 2}' and len(calls) == 2
+
+    calls.clear()
+    result = run.retry_llm_call(llm(['{"a": [1, 2']), max_retries=2, expect_json=True)
+    assert result == '{"a": [1, 2]}' and len(calls) == 2
+
+    # 快速路徑與 repair_json 一樣拒絕 NaN：替換為null是有損修復，先重試
+    calls.clear()
+    result = run.retry_llm_call(llm(['{"price": NaN, "x": 1}', '{"price": 1.5, "x": 1}']), expect_json=True)
+    assert result == '{"price": 1.5, "x": 1}' and len(calls) == 2
@@ -0,0 +1,88 @@
+"""
+新聞map-reduce分析測試（使用假的LLM客戶端）
+運行: python -m pytest test_news_analysis.py
+"""
+import json
+import threading
+
+import pytest
+
+import news_analysis
+import token_budget
+from config import NEWS_ANALYSIS_PROMPT, NEWS_CHUNK_SUMMARY_PROMPT
+from token_budget import TokenBudgetPlanner
+
+
+class FakeDeepSeek:
+    """記錄每次調用的系統提示詞，按提示詞返回摘要或最終分析"""
+
+    model = "deepseek-chat"
+
+    def __init__(self, fail_summaries: bool = False):
+        self.fail_summaries = fail_summaries
+        self.calls = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def last_usage(self):
+        return getattr(self._local, "usage", None)
+
+    def chat(self, user_prompt, use_system_prompt=True, custom_system_prompt=None, json_output=False, max_tokens=None):
+        with self._lock:
+            self.calls.append(custom_system_prompt)
+        self._local.usage = {"prompt_tokens": 10, "completion_tokens": 5, "finish_reason": "stop"}
+        if custom_system_prompt == NEWS_CHUNK_SUMMARY_PROMPT:
+            if self.fail_summaries:
+                raise RuntimeError("summary failed")
+            count = len(json.loads(user_prompt)["articles"])
+            return json.dumps({"summary": f"{count} articles"})
+        return json.dumps({"rating": "buy", "input": json.loads(user_prompt)})
+
+
+@pytest.fixture
+def planner(monkeypatch):
+    monkeypatch.setattr(token_budget, "tiktoken", None)
+    return TokenBudgetPlanner("deepseek-chat")
+
+
+def _articles(count: int, size: int = 200):
+    return [{"title": f"t{i}", "publishedAt": f"2025-08-{i % 28 + 1:02d}", "content": "x" * size} for i in range(count)]
+
+
+def test_split_keeps_order_and_bounds(planner):
+    articles = _articles(12)
+    chunks = news_analysis.split_articles_into_chunks(articles, planner, chunk_tokens=200)
+    assert [a for chunk in chunks for a in chunk] == articles
+    assert len(chunks) > 1
+    # 單篇超過上限時獨立成塊
+    big = _articles(1, size=5000) + _articles(2)
+    assert news_analysis.split_articles_into_chunks(big, planner, chunk_tokens=200)[0] == big[:1]
+
+
+def test_small_news_uses_single_call(planner):
+    deepseek = FakeDeepSeek()
+    result = json.loads(news_analysis.run_news_analysis(deepseek, {"articles": _articles(3)}, {"pe": 30}, planner))
+    assert deepseek.calls == [NEWS_ANALYSIS_PROMPT]
+    assert len(result["input"]["news"]["articles"]) == 3
+
+
+def test_large_news_uses_map_reduce(planner, monkeypatch):
+    monkeypatch.setattr(news_analysis, "NEWS_MAP_REDUCE_THRESHOLD_TOKENS", 500)
+    monkeypatch.setattr(news_analysis, "NEWS_MAP_REDUCE_CHUNK_TOKENS", 400)
+    deepseek = FakeDeepSeek()
+    result = json.loads(news_analysis.run_news_analysis(deepseek, {"articles": _articles(20)}, {"pe": 30}, planner))
+
+    summaries = result["input"]["news_summaries"]
+    assert deepseek.calls.count(NEWS_CHUNK_SUMMARY_PROMPT) == len(summaries) > 1
+    assert deepseek.calls[-1] == NEWS_ANALYSIS_PROMPT
+    assert sum(int(s["summary"].split()[0]) for s in summaries) == 20
+    assert result["input"]["article_count"] == 20
+
+
+def test_failed_chunk_falls_back_to_titles(planner, monkeypatch):
+    monkeypatch.setattr(news_analysis, "retry_llm_call", lambda func, **kwargs: func())
+    deepseek = FakeDeepSeek(fail_summaries=True)
+    summary = news_analysis._summarize_chunk(deepseek, planner, _articles(2), 1, 1)
+    assert summary == {"articles": [{"title": "t0", "publishedAt": "2025-08-01"},
+                                    {"title": "t1", "publishedAt": "2025-08-02"}]}
@@ -0,0 +1,52 @@
+"""
+PDF渲染池的批量/並行選擇測試（不啟動wkhtmltopdf）
+運行: python -m pytest test_pdf_renderer.py
+"""
+from concurrent.futures import Future
+
+import pdf_renderer
+from pdf_renderer import PdfRenderPool
+
+
+def _fake_pool(monkeypatch, max_workers: int):
+    """記錄單獨提交和批量提交的渲染池"""
+    pool = PdfRenderPool(max_workers=max_workers)
+    calls = {"single": [], "batches": []}
+
+    def submit(html_content, pdf_path):
+        calls["single"].append(str(pdf_path))
+        future = Future()
+        future.set_result(str(pdf_path))
+        return future
+
+    class FakeExecutor:
+        def submit(self, func, batch, timeout):
+            calls["batches"].append([pdf_path for _, pdf_path in batch])
+            future = Future()
+            future.set_result({pdf_path: None for _, pdf_path in batch})
+            return future
+
+    monkeypatch.setattr(pdf_renderer, "PDF_BATCH_RENDER", True)
+    monkeypatch.setattr(pool, "submit", submit)
+    monkeypatch.setattr(pool, "_get_executor", lambda: FakeExecutor())
+    return pool, calls
+
+
+def test_few_documents_render_in_parallel(monkeypatch):
+    """同一symbol的中英文PDF（不超過工作進程數）各自佔用一個進程，不合併成一批"""
+    pool, calls = _fake_pool(monkeypatch, max_workers=2)
+    results = pool.render_many([("<p>中文</p>", "a_chinese.pdf"), ("<p>English</p>", "a_english.pdf")])
+    assert results == {"a_chinese.pdf": None, "a_english.pdf": None}
+    assert calls["single"] == ["a_chinese.pdf", "a_english.pdf"]
+    assert calls["batches"] == []
+
+
+def test_many_documents_batch_across_all_workers(monkeypatch):
+    """文檔多於工作進程數時批量渲染，批數不少於工作進程數"""
+    monkeypatch.setattr(pdf_renderer, "PDF_BATCH_SIZE", 8)
+    pool, calls = _fake_pool(monkeypatch, max_workers=2)
+    jobs = [(f"<p>{i}</p>", f"{i}.pdf") for i in range(3)]
+    results = pool.render_many(jobs)
+    assert set(results) == {"0.pdf", "1.pdf", "2.pdf"}
+    assert calls["single"] == []
+    assert calls["batches"] == [["0.pdf", "1.pdf"], ["2.pdf"]]
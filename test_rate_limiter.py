@@ -0,0 +1,139 @@
+"""
+按主機限速調度器測試（使用假時鐘，不發送真實請求）
+運行: python -m pytest test_rate_limiter.py
+"""
+import threading
+from email.utils import formatdate
+
+import pytest
+
+import rate_limiter
+from rate_limiter import HostRateScheduler
+
+
+class FakeClock:
+    """time.time() / time.sleep() 的替代：sleep 只推進時間並記錄"""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds: float):
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def _scheduler(rate: float = 2.0, concurrency: int = 1) -> HostRateScheduler:
+    return HostRateScheduler({"api.example.com": {"rate": rate, "concurrency": concurrency}})
+
+
+def test_requests_to_same_host_are_spaced_by_interval(clock):
+    """同一主機的請求至少間隔 1/rate 秒，其他主機不受影響"""
+    scheduler = _scheduler(rate=2.0)
+    started = []
+    for _ in range(3):
+        with scheduler.slot("https://api.example.com/a"):
+            started.append(clock.time())
+    assert [round(t - started[0], 3) for t in started] == [0.0, 0.5, 1.0]
+
+    before = clock.time()
+    with scheduler.slot("https://other.example.org/"):
+        assert clock.time() == before
+
+
+def test_subdomain_uses_suffix_limits(clock):
+    """按主機名後綴匹配限速配置"""
+    scheduler = _scheduler(rate=1.0, concurrency=3)
+    assert scheduler._limits_for("eu.api.example.com") == {"rate": 1.0, "concurrency": 3}
+    assert scheduler._limits_for("notapi.example.com")["rate"] == scheduler.default_rate
+
+
+def test_concurrency_limit_per_host(clock):
+    """並發數達到上限時新的請求等待槽位釋放"""
+    scheduler = _scheduler(rate=0, concurrency=1)
+    inside = threading.Event()
+    release = threading.Event()
+    second_entered = threading.Event()
+
+    def first():
+        with scheduler.slot("https://api.example.com/1"):
+            inside.set()
+            release.wait(5)
+
+    def second():
+        with scheduler.slot("https://api.example.com/2"):
+            second_entered.set()
+
+    threads = [threading.Thread(target=first)]
+    threads[0].start()
+    assert inside.wait(5)
+    threads.append(threading.Thread(target=second))
+    threads[1].start()
+    assert not second_entered.wait(0.2)
+
+    release.set()
+    assert second_entered.wait(5)
+    for thread in threads:
+        thread.join(5)
+
+
+def test_backoff_honours_retry_after_seconds_and_date(clock):
+    """429/503按Retry-After（秒數或HTTP日期）暫停主機，之後的請求等到暫停結束"""
+    scheduler = _scheduler(rate=0)
+    url = "https://api.example.com/x"
+
+    assert scheduler.report(url, 429, "7") == 7
+    before = clock.time()
+    with scheduler.slot(url):
+        assert clock.time() - before == pytest.approx(7)
+
+    http_date = formatdate(clock.time() + 20, usegmt=True)
+    assert scheduler.report(url, 503, http_date) == pytest.approx(20, abs=1)
+    # 成功後清除失敗計數，不再退避
+    assert scheduler.report(url, 200) == 0.0
+
+
+def test_backoff_without_retry_after_is_exponential_and_capped(clock, monkeypatch):
+    """沒有Retry-After時指數退避，不超過 RATE_LIMIT_MAX_BACKOFF"""
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_BASE_BACKOFF", 5.0)
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_MAX_BACKOFF", 12.0)
+    scheduler = _scheduler()
+    url = "https://api.example.com/x"
+    assert [scheduler.report(url, 429) for _ in range(3)] == [5.0, 10.0, 12.0]
+
+
+def test_get_retries_after_backoff(clock, monkeypatch):
+    """get() 遇到429時退避後重試，返回最後的響應"""
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_MAX_RETRIES", 2)
+
+    class Response:
+        def __init__(self, status_code, headers=None):
+            self.status_code = status_code
+            self.headers = headers or {}
+
+    class Session:
+        def __init__(self):
+            self.responses = [Response(429, {"Retry-After": "3"}), Response(200)]
+            self.calls = []
+
+        def get(self, url, **kwargs):
+            self.calls.append(clock.time())
+            return self.responses.pop(0)
+
+    session = Session()
+    response = _scheduler(rate=0).get(session, "https://api.example.com/x", timeout=5)
+    assert response.status_code == 200
+    assert session.calls[1] - session.calls[0] == pytest.approx(3)
@@ -0,0 +1,72 @@
+"""
+每日摘要索引測試
+運行: python -m pytest test_summary_index.py
+"""
+import multiprocessing
+
+import pytest
+
+import summary_index
+from summary_index import record_stage, forget_stages, load_summary, rebuild_summary, summary_path
+
+DATE = "2025-08-15"
+
+
+def _record_many(base_data_dir, symbol, count):
+    for i in range(count):
+        record_stage(base_data_dir, symbol, DATE, f"stage_{i}")
+
+
+def test_record_and_forget_stages(tmp_path):
+    """記錄階段和摘要字段，移除階段後其他內容保留"""
+    record_stage(tmp_path, "aapl", DATE, "analysis", {"bias": "bullish"}, timestamp="2025-08-15T10:00:00")
+    record_stage(tmp_path, "AAPL", DATE, "pdf_chinese", timestamp="2025-08-15T11:00:00")
+    entry = load_summary(tmp_path, DATE)["symbols"]["AAPL"]
+    assert entry["stages"] == {"analysis": "2025-08-15T10:00:00", "pdf_chinese": "2025-08-15T11:00:00"}
+    assert entry["bias"] == "bullish"
+
+    forget_stages(tmp_path, "AAPL", DATE, ["pdf_chinese"])
+    entry = load_summary(tmp_path, DATE)["symbols"]["AAPL"]
+    assert list(entry["stages"]) == ["analysis"]
+    assert entry["bias"] == "bullish"
+
+
+def test_load_summary_tolerates_missing_or_corrupt_index(tmp_path):
+    """索引不存在或損壞時返回空索引"""
+    assert load_summary(tmp_path, DATE)["symbols"] == {}
+    summary_path(tmp_path, DATE).parent.mkdir(parents=True)
+    summary_path(tmp_path, DATE).write_text("{broken", encoding="utf-8")
+    assert load_summary(tmp_path, DATE)["symbols"] == {}
+
+
+def test_rebuild_summary_from_files(tmp_path):
+    """從數據文件和報告文件重建索引"""
+    symbol_dir = tmp_path / DATE / "TSLA"
+    symbol_dir.mkdir(parents=True)
+    (symbol_dir / f"news_{DATE}.json").write_text("{}", encoding="utf-8")
+    (symbol_dir / f"analysis_{DATE}.json").write_text(
+        '{"data": {"company": "Tesla", "trading_recommendation": {"bias": "bearish"}}}', encoding="utf-8")
+    (symbol_dir / f"TSLA_report_{DATE}.md").write_text("# report", encoding="utf-8")
+
+    rebuild_summary(tmp_path, DATE)
+    entry = load_summary(tmp_path, DATE)["symbols"]["TSLA"]
+    assert set(entry["stages"]) == {"news", "analysis", "report"}
+    assert entry["company"] == "Tesla"
+    assert entry["bias"] == "bearish"
+
+
+@pytest.mark.skipif(summary_index.fcntl is None, reason="需要fcntl")
+def test_concurrent_processes_do_not_lose_updates(tmp_path):
+    """多個進程同時更新同一天的索引時不丟失更新"""
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_record_many, args=(tmp_path, symbol, 25))
+                 for symbol in ("AAPL", "TSLA", "NVDA", "MSFT")]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    symbols = load_summary(tmp_path, DATE)["symbols"]
+    assert sorted(symbols) == ["AAPL", "MSFT", "NVDA", "TSLA"]
+    assert all(len(entry["stages"]) == 25 for entry in symbols.values())
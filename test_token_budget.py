@@ -0,0 +1,99 @@
+"""
+Token預算規劃器測試
+運行: python -m pytest test_token_budget.py
+"""
+import logging
+
+import pytest
+
+import token_budget
+from token_budget import TokenBudgetPlanner, escalate_budget
+
+
+def _planner(monkeypatch) -> TokenBudgetPlanner:
+    """不依賴tiktoken的規劃器（使用字符數估算）"""
+    monkeypatch.setattr(token_budget, "tiktoken", None)
+    return TokenBudgetPlanner("gpt-4o")
+
+
+def test_count_tokens_estimates_cjk_per_character(monkeypatch):
+    """沒有tokenizer時CJK每字算1個token"""
+    planner = _planner(monkeypatch)
+    assert planner.count_tokens("") == 0
+    assert planner.count_tokens("你好世界") >= 4
+
+
+def test_plan_respects_context_window(monkeypatch):
+    """輸入+輸出不超出上下文"""
+    planner = _planner(monkeypatch)
+    plan = planner.plan("news_cn", "system", "新聞" * 2000)
+    assert plan["max_tokens"] >= 1
+    assert plan["input_tokens"] + plan["max_tokens"] <= plan["context_window"]
+    assert plan["max_tokens"] <= plan["output_cap"]
+
+
+def test_plan_rejects_input_that_leaves_no_output_room(monkeypatch):
+    """輸入超出上下文時拋出異常，不以極小的輸出預算發送；fit_text 截短後可以規劃"""
+    planner = _planner(monkeypatch)
+    text = "描述" * planner.context_window
+    with pytest.raises(ValueError):
+        planner.plan("desc_cn", "system", text)
+
+    trimmed = planner.fit_text(text, "desc_cn", "system")
+    assert text.startswith(trimmed)
+    plan = planner.plan("desc_cn", "system", trimmed)
+    assert plan["max_tokens"] >= token_budget.LLM_STAGE_OUTPUT_BUDGETS["desc_cn"]["min"]
+    assert planner.fit_text("short", "desc_cn", "system") == "short"
+
+
+def test_escalate_budget_doubles_until_cap(monkeypatch):
+    """截斷重試時輸出預算翻倍，達到上限後不再提高"""
+    planner = _planner(monkeypatch)
+    plan = planner.plan("analysis", "system", "short input")
+    before = plan["max_tokens"]
+    while escalate_budget(plan):
+        assert plan["max_tokens"] > before
+        before = plan["max_tokens"]
+    assert plan["max_tokens"] <= plan["output_cap"]
+
+
+def test_fit_news_trims_without_modifying_input(monkeypatch):
+    """超出預算時裁剪文章，原數據不變"""
+    planner = _planner(monkeypatch)
+    articles = [{"title": f"t{i}", "html_content": "內容" * 20000} for i in range(20)]
+    news = {"articles": articles}
+    trimmed = planner.fit_news(news, "news_cn", "system")
+    budget = planner.input_budget("news_cn", "system")
+    assert planner.count_tokens(token_budget._dumps(trimmed)) <= budget
+    assert len(news["articles"]) == 20
+    assert news["articles"][0]["html_content"] == "內容" * 20000
+
+
+def test_record_usage_logs_instead_of_printing(monkeypatch, caplog, capsys):
+    """用量通過logging輸出，截斷時記錄警告"""
+    planner = _planner(monkeypatch)
+    plan = planner.plan("analysis", "system", "input")
+    with caplog.at_level(logging.INFO, logger="TokenBudget"):
+        planner.record_usage(plan, {"prompt_tokens": 10, "completion_tokens": 20, "finish_reason": "length"})
+    assert planner.usage_log[-1]["completion_tokens"] == 20
+    assert any(record.levelno == logging.WARNING for record in caplog.records)
+    assert "📏" not in capsys.readouterr().out
+
+
+def test_tokenizer_load_failure_falls_back_to_estimate(monkeypatch):
+    """離線時tiktoken無法下載編碼表，改用字符數估算而不是拋出異常"""
+    class OfflineTiktoken:
+        calls = 0
+
+        @classmethod
+        def encoding_for_model(cls, model):
+            cls.calls += 1
+            raise OSError("network unreachable")
+
+    monkeypatch.setattr(token_budget, "tiktoken", OfflineTiktoken)
+    monkeypatch.setattr(token_budget, "_ENCODERS", {})
+    planner = TokenBudgetPlanner("gpt-4o")
+    assert planner.count_tokens("你好世界") >= 4
+    assert planner.count_tokens("hello") > 0
+    # 失敗結果被緩存，不會每次都重試下載
+    assert OfflineTiktoken.calls == 1
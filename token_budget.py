@@ -0,0 +1,284 @@
+"""
+Token預算規劃器：估算LLM輸入大小，為每個階段選擇輸出預算，並在超出模型上下文時裁剪輸入
+"""
+import json
+import logging
+import re
+from typing import Dict, Any, Optional, List
+
+from config import (
+    LLM_CONTEXT_WINDOWS,
+    LLM_MAX_OUTPUT_TOKENS,
+    LLM_STAGE_OUTPUT_BUDGETS,
+    LLM_CONTEXT_SAFETY_MARGIN
+)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+# 中日韓字符（包括全形標點），每個字符大約佔用一個token
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+
+logger = logging.getLogger("TokenBudget")
+
+# tokenizer緩存，避免重複加載編碼表
+_ENCODERS: Dict[str, Any] = {}
+
+
+def _get_encoder(model: str):
+    """獲取模型對應的tokenizer，不可用時返回None"""
+    if tiktoken is None:
+        return None
+    if model not in _ENCODERS:
+        try:
+            try:
+                _ENCODERS[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                # DeepSeek等非OpenAI模型使用cl100k_base作為近似
+                _ENCODERS[model] = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # 首次使用時tiktoken需要下載編碼表，離線或有防火牆的容器中會失敗；改用字符數估算
+            logger.warning(f"⚠️ 無法加載 {model} 的tokenizer，改用字符數估算: {e}")
+            _ENCODERS[model] = None
+    return _ENCODERS[model]
+
+
+def escalate_budget(plan: Dict[str, Any]) -> bool:
+    """
+    提高輸出預算（用於輸出被截斷後的重試）
+
+    Args:
+        plan: plan() 返回的預算計劃，會被原地修改
+
+    Returns:
+        bool: 預算是否有所提高
+    """
+    available = plan["context_window"] - plan["input_tokens"] - LLM_CONTEXT_SAFETY_MARGIN
+    new_max = min(plan["max_tokens"] * 2, plan["output_cap"], available)
+    if new_max <= plan["max_tokens"]:
+        return False
+    logger.info(f"📈 [{plan['stage']}] 輸出預算提高: {plan['max_tokens']} → {new_max} tokens")
+    plan["max_tokens"] = new_max
+    return True
+
+
+class TokenBudgetPlanner:
+    """
+    為每個LLM階段規劃token預算
+
+    - 估算輸入tokens（有tiktoken時使用tokenizer，否則使用字符數估算）
+    - 根據輸入大小選擇輸出max_tokens
+    - 輸入超出上下文時裁剪新聞內容
+    - 記錄每個階段的預估與實際用量
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.context_window = LLM_CONTEXT_WINDOWS.get(model, LLM_CONTEXT_WINDOWS["default"])
+        self.max_output_tokens = LLM_MAX_OUTPUT_TOKENS.get(model, LLM_MAX_OUTPUT_TOKENS["default"])
+        self.usage_log: List[Dict[str, Any]] = []
+
+    def count_tokens(self, text: Optional[str]) -> int:
+        """
+        估算文本的token數量
+
+        Args:
+            text: 要估算的文本
+
+        Returns:
+            int: token數量
+        """
+        if not text:
+            return 0
+
+        encoder = _get_encoder(self.model)
+        if encoder is not None:
+            return len(encoder.encode(text, disallowed_special=()))
+
+        # 沒有tokenizer時的保守估算：CJK每字1個token，其他約3.5字符1個token
+        cjk_count = len(_CJK_PATTERN.findall(text))
+        other_count = len(text) - cjk_count
+        return cjk_count + int(other_count / 3.5) + 1
+
+    def _stage_config(self, stage: str) -> Dict[str, Any]:
+        """獲取階段的輸出預算配置"""
+        return LLM_STAGE_OUTPUT_BUDGETS.get(stage, LLM_STAGE_OUTPUT_BUDGETS["default"])
+
+    def _output_cap(self, stage: str) -> int:
+        """階段允許的最大輸出tokens（受模型上限限制）"""
+        return min(self._stage_config(stage)["max"], self.max_output_tokens)
+
+    def input_budget(self, stage: str, system_prompt: str = None) -> int:
+        """
+        計算用戶輸入可使用的最大tokens
+
+        Args:
+            stage: 階段名稱 (news_cn, analysis, ...)
+            system_prompt: 系統提示詞
+
+        Returns:
+            int: 用戶輸入的token預算
+        """
+        return (self.context_window
+                - self._output_cap(stage)
+                - self.count_tokens(system_prompt)
+                - LLM_CONTEXT_SAFETY_MARGIN)
+
+    def plan(self, stage: str, system_prompt: str, user_message: str) -> Dict[str, Any]:
+        """
+        為一次LLM調用規劃輸出預算
+
+        Args:
+            stage: 階段名稱
+            system_prompt: 系統提示詞
+            user_message: 用戶輸入
+
+        Returns:
+            Dict: 預算計劃，max_tokens 用於API調用
+
+        Raises:
+            ValueError: 輸入過大，剩餘的輸出空間不足階段的最小輸出預算（應先用 fit_news / fit_text 裁剪輸入）
+        """
+        stage_config = self._stage_config(stage)
+        output_cap = self._output_cap(stage)
+
+        user_tokens = self.count_tokens(user_message)
+        input_tokens = user_tokens + self.count_tokens(system_prompt)
+
+        # 輸出大小與輸入大小成比例（翻譯類階段接近1:1）
+        wanted = int(user_tokens * stage_config["ratio"])
+        max_tokens = max(stage_config["min"], min(wanted, output_cap))
+
+        # 確保輸入+輸出不超出上下文
+        available = self.context_window - input_tokens - LLM_CONTEXT_SAFETY_MARGIN
+        if available < stage_config["min"]:
+            # 以極小的輸出預算發送只會得到被截斷的輸出並觸發重試
+            raise ValueError(f"[{stage}] 輸入過大 ({input_tokens} tokens)，可用輸出空間僅 {available} tokens，"
+                             f"低於最小輸出預算 {stage_config['min']}，請先裁剪輸入")
+        max_tokens = min(max_tokens, available)
+
+        plan = {
+            "stage": stage,
+            "model": self.model,
+            "input_tokens": input_tokens,
+            "max_tokens": max_tokens,
+            "projected_max_tokens": max_tokens,
+            "output_cap": output_cap,
+            "context_window": self.context_window
+        }
+
+        logger.info(f"🧮 [{stage}] 預估輸入 {input_tokens} tokens，輸出預算 {max_tokens} tokens "
+              f"(模型 {self.model}，上下文 {self.context_window})")
+        return plan
+
+    def fit_text(self, text: str, stage: str, system_prompt: str) -> str:
+        """
+        截短純文本輸入使其符合階段的輸入預算
+
+        Args:
+            text: 用戶輸入（如公司描述）
+            stage: 階段名稱
+            system_prompt: 系統提示詞
+
+        Returns:
+            str: 符合預算的文本
+        """
+        budget = self.input_budget(stage, system_prompt)
+        before = self.count_tokens(text)
+        if before <= budget:
+            return text
+
+        trimmed = text
+        current = before
+        while trimmed and current > budget:
+            trimmed = trimmed[:min(len(trimmed) - 1, int(len(trimmed) * budget / current * 0.95))]
+            current = self.count_tokens(trimmed)
+
+        logger.info(f"✂️ [{stage}] 輸入已截短: {before} → {current} tokens (預算 {budget})")
+        return trimmed
+
+    def fit_news(self, news: Any, stage: str, system_prompt: str, reserved_tokens: int = 0) -> Any:
+        """
+        裁剪新聞數據使其符合階段的輸入預算
+
+        先逐步截短每篇文章的正文，仍超出時從尾部丟棄文章。原數據不會被修改。
+
+        Args:
+            news: 新聞數據 ({"articles": [...]})
+            stage: 階段名稱
+            system_prompt: 系統提示詞
+            reserved_tokens: 同一次調用中其他輸入（如基本面數據）佔用的tokens
+
+        Returns:
+            Any: 符合預算的新聞數據
+        """
+        if not isinstance(news, dict) or not isinstance(news.get("articles"), list) or not news["articles"]:
+            return news
+
+        budget = self.input_budget(stage, system_prompt) - reserved_tokens
+        before = self.count_tokens(_dumps(news))
+        if before <= budget:
+            return news
+
+        trimmed = dict(news)
+        articles = [dict(article) if isinstance(article, dict) else article for article in news["articles"]]
+        trimmed["articles"] = articles
+
+        def total_tokens():
+            return self.count_tokens(_dumps(trimmed))
+
+        # 逐步截短文章正文
+        limit = max((len(article.get("html_content") or "") for article in articles if isinstance(article, dict)), default=0)
+        while limit > 500:
+            current = total_tokens()
+            if current <= budget:
+                break
+            limit = min(limit - 1, int(limit * budget / current * 0.95))
+            for article in articles:
+                if isinstance(article, dict):
+                    content = article.get("html_content") or ""
+                    if len(content) > limit:
+                        article["html_content"] = content[:limit] + "..."
+
+        # 仍超出則丟棄最後的文章
+        while len(articles) > 1 and total_tokens() > budget:
+            articles.pop()
+
+        after = total_tokens()
+        logger.info(f"✂️ [{stage}] 新聞輸入已裁剪: {before} → {after} tokens "
+              f"(預算 {budget}，保留 {len(articles)}/{len(news['articles'])} 篇)")
+        return trimmed
+
+    def record_usage(self, plan: Dict[str, Any], usage: Optional[Dict[str, Any]]) -> None:
+        """
+        記錄並輸出預估與實際用量
+
+        Args:
+            plan: plan() 返回的預算計劃
+            usage: LLM客戶端的 last_usage
+        """
+        usage = usage or {}
+        entry = {
+            "stage": plan["stage"],
+            "model": plan["model"],
+            "projected_input_tokens": plan["input_tokens"],
+            "projected_max_tokens": plan["projected_max_tokens"],
+            "final_max_tokens": plan["max_tokens"],
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "finish_reason": usage.get("finish_reason")
+        }
+        self.usage_log.append(entry)
+
+        logger.info(f"📏 [{plan['stage']}] 預估輸入 {entry['projected_input_tokens']} / 實際 {entry['prompt_tokens']} tokens，"
+              f"輸出預算 {entry['final_max_tokens']} / 實際 {entry['completion_tokens']} tokens")
+        if entry["finish_reason"] == "length":
+            logger.warning(f"⚠️ [{plan['stage']}] 輸出達到預算上限被截斷")
+
+
+def _dumps(obj: Any) -> str:
+    """與調用LLM時一致的序列化方式，用於估算tokens"""
+    return json.dumps(obj, ensure_ascii=False, indent=2, default=str)